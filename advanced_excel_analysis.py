@@ -1,5 +1,7 @@
 import pandas as pd
 import sys
+from workbook_loader import load_sheet
+from date_columns import get_calendar_index
 
 # 指定Excel文件路径
 file_path = '/Users/luanxiaowei/Documents/项目开发/智能排班表2/排班表新3.xlsx'
@@ -7,7 +9,7 @@ file_path = '/Users/luanxiaowei/Documents/项目开发/智能排班表2/排班
 try:
     print("===== 深入分析 '规则' 工作表 =====")
     # 读取规则工作表，不设置表头，以便查看原始结构
-    rule_df = pd.read_excel(file_path, sheet_name='规则', header=None)
+    rule_df = load_sheet(file_path, '规则', header=None)
     
     print(f"规则表行数: {len(rule_df)}, 列数: {len(rule_df.columns)}")
     print("\n规则表前15行原始数据:")
@@ -43,7 +45,7 @@ try:
     # 分析排班表
     print("\n===== 深入分析 '排班表' 工作表 =====")
     # 读取排班表，先查看原始结构
-    schedule_df = pd.read_excel(file_path, sheet_name='排班表', header=None)
+    schedule_df = load_sheet(file_path, '排班表', header=None)
     
     print(f"排班表行数: {len(schedule_df)}, 列数: {len(schedule_df.columns)}")
     
@@ -66,21 +68,23 @@ try:
     
     # 重新读取排班表，将第3行作为表头
     if len(schedule_df) > 2:
-        schedule_df_with_header = pd.read_excel(file_path, sheet_name='排班表', header=2)
+        schedule_df_with_header = load_sheet(file_path, '排班表', header=2)
         
         print("\n排班表字段信息（使用第3行作为表头）:")
         print(f"字段列表: {list(schedule_df_with_header.columns)}")
         
         # 识别员工信息字段
         emp_info_fields = []
-        date_fields = []
         
         for col in schedule_df_with_header.columns:
             if isinstance(col, str):
                 if '部门' in col or '用户ID' in col or '工号' in col or '姓名' in col:
                     emp_info_fields.append(col)
-                elif ('/' in col and len(col) > 5) or ('日' in col and len(col) > 2):
-                    date_fields.append(col)
+        
+        # 识别日期字段（日期可能在列名中，也可能在表头之后的某一行）
+        calendar = get_calendar_index(schedule_df_with_header)
+        date_fields = calendar.date_cols
+        schedule_rows = calendar.data_rows(schedule_df_with_header)
         
         print(f"识别到的员工信息字段: {emp_info_fields}")
         print(f"识别到的日期字段数量: {len(date_fields)}")
@@ -96,7 +100,7 @@ try:
         if len(schedule_df_with_header) > 0:
             # 选择员工信息字段和前5个日期字段
             display_cols = emp_info_fields + date_fields[:5]
-            print(schedule_df_with_header[display_cols].head())
+            print(schedule_rows[display_cols].head())
         
         # 统计班次代码分布
         print("\n班次代码分布统计:")
@@ -106,7 +110,7 @@ try:
         for col in date_fields:
             if col in schedule_df_with_header.columns:
                 # 获取该字段中的所有非空值
-                shifts = schedule_df_with_header[col].dropna()
+                shifts = schedule_rows[col].dropna()
                 # 统计每个班次代码的出现次数
                 for shift in shifts:
                     if isinstance(shift, str):
@@ -1,13 +1,13 @@
-import pandas as pd
 import sys
+from workbook_loader import get_sheet_names, load_sheet
+from date_columns import get_calendar_index
 
 # 指定Excel文件路径
 file_path = '/Users/luanxiaowei/Documents/项目开发/智能排班表2/排班表新3.xlsx'
 
 try:
     # 获取Excel文件中的所有工作表名称
-    excel_file = pd.ExcelFile(file_path)
-    sheet_names = excel_file.sheet_names
+    sheet_names = get_sheet_names(file_path)
     
     print(f"Excel文件包含的工作表: {sheet_names}")
     
@@ -16,7 +16,7 @@ try:
         print(f"\n===== 分析工作表 '{sheet_name}' =====")
         
         # 读取工作表数据
-        df = pd.read_excel(file_path, sheet_name=sheet_name)
+        df = load_sheet(file_path, sheet_name)
         
         # 打印工作表的基本信息
         print(f"行数: {len(df)}, 列数: {len(df.columns)}")
@@ -34,10 +34,7 @@ try:
                 print("\n这似乎是一个排班表，包含员工信息和排班数据")
                 
                 # 找出可能的日期列
-                date_columns = []
-                for col in df.columns:
-                    if isinstance(col, str) and ('日' in col or '号' in col or '/' in col):
-                        date_columns.append(col)
+                date_columns = get_calendar_index(df).date_cols
                 
                 if date_columns:
                     print(f"识别到的日期列: {date_columns[:5]}...")
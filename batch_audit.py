@@ -0,0 +1,198 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from validation_results import (ValidationReport, export_reports, KIND_CONSECUTIVE_WORK,
+                                KIND_WEEKLY_WORK_RATIO, KIND_WEEKLY_WORK_DAYS, KIND_Y16_POST_REST,
+                                KIND_Y16_PRE_REST, KIND_STAFFING_COVERAGE, KIND_CROSS_MONTH_WORK)
+
+# 批量审核月度排班表：
+# 接受目录、通配符或文件路径，使用进程池并行对每个工作簿运行
+# ScheduleRuleValidator.run_full_analysis 和 RuleDetailAnalyzer.run_complete_analysis，
+# 以静默模式收集结构化结果（而非打印文本）并汇总为一份报告；
+# --chain 时再按排班表的月份顺序逐月接续验证跨月的连续上班和G值周末班
+
+
+def collect_workbooks(patterns):
+    """把目录、通配符和文件路径展开为去重排序后的 .xlsx 文件列表（跳过 Excel 临时文件）"""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = glob.glob(os.path.join(pattern, '**', '*.xlsx'), recursive=True)
+        else:
+            candidates = glob.glob(pattern, recursive=True) or [pattern]
+        for path in candidates:
+            if os.path.basename(path).startswith('~$') or not path.lower().endswith('.xlsx'):
+                continue
+            files.append(os.path.abspath(path))
+    return sorted(set(files))
+
+
+def audit_workbook(file_path):
+    """在子进程中以静默模式审核单个工作簿，返回包含 ValidationReport 的结果字典"""
+    # 延迟导入：主进程只负责调度，不需要加载 pandas
+    from schedule_rule_validation import ScheduleRuleValidator
+    from rule_detail_analysis import RuleDetailAnalyzer
+
+    result = {'file': file_path, 'status': 'ok', 'errors': []}
+    start = time.perf_counter()
+    try:
+        validator = ScheduleRuleValidator(file_path, quiet=True)
+        if validator.schedule_df is None:
+            result['errors'].append('排班表数据未加载')
+        else:
+            result['validation'] = validator.run_full_analysis()
+    except Exception as e:
+        result['errors'].append(f'排班规则验证出错: {e}')
+
+    try:
+        analyzer = RuleDetailAnalyzer(file_path, quiet=True)
+        if analyzer.run_complete_analysis():
+            result['rule_detail'] = analyzer.get_report()
+        else:
+            result['errors'].append('规则页签分析未完成')
+    except Exception as e:
+        result['errors'].append(f'规则页签分析出错: {e}')
+
+    if result['errors']:
+        result['status'] = 'error' if 'validation' not in result and 'rule_detail' not in result else 'partial'
+    result['elapsed'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def summarize(result):
+    """单个工作簿的汇总指标"""
+    # 没有问题的报告长度为 0，不能用 or 判断
+    validation = result.get('validation', ValidationReport())
+    rule_detail = result.get('rule_detail', ValidationReport())
+    chain = result.get('chain', ValidationReport())
+    work_day_issues = [v for v in validation
+                       if v.kind in (KIND_CONSECUTIVE_WORK, KIND_WEEKLY_WORK_RATIO, KIND_WEEKLY_WORK_DAYS,
+                                     KIND_Y16_POST_REST, KIND_Y16_PRE_REST)]
+    return {
+        'file': os.path.basename(result['file']),
+        'status': result['status'],
+        'employees_with_issues': len({v.employee for v in work_day_issues}),
+        'issue_count': len(work_day_issues),
+        'abnormal_y16_days': len({v.start_pos for v in validation.by_kind(KIND_STAFFING_COVERAGE)
+                                  if '夜班' in (v.dept or '')}),
+        'severity_counts': validation.count_by_severity(),
+        'shift_counts': validation.metrics.get('shift_counts') or {},
+        'business_lines': len(rule_detail.metrics.get('business_line_shifts') or {}),
+        'cross_month_issues': len(chain.by_kind(KIND_CROSS_MONTH_WORK)),
+        'elapsed': result['elapsed'],
+    }
+
+
+def run_batch(files, workers=None):
+    """用进程池并行审核所有工作簿，结果按文件名排序返回"""
+    results = []
+    if workers == 1:
+        for file_path in files:
+            results.append(audit_workbook(file_path))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(audit_workbook, file_path): file_path for file_path in files}
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append({'file': futures[future], 'status': 'error',
+                                    'errors': [f'子进程异常: {e}'], 'elapsed': 0.0})
+    results.sort(key=lambda r: r['file'])
+    return results
+
+
+def run_chain(results):
+    """按排班表日期顺序逐月接续验证（每次只读入一个月），结果放入各工作簿的 'chain' 中"""
+    from month_chain import MonthChainValidator
+
+    validator = MonthChainValidator()
+    by_file = {result['file']: result for result in results}
+    try:
+        files = validator.order_workbooks(list(by_file))
+    except Exception:
+        files = list(by_file)
+    for file_path in files:
+        result = by_file[file_path]
+        try:
+            result['chain'] = validator.validate_workbook(file_path)
+        except Exception as e:
+            result['errors'].append(f'跨月验证出错: {e}')
+            if result['status'] == 'ok':
+                result['status'] = 'partial'
+    return validator
+
+
+def build_report(results, elapsed):
+    """合并所有工作簿的结果为一份报告"""
+    summaries = [summarize(r) for r in results]
+    total_shifts = {}
+    for summary in summaries:
+        for shift_type, count in summary['shift_counts'].items():
+            total_shifts[shift_type] = total_shifts.get(shift_type, 0) + count
+    return {
+        'workbook_count': len(results),
+        'failed': [r['file'] for r in results if r['status'] == 'error'],
+        'total_issue_count': sum(s['issue_count'] for s in summaries),
+        'total_shift_counts': total_shifts,
+        'elapsed': round(elapsed, 3),
+        'summaries': summaries,
+        'results': [{key: value.to_dict() if isinstance(value, ValidationReport) else value
+                     for key, value in r.items()} for r in results],
+    }
+
+
+def print_report(report):
+    print(f"\n===== 批量排班审核报告（共{report['workbook_count']}个工作簿，用时{report['elapsed']}秒） =====")
+    for s in report['summaries']:
+        print(f"- {s['file']} [{s['status']}]: 问题员工{s['employees_with_issues']}人, 问题{s['issue_count']}条, "
+              f"夜班异常{s['abnormal_y16_days']}天, 跨月连续上班{s['cross_month_issues']}条, "
+              f"业务线{s['business_lines']}个, 用时{s['elapsed']}秒")
+    for r in report['results']:
+        for error in r['errors']:
+            print(f"  ! {os.path.basename(r['file'])}: {error}")
+    print("\n班次分布合计：")
+    for shift_type, count in sorted(report['total_shift_counts'].items()):
+        print(f"{shift_type}: {count}次")
+    print(f"\n问题总数: {report['total_issue_count']}, 失败工作簿: {len(report['failed'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='批量审核月度排班表')
+    parser.add_argument('paths', nargs='+', help='工作簿文件、目录或通配符（如 "排班/2025-*.xlsx"）')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='并行进程数（默认为CPU核数）')
+    parser.add_argument('-o', '--output', help='将汇总报告写入JSON文件')
+    parser.add_argument('--violations', help='将所有问题导出为 JSON Lines（.jsonl）或 Parquet（.parquet）文件')
+    parser.add_argument('--chain', action='store_true', help='按月份顺序接续验证跨月规则')
+    args = parser.parse_args(argv)
+
+    files = collect_workbooks(args.paths)
+    if not files:
+        print("未找到需要审核的工作簿")
+        return 1
+
+    start = time.perf_counter()
+    results = run_batch(files, args.workers)
+    if args.chain:
+        run_chain(results)
+    report = build_report(results, time.perf_counter() - start)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        print(f"报告已写入: {args.output}")
+    if args.violations:
+        reports = [r[key] for r in results for key in ('validation', 'rule_detail', 'chain') if key in r]
+        export_reports(reports, args.violations)
+        print(f"问题明细已写入: {args.violations}")
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
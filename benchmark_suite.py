@@ -0,0 +1,430 @@
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from date_columns import WEEKDAY_NAMES
+
+# 性能基准：
+# 按真实排班表的布局生成任意规模（员工 × 天数 × 部门）的合成工作簿——
+# '排班表'页签：标题行、说明行、'排班信息：班次X: hh:mm-hh:mm; ...' 信息行、部门/用户ID/工号/姓名表头行、
+# 'YYYY/M/D\n周X' 日期列；'规则'页签：第一行业务线、第二行班次说明、之后每列为分配人员；
+# 然后逐步计时 read_excel 的分析、ScheduleRuleValidator 的各个方法和 RuleDetailAnalyzer 的各个步骤，
+# 记录耗时（多次取最小值）、CPU 时间和 tracemalloc 峰值内存，结果输出为 JSON，
+# 用 --compare 与之前保存的结果对比，发现性能回退或确认优化效果。
+# 示例：python benchmark_suite.py --size 60x31x4 --size 2000x62x12 --repeat 3 -o bench.json
+
+DEPARTMENTS = ('风险-对公反诈', '风险室-个人反诈', '风险室-风险核查', '风险室-远程质检')
+BUSINESS_LINES = ('对公', '个人', '风险', '质检')
+# 与真实排班表信息行相同的班次时间
+SHIFT_WINDOWS = (('G', '08:50', '18:00'), ('Y1030普', '10:20', '19:30'), ('Y16综', '15:50', '次日00:00'),
+                 ('G值', '08:50', '18:00'), ('G值-A', '08:50', '18:00'), ('G值-B', '08:50', '18:00'),
+                 ('G值-C', '08:50', '18:00'))
+# 规则页签每个业务线的班次说明列
+RULE_LABELS = ('正常班', '夜班', '白班-周末A岗G班')
+DEFAULT_SIZE = (60, 31, 4)
+DEFAULT_START = date(2025, 8, 1)
+# 与基准结果对比时，耗时超过基准的倍数即视为回退
+REGRESSION_RATIO = 1.2
+# 耗时低于该值的步骤不参与回退判断（计时噪声大于步骤本身）
+MIN_COMPARE_SECONDS = 0.005
+
+CASES = ('read_excel', 'validator', 'validator_full', 'rule_detail', 'rule_detail_full')
+
+
+def parse_size(text):
+    """'员工数x天数x部门数'（如 2000x62x12）-> (员工数, 天数, 部门数)"""
+    parts = text.lower().replace('×', 'x').split('x')
+    if len(parts) != 3 or not all(part.strip().isdigit() for part in parts):
+        raise argparse.ArgumentTypeError(f"规模格式应为 员工数x天数x部门数: {text}")
+    employees, days, departments = (int(part) for part in parts)
+    if employees < 1 or days < 1 or departments < 1 or departments > employees:
+        raise argparse.ArgumentTypeError(f"规模无效（部门数不能超过员工数）: {text}")
+    return employees, days, departments
+
+
+def department_names(count):
+    return [DEPARTMENTS[i] if i < len(DEPARTMENTS) else f'风险室-业务{i + 1}' for i in range(count)]
+
+
+def business_line_names(count):
+    return [BUSINESS_LINES[i] if i < len(BUSINESS_LINES) else f'业务线{i + 1}' for i in range(count)]
+
+
+def synthetic_roster(employees, days, departments, start=DEFAULT_START, seed=0):
+    """生成合成排班：(员工信息 DataFrame, 日期列表, 班次字符串矩阵)
+
+    工作日G班、周末休息；每个部门每周轮流一人值Y16综（整周），值完后休息两天；
+    每个周末另一人值G值/G值-A；另有约10%的工作日为Y1030普、约2%的排班为请假（C）。
+    """
+    rng = np.random.default_rng(seed)
+    dates = [start + timedelta(days=i) for i in range(days)]
+    weekdays = np.array([d.weekday() for d in dates])
+    # 以起始日所在周的周一为第0周
+    weeks = (np.arange(days) + weekdays[0]) // 7
+    shifts = np.where(weekdays < 5, 'G', '休').astype(object)
+    shifts = np.tile(shifts, (employees, 1))
+
+    depts = department_names(departments)
+    members = np.array_split(np.arange(employees), departments)
+    for rows in members:
+        size = len(rows)
+        for week in np.unique(weeks):
+            in_week = np.flatnonzero(weeks == week)
+            night = rows[week % size]
+            shifts[night, in_week] = 'Y16综'
+            after = in_week[-1] + 1 + np.arange(2)
+            after = after[after < days]
+            shifts[night, after] = '休'
+            if size < 3:
+                continue
+            duty = rows[(week + 2) % size]
+            weekend = in_week[weekdays[in_week] >= 5]
+            shifts[duty, weekend] = np.where(weekdays[weekend] == 5, 'G值-A', 'G值')
+    normal = shifts == 'G'
+    shifts[normal & (rng.random(shifts.shape) < 0.1)] = 'Y1030普'
+    leave = (shifts != 'Y16综') & (rng.random(shifts.shape) < 0.02)
+    shifts[leave] = 'C'
+
+    numbers = [str(9100000000 + i) for i in range(employees)]
+    info = pd.DataFrame({
+        '部门': np.repeat(depts, [len(rows) for rows in members]),
+        '用户ID': numbers,
+        '工号': numbers,
+        '姓名': [f'员工{i + 1:05d}' for i in range(employees)],
+    })
+    return info, dates, shifts
+
+
+def rule_sheet_rows(info, departments):
+    """'规则'页签的行：业务线行、班次说明行，之后每行为各列的分配人员（业务线之间空一列）"""
+    lines = business_line_names(departments)
+    columns = []
+    for line, (_, group) in zip(lines, info.groupby('部门', sort=False)):
+        names = group['姓名'].tolist()
+        for i, label in enumerate(RULE_LABELS):
+            columns.append((line if i == 0 else None, label, names))
+        columns.append((None, None, []))
+    height = max(len(names) for _, _, names in columns)
+    rows = [[line for line, _, _ in columns], [label for _, label, _ in columns]]
+    for i in range(height):
+        rows.append([names[i] if i < len(names) else None for _, _, names in columns])
+    return rows
+
+
+def write_workbook(path, employees, days, departments, start=DEFAULT_START, seed=0):
+    """按真实布局写出合成工作簿（'排班表'和'规则'两个页签），返回生成规模信息"""
+    info, dates, shifts = synthetic_roster(employees, days, departments, start, seed)
+    workbook = Workbook(write_only=True)
+
+    sheet = workbook.create_sheet('排班表')
+    windows = '; '.join(f'班次{code}: {begin}-{end}' for code, begin, end in SHIFT_WINDOWS)
+    sheet.append([f'{dates[0].year}年{dates[0].month}月合成排班表'])
+    sheet.append(['注意：时间必须严格按照现有格式，否则无法识别到钉钉考勤后台'])
+    sheet.append([f'排班信息：{windows}; 清空：删除排休或排班; 休: 当天休息 '])
+    sheet.append(list(info.columns) + [f'{d.year}/{d.month}/{d.day}\n周{WEEKDAY_NAMES[d.weekday()]}'
+                                       for d in dates])
+    for person, row in zip(info.itertuples(index=False), shifts.tolist()):
+        sheet.append(list(person) + row)
+
+    sheet = workbook.create_sheet('规则')
+    for row in rule_sheet_rows(info, departments):
+        sheet.append(row)
+    workbook.save(path)
+    return {'employees': employees, 'days': days, 'departments': departments,
+            'start': dates[0].isoformat(), 'end': dates[-1].isoformat(), 'seed': seed,
+            'cells': employees * days, 'file_bytes': os.path.getsize(path)}
+
+
+def clear_caches():
+    """清空进程内和磁盘缓存，使每轮计时都包含 XLSX 解析"""
+    from workbook_loader import clear_memory_cache, set_disk_cache_enabled
+    from rule_sheet_model import clear_model_cache
+
+    clear_memory_cache()
+    clear_model_cache()
+    set_disk_cache_enabled(False)
+
+
+def read_excel_steps(file_path):
+    """read_excel 的读取和分析；main 在 load_sheet 之后执行，页签已在进程缓存中，只计分析和打印"""
+    from workbook_loader import load_sheet
+    from date_columns import get_calendar_index
+    from read_excel import analyze_schedule_data, main as read_main
+
+    state = {}
+    return [
+        ('load_sheet', lambda: state.update(frame=load_sheet(file_path, '排班表', header=None))),
+        ('get_calendar_index', lambda: state.update(calendar=get_calendar_index(state['frame']))),
+        ('analyze_schedule_data', lambda: analyze_schedule_data(state['frame'], state['calendar'])),
+        ('main', lambda: read_main(file_path)),
+    ]
+
+
+def validator_steps(file_path):
+    """ScheduleRuleValidator 的每个方法在同一实例上依次计时（识别结果和编码矩阵在实例内只算一次）"""
+    from schedule_rule_validation import ScheduleRuleValidator
+
+    state = {}
+
+    def method(name):
+        return name, lambda: getattr(state['validator'], name)()
+
+    return [
+        ('__init__', lambda: state.update(validator=ScheduleRuleValidator(file_path, quiet=True))),
+        method('load_data'),
+        method('identify_employees_and_dates'),
+        method('get_shift_matrix'),
+        method('employee_row_mask'),
+        method('validate_work_days_per_week'),
+        method('analyze_shift_priority'),
+        method('validate_special_groups'),
+        method('analyze_shift_sequence'),
+        method('validate_weekend_g_rules'),
+        method('run_full_analysis'),
+    ]
+
+
+def employee_rows_checked(file_path):
+    """ScheduleRuleValidator 实际做个人规则检查的员工行数"""
+    from schedule_rule_validation import ScheduleRuleValidator
+
+    validator = ScheduleRuleValidator(file_path, quiet=True)
+    validator.load_data()
+    return int(validator.employee_row_mask().sum())
+
+
+def validator_full_steps(file_path):
+    from schedule_rule_validation import ScheduleRuleValidator
+
+    state = {}
+    return [
+        ('__init__', lambda: state.update(validator=ScheduleRuleValidator(file_path, quiet=True))),
+        ('run_full_analysis', lambda: state['validator'].run_full_analysis()),
+    ]
+
+
+def rule_detail_steps(file_path):
+    """RuleDetailAnalyzer 按 run_complete_analysis 的顺序逐步计时"""
+    from rule_detail_analysis import RuleDetailAnalyzer
+
+    state = {}
+
+    def step(name):
+        return name, lambda: getattr(state['analyzer'], name)()
+
+    return [
+        ('__init__', lambda: state.update(analyzer=RuleDetailAnalyzer(file_path, quiet=True))),
+        step('load_excel_data'),
+        step('analyze_rule_structure'),
+        step('build_business_line_shift_mapping'),
+        step('analyze_employee_allocation'),
+        step('analyze_cross_business_shift_employees'),
+        step('generate_rule_summary'),
+        step('analyze_employee_work_patterns'),
+        step('analyze_assignment_eligibility'),
+        step('get_report'),
+    ]
+
+
+def rule_detail_full_steps(file_path):
+    from rule_detail_analysis import RuleDetailAnalyzer
+
+    state = {}
+    return [
+        ('__init__', lambda: state.update(analyzer=RuleDetailAnalyzer(file_path, quiet=True))),
+        ('run_complete_analysis', lambda: state['analyzer'].run_complete_analysis()),
+    ]
+
+
+CASE_STEPS = {
+    'read_excel': read_excel_steps,
+    'validator': validator_steps,
+    'validator_full': validator_full_steps,
+    'rule_detail': rule_detail_steps,
+    'rule_detail_full': rule_detail_full_steps,
+}
+
+
+def _run_steps(steps, trace_memory):
+    """依次执行步骤，返回每步的 (耗时, CPU时间, 峰值内存)；步骤的打印输出丢弃"""
+    measured = []
+    sink = io.StringIO()
+    for _, func in steps:
+        if trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        wall, cpu = time.perf_counter(), time.process_time()
+        with redirect_stdout(sink):
+            func()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        peak = tracemalloc.get_traced_memory()[1] - base if trace_memory else None
+        measured.append((wall, cpu, peak))
+        sink.seek(0)
+        sink.truncate()
+    return measured
+
+
+def run_case(case, file_path, repeat=3, memory=True):
+    """计时 repeat 轮（每轮清空缓存、新建实例，取最小耗时），再单独跑一轮 tracemalloc 记录峰值内存
+
+    峰值内存为该步骤执行期间相对步骤开始时新增的最大内存，计时轮不开启 tracemalloc 以免影响耗时；
+    tracemalloc 会使大工作簿的解析慢数倍，memory 为 False 时跳过内存轮，峰值记为 None。
+    """
+    timings = []
+    for _ in range(repeat):
+        clear_caches()
+        timings.append(_run_steps(CASE_STEPS[case](file_path), trace_memory=False))
+    measured = [(None, None, None)] * len(timings[0])
+    if memory:
+        clear_caches()
+        tracemalloc.start()
+        try:
+            measured = _run_steps(CASE_STEPS[case](file_path), trace_memory=True)
+        finally:
+            tracemalloc.stop()
+
+    steps = []
+    for i, (name, _) in enumerate(CASE_STEPS[case](file_path)):
+        walls = [run[i][0] for run in timings]
+        steps.append({
+            'name': name,
+            'wall_seconds': round(min(walls), 6),
+            'wall_mean_seconds': round(sum(walls) / len(walls), 6),
+            'cpu_seconds': round(min(run[i][1] for run in timings), 6),
+            'peak_bytes': measured[i][2],
+        })
+    return {'steps': steps,
+            'total_wall_seconds': round(sum(step['wall_seconds'] for step in steps), 6),
+            'max_peak_bytes': max(step['peak_bytes'] for step in steps) if memory else None}
+
+
+def environment_info():
+    import openpyxl
+
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'numpy': np.__version__, 'pandas': pd.__version__, 'openpyxl': openpyxl.__version__}
+
+
+def run_benchmark(sizes=(DEFAULT_SIZE,), cases=CASES, repeat=3, workbook=None, keep_dir=None, seed=0,
+                  memory=True, log=print):
+    """对每个规模生成合成工作簿（或使用指定的工作簿）并运行各基准用例，返回可直接写出为 JSON 的结果"""
+    results = {'environment': environment_info(), 'repeat': repeat, 'memory': memory, 'runs': []}
+    targets = [(None, workbook)] if workbook else [(size, None) for size in sizes]
+    with tempfile.TemporaryDirectory() as tmp:
+        for size, file_path in targets:
+            run = {}
+            if file_path is None:
+                employees, days, departments = size
+                file_path = os.path.join(keep_dir or tmp, f'synthetic_{employees}x{days}x{departments}.xlsx')
+                started = time.perf_counter()
+                run['workbook'] = write_workbook(file_path, employees, days, departments, seed=seed)
+                run['workbook']['generate_seconds'] = round(time.perf_counter() - started, 6)
+                label = f'{employees}x{days}x{departments}'
+            else:
+                run['workbook'] = {'file': os.path.abspath(file_path), 'file_bytes': os.path.getsize(file_path)}
+                label = os.path.basename(file_path)
+            # 员工行识别有误时各验证步骤实际没有检查任何人，计时结果没有意义
+            expected = size[0] if size else None
+            run['rows_checked'] = employee_rows_checked(file_path)
+            if run['rows_checked'] == 0 or (expected is not None and run['rows_checked'] != expected):
+                raise ValueError(f"[{label}] 验证器检查了{run['rows_checked']}个员工行，"
+                                 f"应为{expected if expected is not None else '至少1'}个")
+            run['label'] = label
+            run['cases'] = {}
+            for case in cases:
+                log(f"[{label}] {case} ...")
+                run['cases'][case] = run_case(case, file_path, repeat, memory)
+                log(f"[{label}] {case}: {run['cases'][case]['total_wall_seconds']:.3f}秒")
+            results['runs'].append(run)
+    return results
+
+
+def compare_results(baseline, current):
+    """按 (规模, 用例, 步骤) 对比两份结果，返回 [(规模, 用例, 步骤, 基准耗时, 当前耗时, 倍数)]，倍数 = 当前/基准"""
+    base_steps = {(run['label'], case, step['name']): step['wall_seconds']
+                  for run in baseline.get('runs', []) for case, result in run['cases'].items()
+                  for step in result['steps']}
+    rows = []
+    for run in current['runs']:
+        for case, result in run['cases'].items():
+            for step in result['steps']:
+                before = base_steps.get((run['label'], case, step['name']))
+                if before is None or max(before, step['wall_seconds']) < MIN_COMPARE_SECONDS:
+                    continue
+                rows.append((run['label'], case, step['name'], before, step['wall_seconds'],
+                             step['wall_seconds'] / before if before > 0 else float('inf')))
+    return rows
+
+
+def print_summary(results):
+    for run in results['runs']:
+        workbook = run['workbook']
+        print(f"\n=== {run['label']}（{workbook['file_bytes'] / 1024:.0f} KB，"
+              f"{run.get('rows_checked', '?')}个员工行）===")
+        for case, result in run['cases'].items():
+            peak = result['max_peak_bytes']
+            print(f"{case}: 共{result['total_wall_seconds']:.3f}秒"
+                  f"{'' if peak is None else f', 峰值内存{peak / 2**20:.1f} MB'}")
+            for step in result['steps']:
+                memory = '' if step['peak_bytes'] is None else f"  {step['peak_bytes'] / 2**20:>8.2f} MB"
+                print(f"  {step['name']:<38}{step['wall_seconds']:>9.4f}秒  CPU {step['cpu_seconds']:>8.4f}秒{memory}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='合成排班工作簿的分析性能基准')
+    parser.add_argument('--size', action='append', type=parse_size, metavar='员工数x天数x部门数',
+                        help=f'合成工作簿规模，可重复（默认 {"x".join(map(str, DEFAULT_SIZE))}）')
+    parser.add_argument('--workbook', help='不生成合成数据，直接对该工作簿计时')
+    parser.add_argument('--case', action='append', choices=CASES, help='只运行这些用例（可重复，默认全部）')
+    parser.add_argument('--repeat', type=int, default=3, help='每个用例的计时轮数，取最小值（默认3）')
+    parser.add_argument('--no-memory', action='store_true', help='不运行 tracemalloc 内存轮（大规模时明显更快）')
+    parser.add_argument('--seed', type=int, default=0, help='合成数据的随机种子')
+    parser.add_argument('--keep', metavar='目录', help='把生成的合成工作簿保存到该目录')
+    parser.add_argument('-o', '--output', help='结果JSON文件（默认打印到标准输出）')
+    parser.add_argument('--compare', metavar='基准JSON', help='与之前保存的结果对比，有回退时返回1')
+    args = parser.parse_args(argv)
+
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+    results = run_benchmark(args.size or [DEFAULT_SIZE], args.case or CASES, max(args.repeat, 1),
+                            args.workbook, args.keep, args.seed, not args.no_memory,
+                            log=lambda message: print(message, file=sys.stderr))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print_summary(results)
+    else:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare_results(baseline, results)
+        regressions = [row for row in rows if row[5] > REGRESSION_RATIO]
+        print(f"\n与基准对比（{args.compare}）：{len(rows)}个步骤，回退{len(regressions)}个", file=sys.stderr)
+        for label, case, step, before, after, ratio in rows:
+            flag = '回退' if ratio > REGRESSION_RATIO else ('加速' if ratio < 1 / REGRESSION_RATIO else '')
+            print(f"  [{label}] {case}.{step}: {before:.4f} -> {after:.4f}秒 ({ratio:.2f}x) {flag}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Exception as e:
+        print(f"运行性能基准时出错: {e}")
+        sys.exit(1)
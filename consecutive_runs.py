@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+from shift_vocabulary import ShiftVocabulary, EMPTY_CODE, REST_CODES, LEAVE_CODES
+
+# 连值（连续相同班次）检测引擎：
+# 将排班表一次性编码为 (员工 × 日期) 的整数矩阵，
+# 用 diff/cumsum 方式对所有员工同时做游程编码，不再逐人逐天循环
+
+# IMPORTANT_SCHEDULING_RULES.md 第4条：Y16综、G班最多连值7天，其他班次最多连值5天
+SHIFT_CONSECUTIVE_LIMITS = {
+    'Y16综': 7,
+    'G': 7,
+}
+DEFAULT_CONSECUTIVE_LIMIT = 5
+
+# 休息、假期不属于值班，不受连值天数限制
+UNCAPPED_CODES = REST_CODES + LEAVE_CODES
+
+# 上五休二：连续上班不得超过7天
+MAX_CONSECUTIVE_WORK_DAYS = 7
+
+
+def encode_shift_matrix(frame, date_cols, vocabulary=None):
+    """将排班数据编码为整数矩阵，返回 (codes, 班次代码列表)，未排班编码为 0"""
+    if vocabulary is None:
+        vocabulary = ShiftVocabulary()
+    matrix = vocabulary.encode_frame(frame, date_cols)
+    return matrix, list(vocabulary.codes)
+
+
+def run_length_encode(codes):
+    """对矩阵每一行做游程编码，返回所有非空游程的 (行号, 起始列, 长度, 编码)"""
+    codes = np.asarray(codes)
+    if codes.size == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, empty.astype(codes.dtype)
+
+    n_rows, n_cols = codes.shape
+    is_start = np.ones(codes.shape, dtype=bool)
+    is_start[:, 1:] = codes[:, 1:] != codes[:, :-1]
+
+    # 每行第一列必然是游程起点，因此游程不会跨行
+    starts = np.flatnonzero(is_start.ravel())
+    lengths = np.diff(np.append(starts, codes.size))
+    run_codes = codes.ravel()[starts]
+
+    keep = run_codes != EMPTY_CODE
+    starts, lengths, run_codes = starts[keep], lengths[keep], run_codes[keep]
+    return starts // n_cols, starts % n_cols, lengths, run_codes
+
+
+class ConsecutiveRunAnalyzer:
+    def __init__(self, codes, vocabulary, limits=None, default_limit=DEFAULT_CONSECUTIVE_LIMIT,
+                 uncapped_codes=UNCAPPED_CODES):
+        self.codes = np.asarray(codes)
+        self.vocabulary = list(vocabulary)
+        self.limits = dict(SHIFT_CONSECUTIVE_LIMITS if limits is None else limits)
+        self.default_limit = default_limit
+        self.uncapped_codes = set(uncapped_codes)
+        self._runs = None
+
+    @classmethod
+    def from_frame(cls, frame, date_cols, vocabulary=None, **kwargs):
+        """从排班DataFrame的日期列构建分析器"""
+        codes, shift_codes = encode_shift_matrix(frame, date_cols, vocabulary)
+        return cls(codes, shift_codes, **kwargs)
+
+    def _limit_table(self):
+        """每个班次编码对应的连值上限，不受限的班次为 0"""
+        table = np.array([self.limits.get(shift, self.default_limit) for shift in self.vocabulary],
+                         dtype=np.int64)
+        for i, shift in enumerate(self.vocabulary):
+            if shift in self.uncapped_codes:
+                table[i] = 0
+        return table
+
+    def runs(self):
+        """所有连续相同班次的游程：row, shift_code, start, end, length"""
+        if self._runs is None:
+            rows, starts, lengths, run_codes = run_length_encode(self.codes)
+            self._runs = pd.DataFrame({
+                'row': rows,
+                'shift_code': run_codes,
+                'start': starts,
+                'end': starts + lengths - 1,
+                'length': lengths,
+            })
+        return self._runs
+
+    def max_run_matrix(self):
+        """每位员工每个班次的最长连值天数矩阵 (员工 × 班次)"""
+        result = np.zeros((self.codes.shape[0], len(self.vocabulary)), dtype=np.int64)
+        runs = self.runs()
+        np.maximum.at(result, (runs['row'].to_numpy(), runs['shift_code'].to_numpy()),
+                      runs['length'].to_numpy())
+        return pd.DataFrame(result, columns=self.vocabulary)
+
+    def longest_runs(self, min_length=2):
+        """每位员工最长的一段连值（长度相同时取最早出现的一段）"""
+        runs = self.runs()
+        runs = runs[runs['length'] >= min_length]
+        if runs.empty:
+            return self._with_shift(runs)
+        order = np.lexsort((runs['start'].to_numpy(), -runs['length'].to_numpy(), runs['row'].to_numpy()))
+        ordered = runs.iloc[order]
+        longest = ordered[~ordered['row'].duplicated()]
+        return self._with_shift(longest.reset_index(drop=True))
+
+    def violations(self):
+        """超过班次连值上限的所有区间"""
+        runs = self.runs()
+        limits = self._limit_table()
+        run_limits = limits[runs['shift_code'].to_numpy()] if len(runs) else np.empty(0, dtype=np.int64)
+        mask = (run_limits > 0) & (runs['length'].to_numpy() > run_limits)
+        result = runs[mask].copy()
+        result['limit'] = run_limits[mask]
+        return self._with_shift(result.reset_index(drop=True))
+
+    def work_runs(self, rest_codes=UNCAPPED_CODES):
+        """连续上班区间（除休息、假期和未排班外都算上班）：row, start, end, length"""
+        rest_mask = np.isin(self.codes, self.code_indices(rest_codes))
+        # 上班记为 1，休息、假期和未排班记为 0（与未排班编码相同，不参与游程）
+        working = ((self.codes != EMPTY_CODE) & ~rest_mask).astype(np.int8)
+        rows, starts, lengths, _ = run_length_encode(working)
+        return pd.DataFrame({
+            'row': rows,
+            'start': starts,
+            'end': starts + lengths - 1,
+            'length': lengths,
+        })
+
+    def work_run_violations(self, max_days=MAX_CONSECUTIVE_WORK_DAYS, rest_codes=UNCAPPED_CODES):
+        """连续上班超过 max_days 天的区间"""
+        runs = self.work_runs(rest_codes)
+        return runs[runs['length'] > max_days].reset_index(drop=True)
+
+    def code_indices(self, shifts):
+        """班次名称对应的编码列表（不存在的班次忽略）"""
+        index = {shift: i for i, shift in enumerate(self.vocabulary)}
+        return [index[s] for s in shifts if s in index]
+
+    def count_per_row(self, shifts=None):
+        """每位员工的排班天数；指定 shifts 时只统计这些班次"""
+        if shifts is None:
+            return (self.codes != EMPTY_CODE).sum(axis=1)
+        return np.isin(self.codes, self.code_indices(shifts)).sum(axis=1)
+
+    def _with_shift(self, runs):
+        runs = runs.copy()
+        vocabulary = np.array(self.vocabulary, dtype=object)
+        runs['shift'] = vocabulary[runs['shift_code'].to_numpy()] if len(runs) else []
+        return runs
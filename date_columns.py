@@ -0,0 +1,234 @@
+import re
+import weakref
+from collections import Counter
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+# 日期列识别模块：
+# 所有脚本统一使用同一套预编译规则识别日期列，每个DataFrame只识别一次，
+# 结果为带真实日期、星期、周末标记和ISO周的日历索引，后续检查可直接按周或周末切片
+
+_FULL_DATE = re.compile(r'(\d{4})\s*[-/.年]\s*(\d{1,2})\s*[-/.月]\s*(\d{1,2})')
+_COMPACT_DATE = re.compile(r'^(\d{4})(\d{2})(\d{2})$')
+_MONTH_DAY = re.compile(r'(\d{1,2})\s*月\s*(\d{1,2})\s*[日号]?')
+_SLASH_MONTH_DAY = re.compile(r'^(\d{1,2})/(\d{1,2})(?!\d|/\d)')
+_WEEKDAY = re.compile(r'(?:周|星期|礼拜)([一二三四五六日天])')
+
+WEEKDAY_NAMES = ['一', '二', '三', '四', '五', '六', '日']
+_WEEKDAY_INDEX = {name: i for i, name in enumerate(WEEKDAY_NAMES)}
+_WEEKDAY_INDEX['天'] = 6
+
+# 至少识别到这么多日期列才认为找到了日期表头
+MIN_DATE_COLUMNS = 5
+
+
+def _safe_date(year, month, day):
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def parse_date_label(label):
+    """解析单个列名，返回 (年, 月, 日, 星期序号)，年份缺失时为 None，无法识别时返回 None"""
+    if isinstance(label, (datetime, date)) and not pd.isna(label):
+        d = label.date() if isinstance(label, datetime) else label
+        return d.year, d.month, d.day, d.weekday()
+
+    if isinstance(label, (int, np.integer)) and not isinstance(label, bool):
+        label = str(label)
+    if not isinstance(label, str):
+        return None
+
+    text = label.strip()
+    weekday_match = _WEEKDAY.search(text)
+    weekday = _WEEKDAY_INDEX[weekday_match.group(1)] if weekday_match else None
+
+    match = _FULL_DATE.search(text) or _COMPACT_DATE.match(text)
+    if match:
+        year, month, day = (int(g) for g in match.groups())
+        if _safe_date(year, month, day):
+            return year, month, day, weekday
+        return None
+
+    match = _MONTH_DAY.search(text) or _SLASH_MONTH_DAY.match(text)
+    if match:
+        month, day = (int(g) for g in match.groups())
+        if _safe_date(2000, month, day):  # 2000年为闰年，可校验2月29日
+            return None, month, day, weekday
+        return None
+
+    if weekday is not None:
+        return None, None, None, weekday
+    return None
+
+
+class CalendarIndex:
+    def __init__(self, columns, parsed, header_row=None, default_year=None, positions=None):
+        self.header_row = header_row  # 日期表头所在的行位置（None 表示日期在列名中）
+        self.table = self._build_table(columns, parsed, default_year)
+        # 日期列在原表中的列位置
+        self.table['position'] = np.arange(len(self.table)) if positions is None else np.asarray(positions, dtype=np.int64)
+        self._week_groups = None
+
+    @staticmethod
+    def _build_table(columns, parsed, default_year):
+        """把解析结果补全年份后生成日历表"""
+        years = Counter(p[0] for p in parsed if p[0] is not None)
+        year = years.most_common(1)[0][0] if years else (default_year or date.today().year)
+
+        dates = []
+        last_month = None
+        for p in parsed:
+            if p[0] is not None:
+                d = date(p[0], p[1], p[2])
+                year = p[0]
+            elif p[1] is not None:
+                # 只有月日时沿用上一个年份，跨年（12月到1月）时年份加一
+                if last_month is not None and p[1] < last_month:
+                    year += 1
+                d = _safe_date(year, p[1], p[2])
+            else:
+                d = None
+            if d is not None:
+                last_month = d.month
+            dates.append(d)
+
+        weekdays = [d.weekday() if d is not None else (p[3] if p[3] is not None else -1)
+                    for d, p in zip(dates, parsed)]
+        iso = [d.isocalendar() if d is not None else (0, 0, 0) for d in dates]
+        weekdays = np.array(weekdays, dtype=np.int8)
+        return pd.DataFrame({
+            'column': pd.Series(list(columns), dtype=object),
+            'date': pd.Series(dates, dtype=object),
+            'weekday': weekdays,
+            'is_weekend': weekdays >= 5,
+            'iso_year': np.array([i[0] for i in iso], dtype=np.int32),
+            'iso_week': np.array([i[1] for i in iso], dtype=np.int32),
+        })
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def date_cols(self):
+        return self.table['column'].tolist()
+
+    @property
+    def positions(self):
+        return self.table['position'].to_numpy()
+
+    @property
+    def dates(self):
+        return self.table['date'].tolist()
+
+    @property
+    def weekend_mask(self):
+        return self.table['is_weekend'].to_numpy()
+
+    @property
+    def weekend_cols(self):
+        return self.table.loc[self.table['is_weekend'], 'column'].tolist()
+
+    @property
+    def weekday_cols(self):
+        return self.table.loc[~self.table['is_weekend'], 'column'].tolist()
+
+    @property
+    def data_start(self):
+        """排班数据开始的行位置"""
+        return 0 if self.header_row is None else self.header_row + 1
+
+    def weekday_mask(self, weekday):
+        """指定星期（0=周一 … 6=周日）的列掩码"""
+        return self.table['weekday'].to_numpy() == weekday
+
+    def week_groups(self):
+        """按ISO周分组：{(ISO年, ISO周): 列位置数组}"""
+        if self._week_groups is None:
+            groups = {}
+            keys = zip(self.table['iso_year'].to_numpy(), self.table['iso_week'].to_numpy())
+            for position, key in enumerate(keys):
+                if key[1] > 0:
+                    groups.setdefault((int(key[0]), int(key[1])), []).append(position)
+            self._week_groups = {k: np.array(v, dtype=np.int64) for k, v in groups.items()}
+        return self._week_groups
+
+    def positions_between(self, start, end):
+        """日期落在 [start, end] 区间内的列位置"""
+        dates = self.table['date']
+        mask = dates.map(lambda d: d is not None and start <= d <= end).to_numpy(dtype=bool)
+        return np.flatnonzero(mask)
+
+    def label(self, position):
+        """列位置对应的日期文本（无法解析日期时返回原列名）"""
+        d = self.table['date'].iat[position]
+        return d.isoformat() if d is not None else str(self.table['column'].iat[position])
+
+    def data_rows(self, frame):
+        """返回日期表头之后的数据行"""
+        return frame.iloc[self.data_start:]
+
+
+def _classify_labels(labels):
+    """对一组标签逐个解析，返回 (位置, 解析结果) 列表"""
+    found = []
+    for position, label in enumerate(labels):
+        parsed = parse_date_label(label)
+        if parsed is not None:
+            found.append((position, parsed))
+    return found
+
+
+def _has_real_dates(found):
+    return sum(1 for _, p in found if p[1] is not None) >= MIN_DATE_COLUMNS
+
+
+def build_calendar_index(frame, scan_rows=10, default_year=None):
+    """识别DataFrame的日期列：先看列名，列名中没有日期时在前 scan_rows 行中寻找日期表头行"""
+    columns = list(frame.columns)
+    found = _classify_labels(columns)
+    header_row = None
+
+    if not _has_real_dates(found):
+        values = frame.iloc[:scan_rows].to_numpy(dtype=object)
+        for row in range(len(values)):
+            row_found = _classify_labels(values[row])
+            if _has_real_dates(row_found):
+                found = row_found
+                header_row = row
+                break
+
+    positions = [position for position, _ in found]
+    return CalendarIndex([columns[i] for i in positions], [p for _, p in found],
+                         header_row=header_row, default_year=default_year, positions=positions)
+
+
+def calendar_from_labels(labels, default_year=None):
+    """由一行表头标签直接建立日历索引（用于流式读取等没有DataFrame的场景）"""
+    labels = list(labels)
+    found = _classify_labels(labels)
+    positions = [position for position, _ in found]
+    return CalendarIndex([labels[i] for i in positions], [p for _, p in found],
+                         default_year=default_year, positions=positions)
+
+
+# 每个DataFrame的日历索引缓存：id(DataFrame) -> (列索引对象, 参数, 日历索引)
+_calendar_cache = {}
+
+
+def get_calendar_index(frame, scan_rows=10, default_year=None):
+    """获取DataFrame的日历索引，同一个DataFrame（列未被替换时）只识别一次"""
+    key = id(frame)
+    cached = _calendar_cache.get(key)
+    params = (scan_rows, default_year)
+    if cached is not None and cached[0] is frame.columns and cached[1] == params:
+        return cached[2]
+
+    calendar = build_calendar_index(frame, scan_rows=scan_rows, default_year=default_year)
+    if cached is None:
+        weakref.finalize(frame, _calendar_cache.pop, key, None)
+    _calendar_cache[key] = (frame.columns, params, calendar)
+    return calendar
@@ -1,5 +1,6 @@
-import pandas as pd
 import sys
+from workbook_loader import load_sheet
+from date_columns import get_calendar_index
 
 # 指定Excel文件路径
 file_path = '/Users/luanxiaowei/Documents/项目开发/智能排班表2/排班表新3.xlsx'
@@ -7,7 +8,7 @@ file_path = '/Users/luanxiaowei/Documents/项目开发/智能排班表2/排班
 try:
     # 读取'规则'工作表
     print("===== 详细分析 '规则' 工作表 =====")
-    rule_df = pd.read_excel(file_path, sheet_name='规则')
+    rule_df = load_sheet(file_path, '规则')
     
     print(f"行数: {len(rule_df)}, 列数: {len(rule_df.columns)}")
     print(f"表头: {list(rule_df.columns)}")
@@ -19,7 +20,7 @@ try:
     
     # 读取'排班表'工作表
     print("\n===== 详细分析 '排班表' 工作表 =====")
-    schedule_df = pd.read_excel(file_path, sheet_name='排班表')
+    schedule_df = load_sheet(file_path, '排班表')
     
     print(f"行数: {len(schedule_df)}, 列数: {len(schedule_df.columns)}")
     print(f"表头: {list(schedule_df.columns)}")
@@ -36,8 +37,11 @@ try:
         if isinstance(col, str):
             if '员工' in col or '姓名' in col or '部门' in col or '岗位' in col:
                 emp_info_cols.append(col)
-            elif ('日' in col or '号' in col or '/' in col) and not any(x in col for x in ['员工', '姓名', '部门', '岗位']):
-                date_cols.append(col)
+    
+    # 识别日期列（日期可能在列名中，也可能在前几行的表头行中）
+    calendar = get_calendar_index(schedule_df)
+    date_cols = [col for col in calendar.date_cols if col not in emp_info_cols]
+    schedule_rows = calendar.data_rows(schedule_df)
         
     print(f"\n识别到的员工信息列: {emp_info_cols}")
     print(f"识别到的日期列数量: {len(date_cols)}, 部分日期列: {date_cols[:5]}...")
@@ -48,7 +52,7 @@ try:
     # 遍历所有日期列
     for col in date_cols:
         # 获取该列中的所有班次代码
-        shifts = schedule_df[col].dropna()
+        shifts = schedule_rows[col].dropna()
         # 统计每个班次代码的出现次数
         for shift in shifts:
             if isinstance(shift, str):
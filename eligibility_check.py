@@ -0,0 +1,119 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from rule_sheet_model import RuleSheetModel, rule_label_to_shift
+from shift_vocabulary import ShiftVocabulary
+from validation_results import (Violation, ValidationReport, SEVERITY_ERROR, SEVERITY_WARNING,
+                                KIND_INELIGIBLE_ASSIGNMENT, KIND_UNLISTED_EMPLOYEE)
+
+# 排班表与'规则'页签的资格核对：
+# 排班表编码矩阵中规则页签涉及的班次一次取出 (员工, 日期, 班次) 位置，规则页签展开为 (员工, 班次) 资格对；
+# 员工和 (员工, 班次) 资格对都用哈希索引（pd.Index.get_indexer）查找，一次反连接（anti-join）找出
+# 规则页签中没有分配该班次的所有排班，耗时与两张表的大小成线性关系。
+# 只核对规则页签涉及的班次（正常班、夜班、周末岗等），休息、请假和其他工作班次不核对
+
+PROBLEM_NOT_ALLOCATED = '规则页签中未分配该班次'
+
+
+class EligibilityChecker:
+    def __init__(self, model, vocabulary):
+        self.model = model
+        self.vocabulary = vocabulary
+        permitted = model.permitted_shift_codes()
+        # 员工哈希索引：姓名 -> 员工序号
+        self.employee_index = pd.Index(list(permitted), dtype=object)
+        # 资格对哈希索引：(员工序号, 班次)；按班次代码而不是编码存放，词表在编码排班表时新增班次不影响已有的键
+        pairs = sorted({(emp_id, shift) for emp_id, codes in enumerate(permitted.values()) for shift in codes})
+        self.pair_index = pd.MultiIndex.from_arrays([[emp_id for emp_id, _ in pairs], [shift for _, shift in pairs]])
+        # 规则页签涉及的班次：包括没有分配人员的班次列（如周末B岗暂无人员）
+        self.governed_codes = {shift for _, shift in pairs}
+        for _, label in model.shift_columns:
+            shift = rule_label_to_shift(label)
+            if shift is not None:
+                self.governed_codes.add(shift)
+
+    @classmethod
+    def from_workbook(cls, file_path, vocabulary=None):
+        vocabulary = vocabulary if vocabulary is not None else ShiftVocabulary.from_sources()
+        return cls(RuleSheetModel.from_workbook(file_path), vocabulary)
+
+    def governed_table(self):
+        """规则页签涉及的班次编码查找表（词表在编码过程中可能新增班次，每次按当前词表建表）"""
+        return self.vocabulary.mask_table(self.governed_codes)
+
+    @property
+    def governed_shifts(self):
+        return [self.vocabulary.codes[code] for code in np.flatnonzero(self.governed_table())]
+
+    def check(self, names, codes):
+        """反连接：返回 (行, 列) 不符合资格的排班位置，以及规则页签中没有的员工行
+
+        规则页签中没有的员工无法判断资格，只按行报告一次，不逐个排班报告。
+        """
+        codes = np.asarray(codes)
+        governed = self.governed_table()[codes]
+        emp_ids = self.employee_index.get_indexer(pd.Index(list(names), dtype=object))
+        rows, cols = np.nonzero(governed)
+        listed = emp_ids[rows] >= 0
+        rows, cols = rows[listed], cols[listed]
+        shifts = np.asarray(self.vocabulary.codes, dtype=object)[codes[rows, cols]]
+        keys = pd.MultiIndex.from_arrays([emp_ids[rows], shifts])
+        missing = self.pair_index.get_indexer(keys) < 0
+        unlisted_rows = np.flatnonzero((emp_ids < 0) & governed.any(axis=1))
+        return rows[missing], cols[missing], unlisted_rows
+
+    def violations(self, names, codes, calendar, depts=None):
+        names = list(names)
+        codes = np.asarray(codes)
+        bad_rows, bad_cols, unlisted_rows = self.check(names, codes)
+        result = []
+        for row, col in zip(bad_rows, bad_cols):
+            label = calendar.label(int(col))
+            result.append(Violation(KIND_INELIGIBLE_ASSIGNMENT, SEVERITY_ERROR, employee=names[row],
+                                    dept=depts[row] if depts is not None else None,
+                                    shift=self.vocabulary.codes[codes[row, col]], start=label, end=label,
+                                    start_pos=int(col), end_pos=int(col), detail=PROBLEM_NOT_ALLOCATED))
+        for row in unlisted_rows:
+            result.append(Violation(KIND_UNLISTED_EMPLOYEE, SEVERITY_WARNING, employee=names[row],
+                                    dept=depts[row] if depts is not None else None))
+        return result
+
+    def report(self, names, codes, calendar, depts=None, source=None):
+        violations = self.violations(names, codes, calendar, depts)
+        metrics = {'eligibility': {'governed_shifts': self.governed_shifts,
+                                   'ineligible': sum(v.kind == KIND_INELIGIBLE_ASSIGNMENT for v in violations),
+                                   'unlisted_employees': sum(v.kind == KIND_UNLISTED_EMPLOYEE for v in violations)}}
+        return ValidationReport(source=source, violations=violations, metrics=metrics)
+
+
+def main(file_path, rule_file=None):
+    """流式读取排班表，与'规则'页签（默认同一工作簿）核对每个排班的资格"""
+    from streaming_reader import StreamingScheduleReader
+
+    vocabulary = ShiftVocabulary.from_sources()
+    # 先编码排班表（词表可能新增班次），再按编码后的词表构建核对器
+    with StreamingScheduleReader(file_path, vocabulary=vocabulary) as reader:
+        rows = list(reader.iter_employees())
+        calendar = reader.calendar
+    checker = EligibilityChecker.from_workbook(rule_file or file_path, vocabulary)
+    codes = np.vstack([row.codes for row in rows]) if rows else np.zeros((0, len(calendar)), dtype=vocabulary.dtype)
+    report = checker.report([row.name for row in rows], codes, calendar, [row.dept for row in rows], source=file_path)
+    print(f"员工数量: {len(rows)}, 核对班次: {', '.join(checker.governed_shifts)}")
+    print(f"不符合规则页签分配的排班: {report.metrics['eligibility']['ineligible']}处, "
+          f"规则页签中没有的员工: {report.metrics['eligibility']['unlisted_employees']}人")
+    for violation in report:
+        print(f"- {violation.employee}: {violation.describe()}")
+    return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python eligibility_check.py <排班表.xlsx> [规则工作簿.xlsx]")
+        sys.exit(1)
+    try:
+        main(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    except Exception as e:
+        print(f"核对排班资格时出错: {e}")
+        sys.exit(1)
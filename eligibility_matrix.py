@@ -0,0 +1,218 @@
+import sys
+import json
+import struct
+
+import numpy as np
+import pandas as pd
+
+from shift_vocabulary import DEFAULT_IDENTIFIER_FILE, EMPTY_CODE
+
+# 员工 × 班次的可值班资格位矩阵：
+# 完整标识.json 的 identifiers 每条记录是一个 (employeeNumber, shiftCode, canWork)，
+# 这里一次编译为 np.packbits 压缩的 uint8 位矩阵（每位员工一行，每个班次一位），
+# 工号 -> 行号、班次代码 -> 列号用哈希索引，单个查询是一次位运算，
+# 整列（某班次的全部可值员工）和整天/整月排班的资格掩码都是一次数组运算。
+# 与 SchedulingInputs 原来的语义一致：identifiers 中没有任何记录的员工不受限制（restricted 为 False）。
+# 编译结果可保存为二进制文件（定长文件头 + JSON 索引 + 位矩阵），读取时直接内存映射，不需要重新解析 JSON。
+
+FILE_MAGIC = b'SCHELIG\0'
+FILE_FORMAT_VERSION = 1
+_HEADER = struct.Struct('<8sIQ')   # 魔数、格式版本、JSON 索引长度
+_DATA_ALIGN = 64
+
+
+class EligibilityMatrix:
+    def __init__(self, employees, shifts, bits=None, restricted=None):
+        self.employees = [str(number) for number in employees]   # 行：工号
+        self.shifts = list(shifts)                                # 列：班次代码
+        self.employee_index = pd.Index(self.employees, dtype=object)
+        self.shift_index = {shift: i for i, shift in enumerate(self.shifts)}
+        self.row_bytes = (len(self.shifts) + 7) // 8
+        self.bits = bits if bits is not None else np.zeros((len(self.employees), self.row_bytes), dtype=np.uint8)
+        self.restricted = restricted if restricted is not None else np.zeros(len(self.employees), dtype=bool)
+
+    @classmethod
+    def from_identifiers(cls, data, shifts=None, employees=None):
+        """由标识导出数据编译位矩阵
+
+        shifts 为列的班次（默认导出文件中的全部班次，再加上 identifiers 中出现的其他班次），
+        不在 shifts 中的记录不授予资格，但该员工仍视为受限；
+        employees 为额外的行（默认导出文件中的全部员工），没有记录的员工不受限。
+        """
+        identifiers = pd.DataFrame(data.get('identifiers', []),
+                                   columns=['employeeNumber', 'shiftCode', 'canWork'])
+        numbers = identifiers['employeeNumber'].astype(str).to_numpy()
+        codes = identifiers['shiftCode'].to_numpy(dtype=object)
+        if shifts is None:
+            shifts = [s.get('code') for s in data.get('shifts', []) if s.get('code')]
+            shifts += [code for code in pd.unique(codes) if isinstance(code, str) and code not in shifts]
+        if employees is None:
+            employees = [str(e.get('number')) for e in data.get('employees', [])]
+        rows = list(dict.fromkeys(list(employees) + list(pd.unique(numbers))))
+        matrix = cls(rows, dict.fromkeys(shifts))
+
+        row_ids = matrix.employee_index.get_indexer(numbers)
+        matrix.restricted[row_ids] = True
+        col_ids = pd.Index(matrix.shifts, dtype=object).get_indexer(codes)
+        granted = (col_ids >= 0) & identifiers['canWork'].fillna(False).astype(bool).to_numpy()
+        dense = np.zeros((len(rows), len(matrix.shifts)), dtype=bool)
+        dense[row_ids[granted], col_ids[granted]] = True
+        matrix.bits = np.packbits(dense, axis=1, bitorder='little')
+        return matrix
+
+    @classmethod
+    def from_identifier_file(cls, identifier_file=DEFAULT_IDENTIFIER_FILE, shifts=None):
+        with open(identifier_file, 'r', encoding='utf-8') as f:
+            return cls.from_identifiers(json.load(f), shifts)
+
+    def __len__(self):
+        return len(self.employees)
+
+    def _bit(self, rows, cols):
+        """位矩阵 (行, 列) 处的资格位（rows、cols 均为有效下标的数组）"""
+        return ((self.bits[rows, cols >> 3] >> (cols & 7)) & 1).astype(bool)
+
+    def dense(self):
+        """解压为 (员工 × 班次) 布尔矩阵（只记录 identifiers 中授予的资格）"""
+        return np.unpackbits(self.bits, axis=1, count=len(self.shifts), bitorder='little').astype(bool)
+
+    def rows_of(self, numbers):
+        """工号 -> 行号数组，未知工号为 -1"""
+        return self.employee_index.get_indexer(pd.Index([str(n) for n in numbers], dtype=object))
+
+    def can_work(self, number, shift):
+        row = self.employee_index.get_indexer([str(number)])[0]
+        if row < 0 or not self.restricted[row]:
+            return True
+        col = self.shift_index.get(shift)
+        return col is not None and bool(self.bits[row, col >> 3] >> (col & 7) & 1)
+
+    def check(self, numbers, shifts):
+        """逐对判断 numbers[i] 能否值 shifts[i]（shifts 也可以是单个班次），返回布尔数组"""
+        rows = self.rows_of(numbers)
+        if isinstance(shifts, str):
+            cols = np.full(len(rows), self.shift_index.get(shifts, -1), dtype=np.int64)
+        else:
+            cols = np.array([self.shift_index.get(shift, -1) for shift in shifts], dtype=np.int64)
+        return self._check_ids(rows, cols)
+
+    def _check_ids(self, rows, cols):
+        result = np.ones(rows.shape, dtype=bool)
+        limited = rows >= 0
+        limited[limited] = self.restricted[rows[limited]]
+        known = limited & (cols >= 0)
+        result[limited] = False
+        result[known] = self._bit(rows[known], cols[known])
+        return result
+
+    def mask(self, numbers, shift):
+        """numbers 中每位员工能否值 shift（未知员工不受限）"""
+        return self.check(numbers, shift)
+
+    def column(self, shift):
+        """矩阵中全部员工能否值 shift 的布尔掩码"""
+        col = self.shift_index.get(shift)
+        if col is None:
+            return ~self.restricted
+        return ~self.restricted | self._bit(np.arange(len(self.employees)), np.full(len(self.employees), col))
+
+    def employees_for(self, shift):
+        """能值 shift 的全部员工工号（包括不受限的员工）"""
+        return [self.employees[i] for i in np.flatnonzero(self.column(shift))]
+
+    def shifts_for(self, number):
+        """员工可值的班次；不受限或未知的员工返回 None"""
+        row = self.employee_index.get_indexer([str(number)])[0]
+        if row < 0 or not self.restricted[row]:
+            return None
+        return [self.shifts[i] for i in np.flatnonzero(self.dense()[row])]
+
+    def check_codes(self, numbers, codes, vocabulary):
+        """排班编码（ShiftVocabulary 的 uint8 编码，一天为 (员工,)、整月为 (员工 × 日期)）的资格掩码
+
+        空单元格视为符合；词表中不在矩阵里的班次对受限员工视为不符合。
+        """
+        codes = np.asarray(codes)
+        lookup = np.array([self.shift_index.get(shift, -1) for shift in vocabulary.codes], dtype=np.int64)
+        rows = self.rows_of(numbers).reshape((-1,) + (1,) * (codes.ndim - 1))
+        rows = np.broadcast_to(rows, codes.shape)
+        result = self._check_ids(rows.ravel(), lookup[codes].ravel()).reshape(codes.shape)
+        return result | (codes == EMPTY_CODE)
+
+    def grant(self, number, shift):
+        """为受限员工补充一个可值班次（员工不受限、未知或班次不在矩阵中时不处理），返回是否已授予"""
+        row = self.employee_index.get_indexer([str(number)])[0]
+        col = self.shift_index.get(shift)
+        if row < 0 or col is None or not self.restricted[row]:
+            return False
+        self.bits[row, col >> 3] |= np.uint8(1 << (col & 7))
+        return True
+
+    def save(self, path):
+        """保存为可内存映射的二进制文件：文件头、JSON 索引，按 64 字节对齐后依次为位矩阵和受限标记"""
+        index = json.dumps({'employees': self.employees, 'shifts': self.shifts,
+                            'row_bytes': self.row_bytes}, ensure_ascii=False).encode('utf-8')
+        data_offset = -(-(_HEADER.size + len(index)) // _DATA_ALIGN) * _DATA_ALIGN
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(FILE_MAGIC, FILE_FORMAT_VERSION, len(index)))
+            f.write(index)
+            f.write(b'\0' * (data_offset - _HEADER.size - len(index)))
+            f.write(np.ascontiguousarray(self.bits, dtype=np.uint8).tobytes())
+            f.write(self.restricted.astype(np.uint8).tobytes())
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """读取 save 保存的文件；mmap 为 True 时位矩阵为只读内存映射（grant 需要 mmap=False）"""
+        with open(path, 'rb') as f:
+            magic, version, index_length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != FILE_MAGIC or version != FILE_FORMAT_VERSION:
+                raise ValueError(f"不是资格位矩阵文件或格式版本不符: {path}")
+            index = json.loads(f.read(index_length).decode('utf-8'))
+        n_rows, row_bytes = len(index['employees']), index['row_bytes']
+        data_offset = -(-(_HEADER.size + index_length) // _DATA_ALIGN) * _DATA_ALIGN
+        if mmap and n_rows:
+            bits = np.memmap(path, dtype=np.uint8, mode='r', offset=data_offset, shape=(n_rows, row_bytes))
+            restricted = np.memmap(path, dtype=np.uint8, mode='r', offset=data_offset + n_rows * row_bytes,
+                                   shape=(n_rows,)).view(bool)
+        else:
+            raw = np.fromfile(path, dtype=np.uint8, offset=data_offset)
+            bits = raw[:n_rows * row_bytes].reshape(n_rows, row_bytes).copy()
+            restricted = raw[n_rows * row_bytes:n_rows * row_bytes + n_rows].astype(bool)
+        return cls(index['employees'], index['shifts'], bits, restricted)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='把完整标识.json 的可值班次编译为位矩阵并查询')
+    parser.add_argument('source', nargs='?', default=DEFAULT_IDENTIFIER_FILE,
+                        help='完整标识.json，或 --save 保存的位矩阵文件（.bin）')
+    parser.add_argument('--save', metavar='文件', help='保存编译后的位矩阵')
+    parser.add_argument('--shift', action='append', default=[], help='列出能值该班次的员工（可重复）')
+    parser.add_argument('--employee', action='append', default=[], help='列出该工号可值的班次（可重复）')
+    args = parser.parse_args(argv)
+
+    if args.source.endswith('.json'):
+        matrix = EligibilityMatrix.from_identifier_file(args.source)
+    else:
+        matrix = EligibilityMatrix.load(args.source)
+    print(f"员工: {len(matrix)}人（受限{int(matrix.restricted.sum())}人）, 班次: {len(matrix.shifts)}个, "
+          f"位矩阵: {matrix.bits.nbytes}字节")
+    for shift in args.shift:
+        numbers = matrix.employees_for(shift)
+        print(f"{shift}: {len(numbers)}人 {', '.join(numbers)}")
+    for number in args.employee:
+        shifts = matrix.shifts_for(number)
+        print(f"{number}: {'不受限' if shifts is None else ', '.join(shifts)}")
+    if args.save:
+        matrix.save(args.save)
+        print(f"已保存到 {args.save}")
+    return matrix
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"编译资格位矩阵时出错: {e}")
+        sys.exit(1)
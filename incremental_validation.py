@@ -0,0 +1,207 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from workbook_loader import load_sheet
+from schedule_rule_validation import ScheduleRuleValidator
+from staffing_coverage import StaffingCoverage
+from weekend_g_rules import WeekendGRuleChecker
+from validation_results import ValidationReport
+
+# 增量验证：
+# 保留上一次验证的班次编码矩阵、每位员工的检查结果（上五休二、连续上班、G值周末班规则）、
+# 每日各部门的班次人数张量和班次编码计数，修改少量单元格（或对比两个版本的工作簿）后
+# 只重算受影响的员工行和日期列
+
+
+def diff_schedule_frames(old_df, new_df, date_cols):
+    """对比两个版本的排班表，返回 (日期单元格改动列表, 是否有非日期列改动)；结构不同时返回 None
+
+    改动列表的每一项为 (行号, 日期列位置, 新取值)。
+    """
+    if old_df.shape != new_df.shape or list(old_df.columns) != list(new_df.columns):
+        return None
+
+    old_values = old_df.to_numpy(dtype=object)
+    new_values = new_df.to_numpy(dtype=object)
+    old_na, new_na = pd.isna(old_values), pd.isna(new_values)
+    with np.errstate(all='ignore'):
+        changed = (old_na != new_na) | (~old_na & ~new_na & (old_values != new_values))
+
+    date_positions = [old_df.columns.get_loc(col) for col in date_cols]
+    date_mask = np.zeros(old_df.shape[1], dtype=bool)
+    date_mask[date_positions] = True
+    other_changed = bool(changed[:, ~date_mask].any())
+
+    column_to_day = {position: day for day, position in enumerate(date_positions)}
+    rows, cols = np.nonzero(changed & date_mask)
+    changes = [(int(r), column_to_day[int(c)], new_values[r, c]) for r, c in zip(rows, cols)]
+    return changes, other_changed
+
+
+class IncrementalScheduleValidator:
+    def __init__(self, excel_file=None, validator=None):
+        # 可直接复用已加载数据的 ScheduleRuleValidator
+        self.validator = validator or ScheduleRuleValidator(excel_file, quiet=True)
+        self.last_update = {}    # 最近一次更新重算的行数、列数和耗时
+        self.rebuild()
+
+    def rebuild(self):
+        """完整计算一次所有状态（首次加载或排班表结构变化时使用）"""
+        validator = self.validator
+        self.employee_col, self.date_cols = validator.identify_employees_and_dates()
+        self.codes = validator.get_shift_matrix()
+        self.employee_mask = validator.employee_row_mask()
+        self.employee_names = validator.employee_names().tolist()
+        self.employee_rows = np.flatnonzero(self.employee_mask)
+        self.header_row = validator.calendar.header_row if validator.calendar is not None else None
+
+        # 能按真实日期分组时才检查G值周末班规则和特殊岗位人数（与 run_full_analysis 相同）
+        calendar = validator.calendar
+        self.by_date = calendar is not None and calendar.date_cols == self.date_cols
+
+        # 每个员工行（按排班表行号）的连续上班、上五休二和G值周末班问题
+        self.row_violations = {}
+        self.weekend_g_violations = {}
+        self._recheck_rows(self.employee_rows)
+
+        # 每日各部门的班次人数和各班次编码的出现次数
+        self.coverage = StaffingCoverage.from_validator(validator) if self.by_date else None
+        self.coverage_violations = self.coverage.check(validator.special_groups) if self.by_date else []
+        self.code_counts = np.bincount(self.codes.ravel(), minlength=len(validator.shift_vocabulary)).astype(np.int64)
+        self.last_update = {'rows': len(self.employee_rows), 'columns': len(self.date_cols), 'full': True}
+
+    def _recheck_rows(self, rows):
+        """重新检查指定的员工行（排班表行号）"""
+        rows = [int(r) for r in rows if self.employee_mask[r]]
+        for row in rows:
+            self.row_violations.pop(row, None)
+            self.weekend_g_violations.pop(row, None)
+        if not rows:
+            return
+        validator = self.validator
+        row_employees = [self.employee_names[row] for row in rows]
+        issues = validator.check_work_day_rows(self.codes[rows], row_employees, self.date_cols)
+        for local_row, violations in issues.items():
+            self.row_violations[rows[local_row]] = violations
+        if self.by_date:
+            checker = WeekendGRuleChecker(self.codes[rows], validator.calendar, validator.shift_vocabulary,
+                                          range(len(rows)))
+            for violation in checker.violations():
+                local_row = violation.employee
+                self.weekend_g_violations.setdefault(rows[local_row], []).append(
+                    violation._replace(employee=row_employees[local_row]))
+
+    def _recheck_days(self, days):
+        """重新统计指定日期列的特殊岗位值班人数"""
+        if self.coverage is None or not days:
+            return
+        self.coverage.recount(self.codes[self.coverage.rows], days)
+        self.coverage_violations = self.coverage.check(self.validator.special_groups)
+
+    def _ensure_capacity(self):
+        """词表新增班次后扩大编码矩阵的数据类型和各查找表"""
+        vocabulary = self.validator.shift_vocabulary
+        if np.iinfo(self.codes.dtype).max < len(vocabulary) - 1:
+            self.codes = self.codes.astype(vocabulary.dtype)
+            self.validator._shift_matrix = (self.validator.schedule_df, self.codes)
+        if len(self.code_counts) < len(vocabulary):
+            self.code_counts = np.pad(self.code_counts, (0, len(vocabulary) - len(self.code_counts)))
+
+    def apply_changes(self, changes):
+        """应用单元格改动 [(行号, 日期列位置, 新取值)]，只重算受影响的员工行和日期列"""
+        start = time.perf_counter()
+        validator = self.validator
+        df = validator.schedule_df
+        changes = list(changes)
+        if not changes:
+            self.last_update = {'rows': 0, 'columns': 0, 'full': False, 'elapsed': 0.0}
+            return self.report()
+
+        if self.header_row is not None and any(row <= self.header_row for row, _, _ in changes):
+            # 改动落在日期表头及其上方时，日期列的识别结果可能变化，只能完整重算
+            for row, day, value in changes:
+                df.iat[row, df.columns.get_loc(self.date_cols[day])] = value
+            validator.schedule_df = df.copy()
+            self.rebuild()
+            self.last_update['elapsed'] = round(time.perf_counter() - start, 6)
+            return self.report()
+
+        values = np.empty(len(changes), dtype=object)
+        values[:] = [value for _, _, value in changes]
+        new_codes = validator.shift_vocabulary.encode_values(values)
+        self._ensure_capacity()
+
+        rows, days = set(), set()
+        for (row, day, value), new_code in zip(changes, new_codes):
+            old_code = self.codes[row, day]
+            if old_code != new_code:
+                self.code_counts[old_code] -= 1
+                self.code_counts[new_code] += 1
+                self.codes[row, day] = new_code
+                rows.add(row)
+                days.add(day)
+            # 同步修改排班表，保证之后的完整验证与增量结果一致
+            df.iat[row, df.columns.get_loc(self.date_cols[day])] = value
+
+        self._recheck_rows(sorted(rows))
+        self._recheck_days(days)
+        self.last_update = {'rows': len(rows), 'columns': len(days), 'full': False,
+                            'elapsed': round(time.perf_counter() - start, 6)}
+        return self.report()
+
+    def set_cell(self, row, date_col, value):
+        """修改单个单元格（date_col 可为日期列名或日期列位置）"""
+        day = self.date_cols.index(date_col) if not isinstance(date_col, (int, np.integer)) else int(date_col)
+        return self.apply_changes([(row, day, value)])
+
+    def update_from_frame(self, new_df):
+        """与新版本排班表对比，只把有变化的单元格应用到当前状态"""
+        diff = diff_schedule_frames(self.validator.schedule_df, new_df, self.date_cols)
+        if diff is None or diff[1]:
+            # 表结构或员工列变化时无法增量更新
+            self.validator.schedule_df = new_df
+            self.rebuild()
+            return self.report()
+        return self.apply_changes(diff[0])
+
+    def update_from_workbook(self, new_file):
+        """读取新版本工作簿的'排班表'页签并增量更新"""
+        new_df = load_sheet(new_file, '排班表')
+        self.validator.excel_file = new_file
+        return self.update_from_frame(new_df.copy())
+
+    def shift_counts(self):
+        """各班次类别的次数（由编码计数按类别汇总）"""
+        return self.validator.shift_vocabulary.categories_from_counts(self.code_counts)
+
+    def report(self):
+        """由当前状态组装 ValidationReport（问题与 run_full_analysis 相同，顺序按上五休二、岗位人数、G值周末班）"""
+        report = ValidationReport(source=self.validator.excel_file)
+        for row in sorted(self.row_violations):
+            report.extend(self.row_violations[row])
+        report.extend(self.coverage_violations)
+        for row in sorted(self.weekend_g_violations):
+            report.extend(self.weekend_g_violations[row])
+        report.metrics['shift_counts'] = self.shift_counts()
+        return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("用法: python incremental_validation.py <旧版本.xlsx> <新版本.xlsx>")
+        sys.exit(1)
+    try:
+        incremental = IncrementalScheduleValidator(sys.argv[1])
+        before = len(incremental.report())
+        report = incremental.update_from_workbook(sys.argv[2])
+        update = incremental.last_update
+        print(f"问题数: {before} -> {len(report)}（重算{update['rows']}行、{update['columns']}列，"
+              f"{'完整重算' if update['full'] else '增量更新'}）")
+        for violation in report:
+            print(f"- {violation.employee or violation.dept}: {violation.describe()}")
+    except Exception as e:
+        print(f"增量验证时出错: {e}")
+        sys.exit(1)
@@ -0,0 +1,266 @@
+import sys
+import json
+from collections import namedtuple
+from datetime import date, timedelta
+
+import numpy as np
+
+from shift_vocabulary import ShiftVocabulary, WEEKEND_G_CODES
+from consecutive_runs import (run_length_encode, SHIFT_CONSECUTIVE_LIMITS, DEFAULT_CONSECUTIVE_LIMIT,
+                              UNCAPPED_CODES, MAX_CONSECUTIVE_WORK_DAYS)
+from weekend_g_rules import WeekendGRuleChecker
+from validation_results import (Violation, ValidationReport, SEVERITY_ERROR,
+                                KIND_CONSECUTIVE_WORK, KIND_CROSS_MONTH_WORK, KIND_SHIFT_LIMIT)
+
+# 跨月连续验证：
+# 按月份顺序逐个流式读取排班表，每位员工只在月份之间保留一条紧凑的末尾状态
+# （月末连续上班天数、月末连值班次及天数、最后一次G值周末班日期、各特殊班次最后值班日期），
+# 下个月的连续上班、班次连值和"不得连续两个周末值G值班"检查从该状态接续，
+# 因此可以一次顺序读完一整年，而内存中始终只有一个月的排班
+
+# 记录最后值班日期的特殊班次（用于接续轮转顺序）
+ROTATION_SHIFTS = ('Y16综',) + WEEKEND_G_CODES
+
+EmployeeTail = namedtuple('EmployeeTail', ['name', 'last_date', 'work_run', 'shift', 'shift_run',
+                                           'last_weekend_g', 'last_special'])
+
+
+def employee_key(row):
+    """员工标识：优先使用工号，没有工号时使用姓名"""
+    return row.employee_id or row.name
+
+
+def _last_true(mask):
+    """每行最后一个 True 的列位置，没有时为 -1"""
+    n_cols = mask.shape[1]
+    last = n_cols - 1 - np.argmax(mask[:, ::-1], axis=1)
+    return np.where(mask.any(axis=1), last, -1)
+
+
+def _trailing_run(mask):
+    """每行末尾连续 True 的长度"""
+    n_cols = mask.shape[1]
+    return np.where(mask.all(axis=1), n_cols, np.argmin(mask[:, ::-1], axis=1))
+
+
+class MonthChainValidator:
+    def __init__(self, vocabulary=None, state=None, max_work_days=MAX_CONSECUTIVE_WORK_DAYS, limits=None,
+                 default_limit=DEFAULT_CONSECUTIVE_LIMIT):
+        self.vocabulary = vocabulary if vocabulary is not None else ShiftVocabulary.from_sources()
+        self.state = dict(state or {})   # 员工标识 -> EmployeeTail
+        self.max_work_days = max_work_days
+        self.limits = dict(SHIFT_CONSECUTIVE_LIMITS if limits is None else limits)
+        self.default_limit = default_limit
+        self.months = []                 # 已验证的月份 [(来源, 首日, 末日)]
+
+    def _limit_table(self):
+        limit = self.vocabulary.lookup_table(lambda code: self.limits.get(code, self.default_limit), dtype=np.int64)
+        limit[self.vocabulary.mask_table(UNCAPPED_CODES)] = 0
+        return limit
+
+    def _carried(self, keys, first_date):
+        """接续上个月的状态：只有上个月最后一天紧挨本月第一天时才接续连续天数"""
+        n = len(keys)
+        work = np.zeros(n, dtype=np.int64)
+        shift_codes = np.zeros(n, dtype=np.int64)
+        shift_runs = np.zeros(n, dtype=np.int64)
+        for i, key in enumerate(keys):
+            tail = self.state.get(key)
+            if tail is None or first_date is None or tail.last_date != first_date - timedelta(days=1):
+                continue
+            work[i] = tail.work_run
+            code = self.vocabulary.index.get(tail.shift)
+            if code is not None:
+                shift_codes[i] = code
+                shift_runs[i] = tail.shift_run
+        return work, shift_codes, shift_runs
+
+    def validate_rows(self, rows, calendar, source=None):
+        """验证一个月的员工排班行（ScheduleRow 列表），更新末尾状态并返回 ValidationReport"""
+        keys = [employee_key(row) for row in rows]
+        names = [row.name for row in rows]
+        n_days = len(calendar)
+        codes = np.vstack([row.codes for row in rows]).astype(np.int64) if rows else \
+            np.zeros((0, n_days), dtype=np.int64)
+        dates = calendar.dates
+        first_date = dates[0] if dates else None
+        last_date = dates[-1] if dates else None
+        carried_work, carried_code, carried_shift_run = self._carried(keys, first_date)
+        report = ValidationReport(source=source)
+
+        def label(pos, carry=0):
+            if carry and first_date is not None:
+                return (first_date - timedelta(days=int(carry))).isoformat()
+            return calendar.label(int(pos))
+
+        # 连续上班：本月第一段连续上班加上上个月末的连续天数（休息和请假不算上班）
+        working = (codes != 0) & ~self.vocabulary.mask_table(UNCAPPED_CODES)[codes]
+        rows_idx, starts, lengths, _ = run_length_encode(working.astype(np.int8))
+        carry = np.where(starts == 0, carried_work[rows_idx], 0)
+        for row, start, length, extra in zip(rows_idx, starts, lengths, carry):
+            total = int(length + extra)
+            if total <= self.max_work_days:
+                continue
+            end = int(start + length - 1)
+            kind = KIND_CROSS_MONTH_WORK if extra else KIND_CONSECUTIVE_WORK
+            report.violations.append(Violation(
+                kind, SEVERITY_ERROR, employee=names[row], start=label(start, extra), end=label(end),
+                start_pos=int(start), end_pos=end, value=total, limit=self.max_work_days))
+
+        # 班次连值：本月第一段与上个月末是同一班次时接续
+        limit_table = self._limit_table()
+        rows_idx, starts, lengths, run_codes = run_length_encode(codes)
+        carry = np.where((starts == 0) & (carried_code[rows_idx] == run_codes), carried_shift_run[rows_idx], 0)
+        run_limits = limit_table[run_codes]
+        for row, start, length, code, extra, limit in zip(rows_idx, starts, lengths, run_codes, carry, run_limits):
+            total = int(length + extra)
+            if limit <= 0 or total <= limit:
+                continue
+            end = int(start + length - 1)
+            report.violations.append(Violation(
+                KIND_SHIFT_LIMIT, SEVERITY_ERROR, employee=names[row], shift=self.vocabulary.codes[code],
+                start=label(start, extra), end=label(end), start_pos=int(start), end_pos=end,
+                value=total, limit=int(limit)))
+
+        # G值周末班：上个月最后一个G值周末紧挨本月第一个周末时同样报告
+        last_duty = {name: self.state[key].last_weekend_g for key, name in zip(keys, names)
+                     if key in self.state and self.state[key].last_weekend_g is not None}
+        checker = WeekendGRuleChecker(codes, calendar, self.vocabulary, names, last_duty)
+        report.extend(checker.violations())
+
+        self._update_state(rows, keys, codes, working, calendar, carried_work, carried_code, carried_shift_run)
+        self.months.append((source, first_date, last_date))
+        report.metrics['chain'] = {'employees': len(rows), 'carried': int((carried_work > 0).sum()),
+                                   'first_date': first_date, 'last_date': last_date}
+        return report
+
+    def _update_state(self, rows, keys, codes, working, calendar, carried_work, carried_code, carried_shift_run):
+        """用本月末尾更新每位员工的状态（本月没有出现的员工保留原状态）"""
+        if not rows:
+            return
+        n_days = codes.shape[1]
+        dates = calendar.dates
+        work_run = _trailing_run(working)
+        work_run = np.where(work_run == n_days, work_run + carried_work, work_run)
+        last_code = codes[:, -1]
+        shift_run = _trailing_run(codes == last_code[:, None])
+        shift_run = np.where((last_code == 0), 0, shift_run)
+        shift_run = np.where((shift_run == n_days) & (carried_code == last_code), shift_run + carried_shift_run,
+                             shift_run)
+        last_g = _last_true(self.vocabulary.is_weekend_g_table()[codes])
+        special = {}
+        for shift in ROTATION_SHIFTS:
+            code = self.vocabulary.index.get(shift)
+            if code is not None:
+                special[shift] = _last_true(codes == code)
+
+        for i, (row, key) in enumerate(zip(rows, keys)):
+            previous = self.state.get(key)
+            last_special = dict(previous.last_special) if previous is not None else {}
+            for shift, positions in special.items():
+                if positions[i] >= 0:
+                    last_special[shift] = dates[positions[i]]
+            if last_g[i] >= 0:
+                last_weekend_g = dates[last_g[i]]
+            else:
+                last_weekend_g = previous.last_weekend_g if previous is not None else None
+            self.state[key] = EmployeeTail(
+                row.name, dates[-1], int(work_run[i]),
+                self.vocabulary.codes[last_code[i]] if last_code[i] else None, int(shift_run[i]),
+                last_weekend_g, last_special)
+
+    def validate_workbook(self, file_path):
+        """流式读取一个月的排班表并接续验证"""
+        from streaming_reader import StreamingScheduleReader
+
+        with StreamingScheduleReader(file_path, vocabulary=self.vocabulary) as reader:
+            rows = list(reader.iter_employees())
+            calendar = reader.calendar
+        return self.validate_rows(rows, calendar, source=file_path)
+
+    def order_workbooks(self, files):
+        """按排班表第一个日期排序（只读取表头行）；无法解析日期的工作簿保持原顺序放在最后"""
+        from streaming_reader import StreamingScheduleReader
+
+        first_dates = {}
+        for file_path in files:
+            with StreamingScheduleReader(file_path, vocabulary=self.vocabulary) as reader:
+                dates = [d for d in reader.calendar.dates if d is not None]
+            first_dates[file_path] = min(dates) if dates else None
+        return sorted(files, key=lambda f: (first_dates[f] is None, first_dates[f] or date.min))
+
+    def validate_chain(self, files, ordered=False):
+        """按月份顺序逐月验证，每次只读入一个月，逐个产出 ValidationReport（ordered 为 True 时不再排序）"""
+        if not ordered:
+            files = self.order_workbooks(files)
+        for file_path in files:
+            yield self.validate_workbook(file_path)
+
+    def rotation_cursor(self, shift):
+        """某特殊班次最近一次值班的员工（轮转顺序的接续位置），没有时返回 None"""
+        latest = None
+        for key, tail in self.state.items():
+            last = tail.last_special.get(shift)
+            if last is not None and (latest is None or last > latest[1]):
+                latest = (key, last)
+        return latest[0] if latest else None
+
+    def save_state(self, path):
+        """保存末尾状态（JSON），下个月可从该文件接续验证"""
+        def iso(value):
+            return value.isoformat() if value is not None else None
+
+        data = {key: {'name': tail.name, 'last_date': iso(tail.last_date), 'work_run': tail.work_run,
+                      'shift': tail.shift, 'shift_run': tail.shift_run,
+                      'last_weekend_g': iso(tail.last_weekend_g),
+                      'last_special': {shift: iso(d) for shift, d in tail.last_special.items()}}
+                for key, tail in self.state.items()}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def load_state(path):
+        def parse(value):
+            return date.fromisoformat(value) if value else None
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {key: EmployeeTail(item['name'], parse(item['last_date']), item['work_run'], item['shift'],
+                                  item['shift_run'], parse(item['last_weekend_g']),
+                                  {shift: parse(d) for shift, d in item['last_special'].items()})
+                for key, item in data.items()}
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='按月份顺序跨月验证排班表')
+    parser.add_argument('files', nargs='+', help='按月份顺序排列的排班表工作簿')
+    parser.add_argument('--state', help='上个月的末尾状态文件（JSON）')
+    parser.add_argument('--save-state', help='验证完成后保存末尾状态的文件（JSON）')
+    args = parser.parse_args(argv)
+
+    state = MonthChainValidator.load_state(args.state) if args.state else None
+    validator = MonthChainValidator(state=state)
+    total = 0
+    for report in validator.validate_chain(args.files):
+        chain = report.metrics['chain']
+        cross = report.by_kind(KIND_CROSS_MONTH_WORK)
+        print(f"{report.source}: {chain['first_date']} 至 {chain['last_date']}, 员工{chain['employees']}人, "
+              f"接续上月{chain['carried']}人, 问题{len(report)}条（跨月连续上班{len(cross)}条）")
+        for violation in report:
+            print(f"  - {violation.employee}: {violation.describe()}")
+        total += len(report)
+    if args.save_state:
+        validator.save_state(args.save_state)
+        print(f"末尾状态已写入: {args.save_state}")
+    print(f"共验证{len(validator.months)}个月，问题{total}条")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Exception as e:
+        print(f"跨月验证排班表时出错: {e}")
+        sys.exit(1)
@@ -0,0 +1,202 @@
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+from shift_vocabulary import ShiftVocabulary
+from weekly_rest_rules import WeekLayout
+from validation_results import (Violation, ValidationReport, SEVERITY_ERROR, SEVERITY_WARNING,
+                                KIND_SHORT_REST, KIND_WEEKLY_HOURS)
+
+# 按实际上下班时间检查班次间隔：
+# 班次时间取自 完整标识.json 中 shifts 的 startTime/endTime，排班表班次信息行（如 '班次Y16综: 15:50-次日00:00'）
+# 中的时间段优先；结束时间带'次日'或不晚于开始时间的班次（Y16综、Y18普）跨到第二天结束。
+# 每个排班换算为绝对的开始/结束时间（分钟），整张表展开后按 (员工, 开始时间) 排序，
+# 相邻两个排班的休息间隔是一次错位相减；每周工作时长是时长矩阵按自然周求和。
+# 没有时间的班次（休息、假期、未知班次）不参与计算。
+
+DEFAULT_MIN_REST_HOURS = 11
+MINUTES_PER_DAY = 24 * 60
+_CLOCK = re.compile(r'^\s*(次日)?\s*(\d{1,2}):(\d{2})\s*$')
+
+
+def parse_clock(text):
+    """'08:50'、'24:00'、'次日02:00' -> 当天零点起的分钟数（'次日'加24小时），无法识别时返回 None"""
+    match = _CLOCK.match(str(text or ''))
+    if not match:
+        return None
+    hours, minutes = int(match.group(2)), int(match.group(3))
+    if hours > 24 or minutes > 59:
+        return None
+    return hours * 60 + minutes + (MINUTES_PER_DAY if match.group(1) else 0)
+
+
+def window_minutes(start_text, end_text):
+    """(开始分钟, 时长分钟)；结束时间不晚于开始时间时视为次日结束，无法识别时返回 None"""
+    start, end = parse_clock(start_text), parse_clock(end_text)
+    if start is None or end is None:
+        return None
+    if end <= start:
+        end += MINUTES_PER_DAY
+    return start, end - start
+
+
+class ShiftTimeTable:
+    """按班次编码查表的开始时间和时长（分钟）"""
+
+    def __init__(self, vocabulary, windows=None):
+        size = len(vocabulary)
+        self.start = np.zeros(size, dtype=np.int64)
+        self.duration = np.zeros(size, dtype=np.int64)
+        self.known = np.zeros(size, dtype=bool)
+        for code, info in vocabulary.shift_info.items():
+            self._set(vocabulary, code, window_minutes(info.get('startTime'), info.get('endTime')))
+        # 排班表班次信息行中的时间段优先
+        for code, text in windows or ():
+            start_text, _, end_text = text.partition('-')
+            self._set(vocabulary, code, window_minutes(start_text, end_text))
+
+    def _set(self, vocabulary, code, window):
+        code_id = vocabulary.index.get(code)
+        if code_id is None or window is None:
+            return
+        self.start[code_id], self.duration[code_id] = window
+        self.known[code_id] = True
+
+
+class RestIntervalValidator:
+    def __init__(self, vocabulary, windows=None, min_rest_hours=DEFAULT_MIN_REST_HOURS, max_week_hours=None):
+        self.vocabulary = vocabulary
+        self.windows = list(windows or [])
+        self.min_rest_hours = min_rest_hours
+        self.max_week_hours = max_week_hours   # None 时只统计每周工时，不检查上限
+
+    def time_table(self):
+        # 词表在编码过程中可能新增班次，每次检查时按当前词表建表
+        return ShiftTimeTable(self.vocabulary, self.windows)
+
+    def assignments(self, codes, calendar):
+        """有上下班时间的排班，按 (员工, 开始时间) 排序：(行, 列, 开始, 结束)，时间为绝对分钟数"""
+        codes = np.asarray(codes)
+        table = self.time_table()
+        day_start = np.array([d.toordinal() * MINUTES_PER_DAY if d is not None else -1
+                              for d in calendar.dates[:codes.shape[1]]], dtype=np.int64)
+        rows, cols = np.nonzero(table.known[codes] & (day_start >= 0)[None, :])
+        shift = codes[rows, cols]
+        start = day_start[cols] + table.start[shift]
+        end = start + table.duration[shift]
+        order = np.lexsort((start, rows))
+        return rows[order], cols[order], start[order], end[order]
+
+    def short_rests(self, codes, calendar):
+        """相邻两个排班间隔不足 min_rest_hours 的位置：DataFrame(row, prev_col, next_col, rest_hours)"""
+        rows, cols, start, end = self.assignments(codes, calendar)
+        gaps = start[1:] - end[:-1]
+        index = np.flatnonzero((rows[1:] == rows[:-1]) & (gaps < self.min_rest_hours * 60))
+        return pd.DataFrame({
+            'row': rows[index],
+            'prev_col': cols[index],
+            'next_col': cols[index + 1],
+            'rest_hours': gaps[index] / 60,
+        })
+
+    def weekly_hours(self, codes, calendar):
+        """每人每周工作时长：(WeekLayout, (员工 × 周) 的小时数)，班次时长计入开始当天所在的周"""
+        codes = np.asarray(codes)
+        table = self.time_table()
+        layout = WeekLayout(calendar)
+        return layout, layout.weekly_sum(table.duration[codes]) / 60
+
+    def violations(self, names, codes, calendar, depts=None):
+        codes = np.asarray(codes)
+        labels = [calendar.label(i) for i in range(codes.shape[1])]
+        result = []
+        for gap in self.short_rests(codes, calendar).itertuples(index=False):
+            row = int(gap.row)
+            shifts = f"{self.vocabulary.codes[codes[row, gap.prev_col]]}→{self.vocabulary.codes[codes[row, gap.next_col]]}"
+            result.append(Violation(KIND_SHORT_REST, SEVERITY_ERROR, employee=names[row],
+                                    dept=depts[row] if depts is not None else None, shift=shifts,
+                                    start=labels[gap.prev_col], end=labels[gap.next_col],
+                                    start_pos=int(gap.prev_col), end_pos=int(gap.next_col),
+                                    value=round(float(gap.rest_hours), 1), limit=self.min_rest_hours))
+
+        if self.max_week_hours is not None:
+            layout, hours = self.weekly_hours(codes, calendar)
+            rows, weeks = np.nonzero(hours > self.max_week_hours)
+            for row, week in zip(rows.tolist(), weeks.tolist()):
+                first, last = int(layout.first[week]), int(layout.last[week])
+                result.append(Violation(KIND_WEEKLY_HOURS, SEVERITY_WARNING, employee=names[row],
+                                        dept=depts[row] if depts is not None else None,
+                                        start=layout.labels[first], end=layout.labels[last],
+                                        start_pos=first, end_pos=last,
+                                        value=round(float(hours[row, week]), 1), limit=self.max_week_hours))
+        return result
+
+    def report(self, names, codes, calendar, depts=None, source=None):
+        names = list(names)
+        codes = np.asarray(codes)
+        violations = self.violations(names, codes, calendar, depts)
+        table = self.time_table()
+        work = self.vocabulary.is_work_table()[codes]
+        _, hours = self.weekly_hours(codes, calendar)
+        metrics = {'rest_intervals': {
+            'min_rest_hours': self.min_rest_hours,
+            'max_week_hours': self.max_week_hours,
+            'timed_assignments': int(table.known[codes].sum()),
+            'untimed_assignments': int((work & ~table.known[codes]).sum()),
+            'short_rests': sum(v.kind == KIND_SHORT_REST for v in violations),
+            'weekly_hours_max': round(float(hours.max()), 1) if hours.size else 0.0,
+            'weekly_hours_mean': round(float(hours.mean()), 1) if hours.size else 0.0,
+        }}
+        return ValidationReport(source=source, violations=violations, metrics=metrics)
+
+
+def main(argv=None):
+    import argparse
+    from streaming_reader import StreamingScheduleReader
+
+    parser = argparse.ArgumentParser(description='按班次的实际上下班时间检查班次间休息间隔和每周工时')
+    parser.add_argument('file', help='排班表工作簿')
+    parser.add_argument('--sheet', default='排班表', help='排班页签名称')
+    parser.add_argument('--min-rest', type=float, default=DEFAULT_MIN_REST_HOURS,
+                        help=f'两个班次之间的最短休息小时数（默认{DEFAULT_MIN_REST_HOURS}）')
+    parser.add_argument('--max-week-hours', type=float, help='每周工作时长上限（小时，默认只统计不检查）')
+    parser.add_argument('--hours-csv', metavar='文件', help='每人每周工作时长写入CSV文件')
+    args = parser.parse_args(argv)
+
+    vocabulary = ShiftVocabulary.from_sources()
+    with StreamingScheduleReader(args.file, args.sheet, vocabulary=vocabulary) as reader:
+        rows = list(reader.iter_employees())
+        calendar = reader.calendar
+        windows = reader.shift_windows
+    codes = np.vstack([row.codes for row in rows]) if rows else np.zeros((0, len(calendar)), dtype=vocabulary.dtype)
+    names = [row.name for row in rows]
+    validator = RestIntervalValidator(vocabulary, windows, args.min_rest, args.max_week_hours)
+    report = validator.report(names, codes, calendar, [row.dept for row in rows], source=args.file)
+
+    metrics = report.metrics['rest_intervals']
+    print(f"员工数量: {len(rows)}, 按时间计算的排班: {metrics['timed_assignments']}个"
+          f"（没有上下班时间的上班班次{metrics['untimed_assignments']}个）")
+    print(f"班次间休息不足{args.min_rest:g}小时: {metrics['short_rests']}处")
+    print(f"每周工时: 最多{metrics['weekly_hours_max']}小时, 平均{metrics['weekly_hours_mean']}小时")
+    for violation in report:
+        print(f"- {violation.employee}: {violation.describe()}")
+
+    if args.hours_csv:
+        layout, hours = validator.weekly_hours(codes, calendar)
+        columns = [f"{layout.labels[first]}~{layout.labels[last]}" for first, last in zip(layout.first, layout.last)]
+        frame = pd.DataFrame(hours.round(2), columns=columns)
+        frame.insert(0, '部门', [row.dept for row in rows])
+        frame.insert(1, '姓名', names)
+        frame.to_csv(args.hours_csv, index=False, encoding='utf-8-sig')
+        print(f"每周工时已保存到 {args.hours_csv}")
+    return report
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"检查班次间休息时出错: {e}")
+        sys.exit(1)
@@ -0,0 +1,422 @@
+import sys
+import json
+import time
+import argparse
+import importlib.util
+from datetime import timedelta
+
+import numpy as np
+
+from shift_vocabulary import DEFAULT_IDENTIFIER_FILE, EMPTY_CODE, REST_CODES, LEAVE_CODES, WEEKEND_G_CODES
+from consecutive_runs import SHIFT_CONSECUTIVE_LIMITS, DEFAULT_CONSECUTIVE_LIMIT, MAX_CONSECUTIVE_WORK_DAYS
+from scheduling_engine import (SchedulingInputs, SchedulingEngine, ScheduleResult, allowed_day_mask,
+                               position_matches, BASE_SHIFT, REST_SHIFT, Y16_SHIFT, Y16_POST_REST_DAYS, TAIL_DAYS)
+from weekend_g_rules import SATURDAY_REQUIRED_SHIFTS
+
+# 约束求解排班（CP-SAT）：
+# 把 IMPORTANT_SCHEDULING_RULES.md 的规则和 validate_work_days_per_week 的上五休二要求写成约束模型，
+# 在时间预算内多线程求解，并均衡各岗位（对应排班表的部门）员工的周末G值次数；
+# 以贪心排班引擎的结果（可沿用上个月的轮换位置）作为初始解，上个月末尾的排班作为边界条件。
+# 未安装 ortools 时退回贪心排班引擎的结果
+
+HAS_ORTOOLS = importlib.util.find_spec('ortools') is not None
+
+MIN_WEEKLY_WORK_DAYS = 4     # 上五休二：每个完整的自然周工作4-6天
+MAX_WEEKLY_WORK_DAYS = 6
+PRE_WEEK_DAYS = 7            # 值Y16综前一周（前7天）至少休息2天，否则值班前一天休息
+MIN_PRE_WEEK_REST = 2
+
+# 目标函数权重：无人可排的班次 > 周末G值不均衡 > 工作日休息
+UNFILLED_PENALTY = 1000
+BALANCE_WEIGHT = 10
+WEEKDAY_REST_WEIGHT = 1
+
+DEFAULT_TIME_LIMIT = 5.0
+DEFAULT_WORKERS = 8
+
+
+def tail_from_workbook(file_path, days=TAIL_DAYS):
+    """从上个月的排班表工作簿（流式读取）取得末尾状态，按工号索引"""
+    from streaming_reader import StreamingScheduleReader
+
+    tail = {}
+    with StreamingScheduleReader(file_path) as reader:
+        dates = reader.calendar.dates
+        is_weekend_g = reader.vocabulary.is_weekend_g_table()
+        for row in reader.iter_employees():
+            g_days = np.flatnonzero(is_weekend_g[row.codes])
+            tail[row.employee_id] = (list(reader.vocabulary.decode(row.codes[-days:])),
+                                     dates[g_days[-1]] if len(g_days) else None)
+    return tail
+
+
+def _week_monday(day):
+    return day - timedelta(days=day.weekday())
+
+
+def balance_groups(employees):
+    """周末G值均衡的分组 {组: 行号}：按岗位（个人、对公、风险核查，与排班表的部门对应），没有岗位时按部门"""
+    keys = employees['position'].where(employees['position'] != '', employees['dept'])
+    return {key: list(rows) for key, rows in keys.groupby(keys).groups.items()}
+
+
+class RosterSolver:
+    def __init__(self, inputs, vocabulary=None, time_limit=DEFAULT_TIME_LIMIT, workers=DEFAULT_WORKERS):
+        self.inputs = inputs
+        self.engine = SchedulingEngine(inputs, vocabulary)
+        self.vocabulary = self.engine.vocabulary
+        self.time_limit = time_limit
+        self.workers = workers
+
+    def _slots(self, employees, on_leave):
+        """需要每天一人值班的特殊班次：[(岗位, 班次, 可排员工行号列表)]（顺序与排班顺序一致）"""
+        inputs = self.inputs
+        row_of = {number: i for i, number in enumerate(employees['number'])}
+        positions = employees['position'].tolist()
+        slots = []
+        for (position, shift), numbers in inputs.orders.items():
+            if shift in (BASE_SHIFT,) + REST_CODES + LEAVE_CODES:
+                continue
+            rows = [row_of[n] for n in numbers
+                    if n in row_of and not on_leave[row_of[n]] and inputs.can_work(n, shift)
+                    and position_matches(positions[row_of[n]], position)]
+            if rows:
+                slots.append((position, shift, rows))
+        return slots
+
+    def solve(self, year, month, previous_tail=None, rotation_state=None, hint=None):
+        """求解 year 年 month 月的排班；previous_tail 为上个月的末尾状态，hint 为初始解（默认由贪心引擎生成）"""
+        start = time.perf_counter()
+        hint = hint if hint is not None else self.engine.generate(year, month, rotation_state, previous_tail)
+        if not HAS_ORTOOLS:
+            hint.stats.update({'solver': 'greedy', 'status': 'NO_ORTOOLS',
+                               'wall_time': round(time.perf_counter() - start, 3)})
+            return hint
+
+        from ortools.sat.python import cp_model
+
+        vocabulary = self.vocabulary
+        inputs = self.inputs
+        employees = hint.employees
+        calendar = hint.calendar
+        n_rows, n_days = hint.codes.shape
+        weekday = calendar.table['weekday'].to_numpy()
+        dates = calendar.dates
+        numbers = employees['number'].tolist()
+        previous_tail = previous_tail or {}
+        on_leave = vocabulary.mask_table(LEAVE_CODES)[hint.codes].all(axis=1)
+        slots = self._slots(employees, on_leave)
+
+        # 参与排班的员工：出现在排班顺序中且不在整月休假
+        scheduled = np.zeros(n_rows, dtype=bool)
+        row_of = {number: i for i, number in enumerate(numbers)}
+        for numbers_in_order in inputs.orders.values():
+            for number in numbers_in_order:
+                if number in row_of:
+                    scheduled[row_of[number]] = True
+        scheduled &= ~on_leave
+        # 既不能值基础白班也不能值特殊班次的员工没有可排的班次，保留贪心结果
+        has_option = np.zeros(n_rows, dtype=bool)
+        for _, _, rows in slots:
+            has_option[rows] = True
+        has_option |= [inputs.can_work(number, BASE_SHIFT) for number in numbers]
+        scheduled &= has_option
+
+        # 贪心结果中未排班的单元格视为休息
+        hint_codes = vocabulary.decode(hint.codes)
+        hint_codes[hint.codes == EMPTY_CODE] = REST_SHIFT
+        hints = {}
+
+        model = cp_model.CpModel()
+        x = {}           # (行, 日, 班次) -> 布尔变量
+        slot_of = {}     # (行, 班次) -> 岗位
+        can_base = [scheduled[r] and inputs.can_work(numbers[r], BASE_SHIFT) for r in range(n_rows)]
+        for r in np.flatnonzero(scheduled):
+            for d in range(n_days):
+                x[r, d, REST_SHIFT] = model.NewBoolVar('')
+                if can_base[r] and weekday[d] < 5:
+                    x[r, d, BASE_SHIFT] = model.NewBoolVar('')
+        for position, shift, rows in slots:
+            mask = allowed_day_mask(shift, calendar)
+            for r in rows:
+                if (r, shift) in slot_of:
+                    continue
+                slot_of[r, shift] = position
+                for d in np.flatnonzero(mask):
+                    x[r, int(d), shift] = model.NewBoolVar('')
+
+        options = {}
+        for (r, d, shift), var in x.items():
+            options.setdefault((r, d), {})[shift] = var
+        # 每人每天恰好一个班次（含休息）
+        for cell_options in options.values():
+            model.AddExactlyOne(cell_options.values())
+
+        # 规则3：同一岗位同一天同一特殊班次恰好一人（无人可排时计入惩罚）
+        unfilled = {}
+        for position, shift, rows in slots:
+            for d in np.flatnonzero(allowed_day_mask(shift, calendar)):
+                d = int(d)
+                holders = [x[r, d, shift] for r in rows if slot_of.get((r, shift)) == position and (r, d, shift) in x]
+                slack = model.NewBoolVar('')
+                model.Add(sum(holders) + slack == 1)
+                unfilled[position, shift, d] = slack
+                hints[slack] = int(not any(hint_codes[r, d] == shift and hint.positions[r, d] == position
+                                           for r in rows))
+
+        def extended(values_of_tail, var_of_day):
+            """上个月末尾的固定取值 + 本月变量组成的序列"""
+            return list(values_of_tail) + [var_of_day(d) for d in range(n_days)]
+
+        def add_window_limits(sequence, limit):
+            """任意连续 limit+1 天之和不超过 limit（只约束包含本月变量的窗口）"""
+            tail_len = len(sequence) - n_days
+            for end in range(max(limit + 1, tail_len + 1), len(sequence) + 1):
+                window = sequence[end - limit - 1:end]
+                model.Add(sum(window) <= limit)
+
+        weeks = calendar.table['iso_week'].to_numpy()
+        full_weeks = [days.tolist() for days in (np.flatnonzero(weeks == week) for week in dict.fromkeys(weeks.tolist()))
+                      if len(days) == 7]
+        work = {}
+        for r in np.flatnonzero(scheduled):
+            tail_codes = previous_tail.get(numbers[r], ([], None))[0]
+            for d in range(n_days):
+                work[r, d] = 1 - options[r, d][REST_SHIFT]
+            # 上五休二：连续上班不超过7天（含上个月末尾），每个完整的自然周工作4-6天
+            tail_work = [0 if (code in REST_CODES + LEAVE_CODES or code == '') else 1 for code in tail_codes]
+            add_window_limits(extended(tail_work, lambda d: work[r, d]), MAX_CONSECUTIVE_WORK_DAYS)
+            for days in full_weeks:
+                week_work = sum(work[r, d] for d in days)
+                model.Add(week_work <= MAX_WEEKLY_WORK_DAYS)
+                if sum(len(options[r, d]) > 1 for d in days) >= MIN_WEEKLY_WORK_DAYS:
+                    model.Add(week_work >= MIN_WEEKLY_WORK_DAYS)
+
+            # 规则4：特殊班次连值上限（含上个月末尾）
+            for shift in [s for (row, s) in slot_of if row == r]:
+                limit = SHIFT_CONSECUTIVE_LIMITS.get(shift, DEFAULT_CONSECUTIVE_LIMIT)
+                on_shift = extended([1 if code == shift else 0 for code in tail_codes],
+                                    lambda d, s=shift: options[r, d].get(s, 0))
+                add_window_limits(on_shift, limit)
+            if can_base[r]:
+                base = extended([1 if code == BASE_SHIFT else 0 for code in tail_codes],
+                                lambda d: options[r, d].get(BASE_SHIFT, 0))
+                add_window_limits(base, SHIFT_CONSECUTIVE_LIMITS.get(BASE_SHIFT, DEFAULT_CONSECUTIVE_LIMIT))
+
+            # 值完Y16综后休息两天
+            if (r, Y16_SHIFT) in slot_of:
+                y16 = extended([1 if code == Y16_SHIFT else 0 for code in tail_codes],
+                               lambda d: options[r, d].get(Y16_SHIFT, 0))
+                offset = len(tail_codes)
+                for i in range(max(0, offset - Y16_POST_REST_DAYS), offset + n_days - 1):
+                    ended = y16[i] - y16[i + 1]
+                    for k in range(1, Y16_POST_REST_DAYS + 1):
+                        d = i + k - offset
+                        if 0 <= d < n_days and not isinstance(ended, int):
+                            model.Add(ended <= options[r, d][REST_SHIFT])
+                        elif 0 <= d < n_days and ended == 1:
+                            model.Add(options[r, d][REST_SHIFT] == 1)
+
+            # 值Y16综前一周（前7天）休息不足2天且前一个周末不是双休时，值班前一天休息
+            if (r, Y16_SHIFT) in slot_of:
+                rest = [options[r, d][REST_SHIFT] for d in range(n_days)]
+                for d in range(1, n_days):
+                    if (r, d, Y16_SHIFT) not in x:
+                        continue
+                    y16_start = model.NewBoolVar('')
+                    model.Add(y16_start >= x[r, d, Y16_SHIFT] - options[r, d - 1].get(Y16_SHIFT, 0))
+                    enough_rest = model.NewBoolVar('')
+                    model.Add(sum(rest[max(0, d - PRE_WEEK_DAYS):d]) >= MIN_PRE_WEEK_REST).OnlyEnforceIf(enough_rest)
+                    reasons = [y16_start.Not(), rest[d - 1], enough_rest]
+                    saturdays = [day for day in range(d - 1) if weekday[day] == 5]
+                    if saturdays:
+                        double_rest = model.NewBoolVar('')
+                        model.AddImplication(double_rest, rest[saturdays[-1]])
+                        model.AddImplication(double_rest, rest[saturdays[-1] + 1])
+                        reasons.append(double_rest)
+                    model.AddBoolOr(reasons)
+
+        # 规则7：G值-A/B 周日安排时周六必须相同班次；同一员工不能连续两个周末值G值
+        weekend_days = {}
+        for d in np.flatnonzero(weekday >= 5):
+            weekend_days.setdefault(_week_monday(dates[d]), []).append(int(d))
+        weekends = sorted(weekend_days)
+        weekend_g_count = {}
+        for r in sorted({r for (r, shift) in slot_of if shift in WEEKEND_G_CODES}):
+            for shift in SATURDAY_REQUIRED_SHIFTS:
+                for d in np.flatnonzero(weekday == 6):
+                    d = int(d)
+                    if (r, d, shift) in x and d > 0 and weekday[d - 1] == 5:
+                        model.Add(x[r, d, shift] <= options[r, d - 1].get(shift, 0))
+            on_duty = []
+            for monday in weekends:
+                duty_vars = [options[r, d][s] for d in weekend_days[monday] for s in WEEKEND_G_CODES
+                             if s in options[r, d]]
+                duty = model.NewBoolVar('')
+                for var in duty_vars:
+                    model.AddImplication(var, duty)
+                model.Add(duty <= sum(duty_vars))
+                on_duty.append(duty)
+                hints[duty] = int(any(hint_codes[r, d] in WEEKEND_G_CODES for d in weekend_days[monday]))
+            for (monday, duty), (next_monday, next_duty) in zip(zip(weekends, on_duty), zip(weekends[1:], on_duty[1:])):
+                if next_monday - monday == timedelta(days=7):
+                    model.Add(duty + next_duty <= 1)
+            last_g = previous_tail.get(numbers[r], ([], None))[1]
+            if weekends and last_g is not None and weekends[0] - _week_monday(last_g) == timedelta(days=7):
+                model.Add(on_duty[0] == 0)
+            weekend_g_count[r] = sum(options[r, d][s] for d in range(n_days) for s in WEEKEND_G_CODES
+                                     if s in options[r, d])
+
+        # 目标：无人可排的班次最少，各岗位周末G值次数的极差最小，工作日尽量不休息
+        spreads = []
+        groups = balance_groups(employees)
+        for group_rows in groups.values():
+            counts = [weekend_g_count[r] for r in group_rows if r in weekend_g_count]
+            if len(counts) < 2:
+                continue
+            top = model.NewIntVar(0, n_days, '')
+            bottom = model.NewIntVar(0, n_days, '')
+            for count in counts:
+                model.Add(top >= count)
+                model.Add(bottom <= count)
+            spreads.append(top - bottom)
+        weekday_rest = [options[r, d][REST_SHIFT] for (r, d) in options
+                        if weekday[d] < 5 and len(options[r, d]) > 1]
+        model.Minimize(UNFILLED_PENALTY * sum(unfilled.values()) + BALANCE_WEIGHT * sum(spreads)
+                       + WEEKDAY_REST_WEIGHT * sum(weekday_rest))
+
+        # 初始解：贪心引擎的排班结果（含辅助变量）
+        for (r, d, shift), var in x.items():
+            model.AddHint(var, int(hint_codes[r, d] == shift))
+        for var, value in hints.items():
+            model.AddHint(var, value)
+
+        solver = cp_model.CpSolver()
+        solver.parameters.num_workers = int(self.workers)
+        # 保留初始解在预处理后仍然可用
+        solver.parameters.keep_all_feasible_solutions_in_presolve = True
+        variables = [model.GetIntVarFromProtoIndex(i) for i in range(len(model.Proto().variables))]
+        best = None
+        statuses = []
+
+        # 第一阶段：固定为初始解求出辅助变量的取值，得到完整的初始可行解
+        solver.parameters.fix_variables_to_their_hinted_value = True
+        solver.parameters.max_time_in_seconds = float(self.time_limit)
+        status = solver.Solve(model)
+        statuses.append(solver.StatusName(status))
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            best = (solver.ObjectiveValue(), [solver.Value(v) for v in variables])
+            model.ClearHints()
+            for var, value in zip(variables, best[1]):
+                model.AddHint(var, value)
+
+        # 第二阶段：在剩余的时间预算内多线程优化
+        solver.parameters.fix_variables_to_their_hinted_value = False
+        solver.parameters.max_time_in_seconds = max(self.time_limit - (time.perf_counter() - start), 0.1)
+        status = solver.Solve(model)
+        statuses.append(solver.StatusName(status))
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) and (best is None or solver.ObjectiveValue() <= best[0]):
+            best = (solver.ObjectiveValue(), [solver.Value(v) for v in variables])
+
+        stats = {
+            'solver': 'cp-sat',
+            'status': statuses[-1] if best is None or statuses[-1] == 'OPTIMAL' else 'FEASIBLE',
+            'objective': best[0] if best else None,
+            'best_bound': solver.BestObjectiveBound(),
+            'variables': len(x),
+            'wall_time': round(time.perf_counter() - start, 3),
+        }
+        if best is None:
+            hint.stats.update(stats)
+            return hint
+        values = best[1]
+
+        codes = hint.codes.copy()
+        positions = np.full(codes.shape, '', dtype=object)
+        for (r, d, shift), var in x.items():
+            if values[var.Index()]:
+                codes[r, d] = vocabulary.index[shift]
+                if (r, shift) in slot_of:
+                    positions[r, d] = slot_of[r, shift]
+
+        # 无人可排的日期合并为连续区间；轮换位置为每个岗位班次最后一位值班员工的下一位
+        gaps = {}
+        for (position, shift, d), slack in unfilled.items():
+            if values[slack.Index()]:
+                gaps.setdefault((position, shift), []).append(d)
+        unfilled_blocks = []
+        for (position, shift), days in gaps.items():
+            block = [days[0]]
+            for d in days[1:]:
+                if d != block[-1] + 1:
+                    unfilled_blocks.append((position, shift, block))
+                    block = []
+                block.append(d)
+            unfilled_blocks.append((position, shift, block))
+        rotation = dict(hint.rotation_state)
+        for position, shift, rows in slots:
+            held = [(d, rows.index(r)) for r in rows for d in range(n_days)
+                    if positions[r, d] == position and codes[r, d] == vocabulary.index[shift]]
+            if held:
+                rotation[f'{position}/{shift}'] = (max(held)[1] + 1) % len(rows)
+
+        stats['weekend_g_spread'] = {}
+        for group, group_rows in groups.items():
+            counts = vocabulary.is_weekend_g_table()[codes[group_rows]].sum(axis=1)
+            counts = counts[[r in weekend_g_count for r in group_rows]]
+            if len(counts):
+                stats['weekend_g_spread'][group] = int(counts.max() - counts.min())
+        return ScheduleResult(year, month, employees, calendar, codes, vocabulary, positions, rotation,
+                              unfilled_blocks, stats)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='用约束求解器生成整月排班')
+    parser.add_argument('year', type=int)
+    parser.add_argument('month', type=int)
+    parser.add_argument('--identifiers', default=DEFAULT_IDENTIFIER_FILE, help='完整标识.json 路径')
+    parser.add_argument('--rules', help="包含'规则'页签的工作簿（可选）")
+    parser.add_argument('--previous', help='上个月的排班表工作簿（用于跨月边界约束）')
+    parser.add_argument('--rotation', help='上个月的轮换位置JSON文件（求解后会更新）')
+    parser.add_argument('-t', '--time-limit', type=float, default=DEFAULT_TIME_LIMIT, help='求解时间上限（秒）')
+    parser.add_argument('-j', '--workers', type=int, default=DEFAULT_WORKERS, help='求解线程数')
+    parser.add_argument('-o', '--output', help='输出排班表 .xlsx')
+    args = parser.parse_args(argv)
+
+    try:
+        inputs = SchedulingInputs.load(args.identifiers, args.rules)
+        previous_tail = tail_from_workbook(args.previous) if args.previous else None
+        rotation_state = None
+        if args.rotation:
+            try:
+                with open(args.rotation, 'r', encoding='utf-8') as f:
+                    rotation_state = json.load(f)
+            except FileNotFoundError:
+                rotation_state = None
+        solver = RosterSolver(inputs, time_limit=args.time_limit, workers=args.workers)
+        result = solver.solve(args.year, args.month, previous_tail, rotation_state)
+        stats = result.stats
+        if stats.get('status') == 'NO_ORTOOLS':
+            print("未安装 ortools，使用贪心排班引擎的结果")
+        print(f"求解状态: {stats.get('status')}，目标值: {stats.get('objective')}，用时{stats.get('wall_time')}秒")
+        for group, spread in stats.get('weekend_g_spread', {}).items():
+            print(f"- {group}: 周末G值次数极差 {spread}")
+
+        report = result.check_rules()
+        print(f"规则检查问题数: {len(report)}")
+        for violation in report.violations[:20]:
+            print(f"- {violation.employee or violation.dept}: {violation.describe()}")
+        if args.output:
+            result.save(args.output, inputs.shifts)
+            print(f"排班表已写入: {args.output}")
+        if args.rotation:
+            with open(args.rotation, 'w', encoding='utf-8') as f:
+                json.dump(result.rotation_state, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"求解排班时出错: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,440 @@
+import os
+import sys
+import json
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from date_columns import calendar_from_labels, WEEKDAY_NAMES
+from shift_vocabulary import ShiftVocabulary, EMPTY_CODE, WEEKEND_G_CODES
+from streaming_reader import ScheduleRow, StreamingScheduleReader
+
+# 多年排班历史的二进制存储：
+# 每个月'排班表'页签的 (员工 × 日期) 班次编码矩阵按日期顺序追加到一个定宽的 uint8 文件中，
+# 文件按"每天一行、每位员工一列"排列（codes.u8，宽度为员工容量），日期序号另存为 int32（dates.i4），
+# 员工和班次字典、已导入的月份记录在 meta.json 中。查询时两个文件都以只读内存映射打开，
+# 按日期二分查找得到行范围后直接切片，不需要重新解析 XLSX，内存只与取出的切片大小有关。
+# 取出的编码矩阵、日历索引和 ScheduleRow 与流式读取的结果相同，
+# 可直接交给 StreamingScheduleValidator、MonthChainValidator、ConsecutiveRunAnalyzer 等分析器。
+# 员工会调动部门：每个月每位员工的部门编码另存为 (月份 × 员工容量) 的 int16 矩阵（depts.i2，0 表示该月没有该员工），
+# 部门字典记录在 meta.json 中；按部门查询时按每一天所在月份的部门筛选，meta.json 中的部门只是最近一个月的部门。
+
+STORE_FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+CODES_FILE = 'codes.u8'
+DATES_FILE = 'dates.i4'
+DEPTS_FILE = 'depts.i2'
+MIN_WIDTH = 64
+MAX_SHIFTS = 256   # 定宽文件每个单元格一个字节
+
+
+def _as_ordinal(value):
+    """date / 'YYYY-MM-DD' / None -> 日期序号（None 保持不变）"""
+    if value is None or isinstance(value, (int, np.integer)):
+        return value
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return value.toordinal()
+
+
+def date_label(ordinal):
+    """与排班表表头相同格式的日期标签：'YYYY/M/D\\n周X'"""
+    day = date.fromordinal(int(ordinal))
+    return f'{day.year}/{day.month}/{day.day}\n周{WEEKDAY_NAMES[day.weekday()]}'
+
+
+class StoreView:
+    """存储中一段日期、一组员工的只读视图，接口与 StreamingScheduleReader 相同（calendar、vocabulary、iter_employees）
+
+    指定部门时只保留员工在该部门期间的排班，其余日期视为空；员工的部门为该部门，
+    否则为日期范围内最后所在的部门。
+    """
+
+    def __init__(self, store, rows, columns, dept=None):
+        self.store = store
+        self.columns = columns
+        self.dept = dept
+        self.ordinals = np.asarray(store.dates[rows])
+        self.calendar = calendar_from_labels([date_label(o) for o in self.ordinals])
+        self.vocabulary = store.vocabulary
+        self._rows = rows
+
+    @property
+    def codes(self):
+        """(员工 × 日期) 编码矩阵"""
+        codes = self.store.codes[self._rows][:, self.columns]
+        if self.dept is not None:
+            codes = np.where(self.store.dept_mask(self.dept, self._rows, self.columns), codes, EMPTY_CODE)
+        return codes.T
+
+    @property
+    def employees(self):
+        employees = self.store.employees.iloc[self.columns].reset_index(drop=True)
+        employees['dept'] = self.dept if self.dept is not None else self.store.range_depts(self._rows, self.columns)
+        return employees
+
+    def iter_employees(self):
+        codes = self.codes
+        for i, emp in enumerate(self.employees.itertuples(index=False)):
+            yield ScheduleRow(i, emp.dept, emp.employee_id, emp.name, np.ascontiguousarray(codes[i]))
+
+
+class RosterStore:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != STORE_FORMAT_VERSION:
+                raise ValueError(f"排班存储格式版本不符: {meta.get('version')}")
+        else:
+            meta = {'version': STORE_FORMAT_VERSION, 'width': MIN_WIDTH, 'days': 0,
+                    'shifts': [''], 'depts': [''], 'employees': [], 'months': []}
+        self.meta = meta
+        self.vocabulary = ShiftVocabulary(meta['shifts'][1:])
+        self.employees = pd.DataFrame(meta['employees'], columns=['key', 'employee_id', 'name', 'dept'])
+        self.employee_index = {key: i for i, key in enumerate(self.employees['key'])}
+        self.dept_names = list(meta['depts'])
+        self.dept_index = {name: i for i, name in enumerate(self.dept_names)}
+        self._open_maps()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _open_maps(self):
+        days, width, months = self.meta['days'], self.meta['width'], len(self.meta['months'])
+        if days:
+            self.codes = np.memmap(self._file(CODES_FILE), dtype=np.uint8, mode='r', shape=(days, width))
+            self.dates = np.memmap(self._file(DATES_FILE), dtype=np.int32, mode='r', shape=(days,))
+        else:
+            self.codes = np.zeros((0, width), dtype=np.uint8)
+            self.dates = np.zeros(0, dtype=np.int32)
+        if months:
+            self.depts = np.memmap(self._file(DEPTS_FILE), dtype=np.int16, mode='r', shape=(months, width))
+        else:
+            self.depts = np.zeros((0, width), dtype=np.int16)
+
+    def _write_meta(self):
+        self.meta['shifts'] = list(self.vocabulary.codes)
+        self.meta['depts'] = list(self.dept_names)
+        self.meta['employees'] = self.employees.to_dict('records')
+        tmp_path = self._file(META_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        os.replace(tmp_path, self._file(META_FILE))
+
+    def __len__(self):
+        return self.meta['days']
+
+    @property
+    def months(self):
+        return list(self.meta['months'])
+
+    # ---- 写入 ----
+
+    def _month_rows(self, month):
+        """第 month 个已导入月份在编码文件中的行切片"""
+        months = self.meta['months']
+        end = months[month + 1]['row'] if month + 1 < len(months) else self.meta['days']
+        return slice(months[month]['row'], end)
+
+    def _dept_code(self, dept):
+        code = self.dept_index.get(dept)
+        if code is None:
+            code = len(self.dept_names)
+            self.dept_names.append(dept)
+            self.dept_index[dept] = code
+        return code
+
+    def _register_employees(self, rows, latest=True):
+        """登记员工并返回每行对应的列号；员工数超过文件宽度时按倍数扩宽
+
+        latest 为 True（导入的是最近的月份）时，已有员工的姓名和部门更新为本次导入的取值；
+        重新导入较早的月份不改变员工的当前姓名和部门。
+        """
+        columns = []
+        new = []
+        for row in rows:
+            key = row.employee_id or row.name
+            column = self.employee_index.get(key)
+            if column is None:
+                column = len(self.employee_index)
+                self.employee_index[key] = column
+                new.append({'key': key, 'employee_id': row.employee_id, 'name': row.name, 'dept': row.dept})
+            columns.append(column)
+        if new:
+            self.employees = pd.concat([self.employees, pd.DataFrame(new)], ignore_index=True)
+        columns = np.asarray(columns, dtype=np.int64)
+        if len(columns) and latest:
+            self.employees.loc[columns, 'name'] = [row.name for row in rows]
+            self.employees.loc[columns, 'dept'] = [row.dept for row in rows]
+        if len(self.employees) > self.meta['width']:
+            self._widen(max(self.meta['width'] * 2, len(self.employees)))
+        return columns
+
+    def _widen(self, width):
+        """按新宽度重写编码文件和部门文件（只在员工数超过容量时发生，每次容量至少翻倍）"""
+        old_width = self.meta['width']
+        self.dates = None
+        for name, attr, dtype in ((CODES_FILE, 'codes', np.uint8), (DEPTS_FILE, 'depts', np.int16)):
+            old = getattr(self, attr)
+            if not len(old):
+                continue
+            tmp_path = self._file(name + '.tmp')
+            widened = np.memmap(tmp_path, dtype=dtype, mode='w+', shape=(len(old), width))
+            widened[:, :old_width] = old
+            widened.flush()
+            del widened
+            setattr(self, attr, None)
+            os.replace(tmp_path, self._file(name))
+        self.meta['width'] = width
+        self._open_maps()
+
+    def append_rows(self, rows, ordinals, vocabulary, source=None, replace=False):
+        """追加一个月（或任意一段连续日期）的排班行
+
+        ordinals 为各日期列的日期序号，必须晚于已存储的最后一天；
+        replace 为 True 且日期范围与已导入的某个月完全相同时覆盖该月。
+        """
+        rows = list(rows)
+        ordinals = np.asarray([_as_ordinal(o) for o in ordinals], dtype=np.int32)
+        if len(ordinals) == 0:
+            return 0
+        if np.any(np.diff(ordinals) <= 0):
+            raise ValueError("日期列必须按时间顺序排列且不重复")
+        start, end = int(ordinals[0]), int(ordinals[-1])
+        months = self.meta['months']
+        existing = [i for i, m in enumerate(months) if m['start'] == start and m['end'] == end]
+        if existing and replace:
+            month = existing[0]
+            first_row = months[month]['row']
+        elif self.meta['days'] and start <= int(self.dates[-1]):
+            raise ValueError(f"{date.fromordinal(start)} 不晚于已存储的最后一天 {date.fromordinal(int(self.dates[-1]))}"
+                             f"（重新导入同一月份请使用 replace）")
+        else:
+            first_row = None
+
+        # 月份词表的编码 -> 存储词表的编码
+        lookup = np.array([self.vocabulary.add(shift) if shift else EMPTY_CODE for shift in vocabulary.codes],
+                          dtype=np.int64)
+        if len(self.vocabulary) > MAX_SHIFTS:
+            raise ValueError(f"班次种类超过{MAX_SHIFTS - 1}个，无法按单字节存储")
+        latest = first_row is None or end >= max(m['end'] for m in months)
+        columns = self._register_employees(rows, latest)
+        block = np.zeros((len(ordinals), self.meta['width']), dtype=np.uint8)
+        dept_row = np.zeros(self.meta['width'], dtype=np.int16)
+        if rows:
+            block[:, columns] = lookup[np.vstack([np.asarray(row.codes, dtype=np.int64) for row in rows])].T
+            dept_row[columns] = [self._dept_code(row.dept) for row in rows]
+
+        # 写入前释放只读映射；meta.json 最后写入，中途失败时多写的内容在下次追加时截掉
+        self.codes = self.dates = self.depts = None
+        if first_row is None:
+            with open(self._file(CODES_FILE), 'ab') as f:
+                f.truncate(self.meta['days'] * self.meta['width'])
+                f.write(block.tobytes())
+            with open(self._file(DATES_FILE), 'ab') as f:
+                f.truncate(self.meta['days'] * 4)
+                f.write(ordinals.tobytes())
+            with open(self._file(DEPTS_FILE), 'ab') as f:
+                f.truncate(len(months) * self.meta['width'] * 2)
+                f.write(dept_row.tobytes())
+            months.append({'source': source, 'start': start, 'end': end, 'row': self.meta['days']})
+            self.meta['days'] += len(ordinals)
+        else:
+            codes = np.memmap(self._file(CODES_FILE), dtype=np.uint8, mode='r+',
+                              shape=(self.meta['days'], self.meta['width']))
+            codes[first_row:first_row + len(ordinals)] = block
+            codes.flush()
+            del codes
+            depts = np.memmap(self._file(DEPTS_FILE), dtype=np.int16, mode='r+', shape=(len(months), self.meta['width']))
+            depts[month] = dept_row
+            depts.flush()
+            del depts
+            months[month]['source'] = source
+        self._write_meta()
+        self._open_maps()
+        return len(ordinals)
+
+    def append_workbook(self, file_path, sheet_name='排班表', replace=False):
+        """流式读取一个月的排班表并追加，返回追加的天数"""
+        with StreamingScheduleReader(file_path, sheet_name) as reader:
+            rows = list(reader.iter_employees())
+            calendar = reader.calendar
+            vocabulary = reader.vocabulary
+        if any(d is None for d in calendar.dates):
+            raise ValueError(f"{file_path} 的日期列无法解析为完整日期")
+        ordinals = [d.toordinal() for d in calendar.dates]
+        return self.append_rows(rows, ordinals, vocabulary, source=os.path.abspath(file_path), replace=replace)
+
+    # ---- 查询 ----
+
+    def row_range(self, start=None, end=None):
+        """[start, end] 日期范围（含两端，None 表示不限）对应的行切片"""
+        first = 0 if start is None else int(np.searchsorted(self.dates, _as_ordinal(start), side='left'))
+        last = len(self.dates) if end is None else int(np.searchsorted(self.dates, _as_ordinal(end), side='right'))
+        return slice(first, last)
+
+    def dept_codes(self, rows, columns):
+        """(日期 × 员工) 各日期所在月份的部门编码，0 表示该月没有该员工"""
+        starts = np.array([m['row'] for m in self.meta['months']], dtype=np.int64)
+        days = np.arange(*rows.indices(len(self)))
+        return self.depts[np.searchsorted(starts, days, side='right') - 1][:, columns]
+
+    def dept_mask(self, dept, rows, columns):
+        """(日期 × 员工) 布尔矩阵：当天员工是否在该部门"""
+        code = self.dept_index.get(dept)
+        if code is None:
+            return np.zeros((len(range(*rows.indices(len(self)))), len(columns)), dtype=bool)
+        return self.dept_codes(rows, columns) == code
+
+    def range_depts(self, rows, columns):
+        """每位员工在日期范围内最后所在的部门（范围内没有记录时取员工表中的当前部门）"""
+        codes = self.dept_codes(rows, columns)
+        current = self.employees['dept'].to_numpy(dtype=object)[columns]
+        if not codes.size:
+            return current
+        present = codes != 0
+        last = codes.shape[0] - 1 - np.argmax(present[::-1], axis=0)
+        names = np.asarray(self.dept_names, dtype=object)[codes[last, np.arange(len(columns))]]
+        return np.where(present.any(axis=0), names, current)
+
+    def select(self, dept=None, employees=None, rows=None):
+        """按部门、工号/姓名筛选员工列号；按部门筛选时取日期范围（rows，默认全部）内曾在该部门的员工"""
+        mask = np.ones(len(self.employees), dtype=bool)
+        if employees is not None:
+            wanted = {str(e) for e in employees}
+            mask &= (self.employees['key'].isin(wanted) | self.employees['name'].isin(wanted)).to_numpy()
+        columns = np.flatnonzero(mask)
+        if dept is not None:
+            columns = columns[self.dept_mask(dept, rows or slice(None), columns).any(axis=0)]
+        return columns
+
+    def view(self, start=None, end=None, dept=None, employees=None, active_only=True):
+        """一段日期的只读视图；active_only 时跳过该时间段内没有任何排班的员工"""
+        rows = self.row_range(start, end)
+        columns = self.select(dept, employees, rows)
+        if active_only and len(columns):
+            codes = self.codes[rows][:, columns]
+            if dept is not None:
+                codes = np.where(self.dept_mask(dept, rows, columns), codes, EMPTY_CODE)
+            columns = columns[(codes != EMPTY_CODE).any(axis=0)]
+        return StoreView(self, rows, columns, dept)
+
+    def shift_days(self, shifts, start=None, end=None, dept=None):
+        """指定班次的全部排班：DataFrame(employee_id, name, dept, date, shift)，dept 为当天所在的部门"""
+        shifts = [shifts] if isinstance(shifts, str) else list(shifts)
+        table = self.vocabulary.mask_table(shifts)
+        rows = self.row_range(start, end)
+        columns = self.select(dept, rows=rows)
+        codes = self.codes[rows][:, columns]
+        depts = self.dept_codes(rows, columns)
+        hits = table[codes]
+        if dept is not None:
+            hits &= depts == self.dept_index.get(dept, -1)
+        day_ids, col_ids = np.nonzero(hits)
+        people = self.employees.iloc[columns[col_ids]].reset_index(drop=True)
+        return pd.DataFrame({
+            'employee_id': people['employee_id'], 'name': people['name'],
+            'dept': np.asarray(self.dept_names, dtype=object)[depts[day_ids, col_ids]],
+            'date': pd.to_datetime([date.fromordinal(int(o)) for o in self.dates[rows][day_ids]]),
+            'shift': np.asarray(self.vocabulary.codes, dtype=object)[codes[day_ids, col_ids]],
+        })
+
+    def period_counts(self, shifts, freq='Q', start=None, end=None, dept=None, weekend_only=False):
+        """每位员工每个周期（'M' 月、'Q' 季度、'Y' 年）指定班次的次数，行为员工、列为周期
+
+        日期已排序，同一周期的行是连续的，用 np.add.reduceat 按周期边界一次求和。
+        指定部门时只统计员工在该部门期间的排班。
+        """
+        shifts = [shifts] if isinstance(shifts, str) else list(shifts)
+        table = self.vocabulary.mask_table(shifts)
+        rows = self.row_range(start, end)
+        columns = self.select(dept, rows=rows)
+        ordinals = np.asarray(self.dates[rows])
+        if len(ordinals) == 0 or len(columns) == 0:
+            return pd.DataFrame(index=pd.Index([], name='employee_id'))
+        days = pd.to_datetime([date.fromordinal(int(o)) for o in ordinals])
+        hits = table[self.codes[rows][:, columns]]
+        if dept is not None:
+            hits &= self.dept_mask(dept, rows, columns)
+        if weekend_only:
+            hits &= np.asarray(days.dayofweek >= 5)[:, None]
+        periods = days.to_period(freq)
+        boundaries = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+        counts = np.add.reduceat(hits.astype(np.int64), boundaries, axis=0)
+        people = self.employees.iloc[columns]
+        frame = pd.DataFrame(counts.T, index=pd.Index(people['key'].to_numpy(), name='employee_id'),
+                             columns=[str(p) for p in periods[boundaries]])
+        frame.insert(0, 'name', people['name'].to_numpy())
+        frame.insert(1, 'dept', dept if dept is not None else self.range_depts(rows, columns))
+        return frame
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='多年排班历史的内存映射存储')
+    parser.add_argument('store', help='存储目录')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('append', help='追加月度排班表')
+    p.add_argument('files', nargs='+')
+    p.add_argument('--replace', action='store_true', help='覆盖日期范围相同的已导入月份')
+    p = sub.add_parser('info', help='存储概况')
+    p = sub.add_parser('shifts', help='某班次的全部排班')
+    p.add_argument('shift', nargs='+')
+    p.add_argument('--start')
+    p.add_argument('--end')
+    p.add_argument('--dept')
+    p = sub.add_parser('counts', help='每人每周期的班次次数（默认周末G值班按季度）')
+    p.add_argument('shift', nargs='*')
+    p.add_argument('--freq', default='Q', help="周期：M 月、Q 季度、Y 年（默认 Q）")
+    p.add_argument('--weekend', action='store_true', help='只统计周末')
+    p.add_argument('--start')
+    p.add_argument('--end')
+    p.add_argument('--dept')
+    p = sub.add_parser('validate', help='对一段日期运行流式验证（连值上限、连续上班、上五休二）')
+    p.add_argument('--start')
+    p.add_argument('--end')
+    p.add_argument('--dept')
+    args = parser.parse_args(argv)
+
+    store = RosterStore(args.store)
+    if args.command == 'append':
+        from month_chain import MonthChainValidator
+
+        files = MonthChainValidator(vocabulary=store.vocabulary).order_workbooks(args.files)
+        for file_path in files:
+            days = store.append_workbook(file_path, replace=args.replace)
+            print(f"已追加 {file_path}: {days}天")
+    elif args.command == 'info':
+        print(f"天数: {len(store)}, 员工: {len(store.employees)}人（文件宽度{store.meta['width']}）, "
+              f"班次: {len(store.vocabulary) - 1}种")
+        for month in store.months:
+            print(f"- {date.fromordinal(month['start'])} 至 {date.fromordinal(month['end'])}: {month['source']}")
+    elif args.command == 'shifts':
+        found = store.shift_days(args.shift, args.start, args.end, args.dept)
+        print(f"共{len(found)}次")
+        print(found.groupby(['employee_id', 'name', 'dept']).size().sort_values(ascending=False).to_string())
+    elif args.command == 'counts':
+        counts = store.period_counts(args.shift or list(WEEKEND_G_CODES), args.freq, args.start, args.end,
+                                     args.dept, weekend_only=args.weekend)
+        print(counts.to_string())
+    elif args.command == 'validate':
+        from streaming_reader import StreamingScheduleValidator
+
+        view = store.view(args.start, args.end, args.dept)
+        validator = StreamingScheduleValidator(view)
+        validator.print_report(validator.run())
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Exception as e:
+        print(f"访问排班存储时出错: {e}")
+        sys.exit(1)
@@ -0,0 +1,274 @@
+import sys
+import json
+from collections import namedtuple
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from shift_vocabulary import ShiftVocabulary, DEFAULT_IDENTIFIER_FILE, REST_CODES, LEAVE_CODES
+from consecutive_runs import run_length_encode
+from validation_results import (Violation, ValidationReport, SEVERITY_ERROR, SEVERITY_WARNING,
+                                KIND_ROTATION_REPEAT, KIND_ROTATION_ORDER)
+
+# 排班顺序（完整标识.json 的 shiftOrders）轮转分析：
+# 每个 (岗位, 班次) 的人员顺序建立 工号 -> 顺序位置 的索引（按需建立后缓存），
+# 把排班表中每人每段连值（一段连续的同一班次）记为一次"轮次"，按开始日期重放，
+# 检查每次交接是否交给了顺序中的下一个人（规则5、规则6）；
+# 轮次以日期序号保存，跨月的同一段连值会合并，多个月的历史可以逐月追加。
+# 公平性统计（每人轮次数、值班天数、两次轮次之间的最长等待）基于前缀和，任意日期区间的查询都是 O(人数)
+
+# 基础白班、休息和请假不按排班顺序轮转
+NON_ROTATING_SHIFTS = ('G',) + REST_CODES + LEAVE_CODES
+
+Turn = namedtuple('Turn', ['member', 'start', 'end'])   # member 为顺序位置，start/end 为日期序号（date.toordinal）
+
+
+def load_shift_orders(data, enabled=None):
+    """shiftOrders 转为 {(岗位, 班次): [工号, ...]}（去重并保持顺序）；enabled 不为 None 时只保留其中的班次"""
+    orders = {}
+    for order in data.get('shiftOrders', []):
+        shift = order.get('shiftCode')
+        order_position = (order.get('position') or '').strip()
+        if not shift or not order_position or (enabled is not None and shift not in enabled):
+            continue
+        numbers = orders.setdefault((order_position, shift), [])
+        for number in order.get('employeeNumbers', []):
+            if str(number) not in numbers:
+                numbers.append(str(number))
+    return orders
+
+
+class RotationIndex:
+    def __init__(self, orders):
+        self.orders = {key: list(numbers) for key, numbers in orders.items()}
+        self._positions = {}
+
+    @classmethod
+    def from_identifier_file(cls, identifier_file=DEFAULT_IDENTIFIER_FILE):
+        with open(identifier_file, 'r', encoding='utf-8') as f:
+            return cls(load_shift_orders(json.load(f)))
+
+    def positions(self, key):
+        """(岗位, 班次) 的 工号 -> 顺序位置 字典（缓存）"""
+        index = self._positions.get(key)
+        if index is None:
+            index = {number: i for i, number in enumerate(self.orders.get(key, []))}
+            self._positions[key] = index
+        return index
+
+    def position_of(self, key, number):
+        """员工在排班顺序中的位置，不在顺序中时为 -1"""
+        return self.positions(key).get(str(number), -1)
+
+    def next_after(self, key, number):
+        """顺序中 number 之后的下一个人（不在顺序中时返回第一个人）"""
+        numbers = self.orders.get(key, [])
+        if not numbers:
+            return None
+        return numbers[(self.position_of(key, number) + 1) % len(numbers)]
+
+
+class RotationAnalyzer:
+    def __init__(self, index, vocabulary=None):
+        self.index = index
+        self.vocabulary = vocabulary if vocabulary is not None else ShiftVocabulary.from_sources()
+        self.keys = [key for key in index.orders if key[1] not in NON_ROTATING_SHIFTS and index.orders[key]]
+        self._turns = {key: [] for key in self.keys}
+        self._prefix = None
+
+    @classmethod
+    def from_identifier_file(cls, identifier_file=DEFAULT_IDENTIFIER_FILE, vocabulary=None):
+        return cls(RotationIndex.from_identifier_file(identifier_file), vocabulary)
+
+    def add_month(self, numbers, codes, calendar):
+        """追加一个月的排班（numbers 为每行的工号，codes 为编码矩阵），提取每个轮转班次的轮次"""
+        numbers = [str(n) for n in numbers]
+        codes = np.asarray(codes)
+        ordinals = np.array([d.toordinal() if d is not None else -1 for d in calendar.dates], dtype=np.int64)
+        for shift in {key[1] for key in self.keys}:
+            code = self.vocabulary.index.get(shift)
+            if code is None:
+                continue
+            rows, starts, lengths, _ = run_length_encode((codes == code).astype(np.int8))
+            for key in self.keys_for(shift):
+                positions = self.index.positions(key)
+                turns = self._turns[key]
+                for row, start, length in zip(rows, starts, lengths):
+                    member = positions.get(numbers[row])
+                    if member is None or ordinals[start] < 0:
+                        continue
+                    end = ordinals[start + length - 1]
+                    # 跨月的同一段连值：与上个月最后一个轮次合并
+                    merged = False
+                    for i in range(len(turns) - 1, -1, -1):
+                        if turns[i].end < ordinals[start] - 1:
+                            break
+                        if turns[i].member == member and turns[i].end == ordinals[start] - 1:
+                            turns[i] = Turn(member, turns[i].start, int(end))
+                            merged = True
+                            break
+                    if not merged:
+                        turns.append(Turn(member, int(ordinals[start]), int(end)))
+        for key in self.keys:
+            self._turns[key].sort(key=lambda turn: (turn.start, turn.member))
+        self._prefix = None
+
+    def keys_for(self, shift):
+        return [key for key in self.keys if key[1] == shift]
+
+    def add_workbook(self, file_path):
+        """流式读取一个月的排班表并追加"""
+        from streaming_reader import StreamingScheduleReader
+
+        with StreamingScheduleReader(file_path, vocabulary=self.vocabulary) as reader:
+            rows = list(reader.iter_employees())
+            calendar = reader.calendar
+        codes = np.vstack([row.codes for row in rows]) if rows else \
+            np.zeros((0, len(calendar)), dtype=self.vocabulary.dtype)
+        self.add_month([row.employee_id for row in rows], codes, calendar)
+        return len(rows)
+
+    def turns(self, key):
+        return list(self._turns.get(key, []))
+
+    def replay(self, previous=None):
+        """按开始日期重放每个 (岗位, 班次) 的轮次，返回交接问题的 Violation 列表
+
+        previous 为 {(岗位, 班次): 上一轮的工号}（如上个月最后一轮），用于检查第一次交接。
+        同一人连续两轮（规则5）记为错误；跳过了顺序中的人（规则6，可能因请假或不能值该班次）记为警告。
+        """
+        previous = previous or {}
+        violations = []
+        for key in self.keys:
+            numbers = self.index.orders[key]
+            size = len(numbers)
+            last = self.index.position_of(key, previous[key]) if key in previous else -1
+            for turn in self._turns[key]:
+                if last >= 0:
+                    label = date.fromordinal(turn.start).isoformat()
+                    if turn.member == last and size > 1:
+                        violations.append(Violation(
+                            KIND_ROTATION_REPEAT, SEVERITY_ERROR, employee=numbers[turn.member], dept=key[0],
+                            shift=key[1], start=label, end=date.fromordinal(turn.end).isoformat()))
+                    else:
+                        skipped = (turn.member - last - 1) % size
+                        if skipped:
+                            violations.append(Violation(
+                                KIND_ROTATION_ORDER, SEVERITY_WARNING, employee=numbers[turn.member], dept=key[0],
+                                shift=key[1], start=label, end=date.fromordinal(turn.end).isoformat(),
+                                value=skipped, limit=numbers[(last + 1) % size]))
+                last = turn.member
+        return violations
+
+    def last_turns(self):
+        """每个 (岗位, 班次) 最后一轮的工号，可作为下一段历史的 previous"""
+        return {key: self.index.orders[key][turns[-1].member] for key, turns in self._turns.items() if turns}
+
+    def _build_prefix(self):
+        """每个 (岗位, 班次)：按日期序号的 (成员 × 天) 轮次开始数和值班天数前缀和"""
+        if self._prefix is not None:
+            return self._prefix
+        self._prefix = {}
+        for key, turns in self._turns.items():
+            if not turns:
+                continue
+            size = len(self.index.orders[key])
+            origin = min(t.start for t in turns)
+            n_days = max(t.end for t in turns) - origin + 1
+            started = np.zeros((size, n_days + 1), dtype=np.int64)
+            worked = np.zeros((size, n_days + 1), dtype=np.int64)
+            members = np.array([t.member for t in turns], dtype=np.int64)
+            starts = np.array([t.start for t in turns], dtype=np.int64) - origin
+            ends = np.array([t.end for t in turns], dtype=np.int64) - origin
+            np.add.at(started, (members, starts + 1), 1)
+            # 值班天数用差分数组：开始日 +1、结束次日 -1，两次累加后即为天数前缀和
+            diff = np.zeros((size, n_days + 1), dtype=np.int64)
+            np.add.at(diff, (members, starts), 1)
+            np.add.at(diff, (members, ends + 1), -1)
+            worked[:, 1:] = np.cumsum(np.cumsum(diff, axis=1)[:, :n_days], axis=1)
+            self._prefix[key] = (origin, np.cumsum(started, axis=1), worked, members, starts)
+        return self._prefix
+
+    def counts_between(self, key, start=None, end=None):
+        """[start, end] 日期区间内每位成员开始的轮次数和值班天数 (成员,)，(轮次数, 天数)"""
+        prefix = self._build_prefix().get(key)
+        size = len(self.index.orders.get(key, []))
+        if prefix is None:
+            return np.zeros(size, dtype=np.int64), np.zeros(size, dtype=np.int64)
+        origin, started, worked, _, _ = prefix
+        n_days = started.shape[1] - 1
+        lo = 0 if start is None else int(np.clip(start.toordinal() - origin, 0, n_days))
+        hi = n_days if end is None else int(np.clip(end.toordinal() - origin + 1, 0, n_days))
+        hi = max(hi, lo)
+        return started[:, hi] - started[:, lo], worked[:, hi] - worked[:, lo]
+
+    def fairness(self, start=None, end=None):
+        """每个 (岗位, 班次) 每位成员的轮次数、值班天数和两次轮次之间的最长等待天数
+
+        等待天数为相邻两次轮次开始日期之差；区间内只有一次轮次的成员为空。
+        返回 (成员明细 DataFrame, 岗位班次汇总 DataFrame)，汇总中 spread 为轮次数的极差。
+        """
+        prefix = self._build_prefix()
+        members_rows = []
+        summary_rows = []
+        for key in self.keys:
+            numbers = self.index.orders[key]
+            turns, days = self.counts_between(key, start, end)
+            max_wait = np.full(len(numbers), np.nan)
+            if key in prefix:
+                origin, _, _, members, starts = prefix[key]
+                lo = -np.inf if start is None else start.toordinal() - origin
+                hi = np.inf if end is None else end.toordinal() - origin
+                keep = (starts >= lo) & (starts <= hi)
+                order = np.lexsort((starts[keep], members[keep]))
+                m, s = members[keep][order], starts[keep][order]
+                same = m[1:] == m[:-1]
+                if same.any():
+                    waits = pd.Series(np.diff(s)[same]).groupby(m[1:][same]).max()
+                    max_wait[waits.index.to_numpy()] = waits.to_numpy()
+            for i, number in enumerate(numbers):
+                members_rows.append({'position': key[0], 'shift': key[1], 'order': i, 'number': number,
+                                     'turns': int(turns[i]), 'days': int(days[i]),
+                                     'max_wait': None if np.isnan(max_wait[i]) else int(max_wait[i])})
+            summary_rows.append({'position': key[0], 'shift': key[1], 'members': len(numbers),
+                                 'turns': int(turns.sum()), 'spread': int(turns.max() - turns.min()),
+                                 'max_wait': None if np.isnan(max_wait).all() else int(np.nanmax(max_wait))})
+        return pd.DataFrame(members_rows), pd.DataFrame(summary_rows)
+
+    def report(self, previous=None, source=None):
+        members, summary = self.fairness()
+        return ValidationReport(source=source, violations=self.replay(previous),
+                                metrics={'rotation_fairness': summary.to_dict('records')})
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='按排班顺序重放排班表并统计轮转公平性')
+    parser.add_argument('files', nargs='+', help='按月份顺序排列的排班表工作簿')
+    parser.add_argument('--identifiers', default=DEFAULT_IDENTIFIER_FILE, help='完整标识.json 路径')
+    args = parser.parse_args(argv)
+
+    analyzer = RotationAnalyzer.from_identifier_file(args.identifiers)
+    for file_path in args.files:
+        analyzer.add_workbook(file_path)
+    violations = analyzer.replay()
+    members, summary = analyzer.fairness()
+    print(f"轮转班次: {', '.join(f'{p}/{s}' for p, s in analyzer.keys)}")
+    print(f"交接问题: {len(violations)}条")
+    for violation in violations:
+        print(f"- {violation.employee}: {violation.describe()}")
+    print("\n轮转公平性：")
+    for row in summary.itertuples(index=False):
+        print(f"- {row.position}/{row.shift}: {row.members}人, 共{row.turns}轮, 轮次极差{row.spread}, "
+              f"最长等待{'-' if pd.isna(row.max_wait) else int(row.max_wait)}天")
+    return violations
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"分析排班顺序时出错: {e}")
+        sys.exit(1)
@@ -2,9 +2,18 @@ import sys
 import pandas as pd
 import os
 from collections import defaultdict
+from workbook_loader import load_sheet
+from rule_sheet_model import RuleSheetModel
+from eligibility_check import EligibilityChecker
+from shift_vocabulary import ShiftVocabulary
+from consecutive_runs import ConsecutiveRunAnalyzer, REST_CODES, LEAVE_CODES
+from date_columns import get_calendar_index
+from stage_profiler import run_stage, frame_size
+from validation_results import (Violation, ValidationReport, SEVERITY_INFO, SEVERITY_ERROR,
+                                KIND_CROSS_BUSINESS_LINE, KIND_CROSS_SHIFT)
 
 class RuleDetailAnalyzer:
-    def __init__(self, file_path=None):
+    def __init__(self, file_path=None, quiet=False, profiler=None):
         # 优先使用传入的路径，否则使用默认路径
         self.file_path = file_path or '/Users/luanxiaowei/Documents/项目开发/智能排班表2/排班表新3.xlsx'
         self.rule_df = None
@@ -12,6 +21,17 @@ class RuleDetailAnalyzer:
         self.business_line_shift_map = {}
         self.business_line_columns = []
         self.employee_stats = defaultdict(lambda: {'business_lines': set(), 'shifts': set()})
+        self.work_patterns = None  # 每位员工的总天数、工作天数、休息天数、假期天数和工作比例
+        self.shift_employees = {}  # (业务线, 班次) -> 分配的人员列表
+        self.rule_model = None     # '规则'页签的索引模型（RuleSheetModel）
+        self.eligibility_violations = []  # 排班表中未在规则页签分配该班次的排班
+        self.quiet = quiet         # 静默模式：不打印分析过程
+        self.profiler = profiler   # 分阶段计时（StageProfiler），None 时不计时
+        
+    def log(self, message=''):
+        """非静默模式下打印信息"""
+        if not self.quiet:
+            print(message)
         
     def load_excel_data(self):
         """加载Excel数据"""
@@ -20,22 +40,23 @@ class RuleDetailAnalyzer:
                 raise FileNotFoundError(f"Excel文件不存在: {self.file_path}")
                 
             # 读取规则工作表，不设置表头，以便查看原始结构
-            self.rule_df = pd.read_excel(self.file_path, sheet_name='规则', header=None)
+            self.rule_df = load_sheet(self.file_path, '规则', header=None)
+            self.rule_model = RuleSheetModel.from_workbook(self.file_path)
             # 读取排班表数据，用于后续分析
-            self.schedule_df = pd.read_excel(self.file_path, sheet_name='排班表', header=0)
+            self.schedule_df = load_sheet(self.file_path, '排班表', header=0)
             
             return True
         except Exception as e:
-            print(f"加载Excel数据时出错: {e}")
+            self.log(f"加载Excel数据时出错: {e}")
             return False
             
     def analyze_rule_structure(self):
         """分析规则表的基本结构"""
         if self.rule_df is None:
-            print("规则表数据未加载")
+            self.log("规则表数据未加载")
             return False
             
-        print(f"规则表整体信息：行数={len(self.rule_df)}, 列数={len(self.rule_df.columns)}")
+        self.log(f"规则表整体信息：行数={len(self.rule_df)}, 列数={len(self.rule_df.columns)}")
         
         # 识别业务线（通常在第一行的非空单元格中）
         business_lines = []
@@ -44,7 +65,7 @@ class RuleDetailAnalyzer:
             if pd.notna(cell) and isinstance(cell, str):
                 business_lines.append(cell)
         
-        print(f"\n识别到的业务线：{business_lines}")
+        self.log(f"\n识别到的业务线：{business_lines}")
         
         # 识别班次类型（通常在第二行）
         shift_types = []
@@ -53,234 +74,267 @@ class RuleDetailAnalyzer:
             if pd.notna(cell) and isinstance(cell, str):
                 shift_types.append(cell)
         
-        print(f"\n识别到的班次类型：{shift_types}")
+        self.log(f"\n识别到的班次类型：{shift_types}")
         
         return True
         
     def build_business_line_shift_mapping(self):
         """构建业务线与班次类型的映射关系"""
         if self.rule_df is None:
-            print("规则表数据未加载")
+            self.log("规则表数据未加载")
             return False
             
-        first_row = self.rule_df.iloc[0].tolist()
-        second_row = self.rule_df.iloc[1].tolist()
-        
-        print("\n=== 业务线与班次对应关系分析 ===")
-        
-        # 确定每个业务线对应的列范围
-        current_line = None
-        start_col = 0
-        
-        for i, cell in enumerate(first_row):
-            if pd.notna(cell) and isinstance(cell, str):
-                if current_line is not None:
-                    self.business_line_columns.append((current_line, start_col, i))
-                current_line = cell
-                start_col = i
-        # 添加最后一个业务线
-        if current_line is not None:
-            self.business_line_columns.append((current_line, start_col, len(first_row)))
-            
-        # 提取每个业务线对应的班次类型
-        for line, start_col, end_col in self.business_line_columns:
-            line_shifts = []
-            for i in range(start_col, end_col):
-                if pd.notna(second_row[i]) and isinstance(second_row[i], str):
-                    line_shifts.append(second_row[i])
-            self.business_line_shift_map[line] = line_shifts
-            print(f"{line}业务线包含班次：{line_shifts}")
-            
+        if self.rule_model is None:
+            self.rule_model = RuleSheetModel(self.rule_df)
+
+        self.log("\n=== 业务线与班次对应关系分析 ===")
+
+        # 业务线的列范围和班次类型由索引模型一次算出
+        self.business_line_columns = list(self.rule_model.business_line_columns)
+        for line, line_shifts in self.rule_model.line_shifts.items():
+            self.business_line_shift_map[line] = list(line_shifts)
+            self.log(f"{line}业务线包含班次：{line_shifts}")
+
         return True
-            
+
     def analyze_employee_allocation(self):
         """分析人员分配规则"""
         if self.rule_df is None or not self.business_line_shift_map:
-            print("规则表数据未加载或业务线映射未构建")
+            self.log("规则表数据未加载或业务线映射未构建")
             return False
             
-        print("\n=== 人员-班次分配规则分析 ===")
-        second_row = self.rule_df.iloc[1].tolist()
-        
-        # 遍历每个业务线
+        self.log("\n=== 人员-班次分配规则分析 ===")
+
+        # 遍历每个业务线，(业务线, 班次) -> 人员 为索引查找
         for line, shifts in self.business_line_shift_map.items():
-            print(f"\n{line}业务线人员分配：")
-            
-            # 找到该业务线对应的列范围
-            line_cols = []
-            for l, s, e in self.business_line_columns:
-                if l == line:
-                    line_cols = list(range(s, e))
-                    break
-            
-            # 遍历每个班次类型
-            for shift_idx, shift in enumerate(shifts):
-                # 确定该班次对应的列
-                shift_col = -1
-                for i in line_cols:
-                    if pd.notna(second_row[i]) and second_row[i] == shift:
-                        shift_col = i
-                        break
-                
-                if shift_col != -1:
-                    # 收集该班次的所有人员
-                    shift_employees = []
-                    for row_idx in range(2, len(self.rule_df)):
-                        cell = self.rule_df.iloc[row_idx, shift_col]
-                        if pd.notna(cell) and isinstance(cell, str):
-                            shift_employees.append(cell)
-                    
-                    if shift_employees:
-                        print(f"  {shift}：{', '.join(shift_employees[:5])}{'...' if len(shift_employees) > 5 else ''} (共{len(shift_employees)}人)")
-                    else:
-                        print(f"  {shift}：暂无人员分配")
-                        
+            self.log(f"\n{line}业务线人员分配：")
+            for shift in shifts:
+                if (line, shift) not in self.rule_model.shift_columns:
+                    continue
+                shift_employees = list(self.rule_model.employees_for(line, shift))
+                self.shift_employees[(line, shift)] = shift_employees
+                if self.quiet:
+                    continue
+                if shift_employees:
+                    self.log(f"  {shift}：{', '.join(shift_employees[:5])}{'...' if len(shift_employees) > 5 else ''} (共{len(shift_employees)}人)")
+                else:
+                    self.log(f"  {shift}：暂无人员分配")
+
         return True
-            
+
     def analyze_cross_business_shift_employees(self):
         """分析人员跨业务线和跨班次情况"""
         if self.rule_df is None:
-            print("规则表数据未加载")
+            self.log("规则表数据未加载")
             return False
             
-        print("\n=== 人员跨业务线和跨班次分析 ===")
-        second_row = self.rule_df.iloc[1].tolist()
-        
-        # 遍历所有行和列，收集人员信息
-        for row_idx in range(2, len(self.rule_df)):
-            for col_idx in range(len(self.rule_df.columns)):
-                cell = self.rule_df.iloc[row_idx, col_idx]
-                if pd.notna(cell) and isinstance(cell, str):
-                    # 确定该人员所在的业务线
-                    employee_business_line = None
-                    for line, s, e in self.business_line_columns:
-                        if s <= col_idx < e:
-                            employee_business_line = line
-                            break
-                    
-                    # 确定该人员所在的班次类型
-                    employee_shift = second_row[col_idx] if pd.notna(second_row[col_idx]) else "未知班次"
-                    
-                    # 更新人员统计信息
-                    self.employee_stats[cell]['business_lines'].add(employee_business_line)
-                    self.employee_stats[cell]['shifts'].add(employee_shift)
-        
+        if self.rule_model is None:
+            self.rule_model = RuleSheetModel(self.rule_df)
+
+        self.log("\n=== 人员跨业务线和跨班次分析 ===")
+
+        # 人员 -> {业务线, 班次} 由索引模型提供，不再逐个单元格查找业务线
+        for emp, lines in self.rule_model.employee_lines.items():
+            self.employee_stats[emp]['business_lines'].update(lines)
+            self.employee_stats[emp]['shifts'].update(self.rule_model.shifts_of(emp))
+
         # 找出跨多个业务线或多个班次的人员
         cross_business_employees = []
         cross_shift_employees = []
-        
+
         for emp, stats in self.employee_stats.items():
             if len(stats['business_lines']) > 1:
                 cross_business_employees.append((emp, stats['business_lines']))
             if len(stats['shifts']) > 1:
                 cross_shift_employees.append((emp, stats['shifts']))
-        
+
         if cross_business_employees:
-            print(f"跨多个业务线的人员 ({len(cross_business_employees)}人):")
+            self.log(f"跨多个业务线的人员 ({len(cross_business_employees)}人):")
             for emp, lines in cross_business_employees:
-                print(f"  {emp}：{', '.join(lines)}")
+                self.log(f"  {emp}：{', '.join(lines)}")
         else:
-            print("未发现跨多个业务线的人员")
+            self.log("未发现跨多个业务线的人员")
         
-        print()
+        self.log()
         if cross_shift_employees:
-            print(f"跨多个班次的人员 ({len(cross_shift_employees)}人):")
+            self.log(f"跨多个班次的人员 ({len(cross_shift_employees)}人):")
             for emp, shifts in cross_shift_employees:
                 # 只显示前几个班次，避免输出过长
                 shifts_list = list(shifts)
-                print(f"  {emp}：{', '.join(shifts_list[:3])}{'...' if len(shifts_list) > 3 else ''}")
+                self.log(f"  {emp}：{', '.join(shifts_list[:3])}{'...' if len(shifts_list) > 3 else ''}")
         else:
-            print("未发现跨多个班次的人员")
+            self.log("未发现跨多个班次的人员")
             
         return True
             
     def generate_rule_summary(self):
         """生成规则表结构总结"""
-        print("\n=== 规则表结构总结 ===")
-        print("1. 规则表采用多列布局，每列对应不同业务线的不同班次类型")
-        print("2. 第一行定义业务线（对公、个人、风险）")
-        print("3. 第二行定义具体班次类型（正常班、夜班、周末岗、节假日等）")
-        print("4. 从第三行开始，每行列出被分配到对应班次的员工姓名")
-        print("5. 部分员工被分配到多个班次，显示出灵活的排班策略")
+        self.log("\n=== 规则表结构总结 ===")
+        self.log("1. 规则表采用多列布局，每列对应不同业务线的不同班次类型")
+        self.log("2. 第一行定义业务线（对公、个人、风险）")
+        self.log("3. 第二行定义具体班次类型（正常班、夜班、周末岗、节假日等）")
+        self.log("4. 从第三行开始，每行列出被分配到对应班次的员工姓名")
+        self.log("5. 部分员工被分配到多个班次，显示出灵活的排班策略")
         
     def analyze_employee_work_patterns(self):
         """分析员工工作模式 - 基于排班表数据"""
         if self.schedule_df is None:
-            print("\n警告：排班表数据未加载，无法分析员工工作模式")
+            self.log("\n警告：排班表数据未加载，无法分析员工工作模式")
             return
             
-        print("\n=== 员工工作模式分析 ===")
+        self.log("\n=== 员工工作模式分析 ===")
         
         # 尝试识别员工列和日期列
         try:
             # 假设第一列是员工信息
             employee_col = self.schedule_df.columns[0]
-            date_cols = []
             
-            # 尝试识别日期列
-            for col in self.schedule_df.columns[1:]:
-                # 检查列名是否包含日期相关词汇或数字
-                if isinstance(col, str) and any(keyword in col for keyword in ['日期', '星期', '周', '日', '月']) or isinstance(col, (int, float)):
-                    date_cols.append(col)
+            # 尝试识别日期列（日期可能在列名中，也可能在前几行的表头行中）
+            calendar = get_calendar_index(self.schedule_df)
+            date_cols = [col for col in calendar.date_cols if col != employee_col]
+            if calendar.header_row is not None:
+                # 表头行中有'姓名'列时以姓名作为员工标识
+                header_values = self.schedule_df.iloc[calendar.header_row].tolist()
+                if '姓名' in header_values:
+                    employee_col = self.schedule_df.columns[header_values.index('姓名')]
             
             if date_cols:
-                print(f"识别到 {len(date_cols)} 个可能的日期列")
+                self.log(f"识别到 {len(date_cols)} 个可能的日期列")
                 
                 # 分析部分员工的工作模式示例
                 sample_size = 5  # 分析的样本数量
-                sample_count = 0
                 
-                for idx, row in self.schedule_df.iterrows():
-                    employee = row[employee_col]
-                    # 跳过表头行和说明行
-                    if isinstance(employee, str) and ("注意：" in employee or "排班信息" in employee or "部门" in employee):
-                        continue
-                    
-                    # 收集该员工的排班信息
-                    shifts = row[date_cols].tolist()
-                    # 过滤掉无效值
-                    valid_shifts = [s for s in shifts if pd.notna(s) and s != '']
-                    
-                    if valid_shifts:
-                        # 计算工作天数和休息天数
-                        work_days = sum(1 for s in valid_shifts if s != '休' and s != '休息')
-                        rest_days = sum(1 for s in valid_shifts if s == '休' or s == '休息')
-                        
-                        # 计算工作比例
-                        work_ratio = work_days / len(valid_shifts) if valid_shifts else 0
-                        
-                        print(f"{employee}：总天数={len(valid_shifts)}, 工作天数={work_days}, 休息天数={rest_days}, 工作比例={work_ratio:.2f}")
-                        
-                        sample_count += 1
-                        if sample_count >= sample_size:
-                            break
+                # 跳过表头行和说明行
+                schedule_rows = calendar.data_rows(self.schedule_df)
+                employees = schedule_rows[employee_col]
+                text = employees.where(employees.map(lambda v: isinstance(v, str)), '').astype(str)
+                skip_mask = (text.str.contains('注意：', regex=False) | text.str.contains('排班信息', regex=False) |
+                             text.str.contains('部门', regex=False))
+                candidates = schedule_rows[~skip_mask]
+                
+                # 所有员工一次性统计总天数、休息天数、假期天数和工作天数（假期不算工作）
+                run_analyzer = ConsecutiveRunAnalyzer.from_frame(candidates, date_cols)
+                total_days = run_analyzer.count_per_row()
+                rest_days = run_analyzer.count_per_row(REST_CODES)
+                leave_days = run_analyzer.count_per_row(LEAVE_CODES)
+                work_days = total_days - rest_days - leave_days
+                has_days = total_days > 0
+                self.work_patterns = pd.DataFrame({
+                    'employee': candidates[employee_col].to_numpy()[has_days],
+                    'total_days': total_days[has_days],
+                    'work_days': work_days[has_days],
+                    'rest_days': rest_days[has_days],
+                    'leave_days': leave_days[has_days],
+                    'work_ratio': work_days[has_days] / total_days[has_days],
+                })
+                
+                for pattern in self.work_patterns.head(sample_size).itertuples(index=False):
+                    self.log(f"{pattern.employee}：总天数={pattern.total_days}, 工作天数={pattern.work_days}, 休息天数={pattern.rest_days}, 假期天数={pattern.leave_days}, 工作比例={pattern.work_ratio:.2f}")
         except Exception as e:
-            print(f"分析员工工作模式时出错: {e}")
+            self.log(f"分析员工工作模式时出错: {e}")
+            
+    def analyze_assignment_eligibility(self):
+        """核对排班表中每个排班的人员是否在规则页签中被分配了该班次"""
+        if self.schedule_df is None or self.rule_model is None:
+            self.log("\n警告：排班表或规则表数据未加载，无法核对排班资格")
+            return
+
+        self.log("\n=== 排班资格核对 ===")
+        try:
+            calendar = get_calendar_index(self.schedule_df)
+            if calendar.header_row is None:
+                self.log("未找到包含'姓名'的表头行，跳过排班资格核对")
+                return
+            header_values = [str(value).strip() for value in self.schedule_df.iloc[calendar.header_row]]
+            if '姓名' not in header_values:
+                self.log("未找到包含'姓名'的表头行，跳过排班资格核对")
+                return
+            name_col = self.schedule_df.columns[header_values.index('姓名')]
+            dept_col = self.schedule_df.columns[header_values.index('部门')] if '部门' in header_values else None
+
+            schedule_rows = calendar.data_rows(self.schedule_df)
+            names = schedule_rows[name_col]
+            is_name = names.map(lambda v: isinstance(v, str) and v.strip() != '' and v.strip() != '姓名').to_numpy()
+            rows = schedule_rows[is_name]
+            vocabulary = ShiftVocabulary.from_sources()
+            codes = vocabulary.encode_frame(rows, calendar.date_cols)
+            depts = rows[dept_col].astype(str).str.strip().tolist() if dept_col is not None else None
+            checker = EligibilityChecker(self.rule_model, vocabulary)
+            self.eligibility_violations = checker.violations(rows[name_col].str.strip().tolist(), codes,
+                                                             calendar, depts)
+
+            ineligible = [v for v in self.eligibility_violations if v.severity == SEVERITY_ERROR]
+            unlisted = [v for v in self.eligibility_violations if v.severity != SEVERITY_ERROR]
+            self.log(f"核对班次：{', '.join(checker.governed_shifts)}")
+            self.log(f"未在规则页签中分配该班次的排班：{len(ineligible)}处")
+            for violation in ineligible[:10]:
+                self.log(f"  {violation.employee}：{violation.describe()}")
+            if len(ineligible) > 10:
+                self.log(f"  ...（共{len(ineligible)}处）")
+            if unlisted:
+                self.log(f"规则页签中没有的排班人员 ({len(unlisted)}人)：{', '.join(v.employee for v in unlisted[:10])}"
+                         f"{'...' if len(unlisted) > 10 else ''}")
+        except Exception as e:
+            self.log(f"核对排班资格时出错: {e}")
+
+    def get_results(self):
+        """规则页签分析的结构化结果（需先运行 run_complete_analysis）"""
+        return {
+            'business_line_shifts': {line: list(shifts) for line, shifts in self.business_line_shift_map.items()},
+            'business_line_columns': list(self.business_line_columns),
+            'employee_stats': {emp: {'business_lines': sorted(str(l) for l in stats['business_lines']),
+                                     'shifts': sorted(str(s) for s in stats['shifts'])}
+                               for emp, stats in self.employee_stats.items()},
+            'shift_employees': {f'{line}/{shift}': employees
+                                for (line, shift), employees in self.shift_employees.items()},
+            'work_patterns': [] if self.work_patterns is None else self.work_patterns.to_dict('records'),
+        }
+    
+    def get_report(self):
+        """结构化报告：跨业务线、跨班次的人员记为提示级问题，统计结果放在 metrics 中"""
+        report = ValidationReport(source=self.file_path, metrics=self.get_results())
+        for emp, stats in self.employee_stats.items():
+            if len(stats['business_lines']) > 1:
+                report.violations.append(Violation(KIND_CROSS_BUSINESS_LINE, SEVERITY_INFO, employee=emp,
+                                                   value=len(stats['business_lines'])))
+            if len(stats['shifts']) > 1:
+                report.violations.append(Violation(KIND_CROSS_SHIFT, SEVERITY_INFO, employee=emp,
+                                                   value=len(stats['shifts'])))
+        report.extend(self.eligibility_violations)
+        if self.profiler is not None:
+            report.metrics['stages'] = self.profiler.to_dict()
+        return report
             
     def run_complete_analysis(self):
         """运行完整的规则详情分析"""
-        print("===== 规则页签排班规则详细分析 ======")
+        self.log("===== 规则页签排班规则详细分析 ======")
         
-        # 按顺序执行分析步骤
-        if not self.load_excel_data():
+        # 按顺序执行分析步骤（规则页签的步骤按规则表计行数，排班表的步骤按排班表计行数）
+        rule_size = lambda: frame_size(self.rule_df)
+        schedule_size = lambda: frame_size(self.schedule_df)
+        loaded_size = lambda: (rule_size()[0] + schedule_size()[0], rule_size()[1] + schedule_size()[1])
+        if not run_stage(self.profiler, 'load_excel_data', self.load_excel_data, loaded_size):
             return False
             
-        if not self.analyze_rule_structure():
+        if not run_stage(self.profiler, 'analyze_rule_structure', self.analyze_rule_structure, rule_size):
             return False
             
-        if not self.build_business_line_shift_mapping():
+        if not run_stage(self.profiler, 'build_business_line_shift_mapping', self.build_business_line_shift_mapping,
+                         rule_size):
             return False
             
-        if not self.analyze_employee_allocation():
+        if not run_stage(self.profiler, 'analyze_employee_allocation', self.analyze_employee_allocation, rule_size):
             return False
             
-        if not self.analyze_cross_business_shift_employees():
+        if not run_stage(self.profiler, 'analyze_cross_business_shift_employees',
+                         self.analyze_cross_business_shift_employees, rule_size):
             return False
             
-        self.generate_rule_summary()
-        self.analyze_employee_work_patterns()
+        run_stage(self.profiler, 'generate_rule_summary', self.generate_rule_summary)
+        run_stage(self.profiler, 'analyze_employee_work_patterns', self.analyze_employee_work_patterns, schedule_size)
+        run_stage(self.profiler, 'analyze_assignment_eligibility', self.analyze_assignment_eligibility, schedule_size)
         
-        print("\n===== 规则页签分析完成 ======")
+        self.log("\n===== 规则页签分析完成 ======")
         return True
 
 # 主程序
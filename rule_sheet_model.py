@@ -0,0 +1,156 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from workbook_loader import load_sheet, file_digest
+
+# '规则'页签的索引模型：
+# 第一行为业务线（每个业务线占据到下一个业务线之前的所有列），第二行为班次说明，之后每行为人员姓名。
+# 页签只解析一次：列 -> 业务线用区间数组（业务线起始列 + searchsorted）一次算出，
+# (业务线, 班次) -> 人员、人员 -> {业务线, 班次} 都建成字典，之后的分配查询和跨业务线/跨班次统计均为哈希查找
+
+UNKNOWN_SHIFT = '未知班次'
+RULE_HEADER_ROWS = 2
+
+# 进程内缓存：工作簿内容哈希 -> RuleSheetModel
+_models = {}
+
+
+def clear_model_cache():
+    """清空进程内的规则页签模型缓存"""
+    _models.clear()
+
+
+def rule_label_to_shift(label):
+    """'规则'页签第二行的班次说明对应的班次代码（节假日等无法对应的返回 None）"""
+    if not isinstance(label, str):
+        return None
+    if 'Y16' in label or '夜班' in label:
+        return 'Y16综'
+    if '周末' in label:
+        for suffix in ('A', 'B', 'C'):
+            if f'{suffix}岗' in label:
+                return f'G值-{suffix}'
+        return 'G值'
+    if label == '正常班':
+        return 'G'
+    return None
+
+
+def _is_text(value):
+    return isinstance(value, str)
+
+
+class RuleSheetModel:
+    def __init__(self, rule_df):
+        """rule_df 为不设表头（header=None）读取的'规则'页签"""
+        values = rule_df.to_numpy(dtype=object)
+        n_cols = values.shape[1]
+        first_row = values[0] if len(values) else np.empty(n_cols, dtype=object)
+        second_row = values[1] if len(values) > 1 else np.full(n_cols, np.nan, dtype=object)
+
+        # 业务线区间：起始列有序，列 -> 业务线序号由 searchsorted 一次得到（第一个业务线之前的列为 -1）
+        self.line_starts = np.array([i for i, cell in enumerate(first_row) if _is_text(cell)], dtype=np.int64)
+        self.lines = [first_row[i] for i in self.line_starts]
+        self.column_line_ids = np.searchsorted(self.line_starts, np.arange(n_cols), side='right') - 1
+        ends = list(self.line_starts[1:]) + [n_cols]
+        self.business_line_columns = [(line, int(start), int(end))
+                                      for line, start, end in zip(self.lines, self.line_starts, ends)]
+        self.column_labels = [cell if _is_text(cell) else None for cell in second_row]
+        # 人员所在列的班次说明：空白为'未知班次'
+        cell_shifts = [cell if pd.notna(cell) else UNKNOWN_SHIFT for cell in second_row]
+
+        # 每个业务线的班次说明（按列顺序）以及 (业务线, 班次) 对应的第一列
+        self.line_shifts = {line: [] for line in self.lines}
+        self.shift_columns = {}
+        for col, label in enumerate(self.column_labels):
+            line_id = self.column_line_ids[col]
+            if label is None or line_id < 0:
+                continue
+            line = self.lines[line_id]
+            self.line_shifts[line].append(label)
+            self.shift_columns.setdefault((line, label), col)
+
+        # 人员单元格（行优先顺序）：一次取出所有文本单元格
+        body = values[RULE_HEADER_ROWS:]
+        text_mask = np.vectorize(_is_text, otypes=[bool])(body) if body.size else np.zeros(body.shape, dtype=bool)
+        rows, cols = np.nonzero(text_mask)
+        names = body[rows, cols]
+        self.cells = pd.DataFrame({
+            'row': rows + RULE_HEADER_ROWS,
+            'col': cols,
+            'name': names,
+            'line': [self.lines[i] if i >= 0 else None for i in self.column_line_ids[cols]],
+            'shift': [cell_shifts[c] for c in cols],
+        })
+
+        self.column_employees = {}
+        for col, name in zip(cols, names):
+            self.column_employees.setdefault(int(col), []).append(name)
+        self.shift_employees = {key: list(self.column_employees.get(col, []))
+                                for key, col in self.shift_columns.items()}
+
+        self.employee_lines = {}
+        self.employee_shifts = {}
+        self.employee_pairs = {}
+        for name, line, shift in zip(self.cells['name'], self.cells['line'], self.cells['shift']):
+            self.employee_lines.setdefault(name, set()).add(line)
+            self.employee_shifts.setdefault(name, set()).add(shift)
+            self.employee_pairs.setdefault(name, set()).add((line, shift))
+        self._permitted = None
+
+    @classmethod
+    def from_workbook(cls, file_path, sheet_name='规则'):
+        """读取工作簿的'规则'页签并建立索引（同一进程内按文件内容缓存）"""
+        key = (file_digest(file_path), sheet_name)
+        model = _models.get(key)
+        if model is None:
+            model = cls(load_sheet(file_path, sheet_name, header=None))
+            _models[key] = model
+        return model
+
+    def employees_for(self, line, shift):
+        """业务线某个班次分配的人员"""
+        return self.shift_employees.get((line, shift), [])
+
+    def lines_of(self, name):
+        return self.employee_lines.get(name, set())
+
+    def shifts_of(self, name):
+        return self.employee_shifts.get(name, set())
+
+    def cross_business_employees(self):
+        """跨多个业务线的人员 [(姓名, 业务线集合)]（按首次出现顺序）"""
+        return [(name, lines) for name, lines in self.employee_lines.items() if len(lines) > 1]
+
+    def cross_shift_employees(self):
+        """跨多个班次的人员 [(姓名, 班次集合)]（按首次出现顺序）"""
+        return [(name, shifts) for name, shifts in self.employee_shifts.items() if len(shifts) > 1]
+
+    def permitted_shift_codes(self):
+        """人员 -> 可值班次代码集合（由班次说明换算，无法换算的说明不计入）"""
+        if self._permitted is None:
+            self._permitted = {}
+            for name, pairs in self.employee_pairs.items():
+                codes = {rule_label_to_shift(shift) for _, shift in pairs}
+                codes.discard(None)
+                self._permitted[name] = codes
+        return self._permitted
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python rule_sheet_model.py <排班表.xlsx>")
+        sys.exit(1)
+    try:
+        model = RuleSheetModel.from_workbook(sys.argv[1])
+        for line, shifts in model.line_shifts.items():
+            print(f"{line}: {shifts}")
+            for shift in shifts:
+                print(f"  {shift}: {len(model.employees_for(line, shift))}人")
+        print(f"人员数: {len(model.employee_lines)}, 跨业务线: {len(model.cross_business_employees())}人, "
+              f"跨班次: {len(model.cross_shift_employees())}人")
+    except Exception as e:
+        print(f"读取规则页签时出错: {e}")
+        sys.exit(1)
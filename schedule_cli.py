@@ -0,0 +1,304 @@
+import sys
+import json
+import argparse
+
+# 排班工具统一命令行入口：
+# 每个子命令在执行时才导入对应模块，启动时只加载标准库；
+# sheets / dims 等元数据查询直接读取 XLSX 压缩包中的 XML，不导入 pandas。
+# 示例：python schedule_cli.py sheets 排班表新3.xlsx
+#       python schedule_cli.py employee 排班表新3.xlsx 彭静雅
+#       python schedule_cli.py chain 2025-08.xlsx 2025-09.xlsx --save-state tail.json
+
+
+def cmd_sheets(args):
+    from xlsx_metadata import sheet_names
+
+    names = sheet_names(args.file)
+    if args.json:
+        print(json.dumps(names, ensure_ascii=False))
+    else:
+        for name in names:
+            print(name)
+    return 0
+
+
+def cmd_dims(args):
+    from xlsx_metadata import sheet_dimensions
+
+    dimensions = sheet_dimensions(args.file, exact=args.exact)
+    if args.sheet:
+        dimensions = {name: info for name, info in dimensions.items() if name in args.sheet}
+    if args.json:
+        print(json.dumps(dimensions, ensure_ascii=False))
+    else:
+        for name, info in dimensions.items():
+            print(f"{name}: {info['rows']}行 × {info['cols']}列（{info['ref']}）")
+    return 0
+
+
+def cmd_employee(args):
+    """流式读取排班表，找到指定员工（姓名或工号）后只验证该员工的排班（与 validate 的个人规则相同）"""
+    from streaming_reader import StreamingScheduleReader, StreamingScheduleValidator
+    from weekly_rest_rules import WeeklyRestValidator
+
+    with StreamingScheduleReader(args.file) as reader:
+        validator = StreamingScheduleValidator(reader)
+        for row in reader.iter_employees():
+            if args.employee in (row.name, row.employee_id):
+                break
+        else:
+            print(f"未找到员工: {args.employee}")
+            return 1
+        validator.consume(row)
+        summary = validator.summary()
+        shifts = reader.vocabulary.decode(row.codes)
+        calendar = reader.calendar
+        # 能解析出真实日期时按自然周检查上五休二和Y16综前后休息，代替平均每周工作天数
+        by_week = any(d is not None for d in calendar.dates)
+        weekly = WeeklyRestValidator(reader.vocabulary).check_rows(
+            row.codes[None, :], calendar, [row.name]).get(0, []) if by_week else []
+
+    print(f"{row.name}({row.employee_id}) {row.dept}")
+    print(' '.join(f"{calendar.label(i)[5:]}:{shift or '-'}" for i, shift in enumerate(shifts)))
+    print(f"班次分布: {summary['category_counts']}")
+    ratio_issues = [] if by_week else summary['weekly_ratio_issues']
+    problems = len(summary['limit_violations']) + len(summary['work_run_violations']) + \
+        len(ratio_issues) + len(weekly)
+    for _, _, shift, start, end, length, limit in summary['limit_violations']:
+        print(f"- 班次{shift}: {start} 至 {end} 连续{length}天（上限{limit}天）")
+    for _, _, start, end, length in summary['work_run_violations']:
+        print(f"- {start} 至 {end} 连续上班{length}天")
+    for _, _, avg in ratio_issues:
+        print(f"- 平均每周工作{avg}天，不符合上五休二制")
+    for violation in weekly:
+        print(f"- {violation.describe()}")
+    print("验证通过" if not problems else f"问题{problems}条")
+    return 1 if problems else 0
+
+
+def make_profiler(args):
+    """--stages / --stages-json / --cprofile / --trace-memory 任一开启时创建分阶段计时器，否则为 None"""
+    if not (args.stages or args.stages_json or args.cprofile or args.trace_memory):
+        return None
+    from stage_profiler import StageProfiler
+
+    return StageProfiler(profile=bool(args.cprofile), trace_memory=args.trace_memory)
+
+
+def finish_profiler(profiler, args):
+    """输出分阶段计时表（--json 时输出到标准错误，不混入JSON结果）"""
+    if profiler is None:
+        return
+    profiler.close()
+    out = sys.stderr if args.json else sys.stdout
+    print("\n分阶段耗时：", file=out)
+    profiler.print_table(file=out)
+    if args.stages_json:
+        profiler.write_json(args.stages_json)
+    if args.cprofile:
+        profiler.dump_profile(args.cprofile)
+        print(f"\ncProfile 采样已保存到 {args.cprofile}，耗时最多的函数：", file=out)
+        print(profiler.hotspots(), file=out)
+
+
+def cmd_validate(args):
+    from schedule_rule_validation import ScheduleRuleValidator
+
+    profiler = make_profiler(args)
+    validator = ScheduleRuleValidator(args.file, quiet=args.json, profiler=profiler)
+    if validator.schedule_df is None:
+        return 1
+    report = validator.run_full_analysis()
+    if args.json:
+        print(json.dumps(report.to_dict(), ensure_ascii=False, default=str))
+    finish_profiler(profiler, args)
+    return 0
+
+
+def cmd_rules(args):
+    from rule_detail_analysis import RuleDetailAnalyzer
+
+    profiler = make_profiler(args)
+    analyzer = RuleDetailAnalyzer(args.file, quiet=args.json, profiler=profiler)
+    if not analyzer.run_complete_analysis():
+        return 1
+    if args.json:
+        print(json.dumps(analyzer.get_report().to_dict(), ensure_ascii=False, default=str))
+    finish_profiler(profiler, args)
+    return 0
+
+
+def cmd_stream(args):
+    from streaming_reader import StreamingScheduleReader, StreamingScheduleValidator
+
+    with StreamingScheduleReader(args.file, args.sheet) as reader:
+        validator = StreamingScheduleValidator(reader)
+        validator.print_report(validator.run())
+    return 0
+
+
+def cmd_read(args):
+    from read_excel import main as read_main
+
+    read_main(args.file)
+    return 0
+
+
+def cmd_weekend(args):
+    from weekend_g_rules import main as weekend_main
+
+    return 1 if weekend_main(args.file) else 0
+
+
+def cmd_coverage(args):
+    from schedule_rule_validation import ScheduleRuleValidator
+    from staffing_coverage import StaffingCoverage
+
+    validator = ScheduleRuleValidator(args.file, quiet=True)
+    coverage = StaffingCoverage.from_validator(validator)
+    violations = coverage.check(validator.special_groups)
+    print(f"部门: {', '.join(coverage.depts)}")
+    print(f"特殊岗位人数异常: {len(violations)}处")
+    for violation in violations:
+        print(f"- {violation.describe()}")
+    return 0
+
+
+def cmd_eligibility(args):
+    from eligibility_check import main as eligibility_main
+
+    report = eligibility_main(args.file, args.rules)
+    return 1 if report.metrics['eligibility']['ineligible'] else 0
+
+
+def cmd_diff(args):
+    from incremental_validation import IncrementalScheduleValidator
+
+    incremental = IncrementalScheduleValidator(args.old)
+    before = len(incremental.report())
+    report = incremental.update_from_workbook(args.new)
+    print(f"问题数: {before} -> {len(report)}")
+    for violation in report:
+        print(f"- {violation.employee or violation.dept}: {violation.describe()}")
+    return 0
+
+
+# 自带命令行参数的模块：子命令之后的参数原样转交给模块的 main(argv)
+FORWARDED_COMMANDS = {
+    'audit': ('batch_audit', '批量审核月度排班表（batch_audit）'),
+    'chain': ('month_chain', '按月份顺序跨月验证（month_chain）'),
+    'rotation': ('rotation_order', '排班顺序重放与轮转公平性（rotation_order）'),
+    'generate': ('scheduling_engine', '按规则生成月度排班（scheduling_engine）'),
+    'solve': ('roster_solver', 'CP-SAT 求解月度排班（roster_solver）'),
+    'matrix': ('eligibility_matrix', '编译并查询可值班次位矩阵（eligibility_matrix）'),
+    'store': ('roster_store', '多年排班历史存储：追加、查询、按日期范围验证（roster_store）'),
+    'rest': ('rest_intervals', '按实际上下班时间检查班次间休息和每周工时（rest_intervals）'),
+    'fairness': ('workload_fairness', '按部门和业务线比较工作量公平性（workload_fairness）'),
+    'bench': ('benchmark_suite', '合成工作簿的性能基准（benchmark_suite）'),
+}
+
+
+def run_forwarded(command, argv):
+    import importlib
+
+    module = importlib.import_module(FORWARDED_COMMANDS[command][0])
+    result = module.main(argv)
+    return result if isinstance(result, int) else 0
+
+
+def add_profiling_arguments(parser):
+    parser.add_argument('--stages', action='store_true', help='打印每个分析阶段的耗时、CPU时间和处理行数')
+    parser.add_argument('--stages-json', metavar='文件', help='分阶段计时结果写入JSON文件')
+    parser.add_argument('--cprofile', metavar='文件', help='在各阶段内开启 cProfile，采样保存为 .prof 文件')
+    parser.add_argument('--trace-memory', action='store_true', help='用 tracemalloc 记录各阶段的峰值内存')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='schedule_cli', description='排班表分析与验证工具')
+    sub = parser.add_subparsers(dest='command', metavar='<子命令>')
+
+    p = sub.add_parser('sheets', help='列出页签名称（不导入 pandas）')
+    p.add_argument('file')
+    p.add_argument('--json', action='store_true', help='以JSON输出')
+    p.set_defaults(func=cmd_sheets)
+
+    p = sub.add_parser('dims', help='各页签的行列范围（不导入 pandas）')
+    p.add_argument('file')
+    p.add_argument('sheet', nargs='*', help='只显示这些页签')
+    p.add_argument('--exact', action='store_true', help='扫描单元格得到实际范围（不使用页签记录的范围）')
+    p.add_argument('--json', action='store_true', help='以JSON输出')
+    p.set_defaults(func=cmd_dims)
+
+    p = sub.add_parser('employee', help='只验证一位员工（姓名或工号）')
+    p.add_argument('file')
+    p.add_argument('employee')
+    p.set_defaults(func=cmd_employee)
+
+    p = sub.add_parser('validate', help='完整的排班规则验证（schedule_rule_validation）')
+    p.add_argument('file')
+    p.add_argument('--json', action='store_true', help='静默运行并以JSON输出结构化结果')
+    add_profiling_arguments(p)
+    p.set_defaults(func=cmd_validate)
+
+    p = sub.add_parser('rules', help="'规则'页签详细分析（rule_detail_analysis）")
+    p.add_argument('file')
+    p.add_argument('--json', action='store_true', help='静默运行并以JSON输出结构化结果')
+    add_profiling_arguments(p)
+    p.set_defaults(func=cmd_rules)
+
+    p = sub.add_parser('stream', help='流式读取超大排班表并汇总（streaming_reader）')
+    p.add_argument('file')
+    p.add_argument('sheet', nargs='?', default='排班表')
+    p.set_defaults(func=cmd_stream)
+
+    p = sub.add_parser('read', help='读取排班表结构（read_excel）')
+    p.add_argument('file')
+    p.set_defaults(func=cmd_read)
+
+    p = sub.add_parser('weekend', help='G值周末班规则检查（weekend_g_rules）')
+    p.add_argument('file')
+    p.set_defaults(func=cmd_weekend)
+
+    p = sub.add_parser('coverage', help='特殊岗位每日值班人数（staffing_coverage）')
+    p.add_argument('file')
+    p.set_defaults(func=cmd_coverage)
+
+    p = sub.add_parser('eligibility', help="排班与'规则'页签分配的资格核对（eligibility_check）")
+    p.add_argument('file')
+    p.add_argument('--rules', help="包含'规则'页签的工作簿（默认同一工作簿）")
+    p.set_defaults(func=cmd_eligibility)
+
+    p = sub.add_parser('diff', help='两个版本排班表的增量验证（incremental_validation）')
+    p.add_argument('old')
+    p.add_argument('new')
+    p.set_defaults(func=cmd_diff)
+
+    # 转交的子命令只用于显示帮助，实际在 main 中直接分派
+    for name, (_, help_text) in FORWARDED_COMMANDS.items():
+        sub.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in FORWARDED_COMMANDS:
+        try:
+            return run_forwarded(argv[0], argv[1:])
+        except Exception as e:
+            print(f"执行 {argv[0]} 时出错: {e}")
+            return 1
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, 'func', None):
+        parser.print_help()
+        return 1
+    try:
+        return args.func(args)
+    except Exception as e:
+        print(f"执行 {args.command} 时出错: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
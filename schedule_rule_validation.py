@@ -1,19 +1,36 @@
 import pandas as pd
 import numpy as np
 from collections import defaultdict, Counter
-import re
+from workbook_loader import load_sheet
+from consecutive_runs import ConsecutiveRunAnalyzer, MAX_CONSECUTIVE_WORK_DAYS, UNCAPPED_CODES
+from date_columns import get_calendar_index
+from shift_vocabulary import ShiftVocabulary, EMPTY_CODE, LEAVE_CODES
+from weekend_g_rules import WeekendGRuleChecker
+from staffing_coverage import StaffingCoverage
+from stage_profiler import run_stage
+from weekly_rest_rules import WeeklyRestValidator
+from validation_results import (Violation, ValidationReport, SEVERITY_ERROR, SEVERITY_WARNING,
+                                KIND_CONSECUTIVE_WORK, KIND_WEEKLY_WORK_RATIO)
+
+
+def set_display_options():
+    """设置中文字体显示（只在需要打印表格时设置，导入模块时不修改 pandas 的全局选项）"""
+    pd.set_option('display.unicode.ambiguous_as_wide', True)
+    pd.set_option('display.unicode.east_asian_width', True)
+    pd.set_option('display.max_columns', None)
+    pd.set_option('display.max_rows', 50)
 
-# 设置中文字体显示
-pd.set_option('display.unicode.ambiguous_as_wide', True)
-pd.set_option('display.unicode.east_asian_width', True)
-pd.set_option('display.max_columns', None)
-pd.set_option('display.max_rows', 50)
 
 class ScheduleRuleValidator:
-    def __init__(self, excel_file):
+    def __init__(self, excel_file, quiet=False, profiler=None):
         self.excel_file = excel_file
+        self.quiet = quiet       # 静默模式：不打印报告，也不生成预览和文字描述
+        self.profiler = profiler  # 分阶段计时（StageProfiler），None 时不计时
         self.schedule_df = None  # 排班表数据
         self.rule_df = None      # 规则表数据
+        self.calendar = None     # 排班表日历索引（日期列、星期、周末、ISO周）
+        self._identified_columns = None
+        self._shift_matrix = None
         self.shift_mapping = {
             'G': '正常班',
             'Y16': '夜班',
@@ -43,49 +60,70 @@ class ScheduleRuleValidator:
             }
         }
         
-        self.load_data()
+        # 班次词表：每个班次代码只分类一次，排班表编码为整数矩阵后按编码查表
+        self.shift_vocabulary = ShiftVocabulary.from_sources(self.shift_mapping)
+        
+        if not self.quiet:
+            set_display_options()
+        run_stage(self.profiler, 'load_data', self.load_data, self.processed_size)
     
     def load_data(self):
         """加载Excel文件中的排班表和规则表数据"""
         try:
             # 读取排班表
-            self.schedule_df = pd.read_excel(self.excel_file, sheet_name='排班表')
+            self.schedule_df = load_sheet(self.excel_file, '排班表')
             # 读取规则表
-            self.rule_df = pd.read_excel(self.excel_file, sheet_name='规则')
-            print(f"成功读取Excel文件：{self.excel_file}")
-            print(f"排班表形状：{self.schedule_df.shape}")
-            print(f"规则表形状：{self.rule_df.shape}")
+            self.rule_df = load_sheet(self.excel_file, '规则')
+            if not self.quiet:
+                print(f"成功读取Excel文件：{self.excel_file}")
+                print(f"排班表形状：{self.schedule_df.shape}")
+                print(f"规则表形状：{self.rule_df.shape}")
         except Exception as e:
-            print(f"读取Excel文件时出错：{e}")
+            self.log(f"读取Excel文件时出错：{e}")
+    
+    def log(self, message):
+        """非静默模式下打印信息"""
+        if not self.quiet:
+            print(message)
+
+    def processed_size(self):
+        """排班表的 (行数, 单元格数)：已识别日期列时只计日期列的单元格，用于分阶段计时"""
+        if self.schedule_df is None:
+            return 0, 0
+        if self._identified_columns is not None and self._identified_columns[0] is self.schedule_df:
+            return len(self.schedule_df), len(self.schedule_df) * len(self._identified_columns[2])
+        return int(self.schedule_df.shape[0]), int(self.schedule_df.size)
+
+    def _date_label(self, date_cols, position):
+        """日期列位置对应的日期文本（日期列来自日历索引时为真实日期）"""
+        if self.calendar is not None and self.calendar.date_cols == date_cols:
+            return self.calendar.label(position)
+        return str(date_cols[position])
     
     def identify_employees_and_dates(self):
-        """识别员工列和日期列"""
+        """识别员工列和日期列（同一份排班表只识别一次）"""
         if self.schedule_df is None:
-            print("排班表数据未加载")
+            self.log("排班表数据未加载")
             return None, None
         
-        print("排班表列名预览：")
-        print(self.schedule_df.columns.tolist())
+        if self._identified_columns is not None and self._identified_columns[0] is self.schedule_df:
+            return self._identified_columns[1], self._identified_columns[2]
+        
+        if not self.quiet:
+            print("排班表列名预览：")
+            print(self.schedule_df.columns.tolist())
         
         # 假设第一列是员工信息
         employee_col = self.schedule_df.columns[0]
         
         # 改进的日期列识别逻辑：尝试多种方法
-        date_cols = []
-        
-        # 方法1：检查列名是否包含日期特征
-        for col in self.schedule_df.columns[1:]:
-            if isinstance(col, str):
-                # 检查是否包含月份、日期相关关键词
-                if (re.search(r'\d{1,2}[月日]', col) or 
-                    re.search(r'\d{4}-\d{2}-\d{2}', col) or
-                    re.search(r'星期[一二三四五六日]', col) or
-                    re.search(r'周[一二三四五六日]', col)):
-                    date_cols.append(col)
+        # 方法1：统一的日期列识别（列名或前几行中的日期表头）
+        self.calendar = get_calendar_index(self.schedule_df)
+        date_cols = [col for col in self.calendar.date_cols if col != employee_col]
         
         # 如果方法1未能识别足够的列，尝试方法2：跳过前几行后检查数据内容
         if len(date_cols) < 5:  # 如果识别的日期列太少
-            print("尝试通过数据内容识别日期列...")
+            self.log("尝试通过数据内容识别日期列...")
             # 跳过前几行可能是表头的部分
             sample_data = self.schedule_df.iloc[2:10, 1:].copy()
             
@@ -106,203 +144,276 @@ class ScheduleRuleValidator:
         
         # 如果还是没有识别到足够的列，直接返回所有列（除了第一列）
         if len(date_cols) < 5:
-            print("未能通过特征识别日期列，返回所有非员工列")
+            self.log("未能通过特征识别日期列，返回所有非员工列")
             date_cols = self.schedule_df.columns[1:].tolist()
         
-        print(f"识别到的日期列数量：{len(date_cols)}")
-        if len(date_cols) > 0:
-            print(f"前5个日期列示例：{date_cols[:5]}")
+        if not self.quiet:
+            print(f"识别到的日期列数量：{len(date_cols)}")
+            if len(date_cols) > 0:
+                print(f"前5个日期列示例：{date_cols[:5]}")
         
+        self._identified_columns = (self.schedule_df, employee_col, date_cols)
         return employee_col, date_cols
     
+    def get_shift_matrix(self):
+        """排班表日期列的班次编码矩阵 (行 × 日期)，同一份排班表只编码一次"""
+        employee_col, date_cols = self.identify_employees_and_dates()
+        if self._shift_matrix is None or self._shift_matrix[0] is not self.schedule_df:
+            matrix = self.shift_vocabulary.encode_frame(self.schedule_df, date_cols)
+            self._shift_matrix = (self.schedule_df, matrix)
+        return self._shift_matrix[1]
+    
+    def employee_info_columns(self):
+        """员工信息表头（'部门'、'工号'、'姓名'）所在的列：{字段: 列名}；表头在日期表头行中，日期在列名中时取列名"""
+        self.identify_employees_and_dates()
+        header_row = self.calendar.header_row if self.calendar is not None else None
+        if header_row is None:
+            header = [str(col) for col in self.schedule_df.columns]
+        else:
+            header = ['' if pd.isna(v) else str(v) for v in self.schedule_df.iloc[header_row]]
+        header = [text.replace('\n', '').strip() for text in header]
+        return {field: self.schedule_df.columns[header.index(field)]
+                for field in ('部门', '工号', '姓名') if field in header}
+    
+    def employee_names(self):
+        """每一行的员工姓名（没有'姓名'表头时取第一列）"""
+        employee_col, _ = self.identify_employees_and_dates()
+        info_columns = self.employee_info_columns()
+        return self.schedule_df[info_columns.get('姓名', employee_col)]
+    
+    def employee_row_mask(self):
+        """实际员工行掩码：表头行之后、姓名（或工号）不为空的行；跳过表头行、说明行和部门汇总行"""
+        employee_col, _ = self.identify_employees_and_dates()
+        info_columns = self.employee_info_columns()
+        key_col = info_columns.get('姓名', info_columns.get('工号'))
+        if key_col is None:
+            # 没有员工信息表头：按第一列的文本跳过说明行和部门行（部门行可能包含多人排班信息，不进行个人规则验证）
+            employees = self.schedule_df[employee_col]
+            is_text = employees.map(lambda v: isinstance(v, str))
+            text = employees.where(is_text, '').astype(str)
+            skip_mask = is_text & (
+                text.str.contains('注意：', regex=False) | text.str.contains('排班信息', regex=False) |
+                text.str.contains('部门', regex=False) | text.str.contains('风险-', regex=False) |
+                text.str.contains('风险室-', regex=False)
+            )
+            return ~skip_mask.to_numpy()
+        
+        keys = self.schedule_df[key_col]
+        text = keys.map(lambda v: '' if pd.isna(v) else str(v).strip())
+        mask = (text != '').to_numpy().copy()
+        mask[:self.calendar.data_start] = False
+        return mask
+    
+    def check_work_day_rows(self, codes, row_employees, date_cols):
+        """对若干员工行的班次编码做连续上班、上五休二和Y16综前后休息检查，返回 {行序号: [Violation]}"""
+        issues = defaultdict(list)
+        run_analyzer = ConsecutiveRunAnalyzer(codes, self.shift_vocabulary.codes)
+        # 只处理有实际排班数据的行（跳过数据太少的行）
+        total_days = run_analyzer.count_per_row()
+        leave_days = run_analyzer.count_per_row(LEAVE_CODES)
+        rest_days = run_analyzer.count_per_row(UNCAPPED_CODES)
+        total_work_days = total_days - rest_days
+        valid_rows = total_days >= 5
+
+        # 检查连续上班天数 - 允许连续7天，但不允许超过7天
+        for run in run_analyzer.work_run_violations(MAX_CONSECUTIVE_WORK_DAYS).itertuples(index=False):
+            if valid_rows[run.row]:
+                issues[run.row].append(Violation(
+                    KIND_CONSECUTIVE_WORK, SEVERITY_ERROR, employee=row_employees[run.row],
+                    start=self._date_label(date_cols, run.start), end=self._date_label(date_cols, run.end),
+                    start_pos=int(run.start), end_pos=int(run.end), value=int(run.length),
+                    limit=MAX_CONSECUTIVE_WORK_DAYS))
+
+        # 检查上五休二规则 - 能识别真实日期时按自然周统计，并检查Y16综前后的休息
+        if self.calendar is not None and self.calendar.date_cols == date_cols:
+            weekly = WeeklyRestValidator(self.shift_vocabulary).check_rows(codes, self.calendar, row_employees)
+            for row, row_violations in weekly.items():
+                if valid_rows[row]:
+                    issues[row].extend(row_violations)
+            return issues
+
+        # 无法按自然周分组时，计算平均每周工作天数（假期不计入统计天数，确保有足够的数据进行统计）
+        available_days = total_days - leave_days
+        for row in np.flatnonzero(valid_rows & (available_days > 7)):
+            weeks = available_days[row] / 7
+            avg_work_days_per_week = total_work_days[row] / weeks
+
+            # 上五休二制允许的范围：4-6天/周
+            if avg_work_days_per_week < 4 or avg_work_days_per_week > 6:
+                issues[int(row)].append(Violation(
+                    KIND_WEEKLY_WORK_RATIO, SEVERITY_WARNING, employee=row_employees[row],
+                    value=round(float(avg_work_days_per_week), 1)))
+        return issues
+    
     def validate_work_days_per_week(self):
-        """验证每周上五休二规则和连续上班天数规则"""
+        """验证每周上五休二规则和连续上班天数规则，返回 Violation 列表"""
         if self.schedule_df is None:
-            print("排班表数据未加载")
-            return
+            self.log("排班表数据未加载")
+            return []
         
         employee_col, date_cols = self.identify_employees_and_dates()
         if not date_cols:
-            print("未能识别日期列")
-            return
+            self.log("未能识别日期列")
+            return []
         
         issues = defaultdict(list)
+        employee_mask = self.employee_row_mask()
+        row_employees = self.employee_names()[employee_mask].tolist()
+        row_issues = self.check_work_day_rows(self.get_shift_matrix()[employee_mask], row_employees, date_cols)
+        for row, row_violations in row_issues.items():
+            issues[row_employees[row]].extend(row_violations)
         
-        # 识别实际员工行和部门行
-        for idx, row in self.schedule_df.iterrows():
-            employee = row[employee_col]
-            
-            # 跳过表头行和说明行
-            if isinstance(employee, str):
-                if "注意：" in employee or "排班信息" in employee:
-                    continue
-                # 对于部门行，可能需要特殊处理
-                if "部门" in employee or "风险-" in employee or "风险室-" in employee:
-                    # 部门行可能包含多人排班信息，不进行个人规则验证
-                    continue
-            
-            shifts = row[date_cols].tolist()
-            
-            # 只处理有实际排班数据的行
-            valid_shifts = [s for s in shifts if pd.notna(s) and s not in ['', 'nan']]
-            if len(valid_shifts) < 5:  # 跳过数据太少的行
-                continue
-            
-            # 检查连续上班天数 - 允许连续7天，但不允许超过7天
-            consecutive_work_days = 0
-            for i in range(len(shifts)):
-                shift = shifts[i]
-                if pd.notna(shift) and shift != '休' and shift != '':
-                    consecutive_work_days += 1
-                    # 只有超过7天才算异常
-                    if consecutive_work_days > 7:
-                        issues[employee].append(f"第{i+1}天连续上班超过7天")
-                else:
-                    consecutive_work_days = 0
-            
-            # 检查上五休二规则 - 按周统计
-            # 假设排班周期为4周左右（28天）
-            total_work_days = sum(1 for s in shifts if pd.notna(s) and s != '休' and s != '')
-            total_days = len([s for s in shifts if pd.notna(s) and s != ''])
-            
-            # 计算平均每周工作天数
-            if total_days > 7:  # 确保有足够的数据进行统计
-                weeks = total_days / 7
-                avg_work_days_per_week = total_work_days / weeks
-                
-                # 上五休二制允许的范围：4-6天/周
-                if avg_work_days_per_week < 4 or avg_work_days_per_week > 6:
-                    issues[employee].append(f"平均每周工作{avg_work_days_per_week:.1f}天，不符合上五休二制")
-        
-        if issues:
-            print("上五休二规则验证问题：")
-            for emp, emp_issues in issues.items():
-                # 去重问题描述
-                unique_issues = list(set(emp_issues))
-                print(f"{emp}: {', '.join(unique_issues)}")
-        else:
-            print("上五休二规则验证通过")
+        if not self.quiet:
+            if issues:
+                print("上五休二规则验证问题：")
+                for emp, emp_issues in issues.items():
+                    # 去重问题描述
+                    unique_issues = list(dict.fromkeys(v.describe() for v in emp_issues))
+                    print(f"{emp}: {', '.join(unique_issues)}")
+            else:
+                print("上五休二规则验证通过")
+        return [v for emp_issues in issues.values() for v in emp_issues]
     
     def analyze_shift_priority(self):
-        """分析班次优先级"""
+        """分析班次优先级，返回 {班次类别: 次数}"""
         if self.schedule_df is None:
-            print("排班表数据未加载")
-            return
+            self.log("排班表数据未加载")
+            return {}
         
         employee_col, date_cols = self.identify_employees_and_dates()
         if not date_cols:
-            print("未能识别日期列")
-            return
-        
-        # 统计各类班次出现的次数
-        shift_counter = Counter()
-        
-        for idx, row in self.schedule_df.iterrows():
-            shifts = row[date_cols].dropna().tolist()
-            for shift in shifts:
-                # 识别班次类型
-                if isinstance(shift, str):
-                    if 'Y16' in shift:
-                        shift_counter['Y16综'] += 1
-                    elif shift.startswith('G值') or ('周末' in shift and 'G' in shift):
-                        shift_counter['周末G班'] += 1
-                    elif 'Y1030' in shift:
-                        shift_counter['工作日Y1030普'] += 1
-                    elif shift == 'G':
-                        shift_counter['工作日G班'] += 1
-                    elif shift == '休':
-                        shift_counter['休息'] += 1
-                    else:
-                        shift_counter['其他'] += 1
-        
-        print("班次分布统计：")
-        for shift_type, count in sorted(shift_counter.items()):
-            print(f"{shift_type}: {count}次")
+            self.log("未能识别日期列")
+            return {}
+        
+        # 统计各类班次出现的次数（班次类别由词表查表得到）
+        shift_counter = Counter(self.shift_vocabulary.count_categories(self.get_shift_matrix()))
+        
+        if not self.quiet:
+            print("班次分布统计：")
+            for shift_type, count in sorted(shift_counter.items()):
+                print(f"{shift_type}: {count}次")
+        return dict(shift_counter)
     
     def validate_special_groups(self):
-        """验证特殊部门的排班规则"""
+        """验证特殊部门的排班规则，返回 Violation 列表"""
         if self.schedule_df is None or self.rule_df is None:
-            print("数据未加载完整")
-            return
+            self.log("数据未加载完整")
+            return []
         
-        print("\n特殊部门排班规则验证：")
-        
-        # 尝试从规则表中提取部门信息
-        print("规则表前10行数据预览：")
-        print(self.rule_df.head(10))
+        if not self.quiet:
+            print("\n特殊部门排班规则验证：")
+            
+            # 尝试从规则表中提取部门信息
+            print("规则表前10行数据预览：")
+            print(self.rule_df.head(10))
         
         # 分析排班表中特殊班次的分布
         employee_col, date_cols = self.identify_employees_and_dates()
         if not date_cols:
-            print("未能识别日期列")
-            return
-        
-        # 检查风险-对公反诈组的夜班（每日一人）
-        y16_count_per_day = defaultdict(int)
-        for col in date_cols:
-            # 计算每天Y16班次的数量
-            y16_count = self.schedule_df[col].str.contains('Y16', na=False).sum()
-            y16_count_per_day[col] = y16_count
-        
-        # 找出Y16班次数量异常的日期
-        abnormal_y16_days = {day: count for day, count in y16_count_per_day.items() if count != 1}
-        if abnormal_y16_days:
-            print("风险-对公反诈组夜班岗异常（应为每日1人）：")
-            for day, count in abnormal_y16_days.items():
-                print(f"{day}: {count}人")
-        else:
-            print("风险-对公反诈组夜班岗配置正常（每日1人）")
+            self.log("未能识别日期列")
+            return []
+        
+        # 各分组特殊岗位每个值班日的人数（日期 × 部门 × 班次人数矩阵一次统计）
+        coverage_issues = []
+        if self.calendar is not None and self.calendar.date_cols == date_cols:
+            coverage_issues = StaffingCoverage.from_validator(self).check(self.special_groups)
+        if not self.quiet:
+            if coverage_issues:
+                print("特殊岗位值班人数异常：")
+                for violation in coverage_issues:
+                    print(violation.describe())
+            else:
+                print("特殊岗位值班人数正常")
+        return coverage_issues
+    
+    def validate_weekend_g_rules(self):
+        """验证G值周末班规则（G值-C只在周六、G值-A/B周日需周六同班次、不得连续两个周末），返回 Violation 列表"""
+        if self.schedule_df is None:
+            self.log("排班表数据未加载")
+            return []
+        
+        employee_col, date_cols = self.identify_employees_and_dates()
+        if not date_cols or self.calendar is None or self.calendar.date_cols != date_cols:
+            self.log("未能识别日期列")
+            return []
+        
+        violations = WeekendGRuleChecker.from_validator(self).violations()
+        if not self.quiet:
+            if violations:
+                print("G值周末班规则验证问题：")
+                for violation in violations:
+                    print(f"{violation.employee}: {violation.describe()}")
+            else:
+                print("G值周末班规则验证通过")
+        return violations
     
     def analyze_shift_sequence(self):
-        """分析各班次的排班顺序"""
+        """分析各班次的排班顺序，返回 {员工: 班次序列}"""
         if self.schedule_df is None:
-            print("排班表数据未加载")
-            return
+            self.log("排班表数据未加载")
+            return {}
         
-        print("\n班次排班顺序分析：")
+        self.log("\n班次排班顺序分析：")
         employee_col, date_cols = self.identify_employees_and_dates()
         if not date_cols:
-            print("未能识别日期列")
-            return
+            self.log("未能识别日期列")
+            return {}
         
-        # 统计每位员工的班次序列
+        # 统计每位员工的班次序列：只取实际员工行，由编码矩阵解码（跳过未排班的日期）
+        employee_mask = self.employee_row_mask()
+        codes = self.get_shift_matrix()[employee_mask]
+        decoded = self.shift_vocabulary.decode(codes)
         employee_sequences = {}
-        for idx, row in self.schedule_df.iterrows():
-            employee = row[employee_col]
-            if pd.notna(employee):
-                shifts = row[date_cols].fillna('').tolist()
-                # 过滤掉空值
-                valid_shifts = [s for s in shifts if s]
-                employee_sequences[employee] = valid_shifts
+        for employee, row_codes, row_shifts in zip(self.employee_names()[employee_mask], codes, decoded):
+            employee_sequences[employee] = row_shifts[row_codes != EMPTY_CODE].tolist()
         
         # 显示部分员工的排班序列示例
-        print("部分员工排班序列示例：")
-        sample_size = min(5, len(employee_sequences))
-        for i, (emp, seq) in enumerate(employee_sequences.items()):
-            if i < sample_size:
-                print(f"{emp}: {seq[:7]}...")
+        if not self.quiet:
+            print("部分员工排班序列示例：")
+            sample_size = min(5, len(employee_sequences))
+            for i, (emp, seq) in enumerate(employee_sequences.items()):
+                if i < sample_size:
+                    print(f"{emp}: {seq[:7]}...")
+        return employee_sequences
     
     def run_full_analysis(self):
-        """运行完整的规则验证分析"""
-        print("\n===== 排班规则验证分析报告 =====")
+        """运行完整的规则验证分析，返回 ValidationReport"""
+        self.log("\n===== 排班规则验证分析报告 =====")
+        report = ValidationReport(source=self.excel_file)
+        profiler, size = self.profiler, self.processed_size
+        
+        # 分阶段计时时先单独识别日期列并编码班次矩阵，避免这部分耗时计入第一个验证步骤
+        if profiler is not None and self.schedule_df is not None:
+            run_stage(profiler, 'identify_employees_and_dates', self.identify_employees_and_dates, size)
+            run_stage(profiler, 'get_shift_matrix', self.get_shift_matrix, size)
         
         # 1. 验证每周上五休二规则
-        print("\n1. 每周上五休二规则验证：")
-        self.validate_work_days_per_week()
+        self.log("\n1. 每周上五休二规则验证：")
+        report.extend(run_stage(profiler, 'validate_work_days_per_week', self.validate_work_days_per_week, size))
         
         # 2. 分析班次优先级
-        print("\n2. 班次优先级分析：")
-        self.analyze_shift_priority()
+        self.log("\n2. 班次优先级分析：")
+        report.metrics['shift_counts'] = run_stage(profiler, 'analyze_shift_priority', self.analyze_shift_priority,
+                                                   size)
         
         # 3. 验证特殊部门排班规则
-        print("\n3. 特殊部门排班规则验证：")
-        self.validate_special_groups()
+        self.log("\n3. 特殊部门排班规则验证：")
+        report.extend(run_stage(profiler, 'validate_special_groups', self.validate_special_groups, size))
         
         # 4. 分析排班顺序
-        print("\n4. 排班顺序分析：")
-        self.analyze_shift_sequence()
+        self.log("\n4. 排班顺序分析：")
+        report.metrics['shift_sequences'] = run_stage(profiler, 'analyze_shift_sequence', self.analyze_shift_sequence,
+                                                      size)
+        
+        # 5. 验证G值周末班规则
+        self.log("\n5. G值周末班规则验证：")
+        report.extend(run_stage(profiler, 'validate_weekend_g_rules', self.validate_weekend_g_rules, size))
+        
+        if profiler is not None:
+            report.metrics['stages'] = profiler.to_dict()
         
-        print("\n===== 分析完成 =====")
+        self.log("\n===== 分析完成 =====")
+        return report
 
 if __name__ == "__main__":
     # 替换为实际的Excel文件路径
@@ -0,0 +1,631 @@
+import sys
+import json
+import time
+import argparse
+import calendar as month_calendar
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from date_columns import calendar_from_labels, WEEKDAY_NAMES
+from shift_vocabulary import (ShiftVocabulary, DEFAULT_IDENTIFIER_FILE, EMPTY_CODE, CATEGORIES,
+                              classify_shift, REST_CODES, LEAVE_CODES, WEEKEND_G_CODES)
+from consecutive_runs import (ConsecutiveRunAnalyzer, SHIFT_CONSECUTIVE_LIMITS, DEFAULT_CONSECUTIVE_LIMIT,
+                              MAX_CONSECUTIVE_WORK_DAYS)
+from validation_results import (Violation, ValidationReport, SEVERITY_ERROR, SEVERITY_WARNING,
+                                KIND_SHIFT_LIMIT, KIND_CONSECUTIVE_WORK, KIND_POSITION_DUPLICATE,
+                                KIND_UNFILLED_SLOT)
+from weekend_g_rules import WeekendGRuleChecker, SATURDAY_ONLY_SHIFTS
+from weekly_rest_rules import WeeklyRestValidator
+from rule_sheet_model import RuleSheetModel, rule_label_to_shift
+from rotation_order import load_shift_orders
+from eligibility_matrix import EligibilityMatrix
+
+# 排班引擎（无界面版本）：
+# 与 js/scheduling-algorithm.js 的 SchedulingAlgorithm 使用相同的输入（完整标识.json 中的班次、员工、
+# 排班顺序，以及'规则'页签的业务线/班次/人员布局），按 IMPORTANT_SCHEDULING_RULES.md 的七条规则
+# 在 (员工 × 日期) 的整数编码矩阵上生成整月排班
+
+BASE_SHIFT = 'G'          # 基础白班：工作日未安排特殊班次的员工值G班
+REST_SHIFT = '休'
+Y16_SHIFT = 'Y16综'
+# 不允许在周末排班的班次关键字（与 getAvailableDatesForShift 的 noWeekendShifts 相同）
+WEEKDAY_ONLY_KEYWORDS = ('G', 'G班', 'Y10', '1030', '10:30')
+# 值完Y16综后休息的天数
+Y16_POST_REST_DAYS = 2
+# 跨月排班时需要保留的上个月末尾天数
+TAIL_DAYS = MAX_CONSECUTIVE_WORK_DAYS
+# 上五休二：每个完整的自然周上班4-6天
+MIN_WEEK_WORK_DAYS = 4
+MAX_WEEK_WORK_DAYS = 6
+# 每天都可排的连值班次按自然周对齐的起始星期：7天一轮从周六开始（值班周6天、下一周5天），
+# 5天一轮从周日开始、周五周六两天另起一轮（两种轮次所在的周都是6天和4天）
+WEEK_ALIGNED_STARTS = {7: (5,), 5: (6, 4)}
+
+
+def block_length(shift, position):
+    """一轮连值的天数（与 getConsecutiveDaysRule 相同），不超过规则4的连值上限"""
+    if shift == Y16_SHIFT and '对公' in position:
+        days = 5
+    elif shift == Y16_SHIFT and '个人' in position:
+        days = 7
+    elif shift in ('G值-A', 'G值-B', 'G值'):
+        days = 2
+    else:
+        days = 1
+    return min(days, SHIFT_CONSECUTIVE_LIMITS.get(shift, DEFAULT_CONSECUTIVE_LIMIT))
+
+
+def is_weekday_only(shift):
+    return any(shift == keyword or keyword in shift for keyword in WEEKDAY_ONLY_KEYWORDS) \
+        and shift not in WEEKEND_G_CODES
+
+
+def allowed_day_mask(shift, calendar):
+    """班次可排日期的掩码（与 getAvailableDatesForShift 相同）：G值类只在周末，G值-C只在周六，白班类只在工作日"""
+    weekday = calendar.table['weekday'].to_numpy()
+    if shift in SATURDAY_ONLY_SHIFTS:
+        return weekday == 5
+    if shift in WEEKEND_G_CODES:
+        return weekday >= 5
+    if is_weekday_only(shift):
+        return weekday < 5
+    return np.ones(len(calendar), dtype=bool)
+
+
+def tail_from_result(result, days=TAIL_DAYS):
+    """上个月排班的末尾状态：{工号: (最后 days 天的班次列表, 最后一次值周末G值的日期)}"""
+    decoded = result.vocabulary.decode(result.codes[:, -days:])
+    is_weekend_g = result.vocabulary.is_weekend_g_table()[result.codes]
+    dates = result.calendar.dates
+    tail = {}
+    for row, number in enumerate(result.employees['number']):
+        g_days = np.flatnonzero(is_weekend_g[row])
+        tail[str(number)] = (list(decoded[row]), dates[g_days[-1]] if len(g_days) else None)
+    return tail
+
+
+def position_matches(employee_position, position):
+    """员工岗位与排班顺序岗位是否匹配（与 canAssignShiftToEmployee 的匹配规则相同）"""
+    if not employee_position:
+        return False
+    if employee_position == position:
+        return True
+    for keyword in ('对公', '个人', '风险'):
+        if keyword in position and keyword in employee_position:
+            return True
+    return employee_position in position or position in employee_position
+
+
+def build_month_calendar(year, month):
+    """当月日历索引（列名为 'YYYY/M/D\\n周X'，与排班表表头格式相同）"""
+    days = month_calendar.monthrange(year, month)[1]
+    labels = [f"{year}/{month}/{d}\n周{WEEKDAY_NAMES[date(year, month, d).weekday()]}" for d in range(1, days + 1)]
+    return calendar_from_labels(labels, default_year=year)
+
+
+class SchedulingInputs:
+    def __init__(self, shifts, employees, orders, eligibility=None):
+        self.shifts = shifts                  # 启用的班次（按优先级排序）
+        self.employees = employees            # DataFrame: number, name, dept, position
+        self.orders = orders                  # {(岗位, 班次): [工号, ...]}（排班顺序）
+        # 可值班次位矩阵（EligibilityMatrix），没有记录的员工不限制
+        self.eligibility = eligibility if eligibility is not None else EligibilityMatrix([], [s['code'] for s in shifts])
+
+    @classmethod
+    def load(cls, identifier_file=DEFAULT_IDENTIFIER_FILE, rule_file=None, department=None, position=None):
+        """读取标识导出文件（以及可选的'规则'页签），只保留启用的班次和在职员工"""
+        with open(identifier_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        # 规则1：只使用启用状态（status=0）的班次；规则2：按 priority 排序，相同时按班次类别
+        shifts = [s for s in data.get('shifts', []) if s.get('status') == 0 and s.get('code')]
+        shifts = [s for _, s in sorted(enumerate(shifts), key=lambda item: (
+            item[1].get('priority') or 0, CATEGORIES.index(classify_shift(item[1]['code'])), item[0]))]
+        enabled = {s['code'] for s in shifts}
+
+        employees = pd.DataFrame([{
+            'number': str(e.get('number')),
+            'name': e.get('name', ''),
+            'dept': e.get('deptName') or e.get('department') or '',
+            'position': e.get('position') or '',
+        } for e in data.get('employees', []) if str(e.get('status', 0)).strip() in ('0', 'active')],
+            columns=['number', 'name', 'dept', 'position'])
+        if department:
+            employees = employees[employees['dept'] == department]
+        if position:
+            employees = employees[employees['position'] == position]
+        employees = employees.drop_duplicates('number').reset_index(drop=True)
+
+        orders = load_shift_orders(data, enabled)
+
+        eligibility = EligibilityMatrix.from_identifiers(data, [s['code'] for s in shifts], employees['number'])
+
+        inputs = cls(shifts, employees, orders, eligibility)
+        if rule_file:
+            inputs.merge_rule_sheet(rule_file)
+        return inputs
+
+    def merge_rule_sheet(self, rule_file):
+        """用'规则'页签补充排班顺序和可值班次：排班顺序中没有的 (岗位, 班次) 使用规则页签中的人员顺序"""
+        try:
+            model = RuleSheetModel.from_workbook(rule_file)
+        except Exception:
+            return False
+
+        enabled = {s['code'] for s in self.shifts}
+        name_to_number = dict(zip(self.employees['name'], self.employees['number']))
+        positions = sorted(set(self.employees['position']))
+        for (line, label), names in model.shift_employees.items():
+            shift = rule_label_to_shift(label)
+            if shift not in enabled:
+                continue
+            numbers = [name_to_number[name] for name in names if name in name_to_number]
+            for number in numbers:
+                self.eligibility.grant(number, shift)
+            for position in positions:
+                if position_matches(position, line) and (position, shift) not in self.orders and numbers:
+                    self.orders[(position, shift)] = list(numbers)
+        return True
+
+    def can_work(self, number, shift):
+        return self.eligibility.can_work(number, shift)
+
+
+class ScheduleResult:
+    def __init__(self, year, month, employees, calendar, codes, vocabulary, positions, rotation_state, unfilled,
+                 stats=None):
+        self.year = year
+        self.month = month
+        self.employees = employees          # DataFrame: number, name, dept, position
+        self.calendar = calendar            # 当月日历索引
+        self.codes = codes                  # (员工 × 日期) 班次编码矩阵
+        self.vocabulary = vocabulary
+        self.positions = positions          # (员工 × 日期) 特殊班次对应的排班岗位（未安排为空字符串）
+        self.rotation_state = rotation_state  # {'岗位/班次': 下一轮起始位置}，用于跨月连续轮换
+        self.unfilled = unfilled            # [(岗位, 班次, 日期位置列表)] 无人可排的轮次
+        self.stats = dict(stats or {})      # 求解过程信息（求解器状态、目标值、用时等）
+
+    def to_frame(self):
+        """与排班表相同列布局的DataFrame：部门、用户ID、工号、姓名 + 日期列"""
+        frame = pd.DataFrame({
+            '部门': self.employees['dept'].to_numpy(),
+            '用户ID': self.employees['number'].to_numpy(),
+            '工号': self.employees['number'].to_numpy(),
+            '姓名': self.employees['name'].to_numpy(),
+        })
+        decoded = self.vocabulary.decode(self.codes)
+        dates = pd.DataFrame(decoded, columns=self.calendar.date_cols)
+        return pd.concat([frame, dates], axis=1)
+
+    def save(self, path, shifts=None):
+        """保存为与排班表相同布局的工作簿（标题行、说明行、班次信息行、表头行、排班数据）"""
+        frame = self.to_frame()
+        windows = '; '.join(f"班次{s['code']}: {s['startTime']}-{s['endTime']}"
+                            for s in (shifts or []) if s.get('startTime') and s.get('endTime'))
+        head = [[f'{self.year}年{self.month}月排班表'], ['注意：由排班引擎自动生成'],
+                [f'排班信息：{windows}; 休: 当天休息']]
+        rows = head + [list(frame.columns)] + frame.fillna('').values.tolist()
+        with pd.ExcelWriter(path) as writer:
+            pd.DataFrame(rows).to_excel(writer, sheet_name='排班表', header=False, index=False)
+
+    def shift_counts(self):
+        return self.vocabulary.count_categories(self.codes)
+
+    def check_rules(self):
+        """检查生成结果：连值上限、连续上班天数、上五休二和Y16综前后休息、岗位特殊班次唯一性、G值周末规则、无人可排的轮次"""
+        report = ValidationReport(source=f'{self.year}-{self.month:02d}')
+        names = self.employees['name'].tolist()
+        labels = [self.calendar.label(i) for i in range(len(self.calendar))]
+        analyzer = ConsecutiveRunAnalyzer(self.codes, self.vocabulary.codes)
+
+        for run in analyzer.violations().itertuples(index=False):
+            report.violations.append(Violation(
+                KIND_SHIFT_LIMIT, SEVERITY_ERROR, employee=names[run.row], shift=run.shift,
+                start=labels[run.start], end=labels[run.end], start_pos=int(run.start), end_pos=int(run.end),
+                value=int(run.length), limit=int(run.limit)))
+        for run in analyzer.work_run_violations(MAX_CONSECUTIVE_WORK_DAYS, REST_CODES + LEAVE_CODES).itertuples(index=False):
+            report.violations.append(Violation(
+                KIND_CONSECUTIVE_WORK, SEVERITY_ERROR, employee=names[run.row],
+                start=labels[run.start], end=labels[run.end], start_pos=int(run.start), end_pos=int(run.end),
+                value=int(run.length), limit=MAX_CONSECUTIVE_WORK_DAYS))
+
+        # 规则3：同一岗位同一天同一特殊班次只能有一人
+        rows, days = np.nonzero(self.positions != '')
+        if len(rows):
+            slots = pd.DataFrame({'position': self.positions[rows, days], 'day': days,
+                                  'shift': self.vocabulary.decode(self.codes[rows, days])})
+            counts = slots.groupby(['position', 'day', 'shift']).size()
+            for (position, day, shift), count in counts[counts > 1].items():
+                report.violations.append(Violation(
+                    KIND_POSITION_DUPLICATE, SEVERITY_ERROR, dept=position, shift=shift,
+                    start=labels[day], end=labels[day], start_pos=int(day), end_pos=int(day), value=int(count), limit=1))
+
+        weekly = WeeklyRestValidator(self.vocabulary).check_rows(self.codes, self.calendar, names)
+        report.extend(violation for row in sorted(weekly) for violation in weekly[row])
+        report.extend(WeekendGRuleChecker(self.codes, self.calendar, self.vocabulary, names).violations())
+
+        for position, shift, block in self.unfilled:
+            report.violations.append(Violation(
+                KIND_UNFILLED_SLOT, SEVERITY_WARNING, dept=position, shift=shift,
+                start=labels[block[0]], end=labels[block[-1]], start_pos=int(block[0]), end_pos=int(block[-1])))
+        report.metrics['shift_counts'] = self.shift_counts()
+        return report
+
+
+class SchedulingEngine:
+    def __init__(self, inputs, vocabulary=None):
+        self.inputs = inputs
+        self.vocabulary = vocabulary if vocabulary is not None else ShiftVocabulary.from_sources()
+        for shift in inputs.shifts:
+            self.vocabulary.add(shift['code'])
+
+    def _blocks(self, shift, position, calendar, carried=0):
+        """把班次可排的日期切分为轮次（每一轮由同一人连值）；carried 为月初接着上个月值完的天数"""
+        mask = allowed_day_mask(shift, calendar)
+        days = np.flatnonzero(mask)
+        if shift in WEEKEND_G_CODES:
+            # 每个周末为一轮
+            weeks = calendar.table['iso_week'].to_numpy()
+            return [days[weeks[days] == week] for week in dict.fromkeys(weeks[days].tolist())]
+        length = block_length(shift, position)
+        starts = WEEK_ALIGNED_STARTS.get(length)
+        if starts is None or not mask.all():
+            blocks = [days[:carried]] if carried else []
+            return blocks + [days[i:i + length] for i in range(carried, len(days), length)]
+        # 按自然周对齐切分，月初不完整的一轮由接着值的人值前 carried 天
+        weekday = calendar.table['weekday'].to_numpy()
+        blocks = np.split(days, [i for i in range(1, len(days)) if weekday[days[i]] in starts])
+        if 0 < carried < len(blocks[0]):
+            blocks = [blocks[0][:carried], blocks[0][carried:]] + blocks[1:]
+        return blocks
+
+    def generate(self, year, month, rotation_state=None, previous_tail=None):
+        """生成 year 年 month 月的排班
+
+        rotation_state 为上个月返回的轮换位置，previous_tail 为上个月的末尾状态（见 tail_from_result）。
+        """
+        inputs = self.inputs
+        vocabulary = self.vocabulary
+        employees = inputs.employees
+        calendar = build_month_calendar(year, month)
+        n_days = len(calendar)
+        weekday = calendar.table['weekday'].to_numpy()
+        weeks = calendar.table['iso_week'].to_numpy()
+
+        codes = np.zeros((len(employees), n_days), dtype=vocabulary.dtype)
+        positions = np.full((len(employees), n_days), '', dtype=object)
+        row_of = {number: i for i, number in enumerate(employees['number'])}
+        emp_positions = employees['position'].tolist()
+        row_numbers = employees['number'].tolist()
+        rest_code = vocabulary.add(REST_SHIFT)
+        rotation = dict(rotation_state or {})
+        unfilled = []
+        weekend_g_weeks = [set() for _ in range(len(employees))]
+        y16_starts = []
+        enabled = [s['code'] for s in inputs.shifts]
+        is_work = vocabulary.is_work_table()
+        y16_code = vocabulary.index.get(Y16_SHIFT, -1)
+        complete_weeks = {week for week, count in zip(*np.unique(weeks, return_counts=True)) if count == 7}
+
+        # 假期班次（如产假C）：排班顺序中的人员整月休假
+        for (position, shift), numbers in inputs.orders.items():
+            if shift in LEAVE_CODES:
+                for number in numbers:
+                    if number in row_of:
+                        codes[row_of[number]] = vocabulary.index[shift]
+        on_leave = (codes != EMPTY_CODE).any(axis=1)
+
+        # 上个月末尾：Y16综结束后的休息延续到本月初，上个月最后一个周末值G值的不能接着值本月第一个周末
+        previous_tail = previous_tail or {}
+        initial_runs = np.zeros(len(employees), dtype=np.int64)
+        tail_rest = {}
+        weekend_days = np.flatnonzero(weekday >= 5)
+        dates = calendar.dates
+        # 月初不完整的自然周中属于上个月的天数，以及每人这几天的上班天数（没有上个月末尾时为 -1）
+        lead_days = int(weekday[0])
+        first_week_extra = np.full(len(employees), -1, dtype=np.int64)
+        for number, (tail_codes, last_g) in previous_tail.items():
+            row = row_of.get(number)
+            if row is None or on_leave[row]:
+                continue
+            if lead_days and len(tail_codes) >= lead_days:
+                first_week_extra[row] = sum(c not in REST_CODES + LEAVE_CODES and c != '' for c in tail_codes[-lead_days:])
+            for code in reversed(tail_codes):
+                if code in REST_CODES + LEAVE_CODES or code == '':
+                    break
+                initial_runs[row] += 1
+            recent = list(tail_codes[-Y16_POST_REST_DAYS:])[::-1]
+            if Y16_SHIFT in recent:
+                tail_rest[row] = Y16_POST_REST_DAYS - recent.index(Y16_SHIFT)
+                # 上个月末尾的Y16综未值完时先由同一人接着值，休息在这一轮值完后安排
+                y16_run = len(tail_codes) - len(''.join('x' if c == Y16_SHIFT else '-' for c in tail_codes).rstrip('x'))
+                if not y16_run or y16_run >= block_length(Y16_SHIFT, emp_positions[row]) or \
+                        initial_runs[row] >= MAX_CONSECUTIVE_WORK_DAYS:
+                    codes[row, :tail_rest.pop(row)] = rest_code
+            if last_g is not None and len(weekend_days):
+                first = dates[weekend_days[0]]
+                if (first - timedelta(days=first.weekday())) - (last_g - timedelta(days=last_g.weekday())) == timedelta(days=7):
+                    weekend_g_weeks[row].add(int(weeks[weekend_days[0]]) - 1)
+
+        def fits(row, block, shift, cross_month=True):
+            """row 能否值 block 这一轮 shift（cross_month 为 False 时不计入上个月末尾的上班天数）"""
+            if (codes[row, block] != EMPTY_CODE).any():
+                return False
+            # 本轮与前后紧挨着的已排班次（月初时包括上个月末尾）连起来不能超过7天
+            if self._adjacent_run(codes[row], block, initial_runs[row]) > MAX_CONSECUTIVE_WORK_DAYS:
+                return False
+            # 值完Y16综后的两天必须能休息；所在的自然周（月初的周包括上个月末尾）已排的班次不超过6天，且还能上满4天
+            rest_days = np.arange(block[-1] + 1, min(block[-1] + 1 + Y16_POST_REST_DAYS, n_days)) \
+                if shift == Y16_SHIFT else np.array([], dtype=np.int64)
+            if is_work[codes[row, rest_days]].any():
+                return False
+            extra = first_week_extra[row] if cross_month else -1
+            most, least = self._week_bounds(codes[row], block, rest_days, weeks, weekday, complete_weeks, extra)
+            if most > MAX_WEEK_WORK_DAYS or least < MIN_WEEK_WORK_DAYS:
+                return False
+            # Y16综开始的前一天留作值班前的休息，不安排其他特殊班次
+            if shift != Y16_SHIFT and block[-1] + 1 < n_days and codes[row, block[-1] + 1] == y16_code:
+                return False
+            # 规则7：同一员工不能连续两个周末值G值班
+            week = int(weeks[block[0]])
+            return shift not in WEEKEND_G_CODES or not {week - 1, week, week + 1} & weekend_g_weeks[row]
+
+        # 规则2：按优先级依次安排特殊班次；规则6：按排班顺序轮换
+        for shift in enabled:
+            if shift in (BASE_SHIFT,) + REST_CODES + LEAVE_CODES:
+                continue
+            code = vocabulary.index[shift]
+            for (position, order_shift), numbers in inputs.orders.items():
+                if order_shift != shift:
+                    continue
+                rows = [row_of[n] for n in numbers
+                        if n in row_of and not on_leave[row_of[n]] and inputs.can_work(n, shift)
+                        and position_matches(emp_positions[row_of[n]], position)]
+                key = f'{position}/{shift}'
+                if not rows:
+                    continue
+                index = rotation.get(key, 0) % len(rows)
+                # 上个月末尾未值完的一轮连值由同一人在本月初接着值完
+                carry_row, carried = None, 0
+                if allowed_day_mask(shift, calendar).all():
+                    length = block_length(shift, position)
+                    # 按自然周对齐的轮次在月初第一个起始星期之前结束（月初就是起始星期时上个月的一轮已值完）
+                    starts = WEEK_ALIGNED_STARTS.get(length)
+                    lead = next((d for d in range(n_days) if weekday[d] in starts), n_days) if starts else length
+                    for row in rows:
+                        tail_codes = previous_tail.get(row_numbers[row], ([], None))[0]
+                        run = len(tail_codes) - len(''.join('x' if c == shift else '-' for c in tail_codes).rstrip('x'))
+                        # 接着值的天数不超过剩余的连值天数，也不能让跨月的连续上班超过7天
+                        remaining = min(length - run, lead, MAX_CONSECUTIVE_WORK_DAYS - initial_runs[row])
+                        if run and remaining > 0:
+                            carry_row, carried = row, int(remaining)
+                        if run:
+                            break
+                last_row, last_end = None, -2
+                blocks = self._blocks(shift, position, calendar, carried)
+                if carried and not fits(carry_row, blocks[0], shift):
+                    # 接着值的人值不完时（如上个月末尾所在的自然周已满6天），月初这几天并入本月第一轮
+                    carried = 0
+                    blocks = self._blocks(shift, position, calendar)
+                block_number = 0
+                while block_number < len(blocks):
+                    block = blocks[block_number]
+                    order = [(index + attempt) % len(rows) for attempt in range(len(rows))]
+                    if block_number == 0 and carried:
+                        order = [None] + order
+                    # 没有人能值完整的一轮时（如月初各人都接着上个月连续上班），由能值的人值前面几天，其余天数另起一轮
+                    # 仍然无人可排时，月初跨月的自然周不再计入上个月末尾的上班天数
+                    lengths = [len(block)] if shift in WEEKEND_G_CODES else range(len(block), 0, -1)
+                    chosen = None
+                    for cross_month, length in [(c, n) for c in (True, False) for n in lengths]:
+                        for slot in order:
+                            row = carry_row if slot is None else rows[slot]
+                            # 规则5：值完一轮连值后必须换下一个人
+                            if row == last_row and block[0] == last_end + 1 and len(rows) > 1:
+                                continue
+                            if fits(row, block[:length], shift, cross_month):
+                                chosen = slot, row, block[:length]
+                                break
+                        if chosen is not None:
+                            break
+                    if chosen is None:
+                        unfilled.append((position, shift, block.tolist()))
+                    else:
+                        slot, row, part = chosen
+                        if len(part) < len(block):
+                            blocks.insert(block_number + 1, block[len(part):])
+                        # 规则3：本轮由一人连值，同一岗位同一天只安排一人
+                        codes[row, part] = code
+                        positions[row, part] = position
+                        if shift in WEEKEND_G_CODES:
+                            weekend_g_weeks[row].add(int(weeks[part[0]]))
+                        if shift == Y16_SHIFT:
+                            if part[0] > 0:
+                                y16_starts.append((row, int(part[0])))
+                            # 值完Y16综后休息两天
+                            rest = np.arange(part[-1] + 1, min(part[-1] + 1 + Y16_POST_REST_DAYS, n_days))
+                            rest = rest[codes[row, rest] == EMPTY_CODE]
+                            codes[row, rest] = rest_code
+                        if slot is not None:
+                            index = (slot + 1) % len(rows)
+                        last_row, last_end = row, int(part[-1])
+                    if block_number == 0 and carry_row in tail_rest and codes[carry_row, 0] != code:
+                        # 没能接着值完时，月初按上个月末尾的Y16综休息
+                        rest = np.arange(tail_rest[carry_row])
+                        codes[carry_row, rest[codes[carry_row, rest] == EMPTY_CODE]] = rest_code
+                    block_number += 1
+                rotation[key] = index
+
+        # 参与排班的员工（出现在排班顺序中）周末未安排班次时休息
+        scheduled = np.zeros(len(employees), dtype=bool)
+        for (position, shift), numbers in inputs.orders.items():
+            for number in numbers:
+                if number in row_of:
+                    scheduled[row_of[number]] = True
+        weekend = weekday >= 5
+        free_weekend = (codes == EMPTY_CODE) & weekend[None, :] & scheduled[:, None]
+        codes[free_weekend] = rest_code
+
+        # Y16综前一周休息不足2天（且前一个周末不是双休）时，值班前一天休息
+        is_rest = vocabulary.is_rest_table()
+        for row, start in y16_starts:
+            if start == 0 or codes[row, start - 1] != EMPTY_CODE:
+                continue
+            window = codes[row, max(0, start - 7):start]
+            saturdays = np.flatnonzero(weekday[:start] == 5)
+            double_rest = len(saturdays) > 0 and saturdays[-1] + 1 < start and \
+                is_rest[codes[row, saturdays[-1]]] and is_rest[codes[row, saturdays[-1] + 1]]
+            if is_rest[window].sum() < 2 and not double_rest:
+                codes[row, start - 1] = rest_code
+
+        # 工作日其余时间值基础白班
+        if BASE_SHIFT in enabled:
+            base_code = vocabulary.index[BASE_SHIFT]
+            can_base = scheduled & ~on_leave & inputs.eligibility.mask(employees['number'], BASE_SHIFT)
+            fill = (codes == EMPTY_CODE) & ~weekend[None, :] & can_base[:, None]
+            codes[fill] = base_code
+
+        self._limit_work_runs(codes, rest_code, initial_runs)
+        self._limit_week_days(codes, rest_code, weeks, complete_weeks, first_week_extra)
+        return ScheduleResult(year, month, employees, calendar, codes, vocabulary, positions, rotation, unfilled)
+
+    def _adjacent_run(self, row_codes, block, initial_run=0):
+        """在 block 安排班次后，包含该轮的连续上班天数（前后紧挨着的已排上班日也计入）"""
+        working = self.vocabulary.is_work_table()[row_codes]
+        before = 0
+        while block[0] - before - 1 >= 0 and working[block[0] - before - 1]:
+            before += 1
+        if before == block[0]:
+            before += initial_run
+        after = 0
+        while block[-1] + after + 1 < len(row_codes) and working[block[-1] + after + 1]:
+            after += 1
+        return before + len(block) + after
+
+    def _week_bounds(self, row_codes, block, rest_days, weeks, weekday, complete_weeks, first_week_extra=-1):
+        """在 block 安排班次、rest_days 安排休息后，所涉及自然周的 (已排上班的最多天数, 可能上班的最少天数)
+
+        可能上班的天数包括还能补基础白班的空工作日。只统计完整的周；first_week_extra >= 0 时月初不完整的周
+        加上上个月末尾这几天的上班天数后也统计。
+        """
+        working = self.vocabulary.is_work_table()[row_codes]
+        working[block] = True
+        open_days = (row_codes == EMPTY_CODE) & (weekday < 5)
+        open_days[block] = False
+        open_days[rest_days] = False
+        most, least = 0, MAX_WEEK_WORK_DAYS + 1
+        for week in set(weeks[np.concatenate([block, rest_days])].tolist()):
+            if week in complete_weeks:
+                extra = 0
+            elif week == weeks[0] and first_week_extra >= 0:
+                extra = int(first_week_extra)
+            else:
+                continue
+            in_week = weeks == week
+            fixed = int(working[in_week].sum()) + extra
+            most = max(most, fixed)
+            least = min(least, fixed + int(open_days[in_week].sum()))
+        return most, least
+
+    def _limit_week_days(self, codes, rest_code, weeks, complete_weeks, first_week_extra=None):
+        """上五休二：自然周上班超过6天时，把本周的基础白班改为休息，优先改值班前一天
+
+        只处理完整的周；first_week_extra 给出时月初不完整的周加上上个月末尾的上班天数（-1 为未知）一起处理。
+        """
+        vocabulary = self.vocabulary
+        if BASE_SHIFT not in vocabulary.index:
+            return codes
+        base_code = vocabulary.index[BASE_SHIFT]
+        is_work = vocabulary.is_work_table()
+        if first_week_extra is None:
+            first_week_extra = np.full(codes.shape[0], -1, dtype=np.int64)
+        for week in dict.fromkeys(weeks.tolist()):
+            days = np.flatnonzero(weeks == week)
+            excess = is_work[codes[:, days]].sum(axis=1) - MAX_WEEK_WORK_DAYS
+            if week not in complete_weeks:
+                if week != weeks[0]:
+                    continue
+                excess = np.where(first_week_extra >= 0, excess + first_week_extra, 0)
+            for row in np.flatnonzero(excess > 0):
+                row_days = codes[row, days]
+                base_days = days[row_days == base_code].tolist()
+                duty = days[is_work[row_days] & (row_days != base_code)]
+                # 值班前一天休息，其次是本周最后一天基础白班
+                first_duty = int(duty[0]) if len(duty) else None
+                base_days.sort(key=lambda d: (d != (first_duty or 0) - 1, -d))
+                for day in base_days[:int(excess[row])]:
+                    codes[row, day] = rest_code
+        return codes
+
+    def _limit_work_runs(self, codes, rest_code, initial_runs=None):
+        """上五休二：连续上班超过7天时，把区间内最靠后的一天基础白班改为休息（initial_runs 为上个月末尾的连续上班天数）"""
+        vocabulary = self.vocabulary
+        if BASE_SHIFT not in vocabulary.index:
+            return
+        base_code = vocabulary.index[BASE_SHIFT]
+        working = vocabulary.is_work_table()[codes]
+        if initial_runs is None:
+            initial_runs = np.zeros(codes.shape[0], dtype=np.int64)
+        for row in np.flatnonzero(working.sum(axis=1) + initial_runs > MAX_CONSECUTIVE_WORK_DAYS):
+            run = int(initial_runs[row])
+            for day in range(codes.shape[1]):
+                run = run + 1 if working[row, day] else 0
+                if run > MAX_CONSECUTIVE_WORK_DAYS:
+                    candidates = [d for d in range(day, day - run, -1) if codes[row, d] == base_code]
+                    if not candidates:
+                        continue
+                    codes[row, candidates[0]] = rest_code
+                    working[row, candidates[0]] = False
+                    run = day - candidates[0]
+        return codes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='按排班规则生成整月排班')
+    parser.add_argument('year', type=int)
+    parser.add_argument('month', type=int)
+    parser.add_argument('--identifiers', default=DEFAULT_IDENTIFIER_FILE, help='完整标识.json 路径')
+    parser.add_argument('--rules', help="包含'规则'页签的工作簿（可选）")
+    parser.add_argument('--rotation', help='上个月的轮换位置JSON文件（生成后会更新）')
+    parser.add_argument('-o', '--output', help='输出排班表 .xlsx')
+    args = parser.parse_args(argv)
+
+    try:
+        inputs = SchedulingInputs.load(args.identifiers, args.rules)
+        rotation_state = None
+        if args.rotation:
+            try:
+                with open(args.rotation, 'r', encoding='utf-8') as f:
+                    rotation_state = json.load(f)
+            except FileNotFoundError:
+                rotation_state = None
+
+        start = time.perf_counter()
+        result = SchedulingEngine(inputs).generate(args.year, args.month, rotation_state)
+        elapsed = time.perf_counter() - start
+        print(f"已生成{args.year}年{args.month}月排班：{len(result.employees)}人 × {len(result.calendar)}天，用时{elapsed:.3f}秒")
+
+        print("班次分布统计：")
+        for shift_type, count in sorted(result.shift_counts().items()):
+            print(f"{shift_type}: {count}次")
+        report = result.check_rules()
+        print(f"\n规则检查问题数: {len(report)}")
+        for violation in report.violations[:20]:
+            print(f"- {violation.employee or violation.dept}: {violation.describe()}")
+
+        if args.output:
+            result.save(args.output, inputs.shifts)
+            print(f"排班表已写入: {args.output}")
+        if args.rotation:
+            with open(args.rotation, 'w', encoding='utf-8') as f:
+                json.dump(result.rotation_state, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"生成排班时出错: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
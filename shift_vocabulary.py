@@ -0,0 +1,188 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+# 班次词表：
+# 把班次代码映射为小整数和班次类别，每个不同的原始字符串只分类一次，
+# 之后整张排班表就是一个 uint8 编码矩阵，所有按单元格的分类都变成查表
+
+DEFAULT_IDENTIFIER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '数据导入', '完整标识.json')
+
+# 编码 0 保留给未排班（空单元格）
+EMPTY_CODE = 0
+
+# 班次类别（与 ScheduleRuleValidator.analyze_shift_priority 的统计口径一致）
+CATEGORY_NIGHT = 'Y16综'
+CATEGORY_WEEKEND_G = '周末G班'
+CATEGORY_Y1030 = '工作日Y1030普'
+CATEGORY_DAY_G = '工作日G班'
+CATEGORY_REST = '休息'
+CATEGORY_OTHER = '其他'
+CATEGORIES = [CATEGORY_NIGHT, CATEGORY_WEEKEND_G, CATEGORY_Y1030, CATEGORY_DAY_G, CATEGORY_REST, CATEGORY_OTHER]
+
+# 默认的班次说明（与 ScheduleRuleValidator.shift_mapping 相同）
+DEFAULT_SHIFT_MAPPING = {
+    'G': '正常班',
+    'Y16': '夜班',
+    'G值': '周末班',
+    'G值-A': '周末班',
+    'G值-B': '周末班',
+    'G值-C': '周末班',
+    'Y1030普': '工作日Y1030班',
+    '休': '休息'
+}
+
+REST_CODES = ('休', '休息')
+LEAVE_CODES = ('C',)
+WEEKEND_G_CODES = ('G值', 'G值-A', 'G值-B', 'G值-C')
+
+
+def classify_shift(shift):
+    """班次代码所属类别；非文本取值返回 None（不参与统计）"""
+    if not isinstance(shift, str):
+        return None
+    if 'Y16' in shift:
+        return CATEGORY_NIGHT
+    if shift.startswith('G值') or ('周末' in shift and 'G' in shift):
+        return CATEGORY_WEEKEND_G
+    if 'Y1030' in shift:
+        return CATEGORY_Y1030
+    if shift == 'G':
+        return CATEGORY_DAY_G
+    if shift == '休':
+        return CATEGORY_REST
+    return CATEGORY_OTHER
+
+
+def load_identifier_shifts(identifier_file=DEFAULT_IDENTIFIER_FILE):
+    """读取标识导出文件中的班次列表，文件不存在时返回空列表"""
+    if not identifier_file or not os.path.exists(identifier_file):
+        return []
+    with open(identifier_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get('shifts', [])
+
+
+class ShiftVocabulary:
+    def __init__(self, codes=(), shift_mapping=None):
+        self.shift_mapping = dict(DEFAULT_SHIFT_MAPPING if shift_mapping is None else shift_mapping)
+        self.codes = ['']           # 编码 -> 班次代码，0 为未排班
+        self.index = {}             # 班次代码 -> 编码
+        self.category_ids = [-1]    # 编码 -> 类别序号（-1 表示不统计）
+        self.shift_info = {}        # 班次代码 -> 标识导出中的班次信息
+        for code in codes:
+            self.add(code)
+
+    @classmethod
+    def from_sources(cls, shift_mapping=None, identifier_file=DEFAULT_IDENTIFIER_FILE):
+        """由 shift_mapping 和 完整标识.json 中的班次建立词表，保证常用班次的编码稳定"""
+        vocabulary = cls(shift_mapping=shift_mapping)
+        for code in vocabulary.shift_mapping:
+            vocabulary.add(code)
+        for shift in load_identifier_shifts(identifier_file):
+            code = shift.get('code')
+            if code:
+                vocabulary.add(code)
+                vocabulary.shift_info[code] = shift
+        return vocabulary
+
+    def __len__(self):
+        return len(self.codes)
+
+    def add(self, code):
+        """登记一个班次代码并返回其编码（已存在时直接返回）"""
+        existing = self.index.get(code)
+        if existing is not None:
+            return existing
+        new_id = len(self.codes)
+        self.codes.append(code)
+        self.index[code] = new_id
+        category = classify_shift(code)
+        self.category_ids.append(CATEGORIES.index(category) if category is not None else -1)
+        return new_id
+
+    @property
+    def dtype(self):
+        return np.uint8 if len(self.codes) <= 256 else np.uint16
+
+    def encode_values(self, values):
+        """将任意形状的原始取值数组编码为整数数组，每个不同的取值只处理一次"""
+        values = np.asarray(values, dtype=object)
+        raw_codes, uniques = pd.factorize(values.ravel(), use_na_sentinel=True)
+
+        lookup = np.empty(len(uniques) + 1, dtype=np.int64)
+        for i, value in enumerate(uniques):
+            if isinstance(value, str):
+                value = value.strip()
+            lookup[i] = EMPTY_CODE if value == '' else self.add(value)
+        lookup[-1] = EMPTY_CODE  # factorize 对缺失值返回 -1
+
+        return lookup[raw_codes].astype(self.dtype).reshape(values.shape)
+
+    def encode_frame(self, frame, date_cols):
+        """将排班DataFrame的日期列编码为 (员工 × 日期) 矩阵"""
+        return self.encode_values(frame[date_cols].to_numpy(dtype=object))
+
+    def decode(self, matrix):
+        """把编码矩阵还原为班次代码（未排班为空字符串）"""
+        return np.array(self.codes, dtype=object)[np.asarray(matrix)]
+
+    def lookup_table(self, predicate, dtype=bool):
+        """对每个编码计算一次 predicate(班次代码)，返回可直接按编码索引的查找表"""
+        table = np.zeros(len(self.codes), dtype=dtype)
+        for i, code in enumerate(self.codes):
+            if i != EMPTY_CODE:
+                table[i] = predicate(code)
+        return table
+
+    def mask_table(self, codes):
+        """指定班次集合的布尔查找表"""
+        wanted = set(codes)
+        return self.lookup_table(lambda code: code in wanted)
+
+    def category_table(self):
+        """编码 -> 类别序号的查找表（未排班和不统计的取值为 -1）"""
+        return np.array(self.category_ids, dtype=np.int8)
+
+    def category_of(self, code):
+        category_id = self.category_ids[self.index[code]] if code in self.index else -1
+        return CATEGORIES[category_id] if category_id >= 0 else None
+
+    def count_categories(self, matrix):
+        """按类别统计编码矩阵中的班次数量，返回 {类别: 次数}"""
+        return self.categories_from_counts(np.bincount(np.asarray(matrix).ravel(), minlength=len(self.codes)))
+    
+    def categories_from_counts(self, counts):
+        """把按编码统计的次数汇总为 {类别: 次数}"""
+        counts = np.asarray(counts)
+        category_ids = self.category_table()[:len(counts)]
+        result = {}
+        for category_id, category in enumerate(CATEGORIES):
+            total = int(counts[category_ids == category_id].sum())
+            if total:
+                result[category] = total
+        return result
+
+    def describe(self, code):
+        """班次说明：优先使用 shift_mapping，其次使用标识导出中的班次名称"""
+        if code in self.shift_mapping:
+            return self.shift_mapping[code]
+        for prefix, description in self.shift_mapping.items():
+            if isinstance(code, str) and code.startswith(prefix) and prefix != 'G':
+                return description
+        info = self.shift_info.get(code)
+        return info.get('name') if info else None
+
+    def is_rest_table(self):
+        return self.mask_table(REST_CODES)
+
+    def is_work_table(self):
+        """上班班次查找表：除未排班、休息和假期外都算上班"""
+        table = ~self.mask_table(REST_CODES + LEAVE_CODES)
+        table[EMPTY_CODE] = False
+        return table
+
+    def is_weekend_g_table(self):
+        return self.mask_table(WEEKEND_G_CODES)
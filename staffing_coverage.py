@@ -0,0 +1,175 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from validation_results import Violation, SEVERITY_ERROR, SEVERITY_WARNING, KIND_STAFFING_COVERAGE
+
+# 每日值班人数覆盖矩阵：
+# 把排班表一次性统计为 (日期 × 部门 × 班次编码) 的人数张量，
+# special_groups 中每个特殊岗位（夜班岗、周末A岗、周六C岗、周末B岗……）的要求都在张量上按日期切片检查，
+# 同时覆盖规则3（同一岗位同一天同一特殊班次只有一人），报告人数不足和过多的日期
+
+REQUIRED_PER_POST = 1   # 特殊岗位每个值班日的人数
+
+DAYS_ALL = 'all'
+DAYS_WEEKEND = 'weekend'
+DAYS_SATURDAY = 'saturday'
+
+
+def post_requirement(post, vocabulary):
+    """特殊岗位名称对应的 (班次代码列表, 值班日期类型)；无法识别时返回 (None, None)
+
+    夜班岗为每天的Y16类班次；周末X岗为周六周日的G值-X；周六X岗只在周六；周末白班岗为周末G值。
+    """
+    if '夜班' in post:
+        return [code for code in vocabulary.codes[1:] if isinstance(code, str) and 'Y16' in code], DAYS_ALL
+    if '周末' not in post and '周六' not in post:
+        return None, None
+    days = DAYS_SATURDAY if '周六' in post else DAYS_WEEKEND
+    for suffix in ('A', 'B', 'C'):
+        if f'{suffix}岗' in post:
+            return [f'G值-{suffix}'], days
+    return ['G值'], days
+
+
+def group_matches(group, dept):
+    """special_groups 的分组名与排班表部门是否对应（'风险-对公反诈组' 对应 '风险-对公反诈'）"""
+    core = group.split('-')[-1].rstrip('组')
+    return bool(core) and core in str(dept)
+
+
+class StaffingCoverage:
+    def __init__(self, codes, calendar, vocabulary, depts):
+        self.calendar = calendar
+        self.vocabulary = vocabulary
+        codes = np.asarray(codes)
+        self.dept_ids, self.depts = pd.factorize(pd.Series(list(depts), dtype=object).fillna(''))
+        self.depts = list(self.depts)
+        self.rows = None     # from_validator 构建时为参与统计的排班表行号
+        self.tensor = self._count(codes)
+
+    def _count(self, codes):
+        """一次 bincount 得到 (日期 × 部门 × 班次编码) 人数"""
+        n_days = codes.shape[1]
+        n_codes = len(self.vocabulary)
+        flat = (np.arange(n_days)[None, :] * len(self.depts) + self.dept_ids[:, None]) * n_codes + codes.astype(np.int64)
+        return np.bincount(flat.ravel(), minlength=n_days * len(self.depts) * n_codes).reshape(
+            n_days, len(self.depts), n_codes)
+
+    def recount(self, codes, days):
+        """只重新统计指定日期列的人数（codes 为与构建时相同员工行的最新编码矩阵），用于增量验证"""
+        days = sorted(days)
+        if len(self.vocabulary) > self.tensor.shape[2]:
+            self.tensor = np.pad(self.tensor, ((0, 0), (0, 0), (0, len(self.vocabulary) - self.tensor.shape[2])))
+        if days:
+            self.tensor[days] = self._count(np.asarray(codes)[:, days])
+
+    @classmethod
+    def from_validator(cls, validator):
+        """从 ScheduleRuleValidator 构建：部门取表头行中'部门'所在列，只统计表头之后的数据行"""
+        validator.identify_employees_and_dates()
+        df = validator.schedule_df
+        calendar = validator.calendar
+        codes = validator.get_shift_matrix()
+        start = calendar.data_start if calendar is not None else 0
+        dept_pos = 0
+        if calendar is not None and calendar.header_row is not None:
+            header = [str(value).strip() for value in df.iloc[calendar.header_row]]
+            dept_pos = header.index('部门') if '部门' in header else 0
+        elif '部门' in df.columns:
+            dept_pos = df.columns.get_loc('部门')
+        depts = df.iloc[start:, dept_pos]
+        keep = depts.map(lambda v: isinstance(v, str) and v.strip() != '' and '部门' not in v).to_numpy()
+        coverage = cls(codes[start:][keep], calendar, validator.shift_vocabulary, depts[keep].str.strip().tolist())
+        coverage.rows = start + np.flatnonzero(keep)
+        return coverage
+
+    def day_mask(self, days):
+        weekday = self.calendar.table['weekday'].to_numpy()
+        if days == DAYS_SATURDAY:
+            return weekday == 5
+        if days == DAYS_WEEKEND:
+            return weekday >= 5
+        return np.ones(len(weekday), dtype=bool)
+
+    def counts(self, depts=None, shifts=None):
+        """指定部门和班次的每日人数 (日期,)；None 表示全部"""
+        dept_ids = [self.depts.index(d) for d in depts if d in self.depts] if depts is not None else slice(None)
+        code_ids = [self.vocabulary.index[s] for s in shifts if s in self.vocabulary.index] \
+            if shifts is not None else slice(1, None)
+        return self.tensor[:, dept_ids][:, :, code_ids].sum(axis=(1, 2))
+
+    def to_frame(self):
+        """非零人数的长表：date, dept, shift, count"""
+        days, depts, codes = np.nonzero(self.tensor[:, :, 1:])
+        return pd.DataFrame({
+            'date': [self.calendar.label(d) for d in days],
+            'dept': [self.depts[d] for d in depts],
+            'shift': [self.vocabulary.codes[c + 1] for c in codes],
+            'count': self.tensor[days, depts, codes + 1],
+        })
+
+    def generic_shift(self, shift):
+        """special_groups 中写的班次（如 'G班'）对应的班次代码"""
+        if shift in self.vocabulary.index:
+            return shift
+        shift = str(shift).rstrip('班')
+        return shift if shift in self.vocabulary.index else None
+
+    def check(self, special_groups, required=REQUIRED_PER_POST):
+        """检查 special_groups 中每个特殊岗位每个值班日的人数，返回 Violation 列表
+
+        排班表使用岗位专属班次（G值-A、G值-C……）时逐个岗位检查；仍用通用班次（如周末排 G）的岗位
+        合并检查：每天通用班次的人数应等于当天值班的岗位数。人数不足记为警告，多于要求（违反规则3）记为错误；
+        排班表中没有对应部门的分组不检查。
+        """
+        violations = []
+        for group, posts in special_groups.items():
+            depts = [d for d in self.depts if group_matches(group, d)]
+            if not depts:
+                continue
+            checks = []          # [(岗位名称, 班次列表, 每日应有人数)]
+            generic = {}         # 通用班次 -> (岗位名称列表, 每日应有人数)
+            for post, post_shift in posts.items():
+                shifts, days = post_requirement(post, self.vocabulary)
+                if not shifts:
+                    continue
+                expected = self.day_mask(days).astype(np.int64) * required
+                fallback = self.generic_shift(post_shift)
+                if self.counts(depts, shifts).any() or fallback is None or fallback in shifts:
+                    checks.append((post, shifts, expected))
+                else:
+                    names, total = generic.get(fallback, ([], 0))
+                    generic[fallback] = (names + [post], total + expected)
+            for shift, (names, expected) in generic.items():
+                checks.append(('/'.join(names), [shift], expected))
+
+            for post, shifts, expected in checks:
+                counts = self.counts(depts, shifts)
+                for day in np.flatnonzero((expected > 0) & (counts != expected)):
+                    label = self.calendar.label(int(day))
+                    violations.append(Violation(
+                        KIND_STAFFING_COVERAGE, SEVERITY_ERROR if counts[day] > expected[day] else SEVERITY_WARNING,
+                        dept=f'{group}{post}', shift='/'.join(shifts), start=label, end=label,
+                        start_pos=int(day), end_pos=int(day), value=int(counts[day]), limit=int(expected[day])))
+        return violations
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python staffing_coverage.py <排班表.xlsx>")
+        sys.exit(1)
+    try:
+        from schedule_rule_validation import ScheduleRuleValidator
+
+        validator = ScheduleRuleValidator(sys.argv[1], quiet=True)
+        coverage = StaffingCoverage.from_validator(validator)
+        violations = coverage.check(validator.special_groups)
+        print(f"部门: {', '.join(coverage.depts)}")
+        print(f"特殊岗位人数异常: {len(violations)}处")
+        for violation in violations:
+            print(f"- {violation.describe()}")
+    except Exception as e:
+        print(f"统计值班人数时出错: {e}")
+        sys.exit(1)
@@ -0,0 +1,124 @@
+import io
+import sys
+import json
+import time
+import pstats
+import cProfile
+import tracemalloc
+import unicodedata
+from collections import namedtuple
+
+# 分阶段计时：
+# ScheduleRuleValidator.run_full_analysis、RuleDetailAnalyzer.run_complete_analysis 的每个步骤作为一个阶段，
+# 记录耗时、CPU 时间、处理的行数/单元格数，开启 tracemalloc 时再记录该阶段新增的峰值内存；
+# 开启 cProfile 时只在阶段内部采样，可导出 .prof 文件或打印耗时最多的函数。
+# 未传入 StageProfiler 时（默认）run_stage 直接调用步骤函数，不计时也不创建任何记录对象。
+# 阶段不能嵌套：tracemalloc 的峰值在每个阶段开始时重置。
+
+StageRecord = namedtuple('StageRecord', ['name', 'wall_seconds', 'cpu_seconds', 'rows', 'cells', 'peak_bytes'])
+
+HOTSPOT_LIMIT = 20
+TABLE_COLUMNS = ('耗时(秒)', 'CPU(秒)', '行数', '单元格', '峰值内存', '占比')
+
+
+def _pad(text, width, right=False):
+    """按显示宽度（中文字符占两格）补齐空格"""
+    fill = ' ' * max(width - sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text), 0)
+    return fill + text if right else text + fill
+
+
+def frame_size(frame):
+    """DataFrame 的 (行数, 单元格数)，未加载时为 (0, 0)"""
+    if frame is None:
+        return 0, 0
+    return int(frame.shape[0]), int(frame.size)
+
+
+class StageProfiler:
+    def __init__(self, profile=False, trace_memory=False):
+        self.records = []
+        self.trace_memory = trace_memory
+        self._profile = cProfile.Profile() if profile else None
+        self._started_tracing = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def run(self, name, func, size=None):
+        """在一个阶段内执行 func() 并记录；size() 在执行后调用，返回 (行数, 单元格数)"""
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        if self._profile is not None:
+            self._profile.enable()
+        cpu, wall = time.process_time(), time.perf_counter()
+        try:
+            return func()
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            if self._profile is not None:
+                self._profile.disable()
+            peak = tracemalloc.get_traced_memory()[1] - base if self.trace_memory else None
+            rows, cells = size() if size is not None else (None, None)
+            self.records.append(StageRecord(name, wall, cpu, rows, cells, peak))
+
+    def close(self):
+        """停止由本对象开启的 tracemalloc"""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @property
+    def total_wall_seconds(self):
+        return sum(record.wall_seconds for record in self.records)
+
+    def to_dict(self):
+        return {
+            'stages': [{'name': r.name, 'wall_seconds': round(r.wall_seconds, 6), 'cpu_seconds': round(r.cpu_seconds, 6),
+                        'rows': r.rows, 'cells': r.cells, 'peak_bytes': r.peak_bytes} for r in self.records],
+            'total_wall_seconds': round(self.total_wall_seconds, 6),
+            'total_cpu_seconds': round(sum(r.cpu_seconds for r in self.records), 6),
+            'trace_memory': self.trace_memory,
+            'profile': self._profile is not None,
+        }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def format_table(self):
+        """每个阶段一行：耗时、CPU、行数、单元格数、峰值内存、占总耗时比例"""
+        total = self.total_wall_seconds or 1.0
+        width = max([len(r.name) for r in self.records] + [4]) + 2
+        lines = [_pad('阶段', width) + ''.join(_pad(title, 12, right=True) for title in TABLE_COLUMNS)]
+        for r in self.records:
+            values = [f'{r.wall_seconds:.4f}', f'{r.cpu_seconds:.4f}',
+                      '-' if r.rows is None else str(r.rows), '-' if r.cells is None else str(r.cells),
+                      '-' if r.peak_bytes is None else f'{r.peak_bytes / 2**20:.2f}MB', f'{r.wall_seconds / total:.1%}']
+            lines.append(_pad(r.name, width) + ''.join(_pad(value, 12, right=True) for value in values))
+        lines.append(_pad('合计', width) + _pad(f'{self.total_wall_seconds:.4f}', 12, right=True) +
+                     _pad(f'{sum(r.cpu_seconds for r in self.records):.4f}', 12, right=True))
+        return '\n'.join(lines)
+
+    def print_table(self, file=None):
+        print(self.format_table(), file=file or sys.stdout)
+
+    def hotspots(self, limit=HOTSPOT_LIMIT, sort='cumulative'):
+        """cProfile 采样中耗时最多的函数（未开启 cProfile 时返回空字符串）"""
+        if self._profile is None:
+            return ''
+        stream = io.StringIO()
+        pstats.Stats(self._profile, stream=stream).sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def dump_profile(self, path):
+        """导出 cProfile 采样（可用 snakeviz、pstats 查看）"""
+        if self._profile is not None:
+            self._profile.dump_stats(path)
+
+
+def run_stage(profiler, name, func, size=None):
+    """profiler 为 None 时直接返回 func()，否则作为一个阶段计时"""
+    if profiler is None:
+        return func()
+    return profiler.run(name, func, size)
@@ -0,0 +1,260 @@
+import sys
+from collections import namedtuple
+
+import numpy as np
+from openpyxl import load_workbook
+
+from workbook_loader import (is_schedule_info_row, is_employee_header_row, parse_shift_windows,
+                             EMPLOYEE_HEADER_SEARCH_ROWS)
+from date_columns import calendar_from_labels
+from shift_vocabulary import ShiftVocabulary, CATEGORIES, CATEGORY_DAY_G, CATEGORY_WEEKEND_G, LEAVE_CODES
+from consecutive_runs import (run_length_encode, SHIFT_CONSECUTIVE_LIMITS, DEFAULT_CONSECUTIVE_LIMIT,
+                              UNCAPPED_CODES, MAX_CONSECUTIVE_WORK_DAYS)
+
+# 流式读取超大排班表：
+# 基于 openpyxl 只读模式逐行迭代'排班表'页签，按 read_excel.py 的方式定位员工信息表头行，
+# 之后每次只产出一位员工的排班行，内存占用只与单行和统计累加器有关
+
+ScheduleRow = namedtuple('ScheduleRow', ['row_number', 'dept', 'employee_id', 'name', 'codes'])
+
+
+def _cell_text(value):
+    """与 str(cell).strip() 一致，空单元格为空字符串"""
+    return '' if value is None else str(value).strip()
+
+
+class StreamingScheduleReader:
+    def __init__(self, file_path, sheet_name='排班表', vocabulary=None):
+        self.file_path = file_path
+        self.sheet_name = sheet_name
+        self.vocabulary = vocabulary if vocabulary is not None else ShiftVocabulary.from_sources()
+        self.workbook = None
+        self.header = None          # 清理后的表头（去掉换行和首尾空白）
+        self.header_row = -1        # 表头所在行（从0开始）
+        self.schedule_info = None   # 班次信息文本
+        self.shift_windows = []     # [(班次代码, 时间段)]
+        self.calendar = None        # 日期列的日历索引
+        self._rows = None
+        self._info_positions = {}
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        """以只读模式打开工作簿并定位员工信息表头行"""
+        self.workbook = load_workbook(self.file_path, read_only=True, data_only=True)
+        if self.sheet_name not in self.workbook.sheetnames:
+            self.close()
+            raise ValueError(f"未找到'{self.sheet_name}'页签")
+        sheet = self.workbook[self.sheet_name]
+        # 部分导出文件记录的表格范围不准确，重新按实际内容迭代
+        sheet.reset_dimensions()
+        self._rows = sheet.iter_rows(values_only=True)
+        self._locate_header()
+
+    def close(self):
+        if self.workbook is not None:
+            self.workbook.close()
+            self.workbook = None
+        self._rows = None
+
+    def _locate_header(self):
+        """先找班次信息行，再在其后若干行内寻找包含'部门'、'工号'、'姓名'的表头行"""
+        info_row = -1
+        for i, values in enumerate(self._rows):
+            if info_row == -1:
+                if is_schedule_info_row(values):
+                    info_row = i
+                    self.schedule_info = _cell_text(values[0])
+                    self.shift_windows = parse_shift_windows(self.schedule_info)
+                continue
+            if i > info_row + EMPLOYEE_HEADER_SEARCH_ROWS:
+                break
+            if is_employee_header_row(values):
+                self.header_row = i
+                self.header = [_cell_text(value).replace('\n', '') for value in values]
+                self.calendar = calendar_from_labels(self.header)
+                for field in ('部门', '工号', '姓名'):
+                    if field in self.header:
+                        self._info_positions[field] = self.header.index(field)
+                return
+
+        if info_row == -1:
+            raise ValueError("未找到包含班次信息的行")
+        raise ValueError("未找到员工信息表头行")
+
+    def iter_employees(self):
+        """逐个产出员工排班行；跳过空行、表头行以及工号或姓名为空的行"""
+        if self._rows is None:
+            self.open()
+        positions = self.calendar.positions
+        width = int(positions.max()) + 1 if len(positions) else 0
+        dept_pos = self._info_positions.get('部门')
+        id_pos = self._info_positions.get('工号')
+        name_pos = self._info_positions.get('姓名')
+
+        for row_number, values in enumerate(self._rows, start=self.header_row + 1):
+            head = values[:3]
+            if len(head) < 3 or any(value is None or value == '' or '部门' in str(value) for value in head):
+                continue
+            dept = _cell_text(values[dept_pos]) if dept_pos is not None and dept_pos < len(values) else ''
+            employee_id = _cell_text(values[id_pos]) if id_pos is not None and id_pos < len(values) else ''
+            name = _cell_text(values[name_pos]) if name_pos is not None and name_pos < len(values) else ''
+            if not employee_id or not name:
+                continue
+
+            if len(values) < width:
+                values = tuple(values) + (None,) * (width - len(values))
+            cells = np.empty(len(positions), dtype=object)
+            cells[:] = [values[p] for p in positions]
+            yield ScheduleRow(row_number, dept, employee_id, name, self.vocabulary.encode_values(cells))
+
+
+class StreamingScheduleValidator:
+    def __init__(self, reader, limits=None, default_limit=DEFAULT_CONSECUTIVE_LIMIT,
+                 max_work_days=MAX_CONSECUTIVE_WORK_DAYS):
+        self.reader = reader
+        self.vocabulary = reader.vocabulary
+        self.limits = dict(SHIFT_CONSECUTIVE_LIMITS if limits is None else limits)
+        self.default_limit = default_limit
+        self.max_work_days = max_work_days
+        self._tables = None
+        self._reset()
+
+    def _reset(self):
+        self.employee_count = 0
+        self.category_counts = np.zeros(len(self.vocabulary), dtype=np.int64)
+        self.y16_per_dept = {}
+        self.work_run_violations = []
+        self.limit_violations = []
+        self.weekly_ratio_issues = []
+        self.dept_weekend_g = {}
+
+    def _lookup_tables(self):
+        """编码查找表；词表在读取过程中新增班次时重新生成"""
+        if self._tables is None or len(self._tables['limit']) != len(self.vocabulary):
+            vocabulary = self.vocabulary
+            limit = vocabulary.lookup_table(lambda code: self.limits.get(code, self.default_limit), dtype=np.int64)
+            limit[vocabulary.mask_table(UNCAPPED_CODES)] = 0
+            g_ids = [CATEGORIES.index(CATEGORY_DAY_G), CATEGORIES.index(CATEGORY_WEEKEND_G)]
+            self._tables = {
+                'limit': limit,
+                'work': vocabulary.is_work_table(),
+                'leave': vocabulary.mask_table(LEAVE_CODES),
+                'y16': vocabulary.lookup_table(lambda code: isinstance(code, str) and 'Y16' in code),
+                'g': np.isin(vocabulary.category_table(), g_ids),
+            }
+            if len(self.category_counts) < len(vocabulary):
+                self.category_counts = np.pad(self.category_counts, (0, len(vocabulary) - len(self.category_counts)))
+        return self._tables
+
+    def consume(self, row):
+        """用一位员工的排班行更新所有累加器"""
+        codes = row.codes.astype(np.int64)
+        tables = self._lookup_tables()
+        calendar = self.reader.calendar
+        self.employee_count += 1
+
+        counts = np.bincount(codes, minlength=len(self.category_counts))
+        self.category_counts[:len(counts)] += counts
+        # 夜班岗按部门统计每日Y16人数（各部门的夜班岗每日一人）
+        y16 = tables['y16'][codes]
+        if y16.any():
+            per_day = self.y16_per_dept.setdefault(row.dept, np.zeros(len(codes), dtype=np.int64))
+            per_day += y16
+
+        # 班次连值上限
+        _, starts, lengths, run_codes = run_length_encode(codes[None, :])
+        run_limits = tables['limit'][run_codes]
+        for start, length, code, limit in zip(starts, lengths, run_codes, run_limits):
+            if 0 < limit < length:
+                self.limit_violations.append((row.name, row.employee_id, self.vocabulary.codes[code],
+                                              calendar.label(start), calendar.label(start + length - 1),
+                                              int(length), int(limit)))
+
+        # 连续上班天数（休息、假期和未排班之外都算上班）
+        working = tables['work'][codes].astype(np.int8)
+        _, starts, lengths, _ = run_length_encode(working[None, :])
+        for start, length in zip(starts, lengths):
+            if length > self.max_work_days:
+                self.work_run_violations.append((row.name, row.employee_id, calendar.label(start),
+                                                 calendar.label(start + length - 1), int(length)))
+
+        # 上五休二：平均每周工作4-6天（假期不计入统计天数）
+        total_days = int(((codes != 0) & ~tables['leave'][codes]).sum())
+        if total_days > 7:
+            avg_work_days = working.sum() / (total_days / 7)
+            if avg_work_days < 4 or avg_work_days > 6:
+                self.weekly_ratio_issues.append((row.name, row.employee_id, round(float(avg_work_days), 1)))
+
+        # 各部门周末G班次数
+        weekend_g = int(tables['g'][codes][calendar.weekend_mask].sum())
+        if weekend_g:
+            stats = self.dept_weekend_g.setdefault(row.dept, {'total': 0, 'employees': 0})
+            stats['total'] += weekend_g
+            stats['employees'] += 1
+
+    def run(self):
+        """流式读取全部员工并返回汇总结果"""
+        self._reset()
+        for row in self.reader.iter_employees():
+            self.consume(row)
+        return self.summary()
+
+    def summary(self):
+        category_ids = self.vocabulary.category_table()[:len(self.category_counts)]
+        category_counts = {category: int(self.category_counts[category_ids == i].sum())
+                           for i, category in enumerate(CATEGORIES)}
+        calendar = self.reader.calendar
+        abnormal_y16_days = {}
+        for dept, per_day in self.y16_per_dept.items():
+            for i in np.flatnonzero(per_day != 1):
+                abnormal_y16_days.setdefault(calendar.label(i), {})[dept] = int(per_day[i])
+        return {
+            'employee_count': self.employee_count,
+            'day_count': len(calendar),
+            'category_counts': {k: v for k, v in category_counts.items() if v},
+            'abnormal_y16_days': dict(sorted(abnormal_y16_days.items())),
+            'limit_violations': self.limit_violations,
+            'work_run_violations': self.work_run_violations,
+            'weekly_ratio_issues': self.weekly_ratio_issues,
+            'dept_weekend_g': self.dept_weekend_g,
+        }
+
+    def print_report(self, summary=None):
+        summary = summary or self.summary()
+        print(f"员工数量: {summary['employee_count']}, 日期列数量: {summary['day_count']}")
+        print("班次分布统计：")
+        for shift_type, count in sorted(summary['category_counts'].items()):
+            print(f"{shift_type}: {count}次")
+        print(f"\n超过连值上限的区间数: {len(summary['limit_violations'])}")
+        for name, emp_id, shift, start, end, length, limit in summary['limit_violations'][:10]:
+            print(f"- {name}({emp_id}) 班次{shift}: {start} 至 {end} 连续{length}天（上限{limit}天）")
+        print(f"\n连续上班超过{self.max_work_days}天的区间数: {len(summary['work_run_violations'])}")
+        for name, emp_id, start, end, length in summary['work_run_violations'][:10]:
+            print(f"- {name}({emp_id}): {start} 至 {end} 连续上班{length}天")
+        print(f"\n不符合上五休二制的员工数: {len(summary['weekly_ratio_issues'])}")
+        for name, emp_id, avg in summary['weekly_ratio_issues'][:10]:
+            print(f"- {name}({emp_id}): 平均每周工作{avg}天")
+        print(f"\n夜班岗Y16人数不为1（按部门）的日期数: {len(summary['abnormal_y16_days'])}")
+        print("周末G班按部门统计:")
+        for dept, stats in summary['dept_weekend_g'].items():
+            print(f"- {dept}: 共安排{stats['total']}次（{stats['employees']}人）")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python streaming_reader.py <排班表.xlsx> [页签名]")
+        sys.exit(1)
+    sheet = sys.argv[2] if len(sys.argv) > 2 else '排班表'
+    try:
+        with StreamingScheduleReader(sys.argv[1], sheet) as reader:
+            validator = StreamingScheduleValidator(reader)
+            validator.print_report(validator.run())
+    except Exception as e:
+        print(f"流式读取排班表时出错: {e}")
+        sys.exit(1)
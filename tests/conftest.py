@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+WORKBOOK = os.path.join(ROOT, '排班表新3.xlsx')
+
+
+@pytest.fixture(scope='session')
+def workbook():
+    """仓库自带的 2025年8月 排班表"""
+    return WORKBOOK
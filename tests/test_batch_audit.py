@@ -0,0 +1,26 @@
+import os
+
+from batch_audit import collect_workbooks, run_batch, build_report, main
+
+
+def test_collect_workbooks_skips_temp_files(tmp_path):
+    for name in ('2025-08.xlsx', '~$2025-08.xlsx', 'notes.txt'):
+        (tmp_path / name).write_bytes(b'')
+    assert collect_workbooks([str(tmp_path)]) == [str(tmp_path / '2025-08.xlsx')]
+
+
+def test_run_batch_in_process(workbook):
+    results = run_batch([workbook], workers=1)
+    assert [r['status'] for r in results] == ['ok']
+    report = build_report(results, 0.0)
+    summary = report['summaries'][0]
+    assert summary['file'] == os.path.basename(workbook)
+    assert summary['business_lines'] > 0
+    assert sum(summary['shift_counts'].values()) > 0
+
+
+def test_main_writes_report(tmp_path, workbook, capsys):
+    output = tmp_path / 'report.json'
+    assert main([workbook, '-j', '1', '-o', str(output)]) == 0
+    assert output.exists()
+    assert '批量排班审核报告' in capsys.readouterr().out
@@ -0,0 +1,45 @@
+import argparse
+
+import pytest
+
+import workbook_loader
+from benchmark_suite import (parse_size, synthetic_roster, write_workbook, employee_rows_checked, run_benchmark,
+                             compare_results)
+
+
+@pytest.fixture(autouse=True)
+def restore_disk_cache():
+    yield
+    workbook_loader.set_disk_cache_enabled(True)
+
+
+def test_parse_size():
+    assert parse_size('2000×62x12') == (2000, 62, 12)
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_size('3x10x5')
+
+
+def test_synthetic_roster():
+    info, dates, shifts = synthetic_roster(12, 14, 2)
+    assert shifts.shape == (12, 14) and len(info) == 12 and len(dates) == 14
+    assert info['部门'].nunique() == 2
+    # 每个部门每天一人值Y16综
+    assert ((shifts[:6] == 'Y16综').sum(axis=0) == 1).all()
+
+
+def test_validator_checks_every_synthetic_row(tmp_path):
+    path = tmp_path / 'synthetic.xlsx'
+    info = write_workbook(str(path), 20, 31, 3)
+    assert info['cells'] == 20 * 31
+    assert employee_rows_checked(str(path)) == 20
+
+
+def test_run_and_compare(tmp_path):
+    results = run_benchmark([(12, 14, 2)], ['validator', 'rule_detail_full'], repeat=1, memory=False,
+                            log=lambda message: None)
+    run = results['runs'][0]
+    assert run['label'] == '12x14x2' and run['rows_checked'] == 12
+    assert [step['name'] for step in run['cases']['validator']['steps']][-1] == 'run_full_analysis'
+    slower = {'runs': [{'label': '12x14x2', 'cases': {'validator': {'steps': [
+        {'name': 'run_full_analysis', 'wall_seconds': 10.0}]}}}]}
+    assert compare_results(results, slower)[0][:3] == ('12x14x2', 'validator', 'run_full_analysis')
@@ -0,0 +1,30 @@
+import numpy as np
+
+from consecutive_runs import ConsecutiveRunAnalyzer, run_length_encode
+from shift_vocabulary import ShiftVocabulary
+
+
+def encode(rows):
+    vocabulary = ShiftVocabulary()
+    return vocabulary.encode_values(np.array(rows, dtype=object)), vocabulary
+
+
+def test_run_length_encode_skips_empty_cells():
+    rows, starts, lengths, codes = run_length_encode(np.array([[1, 1, 0, 2], [0, 0, 3, 3]]))
+    assert rows.tolist() == [0, 0, 1]
+    assert starts.tolist() == [0, 3, 2]
+    assert lengths.tolist() == [2, 1, 2]
+    assert codes.tolist() == [1, 2, 3]
+
+
+def test_shift_limit_violations():
+    codes, vocabulary = encode([['Y1030普'] * 6 + ['休'], ['G'] * 7])
+    violations = ConsecutiveRunAnalyzer(codes, vocabulary.codes).violations()
+    assert violations[['row', 'shift', 'length', 'limit']].values.tolist() == [[0, 'Y1030普', 6, 5]]
+
+
+def test_leave_breaks_work_runs():
+    codes, vocabulary = encode([['G'] * 4 + ['C'] + ['G'] * 4, ['G'] * 8 + ['休']])
+    analyzer = ConsecutiveRunAnalyzer(codes, vocabulary.codes)
+    assert analyzer.work_run_violations(7)[['row', 'length']].values.tolist() == [[1, 8]]
+    assert analyzer.count_per_row(['C']).tolist() == [1, 0]
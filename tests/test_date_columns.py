@@ -0,0 +1,33 @@
+from datetime import date, datetime
+
+import pandas as pd
+
+from date_columns import parse_date_label, calendar_from_labels, build_calendar_index
+
+
+def test_parse_date_label_formats():
+    assert parse_date_label('2025-08-04') == (2025, 8, 4, None)
+    assert parse_date_label('20250804') == (2025, 8, 4, None)
+    assert parse_date_label('8月4日 周一') == (None, 8, 4, 0)
+    assert parse_date_label(datetime(2025, 8, 4)) == (2025, 8, 4, 0)
+    assert parse_date_label('周六') == (None, None, None, 5)
+    assert parse_date_label('2月30日') is None
+    assert parse_date_label('姓名') is None
+
+
+def test_calendar_fills_year_across_new_year():
+    calendar = calendar_from_labels(['姓名'] + [f'12月{d}日' for d in (30, 31)] + [f'1月{d}日' for d in (1, 2, 3)],
+                                    default_year=2024)
+    assert calendar.dates == [date(2024, 12, 30), date(2024, 12, 31), date(2025, 1, 1), date(2025, 1, 2),
+                              date(2025, 1, 3)]
+    assert calendar.positions.tolist() == [1, 2, 3, 4, 5]
+    assert list(calendar.week_groups()) == [(2025, 1)]
+
+
+def test_header_row_in_data(workbook):
+    frame = pd.read_excel(workbook, sheet_name='排班表')
+    calendar = build_calendar_index(frame)
+    assert calendar.header_row == 2 and calendar.data_start == 3
+    assert len(calendar) == 31 and calendar.label(0) == '2025-08-01'
+    assert calendar.weekend_mask.sum() == 10
+    assert calendar.weekday_mask(0).sum() == 4
@@ -0,0 +1,39 @@
+import numpy as np
+
+from date_columns import calendar_from_labels
+from eligibility_check import EligibilityChecker
+from shift_vocabulary import ShiftVocabulary
+from validation_results import KIND_INELIGIBLE_ASSIGNMENT, KIND_UNLISTED_EMPLOYEE
+
+from test_rule_sheet_model import sample_model
+
+LABELS = ['2025-08-01', '2025-08-02', '2025-08-03']
+
+
+def test_permitted_shift_codes():
+    assert sample_model().permitted_shift_codes() == {'张三': {'G', 'Y16综'}, '李四': {'G', 'G值-A'},
+                                                      '王五': {'G'}, '赵六': set()}
+
+
+def test_violations_after_vocabulary_growth():
+    vocabulary = ShiftVocabulary(['G', '休'])
+    checker = EligibilityChecker(sample_model(), vocabulary)
+    # 编码排班表时词表新增班次（年假、Y16综、G值-A），已建立的资格索引不受影响
+    codes = vocabulary.encode_values(np.array([
+        ['年假', 'Y16综', 'G'],
+        ['G值-A', 'Y16综', '休'],
+        ['G', 'G', 'G'],
+    ], dtype=object))
+    violations = checker.violations(['张三', '李四', '钱七'], codes, calendar_from_labels(LABELS), ['个人'] * 3)
+    assert [(v.kind, v.employee, v.start, v.shift) for v in violations] == [
+        (KIND_INELIGIBLE_ASSIGNMENT, '李四', '2025-08-02', 'Y16综'),
+        (KIND_UNLISTED_EMPLOYEE, '钱七', None, None)]
+    assert checker.governed_shifts == ['G', 'Y16综', 'G值-A']
+
+
+def test_real_schedule(workbook):
+    from eligibility_check import main
+
+    report = main(workbook)
+    assert report.metrics['eligibility']['governed_shifts']
+    assert all(v.kind in (KIND_INELIGIBLE_ASSIGNMENT, KIND_UNLISTED_EMPLOYEE) for v in report)
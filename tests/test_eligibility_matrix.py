@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from eligibility_matrix import EligibilityMatrix
+from shift_vocabulary import ShiftVocabulary
+
+DATA = {
+    'shifts': [{'code': 'G'}, {'code': 'Y16综'}, {'code': 'G值-A'}],
+    'employees': [{'number': 1}, {'number': 2}, {'number': 3}],
+    'identifiers': [
+        {'employeeNumber': 1, 'shiftCode': 'G', 'canWork': True},
+        {'employeeNumber': 1, 'shiftCode': 'Y16综', 'canWork': True},
+        {'employeeNumber': 2, 'shiftCode': 'Y16综', 'canWork': False},
+        {'employeeNumber': 4, 'shiftCode': '年假', 'canWork': True},
+    ],
+}
+
+
+def test_from_identifiers():
+    matrix = EligibilityMatrix.from_identifiers(DATA)
+    assert matrix.employees == ['1', '2', '3', '4']
+    assert matrix.shifts == ['G', 'Y16综', 'G值-A', '年假']
+    assert matrix.can_work(1, 'Y16综') and not matrix.can_work(1, 'G值-A')
+    assert not matrix.can_work('2', 'G')       # 有记录的员工只能值授予的班次
+    assert matrix.can_work('3', 'G值-A')       # 没有记录的员工不受限
+    assert matrix.can_work('9', 'G')           # 未知员工不受限
+    assert matrix.check(['1', '2', '3'], 'Y16综').tolist() == [True, False, True]
+    assert matrix.employees_for('Y16综') == ['1', '3']
+    assert matrix.shifts_for('1') == ['G', 'Y16综'] and matrix.shifts_for('3') is None
+
+
+def test_check_codes_and_grant():
+    matrix = EligibilityMatrix.from_identifiers(DATA)
+    vocabulary = ShiftVocabulary()
+    codes = vocabulary.encode_values(np.array([['G', 'G值-A', ''], ['Y16综', '休', 'G']], dtype=object))
+    assert matrix.check_codes(['1', '2'], codes, vocabulary).tolist() == [[True, False, True],
+                                                                         [False, False, False]]
+    assert matrix.grant('2', 'G') and not matrix.grant('3', 'G')
+    assert matrix.can_work('2', 'G')
+
+
+def test_save_load_round_trip(tmp_path):
+    matrix = EligibilityMatrix.from_identifiers(DATA)
+    path = tmp_path / 'eligibility.bin'
+    matrix.save(str(path))
+    for mmap in (True, False):
+        loaded = EligibilityMatrix.load(str(path), mmap=mmap)
+        assert loaded.employees == matrix.employees and loaded.shifts == matrix.shifts
+        assert (loaded.dense() == matrix.dense()).all()
+        assert (np.asarray(loaded.restricted) == matrix.restricted).all()
+    writable = EligibilityMatrix.load(str(path), mmap=False)
+    assert writable.grant('1', 'G值-A') and writable.can_work('1', 'G值-A')
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError, match='格式版本'):
+        EligibilityMatrix.load(str(path))
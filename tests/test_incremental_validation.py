@@ -0,0 +1,61 @@
+from collections import Counter
+
+import pytest
+
+from incremental_validation import IncrementalScheduleValidator
+from schedule_rule_validation import ScheduleRuleValidator
+
+
+def full_report(workbook, frame):
+    validator = ScheduleRuleValidator(workbook, quiet=True)
+    validator.schedule_df = frame.copy()
+    return validator.run_full_analysis()
+
+
+def violation_set(report):
+    return Counter(repr(v) for v in report)
+
+
+@pytest.fixture
+def incremental(workbook):
+    return IncrementalScheduleValidator(workbook)
+
+
+def test_initial_state_matches_full_analysis(workbook, incremental):
+    report = incremental.report()
+    expected = full_report(workbook, incremental.validator.schedule_df)
+    assert violation_set(report) == violation_set(expected)
+    assert report.metrics['shift_counts'] == expected.metrics['shift_counts']
+    assert len(incremental.employee_rows) == 57
+
+
+def test_changes_match_full_analysis(workbook, incremental):
+    validator = incremental.validator
+    rows = incremental.employee_rows
+    date_cols = incremental.date_cols
+    # 2025-08-04 为周一：第一位员工这一周全部上班，下一周只上三天
+    changes = [(rows[0], day, 'G') for day in range(3, 10)]
+    changes += [(rows[0], day, '休') for day in range(10, 14)]
+    # 第二位员工周日值G值-C、周一值G值-A
+    changes += [(rows[1], 2, 'G值-C'), (rows[1], 3, 'G值-A')]
+    # 当天的Y16综改为G
+    y16_row = next(row for row in rows if validator.get_shift_matrix()[row, 20] ==
+                   validator.shift_vocabulary.index['Y16综'])
+    changes.append((y16_row, 20, 'G'))
+    report = incremental.apply_changes(changes)
+    assert incremental.last_update['full'] is False
+    assert incremental.last_update['rows'] == 3
+
+    expected = full_report(workbook, validator.schedule_df)
+    assert violation_set(report) == violation_set(expected)
+    assert report.metrics['shift_counts'] == expected.metrics['shift_counts']
+    kinds = Counter(v.kind for v in report)
+    assert kinds['weekend_g_rule'] >= 2 and kinds['staffing_coverage'] >= 1
+    assert kinds['weekly_work_days'] > 17
+
+    # 改回原值后与初始状态一致
+    initial = IncrementalScheduleValidator(workbook).report()
+    original = ScheduleRuleValidator(workbook, quiet=True).schedule_df
+    incremental.update_from_frame(original.copy())
+    assert violation_set(incremental.report()) == violation_set(initial)
+    assert date_cols == incremental.date_cols
@@ -0,0 +1,71 @@
+from datetime import date
+
+import numpy as np
+
+from date_columns import calendar_from_labels
+from month_chain import MonthChainValidator
+from shift_vocabulary import ShiftVocabulary
+from streaming_reader import ScheduleRow
+from validation_results import KIND_CROSS_MONTH_WORK, KIND_SHIFT_LIMIT, KIND_WEEKEND_G_RULE
+
+
+def month(vocabulary, year, month_number, days, rows):
+    labels = [f'{year}-{month_number:02d}-{d:02d}' for d in range(1, days + 1)]
+    schedule = [ScheduleRow(i, '个人', number, name, vocabulary.encode_values(np.array(cells, dtype=object)))
+                for i, (number, name, cells) in enumerate(rows)]
+    return schedule, calendar_from_labels(labels)
+
+
+def test_cross_month_five_plus_four():
+    vocabulary = ShiftVocabulary()
+    validator = MonthChainValidator(vocabulary)
+    july = ['休'] * 26 + ['G'] * 5
+    validator.validate_rows(*month(vocabulary, 2025, 7, 31, [('001', '张三', july)]))
+    assert validator.state['001'].work_run == 5
+
+    august = ['G'] * 4 + ['休'] * 2 + ['G'] * 25
+    report = validator.validate_rows(*month(vocabulary, 2025, 8, 31, [('001', '张三', august)]))
+    cross = report.by_kind(KIND_CROSS_MONTH_WORK)
+    assert [(v.start, v.end, v.value) for v in cross] == [('2025-07-27', '2025-08-04', 9)]
+    assert report.metrics['chain']['carried'] == 1
+
+
+def test_no_carry_after_gap_and_shift_run():
+    vocabulary = ShiftVocabulary()
+    validator = MonthChainValidator(vocabulary)
+    validator.validate_rows(*month(vocabulary, 2025, 7, 30, [('001', '张三', ['休'] * 25 + ['Y1030普'] * 5)]))
+    # 7月31日不在表内：不接续
+    report = validator.validate_rows(*month(vocabulary, 2025, 8, 31, [('001', '张三', ['Y1030普'] * 3 + ['休'] * 28)]))
+    assert len(report) == 0
+
+    validator = MonthChainValidator(vocabulary)
+    validator.validate_rows(*month(vocabulary, 2025, 7, 31, [('001', '张三', ['休'] * 27 + ['Y1030普'] * 4)]))
+    report = validator.validate_rows(*month(vocabulary, 2025, 8, 31, [('001', '张三', ['Y1030普'] * 2 + ['休'] * 29)]))
+    assert [(v.kind, v.value, v.limit) for v in report] == [(KIND_SHIFT_LIMIT, 6, 5)]
+
+
+def test_weekend_g_state_round_trip(tmp_path):
+    vocabulary = ShiftVocabulary()
+    validator = MonthChainValidator(vocabulary)
+    july = ['休'] * 31
+    july[25] = 'G值'   # 7月26日 周六
+    validator.validate_rows(*month(vocabulary, 2025, 7, 31, [('001', '张三', july)]))
+    path = tmp_path / 'state.json'
+    validator.save_state(str(path))
+    state = MonthChainValidator.load_state(str(path))
+    assert state == validator.state
+    assert state['001'].last_weekend_g == date(2025, 7, 26)
+
+    resumed = MonthChainValidator(vocabulary, state=state)
+    august = ['休'] * 31
+    august[1] = 'G值'  # 8月2日 周六，紧接上一个周末
+    report = resumed.validate_rows(*month(vocabulary, 2025, 8, 31, [('001', '张三', august)]))
+    assert [(v.kind, v.start) for v in report] == [(KIND_WEEKEND_G_RULE, '2025-08-02')]
+    assert resumed.rotation_cursor('G值') == '001'
+
+
+def test_validate_workbook(workbook):
+    validator = MonthChainValidator()
+    report = validator.validate_workbook(workbook)
+    assert report.metrics['chain']['employees'] == 57
+    assert validator.months[0][1:] == (date(2025, 8, 1), date(2025, 8, 31))
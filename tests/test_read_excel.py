@@ -0,0 +1,27 @@
+import numpy as np
+
+from read_excel import analyze_schedule_data
+from workbook_loader import load_sheet, is_employee_header_row
+from shift_vocabulary import WEEKEND_G_CODES
+
+
+def load_clean(workbook):
+    raw = load_sheet(workbook, '排班表', header=None)
+    header_row = next(i for i in range(len(raw)) if is_employee_header_row(raw.iloc[i].values))
+    frame = load_sheet(workbook, '排班表', header=header_row)
+    frame.columns = [str(col).strip().replace('\n', '') for col in frame.columns]
+    return frame
+
+
+def test_analyze_schedule_data(workbook):
+    frame = load_clean(workbook)
+    result = analyze_schedule_data(frame)
+    assert result['emp_count'] == 57
+    assert len(result['weekend_cols']) == 10 and len(result['weekday_cols']) == 21
+    assert result['date_labels'][0] == '2025-08-01'
+
+    cells = frame[result['weekend_cols'] + result['weekday_cols']].to_numpy(dtype=object)
+    assert result['weekend_g_total'] == int(np.isin(cells, list(WEEKEND_G_CODES)).sum())
+    assert result['shift_codes'].shape == (len(result['employee_info']), 31)
+    days = [record['days'] for record in result['consecutive_records']]
+    assert days == sorted(days, reverse=True) and min(days) >= 2
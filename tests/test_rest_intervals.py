@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from date_columns import calendar_from_labels
+from rest_intervals import parse_clock, window_minutes, RestIntervalValidator, main
+from shift_vocabulary import ShiftVocabulary
+from validation_results import KIND_SHORT_REST, KIND_WEEKLY_HOURS
+
+AUGUST = calendar_from_labels([f'2025-08-{d:02d}' for d in range(1, 32)])
+
+
+def test_parse_clock():
+    assert parse_clock('08:50') == 530
+    assert parse_clock('24:00') == 1440
+    assert parse_clock('次日02:00') == 1440 + 120
+    assert parse_clock('25:00') is None and parse_clock(None) is None
+    assert window_minutes('15:50', '次日00:00') == (950, 490)
+    assert window_minutes('18:00', '02:00') == (1080, 480)
+
+
+def test_short_rest_after_late_shift():
+    vocabulary = ShiftVocabulary.from_sources()
+    cells = ['Y16综', 'G', '休', 'Y18普', '休', 'G'] + ['休'] * 25
+    codes = vocabulary.encode_values(np.array(cells, dtype=object))[None, :]
+    validator = RestIntervalValidator(vocabulary)
+    violations = validator.violations(['张三'], codes, AUGUST)
+    # Y16综 24:00 下班，次日 08:50 上班：休息8.8小时；Y18普 次日02:00 下班后休一天不报
+    assert [(v.kind, v.shift, v.start, v.value) for v in violations] == [
+        (KIND_SHORT_REST, 'Y16综→G', '2025-08-01', 8.8)]
+
+    # 班次信息行的时间段优先：Y16综提前到 21:00 下班后间隔足够
+    assert RestIntervalValidator(vocabulary, [('Y16综', '13:00-21:00')]).violations(['张三'], codes, AUGUST) == []
+
+
+def test_weekly_hours():
+    vocabulary = ShiftVocabulary.from_sources()
+    cells = ['休'] * 3 + ['G'] * 6 + ['休'] + ['G'] * 5 + ['休'] * 2 + ['休'] * 14
+    codes = vocabulary.encode_values(np.array(cells, dtype=object))[None, :]
+    layout, hours = RestIntervalValidator(vocabulary).weekly_hours(codes, AUGUST)
+    # G 08:50-18:00 每天 550 分钟
+    assert hours[0, 1:3].tolist() == pytest.approx([6 * 550 / 60, 5 * 550 / 60])
+    violations = RestIntervalValidator(vocabulary, max_week_hours=50).violations(['张三'], codes, AUGUST)
+    assert [(v.kind, v.start, v.value) for v in violations] == [(KIND_WEEKLY_HOURS, '2025-08-04', 55.0)]
+
+
+def test_main(workbook, tmp_path):
+    path = str(tmp_path / 'hours.csv')
+    report = main([workbook, '--hours-csv', path])
+    assert report.metrics['rest_intervals']['timed_assignments'] > 0
+    assert (tmp_path / 'hours.csv').exists()
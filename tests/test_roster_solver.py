@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+pytest.importorskip('ortools')
+
+from roster_solver import RosterSolver, balance_groups, main
+from scheduling_engine import SchedulingInputs
+
+from test_scheduling_engine import weekly_work_days
+
+
+@pytest.fixture(scope='module')
+def inputs():
+    return SchedulingInputs.load()
+
+
+def test_balance_groups_by_position(inputs):
+    groups = balance_groups(inputs.employees)
+    assert sum(len(rows) for rows in groups.values()) == len(inputs.employees)
+    for key, rows in groups.items():
+        positions = set(inputs.employees['position'].iloc[rows])
+        assert positions == {key} or positions == {''}
+
+
+def test_solver_follows_rules(inputs):
+    result = RosterSolver(inputs, time_limit=3, workers=4).solve(2025, 8)
+    assert result.stats['status'] in ('OPTIMAL', 'FEASIBLE')
+    report = result.check_rules()
+    assert len(report) == 0, [v.describe() for v in report.violations[:5]]
+    work, minimum = weekly_work_days(result)
+    assert (work >= minimum).all() and work.max() <= 6
+
+
+def test_main_rotation_file(tmp_path, capsys):
+    rotation = tmp_path / 'rotation.json'
+    assert main(['2025', '8', '-t', '2', '-j', '4', '--rotation', str(rotation)]) == 0
+    state = json.loads(rotation.read_text(encoding='utf-8'))
+    assert state and all(isinstance(v, int) for v in state.values())
+    assert '求解状态' in capsys.readouterr().out
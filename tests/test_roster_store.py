@@ -0,0 +1,87 @@
+import json
+import os
+from datetime import date
+
+import numpy as np
+import pytest
+
+from roster_store import RosterStore, STORE_FORMAT_VERSION, META_FILE
+from shift_vocabulary import ShiftVocabulary
+from streaming_reader import ScheduleRow
+
+
+def month_rows(vocabulary, people):
+    return [ScheduleRow(i, dept, number, name, vocabulary.encode_values(np.array(cells, dtype=object)))
+            for i, (dept, number, name, cells) in enumerate(people)]
+
+
+def days(year, month, count):
+    return [date(year, month, d) for d in range(1, count + 1)]
+
+
+def fill(store):
+    vocabulary = ShiftVocabulary()
+    july = month_rows(vocabulary, [('个人', '001', '张三', ['Y16综'] + ['G'] * 30),
+                                   ('对公', '002', '李四', ['休'] * 31)])
+    store.append_rows(july, days(2025, 7, 31), vocabulary, source='7月')
+    august = month_rows(vocabulary, [('对公', '001', '张三', ['G'] * 30 + ['Y16综']),
+                                     ('对公', '002', '李四', ['Y16综'] + ['休'] * 30)])
+    store.append_rows(august, days(2025, 8, 31), vocabulary, source='8月')
+    return vocabulary
+
+
+def test_append_and_query(tmp_path):
+    store = RosterStore(str(tmp_path))
+    fill(store)
+    assert len(store) == 62
+    assert [m['source'] for m in store.months] == ['7月', '8月']
+
+    view = store.view('2025-08-01', '2025-08-31')
+    assert view.codes.shape == (2, 31)
+    assert list(view.employees['dept']) == ['对公', '对公']
+
+    # 张三7月在个人、8月在对公：按当天所在的部门统计
+    y16 = store.shift_days('Y16综')
+    assert list(zip(y16['name'], y16['dept'], y16['date'].dt.strftime('%Y-%m-%d'))) == [
+        ('张三', '个人', '2025-07-01'), ('李四', '对公', '2025-08-01'), ('张三', '对公', '2025-08-31')]
+    assert len(store.shift_days('Y16综', dept='个人')) == 1
+    assert store.shift_days('Y16综', dept='不存在的部门').empty
+
+    counts = store.period_counts('Y16综', freq='M')
+    assert counts.loc['001', '2025-07'] == 1 and counts.loc['001', '2025-08'] == 1
+    assert counts.loc['002', '2025-07'] == 0
+
+
+def test_reopen_and_replace(tmp_path):
+    store = RosterStore(str(tmp_path))
+    vocabulary = fill(store)
+    with open(os.path.join(str(tmp_path), META_FILE), encoding='utf-8') as f:
+        assert json.load(f)['version'] == STORE_FORMAT_VERSION
+
+    # 同一月份不加 replace 时拒绝
+    again = month_rows(vocabulary, [('对公', '001', '张三', ['休'] * 31)])
+    with pytest.raises(ValueError):
+        store.append_rows(again, days(2025, 8, 31), vocabulary)
+    store.append_rows(again, days(2025, 8, 31), vocabulary, source='8月重排', replace=True)
+
+    reopened = RosterStore(str(tmp_path))
+    assert len(reopened) == 62
+    assert reopened.months[1]['source'] == '8月重排'
+    assert list(reopened.shift_days('Y16综')['date'].dt.strftime('%Y-%m-%d')) == ['2025-07-01']
+
+
+def test_widen_keeps_history(tmp_path):
+    store = RosterStore(str(tmp_path))
+    vocabulary = ShiftVocabulary()
+    people = [('个人', f'{i:03d}', f'员工{i}', ['G'] * 30) for i in range(70)]
+    store.append_rows(month_rows(vocabulary, people[:10]), days(2025, 6, 30), vocabulary)
+    store.append_rows(month_rows(vocabulary, people), days(2025, 9, 30), vocabulary)
+    assert store.meta['width'] >= 70
+    assert store.view('2025-06-01', '2025-06-30').codes.shape == (10, 30)
+    assert store.period_counts('G', freq='M').loc['005'].tolist()[2:] == [30, 30]
+
+
+def test_append_workbook(tmp_path, workbook):
+    store = RosterStore(str(tmp_path))
+    assert store.append_workbook(workbook) == 31
+    assert len(store.view().employees) == 57
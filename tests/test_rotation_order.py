@@ -0,0 +1,60 @@
+from datetime import date
+
+import numpy as np
+
+from date_columns import calendar_from_labels
+from rotation_order import RotationIndex, RotationAnalyzer, load_shift_orders
+from shift_vocabulary import ShiftVocabulary
+from validation_results import KIND_ROTATION_REPEAT, KIND_ROTATION_ORDER
+
+KEY = ('个人', 'Y16综')
+
+
+def analyzer_with(rows, labels, previous_rows=None):
+    vocabulary = ShiftVocabulary()
+    index = RotationIndex(load_shift_orders({'shiftOrders': [
+        {'shiftCode': 'Y16综', 'position': '个人', 'employeeNumbers': ['1', '2', '3', 2]},
+        {'shiftCode': 'G', 'position': '个人', 'employeeNumbers': ['1']},
+    ]}))
+    analyzer = RotationAnalyzer(index, vocabulary)
+    codes = vocabulary.encode_values(np.array(rows, dtype=object))
+    analyzer.add_month(['1', '2', '3'], codes, calendar_from_labels(labels))
+    return analyzer
+
+
+def test_index():
+    index = RotationIndex({KEY: ['1', '2', '3']})
+    assert index.position_of(KEY, 3) == 2 and index.position_of(KEY, '9') == -1
+    assert index.next_after(KEY, '3') == '1' and index.next_after(KEY, '9') == '1'
+
+
+def test_replay_and_fairness():
+    labels = [f'2025-08-{d:02d}' for d in range(1, 9)]
+    analyzer = analyzer_with([
+        ['Y16综', 'Y16综', '休', '休', '休', '休', 'Y16综', 'Y16综'],
+        ['休', '休', 'Y16综', 'Y16综', '休', '休', '休', '休'],
+        ['休', '休', '休', '休', 'Y16综', 'Y16综', '休', '休'],
+    ], labels)
+    assert analyzer.keys == [KEY]
+    assert [(t.member, date.fromordinal(t.start).day) for t in analyzer.turns(KEY)] == [(0, 1), (1, 3), (2, 5), (0, 7)]
+    assert analyzer.replay() == []
+    # 上一轮是2号时，1号接班跳过了3号；上一轮是1号时，1号连续两轮
+    assert [(v.kind, v.value, v.limit) for v in analyzer.replay({KEY: '2'})] == [(KIND_ROTATION_ORDER, 1, '3')]
+    assert [v.kind for v in analyzer.replay({KEY: '1'})] == [KIND_ROTATION_REPEAT]
+    assert analyzer.last_turns() == {KEY: '1'}
+
+    members, summary = analyzer.fairness()
+    assert members['turns'].tolist() == [2, 1, 1] and members['days'].tolist() == [4, 2, 2]
+    assert members['max_wait'].tolist()[0] == 6
+    assert summary.iloc[0]['spread'] == 1
+    turns, days = analyzer.counts_between(KEY, date(2025, 8, 3), date(2025, 8, 6))
+    assert turns.tolist() == [0, 1, 1] and days.tolist() == [0, 2, 2]
+
+
+def test_turns_merge_across_months():
+    analyzer = analyzer_with([['休', 'Y16综'], ['休', '休'], ['休', '休']], ['2025-07-30', '2025-07-31'])
+    codes = analyzer.vocabulary.encode_values(np.array([['Y16综', '休'], ['休', '休'], ['休', '休']], dtype=object))
+    analyzer.add_month(['1', '2', '3'], codes, calendar_from_labels(['2025-08-01', '2025-08-02']))
+    turns = analyzer.turns(KEY)
+    assert len(turns) == 1
+    assert date.fromordinal(turns[0].start) == date(2025, 7, 31) and date.fromordinal(turns[0].end) == date(2025, 8, 1)
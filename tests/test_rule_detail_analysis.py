@@ -0,0 +1,11 @@
+from rule_detail_analysis import RuleDetailAnalyzer
+
+
+def test_leave_days_are_not_work(workbook):
+    analyzer = RuleDetailAnalyzer(workbook, quiet=True)
+    assert analyzer.run_complete_analysis()
+    patterns = analyzer.work_patterns.set_index('employee')
+    on_leave = patterns.loc['王雨']
+    assert on_leave.leave_days == on_leave.total_days
+    assert on_leave.work_days == 0 and on_leave.work_ratio == 0
+    assert (patterns['work_days'] + patterns['rest_days'] + patterns['leave_days'] == patterns['total_days']).all()
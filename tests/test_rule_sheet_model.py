@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from rule_sheet_model import RuleSheetModel, rule_label_to_shift
+
+
+def sample_model():
+    nan = np.nan
+    return RuleSheetModel(pd.DataFrame([
+        ['个人', nan, nan, '对公', nan],
+        ['正常班', 'Y16夜班', '周末A岗', '正常班', nan],
+        ['张三', '张三', '李四', '王五', '赵六'],
+        ['李四', nan, nan, '张三', nan],
+    ], dtype=object))
+
+
+def test_rule_label_to_shift():
+    assert rule_label_to_shift('Y16夜班') == 'Y16综'
+    assert rule_label_to_shift('周末A岗') == 'G值-A'
+    assert rule_label_to_shift('周末白班岗') == 'G值'
+    assert rule_label_to_shift('正常班') == 'G'
+    assert rule_label_to_shift('节假日') is None
+
+
+def test_index():
+    model = sample_model()
+    assert model.business_line_columns == [('个人', 0, 3), ('对公', 3, 5)]
+    assert model.line_shifts == {'个人': ['正常班', 'Y16夜班', '周末A岗'], '对公': ['正常班']}
+    assert model.employees_for('个人', '正常班') == ['张三', '李四']
+    assert model.employees_for('对公', '周末A岗') == []
+    assert model.lines_of('张三') == {'个人', '对公'}
+    assert model.shifts_of('赵六') == {'未知班次'}
+    assert [name for name, _ in model.cross_business_employees()] == ['张三']
+    assert [name for name, _ in model.cross_shift_employees()] == ['张三', '李四']
+
+
+def test_from_workbook_is_cached(workbook):
+    model = RuleSheetModel.from_workbook(workbook)
+    assert model is RuleSheetModel.from_workbook(workbook)
+    assert model.lines and all(model.line_shifts[line] for line in model.lines)
@@ -0,0 +1,27 @@
+import json
+
+from schedule_cli import main
+
+
+def test_sheets_json(workbook, capsys):
+    assert main(['sheets', workbook, '--json']) == 0
+    assert '排班表' in json.loads(capsys.readouterr().out)
+
+
+def test_employee_reports_weekly_rules(workbook, capsys):
+    assert main(['employee', workbook, '李璇']) == 1
+    out = capsys.readouterr().out
+    assert out.startswith('李璇(9000277847) 风险室-个人反诈')
+    assert '2025-08-18 至 2025-08-24 这一周上班7天，多于6天' in out
+    assert main(['employee', workbook, '9000277847']) == 1
+
+
+def test_employee_not_found(workbook, capsys):
+    assert main(['employee', workbook, '不存在']) == 1
+    assert '未找到员工' in capsys.readouterr().out
+
+
+def test_validate_json(workbook, capsys):
+    assert main(['validate', workbook, '--json']) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert len(report['violations']) == 19
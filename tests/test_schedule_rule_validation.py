@@ -0,0 +1,20 @@
+from collections import Counter
+
+from schedule_rule_validation import ScheduleRuleValidator
+
+
+def test_run_full_analysis(workbook):
+    validator = ScheduleRuleValidator(workbook, quiet=True)
+    report = validator.run_full_analysis()
+    kinds = Counter(v.kind for v in report)
+    assert kinds == {'weekly_work_days': 17, 'y16_post_rest': 2}
+    assert report.metrics['shift_counts']['Y16综'] > 0
+
+
+def test_shift_sequences_only_for_employee_rows(workbook):
+    validator = ScheduleRuleValidator(workbook, quiet=True)
+    sequences = validator.analyze_shift_sequence()
+    assert len(sequences) == 57
+    assert '姓名' not in sequences
+    assert set(sequences['王雨']) == {'C'}
+    assert all(len(sequence) == 31 for sequence in sequences.values())
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from scheduling_engine import SchedulingInputs, SchedulingEngine, build_month_calendar, tail_from_result
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return SchedulingEngine(SchedulingInputs.load())
+
+
+def weekly_work_days(result):
+    """每个完整自然周每人的 (上班天数, 下限)，下限扣除请假天数，均为 (员工 × 周)"""
+    is_work = result.vocabulary.is_work_table()[result.codes]
+    is_rest = result.vocabulary.is_rest_table()[result.codes]
+    weeks = [days for days in result.calendar.week_groups().values() if len(days) == 7]
+    work = np.stack([is_work[:, days].sum(axis=1) for days in weeks], axis=1)
+    rest = np.stack([is_rest[:, days].sum(axis=1) for days in weeks], axis=1)
+    return work, 4 - (7 - work - rest)
+
+
+def test_build_month_calendar():
+    calendar = build_month_calendar(2025, 8)
+    assert len(calendar) == 31
+    assert calendar.label(0) == '2025-08-01' and calendar.weekend_mask.sum() == 10
+
+
+def test_generated_months_follow_rules(engine):
+    rotation_state, tail = None, None
+    # 2026年2月、3月从周日开始，上个月末尾的对公Y16综一轮刚好值完
+    for year, month in [(2025, m) for m in range(6, 13)] + [(2026, m) for m in (1, 2, 3)]:
+        result = engine.generate(year, month, rotation_state, tail)
+        report = result.check_rules()
+        assert len(report) == 0, [v.describe() for v in report.violations[:5]]
+        assert not result.unfilled
+        work, minimum = weekly_work_days(result)
+        assert (work >= minimum).all() and work.max() <= 6
+        # 值完Y16综后休息两天（月末的两天留给下个月）
+        y16 = result.codes == result.vocabulary.index['Y16综']
+        ends = y16[:, :-1] & ~y16[:, 1:]
+        rows, days = np.nonzero(ends[:, :-2])
+        is_rest = result.vocabulary.is_rest_table()[result.codes]
+        assert is_rest[rows, days + 1].all() and is_rest[rows, days + 2].all()
+        rotation_state, tail = result.rotation_state, tail_from_result(result)
+
+
+def test_to_frame_layout(engine):
+    result = engine.generate(2025, 8)
+    frame = result.to_frame()
+    assert frame.columns[:4].tolist() == ['部门', '用户ID', '工号', '姓名']
+    assert frame.shape == (len(result.employees), 4 + 31)
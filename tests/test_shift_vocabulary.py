@@ -0,0 +1,29 @@
+import numpy as np
+
+from shift_vocabulary import ShiftVocabulary, EMPTY_CODE, CATEGORY_NIGHT, CATEGORY_REST
+
+
+def test_encode_and_decode():
+    vocabulary = ShiftVocabulary()
+    values = np.array([['G', ' 休 ', None], ['Y16综', '', 'G']], dtype=object)
+    codes = vocabulary.encode_values(values)
+    assert codes.dtype == np.uint8
+    assert codes[0, 2] == EMPTY_CODE and codes[1, 1] == EMPTY_CODE
+    assert codes[0, 0] == codes[1, 2]
+    assert vocabulary.decode(codes).tolist() == [['G', '休', ''], ['Y16综', '', 'G']]
+
+
+def test_lookup_tables():
+    vocabulary = ShiftVocabulary(['G', '休', 'C', 'G值-A', 'Y16综'])
+    codes = np.arange(len(vocabulary))
+    assert vocabulary.decode(codes[vocabulary.is_work_table()]).tolist() == ['G', 'G值-A', 'Y16综']
+    assert vocabulary.decode(codes[vocabulary.is_weekend_g_table()]).tolist() == ['G值-A']
+    assert vocabulary.count_categories(codes) == {CATEGORY_NIGHT: 1, '周末G班': 1, '工作日G班': 1,
+                                                  CATEGORY_REST: 1, '其他': 1}
+
+
+def test_from_sources_keeps_common_codes_stable():
+    first = ShiftVocabulary.from_sources()
+    second = ShiftVocabulary.from_sources()
+    assert first.codes == second.codes
+    assert first.index['G'] == 1
@@ -0,0 +1,33 @@
+import numpy as np
+
+from schedule_rule_validation import ScheduleRuleValidator
+from staffing_coverage import StaffingCoverage, post_requirement, group_matches, DAYS_SATURDAY
+from shift_vocabulary import ShiftVocabulary
+
+
+def test_post_requirement():
+    vocabulary = ShiftVocabulary(['G', 'Y16综', 'G值-C'])
+    assert post_requirement('夜班岗', vocabulary) == (['Y16综'], 'all')
+    assert post_requirement('周六C岗', vocabulary) == (['G值-C'], DAYS_SATURDAY)
+    assert post_requirement('周末白班岗', vocabulary) == (['G值'], 'weekend')
+    assert post_requirement('其他', vocabulary) == (None, None)
+    assert group_matches('风险-对公反诈组', '风险-对公反诈') and not group_matches('风险室-个人反诈', '对公')
+
+
+def test_real_schedule_and_recount(workbook):
+    validator = ScheduleRuleValidator(workbook, quiet=True)
+    coverage = StaffingCoverage.from_validator(validator)
+    assert len(coverage.rows) == 57
+    assert coverage.check(validator.special_groups) == []
+
+    # 某天的夜班改为G后，该部门当天夜班人数不足；增量统计与重新统计一致
+    codes = validator.get_shift_matrix().copy()
+    y16 = validator.shift_vocabulary.index['Y16综']
+    row = coverage.rows[np.flatnonzero(codes[coverage.rows, 5] == y16)[0]]
+    codes[row, 5] = validator.shift_vocabulary.index['G']
+    coverage.recount(codes[coverage.rows], [5])
+    violations = coverage.check(validator.special_groups)
+    assert [(v.start, v.value, v.limit, v.severity) for v in violations] == [('2025-08-06', 0, 1, 'warning')]
+    depts = [coverage.depts[i] for i in coverage.dept_ids]
+    fresh = StaffingCoverage(codes[coverage.rows], validator.calendar, validator.shift_vocabulary, depts)
+    assert (fresh.tensor == coverage.tensor).all()
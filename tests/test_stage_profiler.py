@@ -0,0 +1,35 @@
+import json
+
+from stage_profiler import StageProfiler, run_stage
+
+
+def test_run_stage_without_profiler():
+    assert run_stage(None, 'noop', lambda: 42) == 42
+
+
+def test_records_and_json(tmp_path):
+    profiler = StageProfiler(trace_memory=True)
+    try:
+        assert profiler.run('build', lambda: [0] * 100000, lambda: (10, 100)) == [0] * 100000
+        profiler.run('sum', lambda: sum(range(1000)))
+    finally:
+        profiler.close()
+    data = profiler.to_dict()
+    assert [stage['name'] for stage in data['stages']] == ['build', 'sum']
+    assert data['stages'][0]['rows'] == 10 and data['stages'][0]['cells'] == 100
+    assert data['stages'][0]['peak_bytes'] > 0
+    assert '合计' in profiler.format_table()
+    path = tmp_path / 'stages.json'
+    profiler.write_json(str(path))
+    assert json.loads(path.read_text(encoding='utf-8'))['trace_memory'] is True
+
+
+def test_validator_stages(workbook):
+    from schedule_rule_validation import ScheduleRuleValidator
+
+    profiler = StageProfiler(profile=True)
+    report = ScheduleRuleValidator(workbook, quiet=True, profiler=profiler).run_full_analysis()
+    names = [stage['name'] for stage in report.metrics['stages']['stages']]
+    assert names[:3] == ['load_data', 'identify_employees_and_dates', 'get_shift_matrix']
+    assert 'validate_weekend_g_rules' in names
+    assert profiler.hotspots()
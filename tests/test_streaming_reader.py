@@ -0,0 +1,22 @@
+from streaming_reader import StreamingScheduleReader, StreamingScheduleValidator
+from read_excel import analyze_schedule_data
+from shift_vocabulary import ShiftVocabulary
+
+from test_read_excel import load_clean
+
+
+def test_streaming_matches_in_memory_analysis(workbook):
+    vocabulary = ShiftVocabulary.from_sources()
+    with StreamingScheduleReader(workbook, vocabulary=vocabulary) as reader:
+        assert reader.header_row == 3
+        assert [code for code, _ in reader.shift_windows][:1] == ['G']
+        summary = StreamingScheduleValidator(reader).run()
+
+    result = analyze_schedule_data(load_clean(workbook))
+    assert summary['employee_count'] == len(result['employee_info'])
+    assert summary['day_count'] == 31
+    expected = result['shift_vocabulary'].count_categories(result['shift_codes'])
+    assert summary['category_counts'] == expected
+    assert len(summary['limit_violations']) == len(result['limit_violations'])
+    # 各部门的夜班岗每日一人
+    assert summary['abnormal_y16_days'] == {}
@@ -0,0 +1,41 @@
+import json
+
+import pandas as pd
+
+from validation_results import (Violation, ValidationReport, export_reports, SEVERITY_ERROR, SEVERITY_INFO,
+                                KIND_CONSECUTIVE_WORK, KIND_WEEKLY_WORK_RATIO, KIND_CROSS_SHIFT)
+
+
+def sample_report():
+    return ValidationReport(source='2025-08.xlsx', violations=[
+        Violation(KIND_CONSECUTIVE_WORK, SEVERITY_ERROR, employee='张三', start='2025-08-01', end='2025-08-09',
+                  start_pos=0, end_pos=8, value=9, limit=7),
+        Violation(KIND_WEEKLY_WORK_RATIO, 'warning', employee='李四', value=6.5),
+        Violation(KIND_CROSS_SHIFT, SEVERITY_INFO, employee='王五', value=2, detail='G、Y16综'),
+    ], metrics={'shift_counts': {'休息': 3}})
+
+
+def test_describe():
+    report = sample_report()
+    assert report.violations[0].describe() == '第1-9天连续上班9天，超过7天'
+    assert report.violations[1].describe() == '平均每周工作6.5天，不符合上五休二制'
+    assert report.count_by_severity() == {'error': 1, 'warning': 1, 'info': 1}
+    assert [v.employee for v in report.by_kind(KIND_CROSS_SHIFT)] == ['王五']
+
+
+def test_export_jsonl(tmp_path):
+    path = tmp_path / 'violations.jsonl'
+    export_reports([sample_report(), sample_report()], str(path))
+    records = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert len(records) == 6
+    assert records[0]['source'] == '2025-08.xlsx' and records[0]['value'] == 9
+
+
+def test_export_parquet(tmp_path):
+    path = tmp_path / 'violations.parquet'
+    export_reports([sample_report()], str(path))
+    frame = pd.read_parquet(path)
+    assert frame['employee'].tolist() == ['张三', '李四', '王五']
+    assert frame['value'].tolist() == [9.0, 6.5, 2.0]
+    assert frame['start_pos'].isna().tolist() == [False, True, True]
+    assert frame['detail'].tolist()[2] == 'G、Y16综' and frame['detail'].isna().tolist()[:2] == [True, True]
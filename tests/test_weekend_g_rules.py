@@ -0,0 +1,61 @@
+from datetime import date
+
+import numpy as np
+
+from date_columns import calendar_from_labels
+from shift_vocabulary import ShiftVocabulary
+from weekend_g_rules import (WeekendGRuleChecker, pack_bits, unpack_bits, shift_down, PROBLEM_WEEKDAY,
+                             PROBLEM_SATURDAY_ONLY, PROBLEM_SATURDAY_REQUIRED, PROBLEM_CONSECUTIVE)
+
+# 2025-08-01 为周五：第2、3列为第一个周末，第9、10列为第二个周末
+LABELS = [f'2025-08-{d:02d}' for d in range(1, 18)]
+
+
+def check(rows, employees=None, last_duty_dates=None):
+    vocabulary = ShiftVocabulary()
+    codes = vocabulary.encode_values(np.array(rows, dtype=object))
+    checker = WeekendGRuleChecker(codes, calendar_from_labels(LABELS), vocabulary, employees, last_duty_dates)
+    return [(v.employee, v.start, v.shift, v.detail) for v in checker.violations()]
+
+
+def row(**days):
+    cells = ['G'] * len(LABELS)
+    for day, shift in days.items():
+        cells[int(day[1:]) - 1] = shift
+    return cells
+
+
+def test_bit_helpers():
+    matrix = np.zeros((2, 70), dtype=bool)
+    matrix[0, [0, 63, 64]] = True
+    words = pack_bits(matrix)
+    assert words.shape == (2, 2)
+    assert (unpack_bits(words, 70) == matrix).all()
+    assert np.flatnonzero(unpack_bits(shift_down(words), 70)[0]).tolist() == [62, 63]
+
+
+def test_sunday_g_value_c():
+    assert check([row(d02='G值-C', d03='G值-C')]) == [(0, '2025-08-03', 'G值-C', PROBLEM_SATURDAY_ONLY)]
+
+
+def test_weekday_and_missing_saturday():
+    assert check([row(d04='G值-A', d10='G值-B')], ['张三']) == [
+        ('张三', '2025-08-04', 'G值-A', PROBLEM_WEEKDAY),
+        ('张三', '2025-08-10', 'G值-B', PROBLEM_SATURDAY_REQUIRED)]
+    assert check([row(d09='G值-B', d10='G值-B')]) == []
+
+
+def test_consecutive_weekends_across_months():
+    assert check([row(d02='G值', d10='G值')]) == [(0, '2025-08-10', 'G值', PROBLEM_CONSECUTIVE)]
+    assert check([row(d02='G值')], ['张三'], {'张三': date(2025, 7, 26)}) == [
+        ('张三', '2025-08-02', 'G值', PROBLEM_CONSECUTIVE)]
+    assert check([row(d02='G值')], ['张三'], {'张三': date(2025, 7, 19)}) == []
+
+
+def test_real_schedule_is_clean(workbook):
+    from schedule_rule_validation import ScheduleRuleValidator
+
+    validator = ScheduleRuleValidator(workbook, quiet=True)
+    checker = WeekendGRuleChecker.from_validator(validator)
+    assert checker.codes.shape == (57, 31)
+    assert checker.violations() == []
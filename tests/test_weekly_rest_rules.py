@@ -0,0 +1,73 @@
+import numpy as np
+
+from date_columns import calendar_from_labels
+from shift_vocabulary import ShiftVocabulary
+from streaming_reader import StreamingScheduleReader
+from validation_results import KIND_WEEKLY_WORK_DAYS, KIND_Y16_POST_REST, KIND_Y16_PRE_REST
+from weekly_rest_rules import WeeklyRestValidator, WeekLayout
+
+# 2025-08-01 为周五，4日至31日为四个完整的自然周
+AUGUST = calendar_from_labels([f'2025-08-{d:02d}' for d in range(1, 32)])
+
+
+def encode(vocabulary, *rows):
+    return np.vstack([vocabulary.encode_values(np.array(cells, dtype=object)) for cells in rows])
+
+
+def kinds(issues):
+    return sorted((v.kind, v.start, v.value) for row in issues.values() for v in row)
+
+
+def test_week_layout_marks_partial_weeks():
+    layout = WeekLayout(AUGUST)
+    assert len(layout) == 5
+    assert layout.complete.tolist() == [False, True, True, True, True]
+    assert layout.first.tolist()[1:] == [3, 10, 17, 24]
+
+
+def test_seven_three_pattern():
+    vocabulary = ShiftVocabulary()
+    # 第一个完整周上班7天、第二周3天，其余周上五休二
+    cells = ['休'] * 3 + ['G'] * 7 + ['G'] * 3 + ['休'] * 4 + (['G'] * 5 + ['休'] * 2) * 2
+    codes = encode(vocabulary, cells)
+
+    issues = WeeklyRestValidator(vocabulary).check_rows(codes, AUGUST, ['张三'])
+    assert kinds(issues) == [(KIND_WEEKLY_WORK_DAYS, '2025-08-04', 7), (KIND_WEEKLY_WORK_DAYS, '2025-08-11', 3)]
+    # 相邻周调减只在显式启用时生效
+    assert WeeklyRestValidator(vocabulary, allow_offset=True).check_rows(codes, AUGUST, ['张三']) == {}
+
+
+def test_leave_lowers_the_minimum():
+    vocabulary = ShiftVocabulary()
+    cells = ['休'] * 3 + ['G'] * 2 + ['C'] * 3 + ['休'] * 2 + (['G'] * 5 + ['休'] * 2) * 3
+    assert WeeklyRestValidator(vocabulary).check_rows(encode(vocabulary, cells), AUGUST, ['张三']) == {}
+    # 同样的上班天数不请假时少于下限
+    cells[5:8] = ['休'] * 3
+    assert kinds(WeeklyRestValidator(vocabulary).check_rows(encode(vocabulary, cells), AUGUST, ['张三'])) == [
+        (KIND_WEEKLY_WORK_DAYS, '2025-08-04', 2)]
+
+
+def test_y16_rest_before_and_after():
+    vocabulary = ShiftVocabulary()
+    # 值完Y16综第二天上班；值班前一周只休1天且前一个周末不是双休，值班前一天上班
+    cells = ['G'] * 3 + ['休'] + ['G'] * 5 + ['Y16综'] + ['休', 'G', 'G', 'G', 'G'] + ['休', '休'] + \
+        (['G'] * 5 + ['休'] * 2) * 2
+    issues = WeeklyRestValidator(vocabulary).check_rows(encode(vocabulary, cells), AUGUST, ['张三'])
+    found = kinds(issues)
+    assert (KIND_Y16_POST_REST, '2025-08-12', 2) in found
+    assert (KIND_Y16_PRE_REST, '2025-08-09', 1) in found
+
+
+def test_real_rows(workbook):
+    with StreamingScheduleReader(workbook) as reader:
+        rows = list(reader.iter_employees())
+        calendar, vocabulary = reader.calendar, reader.vocabulary
+    names = [row.name for row in rows]
+    codes = np.vstack([row.codes for row in rows])
+    issues = WeeklyRestValidator(vocabulary).check_rows(codes, calendar, names)
+
+    over = [v for v in issues[names.index('李璇')] if v.kind == KIND_WEEKLY_WORK_DAYS]
+    assert [(v.start, v.end, v.value, v.detail) for v in over] == [('2025-08-18', '2025-08-24', 7, '多于')]
+    assert sum(len(v) for v in issues.values()) == 19
+    # 王雨整月请假：下限扣除后不报
+    assert names.index('王雨') not in issues
@@ -0,0 +1,32 @@
+import pandas as pd
+
+import workbook_loader
+from workbook_loader import get_sheet_names, load_sheet, load_sheet_cells, parse_shift_windows
+
+
+def test_sheet_names(workbook):
+    names = get_sheet_names(workbook)
+    assert '排班表' in names and '规则' in names
+
+
+def test_load_sheet_matches_read_excel(workbook):
+    for sheet in ('排班表', '规则'):
+        expected = pd.read_excel(workbook, sheet_name=sheet)
+        pd.testing.assert_frame_equal(load_sheet(workbook, sheet), expected, check_dtype=False)
+
+
+def test_disk_cache_round_trip(tmp_path, workbook):
+    copy = tmp_path / 'schedule.xlsx'
+    copy.write_bytes(open(workbook, 'rb').read())
+    workbook_loader.clear_memory_cache()
+    parsed = load_sheet_cells(str(copy), '排班表').copy()
+    if workbook_loader._use_disk_cache:
+        assert list(tmp_path.glob('.schedule.xlsx.cache/*/sheet_*.parquet'))
+    workbook_loader.clear_memory_cache()
+    cached = load_sheet_cells(str(copy), '排班表')
+    assert (cached == parsed).all()
+
+
+def test_parse_shift_windows():
+    assert parse_shift_windows('班次G: 8:30-17:30 班次Y16综: 16:00-次日0:00') == [
+        ('G', '8:30-17:30'), ('Y16综', '16:00-次日0:00')]
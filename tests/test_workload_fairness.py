@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+import pandas as pd
+
+from date_columns import calendar_from_labels
+from shift_vocabulary import ShiftVocabulary
+from validation_results import KIND_WORKLOAD_OUTLIER
+from workload_fairness import (employee_workload, group_members, WorkloadFairness, RollingWorkload, main,
+                               METRICS, METRIC_WORK_DAYS, METRIC_NIGHTS, METRIC_WEEKENDS, METRIC_HOURS,
+                               METRIC_LEAVE_DAYS, GROUP_DEPT)
+
+WEEK = calendar_from_labels([f'2025-08-{d:02d}' for d in range(4, 11)])   # 周一至周日
+
+
+def encode(vocabulary, rows):
+    return np.vstack([vocabulary.encode_values(np.array(cells, dtype=object)) for cells in rows])
+
+
+def test_employee_workload():
+    vocabulary = ShiftVocabulary.from_sources()
+    codes = encode(vocabulary, [['G'] * 5 + ['休', '休'],
+                                ['Y16综', '休', '休', 'G', 'G', 'G', 'G'],
+                                ['C'] * 5 + ['', '']])
+    stats = employee_workload(codes, WEEK, vocabulary)
+    assert stats[METRIC_WORK_DAYS].tolist() == [5, 5, 0]
+    assert stats[METRIC_NIGHTS].tolist() == [0, 1, 0]
+    assert stats[METRIC_WEEKENDS].tolist() == [0, 2, 0]
+    assert stats[METRIC_LEAVE_DAYS].tolist() == [0, 0, 5]
+    assert stats.loc[0, METRIC_HOURS] == pytest.approx(5 * 550 / 60)
+
+
+def test_outlier_within_department():
+    vocabulary = ShiftVocabulary.from_sources()
+    normal = ['G'] * 5 + ['休', '休']
+    codes = encode(vocabulary, [normal] * 5 + [['G'] * 7] + [['C'] * 7])
+    stats = employee_workload(codes, WEEK, vocabulary)
+    names = [f'员工{i}' for i in range(7)]
+    fairness = WorkloadFairness(stats, group_members(names, ['个人'] * 7))
+    # 整周请假的员工不参与比较
+    assert 6 not in set(fairness.values()['row'])
+    outliers = [(v.employee, v.shift) for v in fairness.violations(names)]
+    assert ('员工5', METRIC_WORK_DAYS) in outliers and ('员工5', METRIC_WEEKENDS) in outliers
+    assert all(v.kind == KIND_WORKLOAD_OUTLIER for v in fairness.violations(names))
+
+    dispersion = fairness.dispersion()
+    work = dispersion[(dispersion['group_type'] == GROUP_DEPT) & (dispersion['metric'] == METRIC_WORK_DAYS)].iloc[0]
+    assert (work['size'], work['min'], work['max'], work['range']) == (6, 5, 7, 2)
+    assert 0 < work['gini'] < 0.1
+
+
+def test_rolling_window():
+    rolling = RollingWorkload()
+    for label, value in (('2025-06', 1), ('2025-07', 2), ('2025-08', 4)):
+        stats = pd.DataFrame([[value] * len(METRICS)], columns=METRICS)
+        rolling.add_month(label, ['001'], ['张三'], ['个人'], stats)
+    stats, employees, window = rolling.window(2)
+    assert window == ('2025-07', '2025-08')
+    assert stats.loc[0, METRIC_WORK_DAYS] == 6
+    assert rolling.window(0)[0].loc[0, METRIC_WORK_DAYS] == 7
+    assert list(employees['name']) == ['张三']
+
+
+def test_main(workbook, tmp_path):
+    path = str(tmp_path / 'workload.csv')
+    report = main([workbook, '--csv', path])
+    assert report.metrics['fairness']['employees'] > 0
+    assert (tmp_path / 'workload.csv').exists()
@@ -0,0 +1,17 @@
+from workbook_loader import get_sheet_names, load_sheet_cells
+from xlsx_metadata import sheet_names, sheet_dimensions, parse_range, column_number
+
+
+def test_parse_range():
+    assert column_number('AI') == 35
+    assert parse_range('A1:AI61') == (1, 1, 61, 35)
+    assert parse_range('C3') == (3, 3, 3, 3)
+    assert parse_range('A1:') is None
+
+
+def test_metadata_matches_parsed_workbook(workbook):
+    assert sheet_names(workbook) == get_sheet_names(workbook)
+    recorded = sheet_dimensions(workbook)
+    assert recorded == sheet_dimensions(workbook, exact=True)
+    assert recorded['排班表'] == {'ref': 'A1:AI61', 'rows': 61, 'cols': 35}
+    assert load_sheet_cells(workbook, '排班表').shape == (61, 35)
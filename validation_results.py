@@ -0,0 +1,176 @@
+import os
+import json
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# 结构化验证结果：
+# 各项检查返回 Violation 记录（问题类型、员工、日期区间、班次、严重程度），
+# 由 ValidationReport 汇总，可导出为 JSON Lines 或 Parquet 供看板使用；
+# 文字描述只在打印时才生成
+
+SEVERITY_ERROR = 'error'
+SEVERITY_WARNING = 'warning'
+SEVERITY_INFO = 'info'
+
+KIND_CONSECUTIVE_WORK = 'consecutive_work_days'      # 连续上班超过上限
+KIND_WEEKLY_WORK_RATIO = 'weekly_work_ratio'         # 平均每周工作天数不符合上五休二
+KIND_SHIFT_LIMIT = 'consecutive_shift_limit'         # 同一班次连值超过上限
+KIND_CROSS_BUSINESS_LINE = 'cross_business_line'     # 人员跨多个业务线
+KIND_CROSS_SHIFT = 'cross_shift'                     # 人员跨多个班次
+KIND_POSITION_DUPLICATE = 'position_shift_duplicate' # 同一岗位同一天同一特殊班次多于1人
+KIND_WEEKEND_G_RULE = 'weekend_g_rule'               # G值班次周末安排规则
+KIND_UNFILLED_SLOT = 'unfilled_slot'                 # 排班时无法安排人员的班次
+KIND_STAFFING_COVERAGE = 'staffing_coverage'         # 特殊岗位每日值班人数不足或过多
+KIND_INELIGIBLE_ASSIGNMENT = 'ineligible_assignment' # 排班人员未在规则页签中分配该班次
+KIND_UNLISTED_EMPLOYEE = 'unlisted_employee'         # 排班人员不在规则页签中
+KIND_CROSS_MONTH_WORK = 'cross_month_consecutive_work' # 接续上月末后连续上班超过上限
+KIND_ROTATION_REPEAT = 'rotation_repeat'             # 同一人连续值两轮（规则5）
+KIND_ROTATION_ORDER = 'rotation_order'               # 交接时跳过了排班顺序中的人（规则6）
+KIND_WEEKLY_WORK_DAYS = 'weekly_work_days'           # 自然周（周一至周日）上班多于6天或少于4天
+KIND_Y16_POST_REST = 'y16_post_rest'                 # 值完Y16综后两天未休息
+KIND_Y16_PRE_REST = 'y16_pre_rest'                   # 值Y16综前一周休息不足2天，值班前一天未休息
+KIND_SHORT_REST = 'short_rest_interval'             # 相邻两个班次之间（按实际上下班时间）休息时间不足
+KIND_WEEKLY_HOURS = 'weekly_hours'                   # 自然周工作时长超过上限
+KIND_WORKLOAD_OUTLIER = 'workload_outlier'           # 工作量明显偏离部门/业务线平均（z 分数超过阈值）
+
+# 每种问题的文字描述模板（字段名与 Violation 一致）
+MESSAGE_TEMPLATES = {
+    KIND_CONSECUTIVE_WORK: '第{start_pos_1}-{end_pos_1}天连续上班{value}天，超过{limit}天',
+    KIND_WEEKLY_WORK_RATIO: '平均每周工作{value:.1f}天，不符合上五休二制',
+    KIND_SHIFT_LIMIT: '班次{shift}: {start} 至 {end} 连续{value}天（上限{limit}天）',
+    KIND_CROSS_BUSINESS_LINE: '跨{value}个业务线',
+    KIND_CROSS_SHIFT: '跨{value}个班次',
+    KIND_POSITION_DUPLICATE: '{dept}岗位{start}的{shift}班次安排了{value}人',
+    KIND_WEEKEND_G_RULE: '{start} 班次{shift}: {detail}',
+    KIND_UNFILLED_SLOT: '{dept}岗位{shift}班次 {start} 至 {end} 无人可排',
+    KIND_STAFFING_COVERAGE: '{dept} {start} 班次{shift}: {value}人（应为{limit}人）',
+    KIND_INELIGIBLE_ASSIGNMENT: '{start} 班次{shift}: {detail}',
+    KIND_UNLISTED_EMPLOYEE: '规则页签中没有该人员，无法核对班次资格',
+    KIND_CROSS_MONTH_WORK: '{start} 至 {end} 跨月连续上班{value}天，超过{limit}天',
+    KIND_ROTATION_REPEAT: '{dept}岗位{shift}班次 {start} 至 {end} 连续两轮由同一人值班',
+    KIND_ROTATION_ORDER: '{dept}岗位{shift}班次 {start} 起跳过了排班顺序中的{value}人（应为{limit}）',
+    KIND_WEEKLY_WORK_DAYS: '{start} 至 {end} 这一周上班{value}天，{detail}{limit}天',
+    KIND_Y16_POST_REST: '{start} 应休息（值完{shift}后第{value}天）',
+    KIND_Y16_PRE_REST: '{start} 应休息（值{shift}前一周只休息{value}天，且前一个周末不是双休）',
+    KIND_SHORT_REST: '{start} 至 {end} 班次{shift}之间只休息{value}小时，少于{limit}小时',
+    KIND_WEEKLY_HOURS: '{start} 至 {end} 这一周工作{value}小时，超过{limit}小时',
+    KIND_WORKLOAD_OUTLIER: '{dept}的{shift}为{value}，明显偏离组内平均{limit}',
+}
+
+VIOLATION_FIELDS = ['kind', 'severity', 'employee', 'dept', 'shift', 'start', 'end',
+                    'start_pos', 'end_pos', 'value', 'limit', 'detail']
+TEXT_FIELDS = ['source', 'kind', 'severity', 'employee', 'dept', 'shift', 'start', 'end', 'detail']
+
+
+class Violation(namedtuple('Violation', VIOLATION_FIELDS)):
+    """一条规则问题；start/end 为日期文本，start_pos/end_pos 为日期列位置（从0开始），
+    value/limit 为数值（天数、人数、小时数等），detail 为文字说明（如具体违反的子规则）"""
+    __slots__ = ()
+
+    def __new__(cls, kind, severity, employee=None, dept=None, shift=None, start=None, end=None,
+                start_pos=None, end_pos=None, value=None, limit=None, detail=None):
+        return super().__new__(cls, kind, severity, employee, dept, shift, start, end,
+                               start_pos, end_pos, value, limit, detail)
+
+    def describe(self):
+        """按问题类型生成文字描述"""
+        template = MESSAGE_TEMPLATES.get(self.kind)
+        if template is None:
+            return f'{self.kind}: {self.detail if self.detail is not None else self.value}'
+        fields = self._asdict()
+        fields['start_pos_1'] = self.start_pos + 1 if self.start_pos is not None else None
+        fields['end_pos_1'] = self.end_pos + 1 if self.end_pos is not None else None
+        return template.format(**fields)
+
+    def to_dict(self):
+        return {key: _plain(value) for key, value in self._asdict().items()}
+
+
+def _plain(value):
+    """numpy 标量转为 Python 内置类型，便于 JSON 序列化"""
+    return value.item() if hasattr(value, 'item') else value
+
+
+class ValidationReport:
+    def __init__(self, source=None, violations=None, metrics=None):
+        self.source = source                       # 结果对应的工作簿路径
+        self.violations = list(violations or [])
+        self.metrics = dict(metrics or {})         # 统计类结果（班次分布等）
+
+    def __len__(self):
+        return len(self.violations)
+
+    def __iter__(self):
+        return iter(self.violations)
+
+    def extend(self, violations):
+        self.violations.extend(violations or [])
+
+    def merge(self, other):
+        """合并另一份报告的问题和统计结果"""
+        self.extend(other.violations)
+        self.metrics.update(other.metrics)
+        return self
+
+    def by_kind(self, kind):
+        return [v for v in self.violations if v.kind == kind]
+
+    def count_by_severity(self):
+        counts = {}
+        for v in self.violations:
+            counts[v.severity] = counts.get(v.severity, 0) + 1
+        return counts
+
+    def to_frame(self):
+        """所有问题转为 DataFrame（含 source 列）"""
+        frame = pd.DataFrame([v.to_dict() for v in self.violations], columns=VIOLATION_FIELDS)
+        frame.insert(0, 'source', self.source)
+        return frame
+
+    def to_dict(self):
+        return {
+            'source': self.source,
+            'violations': [v.to_dict() for v in self.violations],
+            'metrics': self.metrics,
+        }
+
+    def to_jsonl(self, path, append=False):
+        """每条问题写一行 JSON"""
+        with open(path, 'a' if append else 'w', encoding='utf-8') as f:
+            for v in self.violations:
+                record = {'source': self.source}
+                record.update(v.to_dict())
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+    def to_parquet(self, path):
+        _parquet_frame(self.to_frame()).to_parquet(path, index=False)
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+def _parquet_frame(frame):
+    """数值列可能混有整数、小数和空值，统一为可空数值类型；文本列统一转为字符串（空值保持为空）"""
+    frame = frame.copy()
+    frame['value'] = pd.to_numeric(frame['value'], errors='coerce').astype('Float64')
+    frame['limit'] = pd.to_numeric(frame['limit'], errors='coerce').astype('Float64')
+    for col in ['start_pos', 'end_pos']:
+        frame[col] = pd.to_numeric(frame[col], errors='coerce').astype('Int64')
+    for col in TEXT_FIELDS:
+        frame[col] = frame[col].map(lambda v: None if _is_missing(v) else str(v)).astype('string')
+    return frame
+
+
+def export_reports(reports, path):
+    """把多份报告的问题导出到一个文件，按扩展名选择 JSON Lines 或 Parquet"""
+    reports = list(reports)
+    if os.path.splitext(path)[1].lower() == '.parquet':
+        frames = [r.to_frame() for r in reports] or [ValidationReport().to_frame()]
+        _parquet_frame(pd.concat(frames, ignore_index=True)).to_parquet(path, index=False)
+    else:
+        open(path, 'w', encoding='utf-8').close()
+        for report in reports:
+            report.to_jsonl(path, append=True)
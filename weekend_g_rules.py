@@ -0,0 +1,201 @@
+import sys
+from datetime import timedelta
+
+import numpy as np
+
+from shift_vocabulary import ShiftVocabulary, WEEKEND_G_CODES
+from validation_results import Violation, ValidationReport, SEVERITY_ERROR, KIND_WEEKEND_G_RULE
+
+# G值周末班规则（IMPORTANT_SCHEDULING_RULES.md 第7条）的位图检查：
+# 按周末序号（以周一日期计算，相邻序号即相邻的两个周末）把每位员工每个G值班次的周六、周日安排
+# 打包为 uint64 位图 (员工 × 字)，三条子规则对整张排班表做一次移位与按位运算即可完成检查
+
+SATURDAY_ONLY_SHIFTS = ('G值-C',)              # 只能在周六安排
+SATURDAY_REQUIRED_SHIFTS = ('G值-A', 'G值-B')  # 周日安排时周六必须是同一班次
+
+PROBLEM_WEEKDAY = '只能安排在周末'
+PROBLEM_SATURDAY_ONLY = '只能安排在周六'
+PROBLEM_SATURDAY_REQUIRED = '周日安排时周六必须安排相同班次'
+PROBLEM_CONSECUTIVE = '连续两个周末值G值班'
+
+WORD_BITS = 64
+
+
+def pack_bits(matrix):
+    """布尔矩阵 (员工 × 周末) 按周末序号打包为 uint64 位图 (员工 × 字)，第 k 个周末为第 k 位"""
+    matrix = np.asarray(matrix, dtype=bool)
+    n_words = max(1, -(-matrix.shape[1] // WORD_BITS))
+    padded = np.zeros((matrix.shape[0], n_words * WORD_BITS), dtype=bool)
+    padded[:, :matrix.shape[1]] = matrix
+    return np.packbits(padded, axis=1, bitorder='little').view('<u8')
+
+
+def unpack_bits(words, n_bits):
+    """pack_bits 的逆运算"""
+    words = np.ascontiguousarray(words, dtype='<u8')
+    return np.unpackbits(words.view(np.uint8), axis=1, bitorder='little')[:, :n_bits].astype(bool)
+
+
+def shift_down(words):
+    """位图整体右移一位（第 k+1 位移到第 k 位），跨字时把下一个字的最低位移入当前字的最高位"""
+    shifted = words >> np.uint64(1)
+    shifted[:, :-1] |= (words[:, 1:] & np.uint64(1)) << np.uint64(WORD_BITS - 1)
+    return shifted
+
+
+class WeekendGRuleChecker:
+    def __init__(self, codes, calendar, vocabulary, employees=None, last_duty_dates=None):
+        self.codes = np.asarray(codes)
+        self.calendar = calendar
+        self.vocabulary = vocabulary
+        self.employees = list(employees) if employees is not None else list(range(self.codes.shape[0]))
+        # 上个月最后一次值G值周末班的日期 {员工: date}，用于跨月检查连续两个周末
+        self.last_duty_dates = dict(last_duty_dates or {})
+        self._build_weekends()
+        self._pack()
+
+    @classmethod
+    def from_validator(cls, validator):
+        """从 ScheduleRuleValidator 的编码矩阵和日历索引构建（只包含实际员工行）"""
+        mask = validator.employee_row_mask()
+        return cls(validator.get_shift_matrix()[mask], validator.calendar, validator.shift_vocabulary,
+                   validator.employee_names()[mask].tolist())
+
+    def _build_weekends(self):
+        """周末序号：以第一个周末所在周的周一为0，每隔7天加1；记录每个周末的周六、周日列位置"""
+        table = self.calendar.table
+        weekday = table['weekday'].to_numpy()
+        dates = table['date'].tolist()
+        weekend_cols = [i for i in np.flatnonzero(weekday >= 5) if dates[i] is not None]
+        self.weekday_mask = (weekday >= 0) & (weekday < 5)
+        if not weekend_cols:
+            self.first_monday = None
+            self.n_weekends = 0
+            self.saturday_col = self.sunday_col = np.zeros(0, dtype=np.int64)
+            return
+
+        mondays = [dates[i] - timedelta(days=int(weekday[i])) for i in weekend_cols]
+        self.first_monday = min(mondays)
+        numbers = np.array([(monday - self.first_monday).days // 7 for monday in mondays], dtype=np.int64)
+        self.n_weekends = int(numbers.max()) + 1
+        self.saturday_col = np.full(self.n_weekends, -1, dtype=np.int64)
+        self.sunday_col = np.full(self.n_weekends, -1, dtype=np.int64)
+        for col, number in zip(weekend_cols, numbers):
+            target = self.saturday_col if weekday[col] == 5 else self.sunday_col
+            target[number] = col
+
+    def _weekend_matrix(self, columns, shift):
+        """指定班次在各周末周六（或周日）的安排 (员工 × 周末)"""
+        result = np.zeros((self.codes.shape[0], self.n_weekends), dtype=bool)
+        code = self.vocabulary.index.get(shift)
+        present = columns >= 0
+        if code is not None and present.any():
+            result[:, present] = self.codes[:, columns[present]] == code
+        return result
+
+    def _pack(self):
+        self.saturday = {}
+        self.sunday = {}
+        for shift in WEEKEND_G_CODES:
+            self.saturday[shift] = pack_bits(self._weekend_matrix(self.saturday_col, shift))
+            self.sunday[shift] = pack_bits(self._weekend_matrix(self.sunday_col, shift))
+        self.has_saturday = pack_bits((self.saturday_col >= 0)[None, :])[0]
+        any_duty = np.zeros_like(self.has_saturday, shape=(self.codes.shape[0], len(self.has_saturday)))
+        for shift in WEEKEND_G_CODES:
+            any_duty |= self.saturday[shift] | self.sunday[shift]
+        self.any_duty = any_duty
+
+    def previous_duty_bits(self):
+        """上个月最后一个G值周末紧挨本表第一个周末的员工 (员工,) 布尔数组"""
+        result = np.zeros(self.codes.shape[0], dtype=bool)
+        if self.first_monday is None:
+            return result
+        for row, employee in enumerate(self.employees):
+            last = self.last_duty_dates.get(employee)
+            if last is not None and self.first_monday - (last - timedelta(days=last.weekday())) == timedelta(days=7):
+                result[row] = True
+        return result
+
+    def check(self):
+        """按位检查三条子规则，返回 {问题: (员工 × 周末) 布尔矩阵}"""
+        saturday_only = np.zeros_like(self.any_duty)
+        for shift in SATURDAY_ONLY_SHIFTS:
+            saturday_only |= self.sunday[shift]
+        saturday_required = np.zeros_like(self.any_duty)
+        for shift in SATURDAY_REQUIRED_SHIFTS:
+            # 缺少周六列的周末（如表格从周日开始）无法判断，不计入
+            saturday_required |= self.sunday[shift] & ~self.saturday[shift] & self.has_saturday
+        # 第 k+1 位与第 k 位同时为1：第 k+1 个周末紧接着第 k 个周末
+        consecutive = shift_down(self.any_duty) & self.any_duty
+        return {
+            PROBLEM_SATURDAY_ONLY: unpack_bits(saturday_only, self.n_weekends),
+            PROBLEM_SATURDAY_REQUIRED: unpack_bits(saturday_required, self.n_weekends),
+            PROBLEM_CONSECUTIVE: unpack_bits(consecutive, self.n_weekends),
+        }
+
+    def violations(self):
+        """所有G值周末班问题（含日期），顺序为：工作日安排、周日G值-C、周日缺周六、连续两个周末"""
+        labels = [self.calendar.label(i) for i in range(len(self.calendar))]
+        decoded = self.vocabulary.decode(self.codes)
+        result = []
+
+        def add(row, col, problem):
+            col = int(col)
+            result.append(Violation(KIND_WEEKEND_G_RULE, SEVERITY_ERROR, employee=self.employees[row],
+                                    shift=decoded[row, col], start=labels[col], end=labels[col],
+                                    start_pos=col, end_pos=col, detail=problem))
+
+        weekday_hits = self.vocabulary.is_weekend_g_table()[self.codes] & self.weekday_mask[None, :]
+        for row, col in zip(*np.nonzero(weekday_hits)):
+            add(row, col, PROBLEM_WEEKDAY)
+        if not self.n_weekends:
+            return result
+
+        problems = self.check()
+        for problem in (PROBLEM_SATURDAY_ONLY, PROBLEM_SATURDAY_REQUIRED):
+            for row, weekend in zip(*np.nonzero(problems[problem])):
+                add(row, self.sunday_col[weekend], problem)
+
+        # 连续两个周末：报告后一个周末的第一天；上个月最后一个G值周末紧挨本表第一个周末时同样报告
+        duty = unpack_bits(self.any_duty, self.n_weekends)
+        consecutive = np.zeros_like(duty)
+        consecutive[:, 1:] = problems[PROBLEM_CONSECUTIVE][:, :-1]
+        consecutive[:, 0] = duty[:, 0] & self.previous_duty_bits()
+        first_col = np.where(self.saturday_col >= 0, self.saturday_col, self.sunday_col)
+        weekend_g = self.vocabulary.is_weekend_g_table()[self.codes]
+        for row, weekend in zip(*np.nonzero(consecutive)):
+            cols = [c for c in (self.saturday_col[weekend], self.sunday_col[weekend]) if c >= 0 and weekend_g[row, c]]
+            add(row, cols[0] if cols else first_col[weekend], PROBLEM_CONSECUTIVE)
+        return result
+
+    def report(self, source=None):
+        return ValidationReport(source=source, violations=self.violations())
+
+
+def main(file_path):
+    """流式读取排班表并检查G值周末班规则"""
+    from streaming_reader import StreamingScheduleReader
+
+    vocabulary = ShiftVocabulary.from_sources()
+    with StreamingScheduleReader(file_path, vocabulary=vocabulary) as reader:
+        rows = list(reader.iter_employees())
+        calendar = reader.calendar
+    codes = np.vstack([row.codes for row in rows]) if rows else np.zeros((0, len(calendar)), dtype=vocabulary.dtype)
+    checker = WeekendGRuleChecker(codes, calendar, vocabulary, [row.name for row in rows])
+    violations = checker.violations()
+    print(f"员工数量: {len(rows)}, 周末数量: {checker.n_weekends}")
+    print(f"G值周末班规则问题数: {len(violations)}")
+    for violation in violations:
+        print(f"- {violation.employee}: {violation.describe()}")
+    return violations
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python weekend_g_rules.py <排班表.xlsx>")
+        sys.exit(1)
+    try:
+        main(sys.argv[1])
+    except Exception as e:
+        print(f"检查G值周末班规则时出错: {e}")
+        sys.exit(1)
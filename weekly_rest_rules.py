@@ -0,0 +1,179 @@
+from collections import defaultdict
+
+import numpy as np
+
+from consecutive_runs import run_length_encode
+from shift_vocabulary import WEEKEND_G_CODES
+from validation_results import (Violation, SEVERITY_ERROR, SEVERITY_WARNING, KIND_WEEKLY_WORK_DAYS,
+                                KIND_Y16_POST_REST, KIND_Y16_PRE_REST)
+
+# 按自然周（ISO周，周一至周日）检查上五休二和Y16综前后的休息：
+# 日期列按表头解析出的真实日期映射到 (周序号 × 7 + 星期) 的槽位，整张编码矩阵一次散列、reshape 为
+# (员工 × 周 × 7) 后求和，得到每人每周的上班/值班天数；Y16综前后的休息用游程编码和前缀和整体计算，
+# 不逐行循环。Y16综前后的休息规则与前端排班（calculateY16RestDates、getPreWeekRestCount）相同：
+# - 每个完整的自然周上班4-6天（上五休二，遇值班可多上或少上一天）；请假的天数从下限中扣除；
+# - 值完Y16综后休息两天；
+# - 值Y16综前一周（前7天）休息不足2天，且前一个周末不是双休时，值班前一天休息。
+# 只检查排班表范围内的完整周：首尾不完整的周不做上五休二检查。
+# allow_offset=True 时允许相邻两周互相调减（如本周7天、下周3天），默认不启用。
+
+STANDARD_WEEK_WORK_DAYS = 5
+MIN_WEEK_WORK_DAYS = 4
+MAX_WEEK_WORK_DAYS = 6
+Y16_SHIFT = 'Y16综'
+DUTY_SHIFTS = (Y16_SHIFT,) + WEEKEND_G_CODES
+Y16_POST_REST_DAYS = 2
+PRE_WEEK_DAYS = 7
+MIN_PRE_WEEK_REST = 2
+SATURDAY = 5
+
+
+class WeekLayout:
+    """日历索引中日期列到 (周, 星期) 槽位的映射"""
+
+    def __init__(self, calendar):
+        table = calendar.table
+        iso_year = table['iso_year'].to_numpy(dtype=np.int64)
+        iso_week = table['iso_week'].to_numpy(dtype=np.int64)
+        self.weekday = table['weekday'].to_numpy(dtype=np.int64)
+        self.labels = [calendar.label(i) for i in range(len(table))]
+        # 能解析出真实日期的列才参与按周统计
+        self.columns = np.flatnonzero(iso_week > 0)
+        weeks, week_of = np.unique(iso_year[self.columns] * 100 + iso_week[self.columns], return_inverse=True)
+        self.weeks = [(int(key // 100), int(key % 100)) for key in weeks]
+        self.week_of = week_of.reshape(-1)
+        self.slots = self.week_of * 7 + self.weekday[self.columns]
+        self.days_present = np.bincount(self.week_of, minlength=len(weeks))
+        self.first = np.full(len(weeks), len(table), dtype=np.int64)
+        self.last = np.full(len(weeks), -1, dtype=np.int64)
+        np.minimum.at(self.first, self.week_of, self.columns)
+        np.maximum.at(self.last, self.week_of, self.columns)
+
+    def __len__(self):
+        return len(self.weeks)
+
+    @property
+    def complete(self):
+        """排班表包含全部7天的周"""
+        return self.days_present == 7
+
+    def weekly_sum(self, values):
+        """(员工 × 日期) 的布尔或数值矩阵按周求和，返回 (员工 × 周)：布尔矩阵为天数"""
+        grid = np.zeros((values.shape[0], len(self.weeks) * 7), dtype=np.promote_types(values.dtype, np.int16))
+        grid[:, self.slots] = values[:, self.columns]
+        return grid.reshape(values.shape[0], len(self.weeks), 7).sum(axis=2)
+
+
+class WeeklyRestValidator:
+    def __init__(self, vocabulary, min_days=MIN_WEEK_WORK_DAYS, max_days=MAX_WEEK_WORK_DAYS, allow_offset=False):
+        self.vocabulary = vocabulary
+        self.min_days = min_days
+        self.max_days = max_days
+        # 相邻周调减：超出上限的周，前后一周上班不超过 2×5-本周 天时不报；少于下限的周同理
+        self.allow_offset = allow_offset
+
+    def weekly_counts(self, codes, calendar):
+        """每人每周的上班、休息、值班天数：(WeekLayout, 上班, 休息, 值班)，后三者均为 (员工 × 周)"""
+        codes = np.asarray(codes)
+        layout = WeekLayout(calendar)
+        work = layout.weekly_sum(self.vocabulary.is_work_table()[codes])
+        rest = layout.weekly_sum(self.vocabulary.is_rest_table()[codes])
+        duty = layout.weekly_sum(self.vocabulary.mask_table(DUTY_SHIFTS)[codes])
+        return layout, work, rest, duty
+
+    def _offset(self, work, complete, limit_of_neighbour):
+        """相邻的完整周中是否有一周满足 limit_of_neighbour(邻周上班天数)，返回 (员工 × 周) 布尔矩阵"""
+        neighbour_work = np.pad(work, ((0, 0), (1, 1)))
+        known = np.zeros(work.shape[1] + 2, dtype=bool)
+        known[1:-1] = complete
+        return ((known[None, :-2] & limit_of_neighbour(neighbour_work[:, :-2])) |
+                (known[None, 2:] & limit_of_neighbour(neighbour_work[:, 2:])))
+
+    def week_violations(self, codes, calendar, row_employees):
+        """上五休二：完整的自然周上班多于6天或少于4天（请假的天数从下限中扣除）"""
+        layout, work, rest, _ = self.weekly_counts(codes, calendar)
+        if not len(layout):
+            return []
+        complete = layout.complete
+        # 未排班和请假的天数不要求上班
+        minimum = self.min_days - (7 - (work + rest))
+        over = (work > self.max_days) & complete[None, :]
+        under = (work < minimum) & complete[None, :]
+        if self.allow_offset:
+            standard = 2 * STANDARD_WEEK_WORK_DAYS
+            over &= ~self._offset(work, complete, lambda other: other <= standard - work)
+            under &= ~self._offset(work, complete, lambda other: other >= standard - work)
+
+        violations = []
+        for flags, limit, detail in ((over, np.full_like(work, self.max_days), '多于'), (under, minimum, '少于')):
+            rows, weeks = np.nonzero(flags)
+            for row, week in zip(rows.tolist(), weeks.tolist()):
+                first, last = int(layout.first[week]), int(layout.last[week])
+                violations.append((row, Violation(
+                    KIND_WEEKLY_WORK_DAYS, SEVERITY_WARNING, employee=row_employees[row],
+                    start=layout.labels[first], end=layout.labels[last], start_pos=first, end_pos=last,
+                    value=int(work[row, week]), limit=int(limit[row, week]), detail=detail)))
+        violations.sort(key=lambda item: (item[0], item[1].start_pos))
+        return violations
+
+    def y16_violations(self, codes, calendar, row_employees):
+        """值完Y16综后两天未休息，以及值班前一周休息不足且前一天未休息"""
+        codes = np.asarray(codes)
+        y16_code = self.vocabulary.index.get(Y16_SHIFT)
+        if y16_code is None or codes.size == 0:
+            return []
+        n_days = codes.shape[1]
+        labels = [calendar.label(i) for i in range(n_days)]
+        is_work = self.vocabulary.is_work_table()
+        is_rest = self.vocabulary.is_rest_table()
+        rows, starts, lengths, _ = run_length_encode((codes == y16_code).astype(np.uint8))
+        ends = starts + lengths - 1
+        violations = []
+
+        # 值完后休息两天
+        for day in range(1, Y16_POST_REST_DAYS + 1):
+            positions = ends + day
+            inside = positions < n_days
+            hit = np.zeros(len(rows), dtype=bool)
+            hit[inside] = is_work[codes[rows[inside], positions[inside]]]
+            for row, position in zip(rows[hit].tolist(), positions[hit].tolist()):
+                violations.append((row, Violation(
+                    KIND_Y16_POST_REST, SEVERITY_ERROR, employee=row_employees[row], shift=Y16_SHIFT,
+                    start=labels[position], end=labels[position], start_pos=position, end_pos=position,
+                    value=day, limit=Y16_POST_REST_DAYS)))
+
+        # 值班前：前7天的休息天数（前缀和相减），前一个周末（周六、周日都在值班之前）是否双休
+        rest = is_rest[codes]
+        cumulative = np.zeros((codes.shape[0], n_days + 1), dtype=np.int32)
+        np.cumsum(rest, axis=1, out=cumulative[:, 1:])
+        has_prev = starts > 0
+        rows, starts = rows[has_prev], starts[has_prev]
+        pre_rest = cumulative[rows, starts] - cumulative[rows, np.maximum(starts - PRE_WEEK_DAYS, 0)]
+
+        weekday = calendar.table['weekday'].to_numpy(dtype=np.int64)[:n_days]
+        saturdays = np.flatnonzero(weekday == SATURDAY)
+        saturday = np.full(len(starts), -1, dtype=np.int64)
+        if len(saturdays):
+            index = np.searchsorted(saturdays + 1, starts, side='left') - 1
+            saturday[index >= 0] = saturdays[index[index >= 0]]
+        double_rest = np.zeros(len(starts), dtype=bool)
+        found = saturday >= 0
+        double_rest[found] = rest[rows[found], saturday[found]] & rest[rows[found], saturday[found] + 1]
+
+        need_rest = (pre_rest < MIN_PRE_WEEK_REST) & ~double_rest
+        hit = need_rest & is_work[codes[rows, starts - 1]]
+        for row, start, count in zip(rows[hit].tolist(), starts[hit].tolist(), pre_rest[hit].tolist()):
+            position = start - 1
+            violations.append((row, Violation(
+                KIND_Y16_PRE_REST, SEVERITY_WARNING, employee=row_employees[row], shift=Y16_SHIFT,
+                start=labels[position], end=labels[position], start_pos=position, end_pos=position,
+                value=count, limit=MIN_PRE_WEEK_REST)))
+        return violations
+
+    def check_rows(self, codes, calendar, row_employees):
+        """对若干员工行做上五休二（按自然周）和Y16综前后休息检查，返回 {行序号: [Violation]}"""
+        issues = defaultdict(list)
+        for row, violation in self.week_violations(codes, calendar, row_employees) + \
+                self.y16_violations(codes, calendar, row_employees):
+            issues[row].append(violation)
+        return issues
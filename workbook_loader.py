@@ -0,0 +1,321 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import importlib.util
+from datetime import datetime, date, time
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# 工作簿统一加载模块：
+# 1. 每个进程内每个页签只解析一次（按文件内容哈希缓存原始单元格）
+# 2. 在Excel文件旁边维护 .<文件名>.cache/<内容哈希>/ 目录，以Parquet格式保存原始单元格，
+#    文件未变化时再次运行可完全跳过XLSX解析
+# 3. 任意 header 参数的结果均由缓存的原始单元格经 TextParser 生成，与 pd.read_excel 结果一致
+
+CACHE_FORMAT_VERSION = 1
+
+# 单元格类型编码（写入Parquet时每列附带一列类型码，保证混合类型列可以无损还原）
+_KIND_EMPTY = 0
+_KIND_STR = 1
+_KIND_INT = 2
+_KIND_FLOAT = 3
+_KIND_BOOL = 4
+_KIND_DATETIME = 5
+_KIND_DATE = 6
+_KIND_TIME = 7
+
+# 进程内缓存
+_file_digests = {}   # 绝对路径 -> ((文件大小, 修改时间), 内容哈希)
+_sheet_names = {}    # 内容哈希 -> 页签名称列表
+_sheet_cells = {}    # (内容哈希, 页签名) -> 原始单元格 object 数组
+_excel_files = {}    # 内容哈希 -> pd.ExcelFile（仅在需要解析XLSX时打开）
+
+_use_disk_cache = importlib.util.find_spec('pyarrow') is not None
+
+# 排班表布局：班次信息行（"排班信息：班次G: 08:50-18:00; ..."）之后若干行内是员工信息表头行
+SHIFT_WINDOW_PATTERN = re.compile(r'班次(\w+):\s*(\d{1,2}:\d{2}-\d{1,2}:\d{2}|\d{1,2}:\d{2}-次日\d{1,2}:\d{2})')
+EMPLOYEE_HEADER_SEARCH_ROWS = 9
+
+
+def is_schedule_info_row(values):
+    """是否为包含班次信息的行"""
+    return any(isinstance(cell, str) and ('班次' in cell or 'G值' in cell) for cell in values)
+
+
+def is_employee_header_row(values):
+    """是否为员工信息表头行（包含'部门'，以及'工号'/'ID'或'姓名'）"""
+    texts = [str(cell) for cell in values]
+    has_dept = any('部门' in text for text in texts)
+    has_id = any('工号' in text or 'ID' in text for text in texts)
+    has_name = any('姓名' in text for text in texts)
+    return has_dept and (has_id or has_name)
+
+
+def parse_shift_windows(schedule_info):
+    """从班次信息文本中提取 [(班次代码, 时间段)]"""
+    return SHIFT_WINDOW_PATTERN.findall(str(schedule_info))
+
+
+def set_disk_cache_enabled(enabled):
+    """开启或关闭磁盘Parquet缓存（未安装pyarrow时始终关闭）"""
+    global _use_disk_cache
+    _use_disk_cache = bool(enabled) and importlib.util.find_spec('pyarrow') is not None
+
+
+def clear_memory_cache():
+    """清空进程内的工作簿缓存"""
+    for excel_file in _excel_files.values():
+        excel_file.close()
+    _file_digests.clear()
+    _sheet_names.clear()
+    _sheet_cells.clear()
+    _excel_files.clear()
+
+
+def file_digest(file_path):
+    """计算文件内容的SHA-256哈希，同一进程内按文件大小和修改时间复用结果"""
+    abs_path = os.path.abspath(file_path)
+    stat = os.stat(abs_path)
+    stat_key = (stat.st_size, stat.st_mtime_ns)
+    cached = _file_digests.get(abs_path)
+    if cached is not None and cached[0] == stat_key:
+        return cached[1]
+
+    sha = hashlib.sha256()
+    with open(abs_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    _file_digests[abs_path] = (stat_key, digest)
+    return digest
+
+
+def cache_dir_for(file_path):
+    """返回Excel文件旁边的缓存根目录"""
+    abs_path = os.path.abspath(file_path)
+    return os.path.join(os.path.dirname(abs_path), f'.{os.path.basename(abs_path)}.cache')
+
+
+def _digest_dir(file_path, digest):
+    return os.path.join(cache_dir_for(file_path), digest)
+
+
+def _get_excel_file(file_path, digest):
+    excel_file = _excel_files.get(digest)
+    if excel_file is None:
+        excel_file = pd.ExcelFile(file_path)
+        _excel_files[digest] = excel_file
+    return excel_file
+
+
+def _read_meta(file_path, digest):
+    meta_path = os.path.join(_digest_dir(file_path, digest), 'meta.json')
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != CACHE_FORMAT_VERSION:
+        return None
+    return meta
+
+
+def _write_meta(file_path, digest, sheet_names):
+    root = cache_dir_for(file_path)
+    target_dir = _digest_dir(file_path, digest)
+    os.makedirs(target_dir, exist_ok=True)
+
+    # 同一文件只保留当前内容对应的缓存目录
+    for name in os.listdir(root):
+        if name != digest:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    meta = {
+        'version': CACHE_FORMAT_VERSION,
+        'source': os.path.basename(file_path),
+        'sheet_names': list(sheet_names),
+    }
+    tmp_path = os.path.join(target_dir, 'meta.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(target_dir, 'meta.json'))
+
+
+def _sheet_names_from_archive(file_path):
+    """XLSX 直接从压缩包的 workbook.xml 读取页签名称（不需要打开 pd.ExcelFile）；其他格式返回 None"""
+    if not str(file_path).lower().endswith(('.xlsx', '.xlsm')):
+        return None
+    from xlsx_metadata import sheet_names
+
+    try:
+        return sheet_names(file_path)
+    except Exception:
+        return None
+
+
+def get_sheet_names(file_path):
+    """获取工作簿的所有页签名称"""
+    digest = file_digest(file_path)
+    names = _sheet_names.get(digest)
+    if names is not None:
+        return list(names)
+
+    meta = _read_meta(file_path, digest) if _use_disk_cache else None
+    if meta is not None:
+        names = meta['sheet_names']
+    else:
+        names = _sheet_names_from_archive(file_path)
+        if names is None:
+            names = list(_get_excel_file(file_path, digest).sheet_names)
+        if _use_disk_cache:
+            try:
+                _write_meta(file_path, digest, names)
+            except OSError as e:
+                print(f"写入工作簿缓存失败：{e}")
+    _sheet_names[digest] = names
+    return list(names)
+
+
+def _cell_kind(value):
+    if value is None or value is pd.NaT or value == '':
+        return _KIND_EMPTY
+    if isinstance(value, str):
+        return _KIND_STR
+    if isinstance(value, (bool, np.bool_)):
+        return _KIND_BOOL
+    if isinstance(value, (int, np.integer)):
+        return _KIND_INT
+    if isinstance(value, (float, np.floating)):
+        return _KIND_EMPTY if np.isnan(value) else _KIND_FLOAT
+    if isinstance(value, datetime):
+        return _KIND_DATETIME
+    if isinstance(value, date):
+        return _KIND_DATE
+    if isinstance(value, time):
+        return _KIND_TIME
+    return _KIND_STR
+
+
+def _encode_cells(cells):
+    """将原始单元格矩阵编码为每列 (文本值, 类型码) 两列的DataFrame"""
+    columns = {}
+    for j in range(cells.shape[1]):
+        column = cells[:, j]
+        kinds = np.fromiter((_cell_kind(v) for v in column), dtype=np.int8, count=len(column))
+        texts = np.empty(len(column), dtype=object)
+        for i, (value, kind) in enumerate(zip(column, kinds)):
+            if kind == _KIND_EMPTY:
+                texts[i] = None
+            elif kind == _KIND_FLOAT:
+                texts[i] = repr(float(value))
+            elif kind in (_KIND_DATETIME, _KIND_DATE, _KIND_TIME):
+                texts[i] = value.isoformat()
+            else:
+                texts[i] = str(value)
+        columns[f'v{j}'] = pd.Series(texts, dtype=object)
+        columns[f'k{j}'] = kinds
+    return pd.DataFrame(columns)
+
+
+def _decode_cells(encoded, n_cols):
+    """还原 _encode_cells 的结果，按类型码整列批量转换"""
+    n_rows = len(encoded)
+    cells = np.full((n_rows, n_cols), '', dtype=object)
+    for j in range(n_cols):
+        texts = encoded[f'v{j}'].to_numpy(dtype=object)
+        kinds = encoded[f'k{j}'].to_numpy()
+        column = cells[:, j]
+
+        mask = kinds == _KIND_STR
+        column[mask] = texts[mask]
+        mask = kinds == _KIND_INT
+        if mask.any():
+            column[mask] = [int(v) for v in texts[mask]]
+        mask = kinds == _KIND_FLOAT
+        if mask.any():
+            column[mask] = texts[mask].astype(np.float64).tolist()
+        mask = kinds == _KIND_BOOL
+        if mask.any():
+            column[mask] = (texts[mask] == 'True').tolist()
+        mask = kinds == _KIND_DATETIME
+        if mask.any():
+            column[mask] = [datetime.fromisoformat(v) for v in texts[mask]]
+        mask = kinds == _KIND_DATE
+        if mask.any():
+            column[mask] = [date.fromisoformat(v) for v in texts[mask]]
+        mask = kinds == _KIND_TIME
+        if mask.any():
+            column[mask] = [time.fromisoformat(v) for v in texts[mask]]
+    return cells
+
+
+def _sheet_cache_path(file_path, digest, sheet_name):
+    names = get_sheet_names(file_path)
+    return os.path.join(_digest_dir(file_path, digest), f'sheet_{names.index(sheet_name)}.parquet')
+
+
+def _parse_sheet_cells(file_path, digest, sheet_name):
+    """从XLSX解析页签的原始单元格（空单元格为空字符串）"""
+    excel_file = _get_excel_file(file_path, digest)
+    raw = pd.read_excel(excel_file, sheet_name=sheet_name, header=None, dtype=object)
+    cells = raw.to_numpy(dtype=object)
+    cells[pd.isna(cells)] = ''
+    return cells
+
+
+def load_sheet_cells(file_path, sheet_name):
+    """获取页签的原始单元格矩阵，依次尝试进程内缓存、磁盘缓存、XLSX解析"""
+    digest = file_digest(file_path)
+    key = (digest, sheet_name)
+    cells = _sheet_cells.get(key)
+    if cells is not None:
+        return cells
+
+    if sheet_name not in get_sheet_names(file_path):
+        raise ValueError(f"工作簿中不存在页签: {sheet_name}")
+
+    cache_path = _sheet_cache_path(file_path, digest, sheet_name) if _use_disk_cache else None
+    if cache_path is not None and os.path.exists(cache_path):
+        try:
+            encoded = pd.read_parquet(cache_path)
+            cells = _decode_cells(encoded, len(encoded.columns) // 2)
+        except Exception as e:
+            print(f"读取页签缓存失败，重新解析XLSX：{e}")
+            cells = None
+
+    if cells is None:
+        cells = _parse_sheet_cells(file_path, digest, sheet_name)
+        if cache_path is not None:
+            try:
+                if _read_meta(file_path, digest) is None:
+                    _write_meta(file_path, digest, get_sheet_names(file_path))
+                tmp_path = cache_path + '.tmp'
+                _encode_cells(cells).to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, cache_path)
+            except Exception as e:
+                print(f"写入页签缓存失败：{e}")
+
+    cells.flags.writeable = False
+    _sheet_cells[key] = cells
+    return cells
+
+
+def load_sheet(file_path, sheet_name, header=0):
+    """读取页签为DataFrame，结果与 pd.read_excel(file_path, sheet_name, header=header) 一致"""
+    cells = load_sheet_cells(file_path, sheet_name)
+    if cells.shape[0] == 0:
+        return pd.DataFrame()
+    if header is not None and header >= cells.shape[0]:
+        raise ValueError(f"表头行 {header} 超出页签 '{sheet_name}' 的行数 {cells.shape[0]}")
+    return TextParser(cells.tolist(), header=header).read()
+
+
+def load_sheets(file_path, sheet_names=None, header=0):
+    """批量读取多个页签，返回 {页签名: DataFrame}"""
+    if sheet_names is None:
+        sheet_names = get_sheet_names(file_path)
+    return {name: load_sheet(file_path, name, header=header) for name in sheet_names}
@@ -0,0 +1,279 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from shift_vocabulary import ShiftVocabulary, CATEGORIES, CATEGORY_REST, LEAVE_CODES
+from rest_intervals import ShiftTimeTable, MINUTES_PER_DAY
+from validation_results import Violation, ValidationReport, SEVERITY_INFO, KIND_WORKLOAD_OUTLIER
+
+# 工作量公平性：
+# 排班编码矩阵展开为 (员工, 日期, 班次) 长表，一次 groupby 得到每位员工各类班次、夜班、周末上班、
+# 上班天数和工时；再按部门和'规则'页签的业务线分组，计算组内平均、标准差、极差、基尼系数和每人的 z 分数，
+# |z| 超过阈值的员工列为偏离。分组统计都是排序后的 groupby/transform，不逐组循环。
+# 多个月份按月累加（前缀和）：第 k 个月保存前 k 个月的累计值，任意连续几个月的合计是两次累计值之差，
+# 每追加一个月只处理该月的数据。窗口内没有上过班的员工（如整段休产假）不参与比较。
+
+METRIC_WORK_DAYS = '上班天数'
+METRIC_NIGHTS = '夜班次数'
+METRIC_WEEKENDS = '周末上班天数'
+METRIC_HOURS = '工时'
+METRIC_LEAVE_DAYS = '假期天数'
+CATEGORY_METRICS = [category for category in CATEGORIES if category != CATEGORY_REST]
+METRICS = [METRIC_WORK_DAYS] + CATEGORY_METRICS + [METRIC_NIGHTS, METRIC_WEEKENDS, METRIC_HOURS, METRIC_LEAVE_DAYS]
+# 参与公平性比较的指标（假期天数只统计，不比较）
+FAIRNESS_METRICS = METRICS[:-1]
+
+GROUP_DEPT = '部门'
+GROUP_LINE = '业务线'
+NIGHT_START_BEFORE = 6 * 60        # 零点至6点开始的班次也算夜班（如 Y0）
+DEFAULT_Z_THRESHOLD = 2.0
+MIN_GROUP_SIZE = 3
+DEFAULT_WINDOW_MONTHS = 3
+
+
+def employee_workload(codes, calendar, vocabulary, windows=None):
+    """(员工 × 日期) 编码矩阵 -> 每位员工一行的工作量统计（行号与编码矩阵的行一致，列为 METRICS）"""
+    codes = np.asarray(codes)
+    table = ShiftTimeTable(vocabulary, windows)
+    rows, cols = np.nonzero(codes)
+    shift = codes[rows, cols]
+    work = vocabulary.is_work_table()[shift]
+    category_ids = vocabulary.category_table()[shift]
+    end = table.start[shift] + table.duration[shift]
+
+    long = pd.DataFrame({'row': rows, METRIC_WORK_DAYS: work})
+    for category in CATEGORY_METRICS:
+        long[category] = work & (category_ids == CATEGORIES.index(category))
+    # 夜班：跨零点结束（Y16综、Y18普）或凌晨开始的班次
+    long[METRIC_NIGHTS] = work & table.known[shift] & ((end >= MINUTES_PER_DAY) | (table.start[shift] < NIGHT_START_BEFORE))
+    long[METRIC_WEEKENDS] = work & calendar.weekend_mask[:codes.shape[1]][cols]
+    long[METRIC_HOURS] = np.where(work, table.duration[shift], 0) / 60
+    long[METRIC_LEAVE_DAYS] = vocabulary.mask_table(LEAVE_CODES)[shift]
+    stats = long.groupby('row').sum()
+    return stats.reindex(np.arange(codes.shape[0]), fill_value=0)[METRICS]
+
+
+def group_members(names, depts, model=None):
+    """员工行所属的分组：DataFrame(row, group_type, group)，部门之外再按'规则'页签的业务线分组（一人可在多个业务线）"""
+    frames = [pd.DataFrame({'row': np.arange(len(depts)), 'group_type': GROUP_DEPT, 'group': list(depts)})]
+    if model is not None:
+        lines = model.cells[['name', 'line']].dropna().drop_duplicates()
+        people = pd.DataFrame({'row': np.arange(len(names)), 'name': list(names)})
+        merged = people.merge(lines, on='name')
+        frames.append(pd.DataFrame({'row': merged['row'], 'group_type': GROUP_LINE, 'group': merged['line']}))
+    members = pd.concat(frames, ignore_index=True)
+    return members[members['group'].map(lambda g: isinstance(g, str) and g.strip() != '')].reset_index(drop=True)
+
+
+class WorkloadFairness:
+    def __init__(self, stats, members, z_threshold=DEFAULT_Z_THRESHOLD, min_group_size=MIN_GROUP_SIZE):
+        self.stats = stats
+        self.z_threshold = z_threshold
+        self.min_group_size = min_group_size
+        # 只比较上过班的员工
+        active = np.flatnonzero(stats[METRIC_WORK_DAYS].to_numpy() > 0)
+        self.members = members[members['row'].isin(active)].reset_index(drop=True)
+        self._values = None
+
+    def values(self):
+        """分组长表：group_type, group, metric, row, value, 以及组内人数、平均、标准差和 z 分数"""
+        if self._values is None:
+            frame = self.stats[FAIRNESS_METRICS].rename_axis('row').reset_index().melt(
+                id_vars='row', var_name='metric', value_name='value')
+            frame = self.members.merge(frame, on='row')
+            keys = ['group_type', 'group', 'metric']
+            grouped = frame.groupby(keys, sort=False)['value']
+            frame['size'] = grouped.transform('size')
+            frame['mean'] = grouped.transform('mean')
+            frame['std'] = grouped.transform('std', ddof=0)
+            # 组内取值都相同时 z 为 0
+            frame['z'] = ((frame['value'] - frame['mean']) / frame['std'].where(frame['std'] > 0)).fillna(0.0)
+            self._values = frame
+        return self._values
+
+    def dispersion(self):
+        """每个分组、每个指标一行：人数、平均、标准差、最小、最大、极差、基尼系数"""
+        keys = ['group_type', 'group', 'metric']
+        frame = self.values().sort_values(keys + ['value'], kind='stable')
+        grouped = frame.groupby(keys, sort=False)['value']
+        result = grouped.agg(['size', 'mean', 'std', 'min', 'max', 'sum'])
+        result['std'] = grouped.std(ddof=0)
+        result['range'] = result['max'] - result['min']
+        # 基尼系数：组内升序排列后 Σ(2i - n - 1)·x_i / (n·Σx)
+        rank = frame.groupby(keys, sort=False).cumcount() + 1
+        weighted = (2 * rank - frame['size'] - 1) * frame['value']
+        numerator = weighted.groupby([frame[k] for k in keys], sort=False).sum()
+        denominator = result['size'] * result['sum']
+        result['gini'] = (numerator / denominator.where(denominator > 0)).fillna(0.0)
+        return result.drop(columns='sum').reset_index()
+
+    def outliers(self):
+        """|z| 不小于阈值的员工（组内人数不少于 min_group_size）"""
+        frame = self.values()
+        mask = (frame['z'].abs() >= self.z_threshold) & (frame['size'] >= self.min_group_size)
+        return frame[mask].sort_values('z', key=np.abs, ascending=False).reset_index(drop=True)
+
+    def violations(self, names):
+        result = []
+        for item in self.outliers().itertuples(index=False):
+            result.append(Violation(KIND_WORKLOAD_OUTLIER, SEVERITY_INFO, employee=names[item.row], dept=item.group,
+                                    shift=item.metric, value=round(float(item.value), 1),
+                                    limit=round(float(item.mean), 1)))
+        return result
+
+    def report(self, names, source=None, window=None):
+        violations = self.violations(list(names))
+        dispersion = self.dispersion()
+        metrics = {'fairness': {
+            'window': window,
+            'z_threshold': self.z_threshold,
+            'employees': int((self.stats[METRIC_WORK_DAYS] > 0).sum()),
+            'outliers': len(violations),
+            'dispersion': dispersion.round(4).to_dict('records'),
+        }}
+        return ValidationReport(source=source, violations=violations, metrics=metrics)
+
+
+class RollingWorkload:
+    """按月累加的工作量统计：cumulative[k] 为前 k 个月的合计（员工 × 指标），员工按首次出现顺序登记"""
+
+    def __init__(self):
+        self.months = []
+        self.employees = pd.DataFrame(columns=['key', 'name', 'dept'])
+        self.employee_index = {}
+        self.cumulative = [np.zeros((0, len(METRICS)))]
+
+    def add_month(self, label, keys, names, depts, stats):
+        """追加一个月的统计（stats 行与 keys 一一对应）；部门记为最近一个月的部门"""
+        columns = []
+        new = []
+        for key, name, dept in zip(keys, names, depts):
+            column = self.employee_index.get(key)
+            if column is None:
+                column = len(self.employee_index)
+                self.employee_index[key] = column
+                new.append({'key': key, 'name': name, 'dept': dept})
+            columns.append(column)
+        if new:
+            self.employees = pd.concat([self.employees, pd.DataFrame(new)], ignore_index=True)
+        columns = np.asarray(columns, dtype=np.int64)
+        self.employees.loc[columns, 'dept'] = list(depts)
+
+        total = np.zeros((len(self.employee_index), len(METRICS)))
+        previous = self.cumulative[-1]
+        total[:len(previous)] = previous
+        np.add.at(total, columns, stats[METRICS].to_numpy(dtype=float))
+        self.cumulative.append(total)
+        self.months.append(label)
+
+    def window(self, months=DEFAULT_WINDOW_MONTHS, end=None):
+        """截至第 end 个月（默认最近一个月）连续 months 个月的合计：(统计 DataFrame, 员工信息, (起始月, 结束月))"""
+        end = len(self.months) if end is None else end
+        start = max(0, end - months) if months else 0
+        upper = self.cumulative[end]
+        lower = np.zeros_like(upper)
+        lower[:len(self.cumulative[start])] = self.cumulative[start]
+        employees = self.employees.iloc[:len(upper)].reset_index(drop=True)
+        labels = (self.months[start], self.months[end - 1]) if end > start else None
+        return pd.DataFrame(upper - lower, columns=METRICS), employees, labels
+
+
+def _month_label(calendar):
+    dates = [d for d in calendar.dates if d is not None]
+    return f'{min(dates):%Y-%m}' if dates else None
+
+
+def iter_workbook_months(files, vocabulary):
+    """按月份顺序读取工作簿：逐个产出 (月份, 员工行列表, 编码矩阵, 日历索引, 班次时间段)"""
+    from month_chain import MonthChainValidator
+    from streaming_reader import StreamingScheduleReader
+
+    for file_path in MonthChainValidator(vocabulary=vocabulary).order_workbooks(files):
+        with StreamingScheduleReader(file_path, vocabulary=vocabulary) as reader:
+            rows = list(reader.iter_employees())
+            calendar = reader.calendar
+            windows = reader.shift_windows
+        codes = np.vstack([row.codes for row in rows]) if rows else np.zeros((0, len(calendar)), dtype=vocabulary.dtype)
+        yield _month_label(calendar) or file_path, rows, codes, calendar, windows
+
+
+def iter_store_months(store):
+    """排班存储中已导入的月份（按日期顺序）"""
+    for month in sorted(store.months, key=lambda m: m['start']):
+        view = store.view(month['start'], month['end'])
+        rows = list(view.iter_employees())
+        yield _month_label(view.calendar), rows, view.codes, view.calendar, None
+
+
+def main(argv=None):
+    import argparse
+    from rule_sheet_model import RuleSheetModel
+    from xlsx_metadata import sheet_names
+
+    parser = argparse.ArgumentParser(description='按部门和业务线比较员工工作量（班次、夜班、周末、工时）的公平性')
+    parser.add_argument('files', nargs='*', help='月度排班表（按第一个日期自动排序）')
+    parser.add_argument('--store', metavar='目录', help='从排班存储（roster_store）读取全部已导入月份')
+    parser.add_argument('--rules', help="包含'规则'页签的工作簿（默认最后一个月的工作簿）")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW_MONTHS,
+                        help=f'统计最近几个月（默认{DEFAULT_WINDOW_MONTHS}，0 为全部月份）')
+    parser.add_argument('--z', type=float, default=DEFAULT_Z_THRESHOLD, help=f'偏离阈值（默认{DEFAULT_Z_THRESHOLD}）')
+    parser.add_argument('--min-group', type=int, default=MIN_GROUP_SIZE, help=f'分组最少人数（默认{MIN_GROUP_SIZE}）')
+    parser.add_argument('--csv', metavar='文件', help='每位员工的工作量统计写入CSV文件')
+    args = parser.parse_args(argv)
+    if not args.files and not args.store:
+        parser.error('需要排班表文件或 --store')
+
+    if args.store:
+        from roster_store import RosterStore
+
+        store = RosterStore(args.store)
+        vocabulary = store.vocabulary
+        months = iter_store_months(store)
+    else:
+        vocabulary = ShiftVocabulary.from_sources()
+        months = iter_workbook_months(args.files, vocabulary)
+
+    rolling = RollingWorkload()
+    for label, rows, codes, calendar, windows in months:
+        stats = employee_workload(codes, calendar, vocabulary, windows)
+        rolling.add_month(label, [row.employee_id or row.name for row in rows], [row.name for row in rows],
+                          [row.dept for row in rows], stats)
+    if not rolling.months:
+        print("没有可统计的月份")
+        return 1
+
+    rule_file = args.rules or (args.files[-1] if args.files else None)
+    model = None
+    if rule_file and '规则' in sheet_names(rule_file):
+        model = RuleSheetModel.from_workbook(rule_file)
+    stats, employees, window = rolling.window(args.window)
+    fairness = WorkloadFairness(stats, group_members(employees['name'], employees['dept'], model),
+                                args.z, args.min_group)
+    report = fairness.report(employees['name'], source=args.store or ', '.join(args.files), window=window)
+
+    print(f"统计月份: {window[0]} 至 {window[1]}（共导入{len(rolling.months)}个月）, "
+          f"员工: {report.metrics['fairness']['employees']}人, 业务线分组: {'有' if model is not None else '无'}")
+    dispersion = fairness.dispersion()
+    shown = dispersion[dispersion['metric'].isin([METRIC_HOURS, METRIC_NIGHTS, METRIC_WEEKENDS]) &
+                       (dispersion['size'] >= args.min_group)]
+    if len(shown):
+        print("\n分组工作量离散程度：")
+        print(shown.round(2).to_string(index=False))
+    print(f"\n工作量明显偏离组内平均（|z| ≥ {args.z:g}）: {len(report)}处")
+    for violation in report:
+        print(f"- {violation.employee}: {violation.describe()}")
+
+    if args.csv:
+        frame = pd.concat([employees[['name', 'dept']].rename(columns={'name': '姓名', 'dept': '部门'}), stats], axis=1)
+        frame[(stats[METRICS] > 0).any(axis=1)].round(2).to_csv(args.csv, index=False, encoding='utf-8-sig')
+        print(f"员工工作量统计已保存到 {args.csv}")
+    return report
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"统计工作量公平性时出错: {e}")
+        sys.exit(1)
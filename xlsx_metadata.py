@@ -0,0 +1,123 @@
+import re
+import sys
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+
+# 只读取 XLSX 压缩包中的 XML 获取工作簿元数据（页签名称、表格范围），不导入 pandas/openpyxl：
+# 页签名称来自 xl/workbook.xml，页签文件位置来自 xl/_rels/workbook.xml.rels，
+# 表格范围优先使用页签 XML 开头的 <dimension ref="A1:AI60"/>，
+# 需要精确范围（部分导出文件记录的范围不准确）时逐行扫描单元格引用
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PACKAGE_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+CELL_REF_PATTERN = re.compile(r'([A-Z]+)(\d+)')
+
+
+def column_number(letters):
+    """列字母转为列号（A=1）"""
+    number = 0
+    for ch in letters:
+        number = number * 26 + ord(ch) - ord('A') + 1
+    return number
+
+
+def parse_range(ref):
+    """'A1:AI60' -> (首行, 首列, 末行, 末列)，均从1开始；单个单元格时首末相同"""
+    cells = [CELL_REF_PATTERN.fullmatch(part) for part in ref.upper().split(':')]
+    if not cells or any(cell is None for cell in cells):
+        return None
+    first, last = cells[0], cells[-1]
+    return int(first.group(2)), column_number(first.group(1)), int(last.group(2)), column_number(last.group(1))
+
+
+def _sheet_targets(archive):
+    """[(页签名称, 压缩包内的页签文件路径)]（按工作簿中的顺序）"""
+    rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {}
+    for rel in rels.iter(f'{{{NS_PACKAGE_REL}}}Relationship'):
+        target = rel.get('Target', '')
+        # 目标可能是相对 xl/ 的路径，也可能是以 / 开头的包内绝对路径
+        path = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+        targets[rel.get('Id')] = path
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    return [(sheet.get('name'), targets.get(sheet.get(f'{{{NS_REL}}}id')))
+            for sheet in workbook.iter(f'{{{NS_MAIN}}}sheet')]
+
+
+def sheet_names(file_path):
+    """工作簿的所有页签名称"""
+    with zipfile.ZipFile(file_path) as archive:
+        return [name for name, _ in _sheet_targets(archive)]
+
+
+def _recorded_dimension(archive, path):
+    """页签 XML 中记录的 <dimension ref>；读到 sheetData 仍没有时返回 None"""
+    with archive.open(path) as f:
+        for _, element in ET.iterparse(f, events=('start',)):
+            tag = element.tag.rsplit('}', 1)[-1]
+            if tag == 'dimension':
+                return element.get('ref')
+            if tag == 'sheetData':
+                return None
+    return None
+
+
+def _scanned_dimension(archive, path):
+    """逐个单元格扫描得到的实际范围 (首行, 首列, 末行, 末列)；没有单元格时返回 None"""
+    min_row = min_col = None
+    max_row = max_col = 0
+    with archive.open(path) as f:
+        for _, element in ET.iterparse(f, events=('end',)):
+            if element.tag == f'{{{NS_MAIN}}}c':
+                match = CELL_REF_PATTERN.fullmatch(element.get('r', ''))
+                if match:
+                    row, col = int(match.group(2)), column_number(match.group(1))
+                    min_row = row if min_row is None else min(min_row, row)
+                    min_col = col if min_col is None else min(min_col, col)
+                    max_row, max_col = max(max_row, row), max(max_col, col)
+            elif element.tag == f'{{{NS_MAIN}}}row':
+                element.clear()
+    return None if min_row is None else (min_row, min_col, max_row, max_col)
+
+
+def sheet_dimensions(file_path, exact=False):
+    """{页签名称: {'ref', 'rows', 'cols'}}；exact 为 True 时扫描单元格，否则使用页签记录的范围"""
+    result = {}
+    with zipfile.ZipFile(file_path) as archive:
+        for name, path in _sheet_targets(archive):
+            bounds = None
+            if path is not None and not exact:
+                ref = _recorded_dimension(archive, path)
+                bounds = parse_range(ref) if ref else None
+            if path is not None and bounds is None:
+                bounds = _scanned_dimension(archive, path)
+            if bounds is None:
+                result[name] = {'ref': None, 'rows': 0, 'cols': 0}
+                continue
+            first_row, first_col, last_row, last_col = bounds
+            result[name] = {'ref': f'{_column_letters(first_col)}{first_row}:{_column_letters(last_col)}{last_row}',
+                            'rows': last_row, 'cols': last_col}
+    return result
+
+
+def _column_letters(number):
+    letters = ''
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python xlsx_metadata.py <工作簿.xlsx>")
+        sys.exit(1)
+    try:
+        for name, info in sheet_dimensions(sys.argv[1]).items():
+            print(f"{name}: {info['rows']}行 × {info['cols']}列（{info['ref']}）")
+    except Exception as e:
+        print(f"读取工作簿元数据时出错: {e}")
+        sys.exit(1)